@@ -1,13 +1,17 @@
 import os
+from typing import Any
 
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
 from sentry_sdk import init as sentry_init
 from sentry_sdk.integrations.flask import FlaskIntegration
+from sqlalchemy import create_engine
 
 from flask import Flask
 
+from .config import get_config
 from .error_handlers import register_error_handlers
+from .read_routing import init_read_router
 from .security import (
     apply_secure_headers,
     configure_logging,
@@ -53,13 +57,65 @@ def create_app() -> Flask:
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     # app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "default-secret-key")
 
+    # Imported here because these modules depend on ``db`` defined above.
+    from .admin import admin_bp  # noqa: PLC0415
+    from .api import api_bp  # noqa: PLC0415
+    from .classification_cache import init_classifier  # noqa: PLC0415
+    from .cli import register_cli  # noqa: PLC0415
+    from .pattern_preview import init_preview_pool  # noqa: PLC0415
+    from .pool_metrics import InstrumentedQueuePool, metrics_bp  # noqa: PLC0415
+    from .sqlite_profile import SqlitePragmas, init_sqlite_profile  # noqa: PLC0415
+
+    # Connection pool settings come from the environment's Config class.
+    config = get_config()
+
+    def engine_options(url: str) -> dict[str, Any]:
+        options = config.engine_options(url)
+        if "pool_size" in options:
+            options["poolclass"] = InstrumentedQueuePool
+        return options
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+        app.config["SQLALCHEMY_DATABASE_URI"],
+    )
+    # Optional read replica for reports and exports (see read_routing).
+    replica_url = os.getenv("DATABASE_REPLICA_URL")
+    replica = (
+        create_engine(replica_url, **engine_options(replica_url))
+        if replica_url
+        else None
+    )
+
     # Initialize core services and middleware
     db.init_app(app)
+    with app.app_context():
+        # WAL, pragmas and a single writer queue for SQLite database files.
+        if config.SQLITE_TUNED:
+            init_sqlite_profile(app, db.engine, SqlitePragmas.from_config(config))
+        init_read_router(app, db.engine, replica, max_lag=config.DB_REPLICA_MAX_LAG)
+        # Shared vendor matcher, loaded before a preforking server forks.
+        artifact_dir = os.getenv("MATCHER_ARTIFACT_DIR")
+        if artifact_dir:
+            init_classifier(
+                app,
+                db.engine,
+                artifact_dir,
+                timeout=config.MATCHER_TIMEOUT,
+            )
+    # Pattern preview workers, started on first use in each process.
+    init_preview_pool(app)
     apply_secure_headers(app)
-    configure_rate_limiting(app)
+    limiter = configure_rate_limiting(app)
     configure_logging(app)
     register_error_handlers(app)
 
+    register_cli(app)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp)
+    # Scrapers poll /metrics far more often than the default rate limit.
+    limiter.exempt(metrics_bp)
+    app.register_blueprint(metrics_bp)
+
     @app.route("/")
     def index() -> str:
         return "LedgerBase API is running."
@@ -0,0 +1,80 @@
+##: name = admin.py
+##: description = Admin blueprint for vendor dictionary maintenance endpoints
+##: category = api
+##: usage = app.register_blueprint(admin_bp)
+##: behavior = Exposes JSON endpoints used while curating vendor patterns
+##: inputs = JSON request bodies validated with marshmallow
+##: outputs = JSON responses
+##: dependencies = Flask, marshmallow, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = admin, api, vendors
+##: changelog = Previews run on the app's long-lived PreviewPool
+
+"""Admin endpoints for curating the vendor dictionary.
+
+Request bodies are validated with marshmallow; a ``ValidationError`` is
+turned into a 422 response by ``register_error_handlers``.
+"""
+
+import re
+
+from marshmallow import Schema, ValidationError, fields, validate
+
+from flask import Blueprint, Response, jsonify, request
+
+from .pattern_preview import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_SAMPLE_SIZE,
+    DEFAULT_TIME_BUDGET,
+    preview_pattern,
+    preview_pool,
+)
+from .pattern_profiler import guard_pattern
+from .read_routing import read_engine
+from .vendor_matcher import DEFAULT_SOURCE_COLUMN
+
+MAX_TIME_BUDGET = 30.0
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+class PatternPreviewSchema(Schema):
+    """Request body for ``POST /admin/patterns/preview``."""
+
+    pattern = fields.String(required=True, validate=validate.Length(min=1))
+    vendor_id = fields.Integer(load_default=None)
+    institution_id = fields.Integer(load_default=None)
+    source_column = fields.String(
+        load_default=DEFAULT_SOURCE_COLUMN,
+        validate=validate.OneOf(
+            ["raw_description", "normalized_description", "parsed_vendor"],
+        ),
+    )
+    time_budget = fields.Float(
+        load_default=DEFAULT_TIME_BUDGET,
+        validate=validate.Range(min=0, min_inclusive=False, max=MAX_TIME_BUDGET),
+    )
+    chunk_size = fields.Integer(
+        load_default=DEFAULT_CHUNK_SIZE,
+        validate=validate.Range(min=1),
+    )
+    sample_size = fields.Integer(
+        load_default=DEFAULT_SAMPLE_SIZE,
+        validate=validate.Range(min=0),
+    )
+
+
+@admin_bp.post("/patterns/preview")
+def preview() -> Response:
+    """Preview a candidate pattern against existing transactions."""
+    params = PatternPreviewSchema().load(request.get_json(silent=True) or {})
+    try:
+        guard = guard_pattern(params["pattern"])
+    except re.error as error:
+        raise ValidationError({"pattern": [str(error)]}) from error
+    if not guard.safe:
+        raise ValidationError({"pattern": [f"Pattern rejected: {guard.reason}"]})
+    with read_engine().connect() as connection:
+        result = preview_pattern(connection, **params, pool=preview_pool())
+    return jsonify(result.as_dict())
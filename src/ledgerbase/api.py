@@ -0,0 +1,133 @@
+##: name = api.py
+##: description = JSON API blueprint for the transaction list and budget UI
+##: category = api
+##: usage = app.register_blueprint(api_bp)
+##: behavior = Serves transaction pages and budget reports from the read replica
+##: inputs = Query string parameters validated with marshmallow
+##: outputs = JSON responses
+##: dependencies = Flask, marshmallow, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = api, transactions, budget
+##: changelog = Refresh dirty budget balances before reports that read them
+
+"""Read-only JSON endpoints used by the web UI.
+
+Query strings are validated with marshmallow; a ``ValidationError`` is
+turned into a 422 response by ``register_error_handlers``. Reports that
+read the stored budget balances refresh dirty categories on the primary
+first.
+"""
+
+from decimal import Decimal
+
+from marshmallow import Schema, ValidationError, fields, validate
+from sqlalchemy import Engine
+
+from flask import Blueprint, Response, jsonify, request
+
+from .budget_balances import balances_current, refresh_balances
+from .budget_engine import budget_report
+from .read_routing import read_engine
+from .savings_reconciliation import reconcile_savings
+from .sqlite_profile import run_write
+from .transaction_listing import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    TransactionFilters,
+    decode_cursor,
+    list_transactions,
+)
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+
+class TransactionListSchema(Schema):
+    """Query string of ``GET /api/transactions``."""
+
+    cursor = fields.String(load_default=None)
+    limit = fields.Integer(
+        load_default=DEFAULT_PAGE_SIZE,
+        validate=validate.Range(min=1, max=MAX_PAGE_SIZE),
+    )
+    unmatched = fields.Boolean(load_default=False)
+    vendor_id = fields.Integer(load_default=None)
+    category_tier_1 = fields.String(load_default=None)
+    category_tier_2 = fields.String(load_default=None)
+    label = fields.String(load_default=None)
+    person = fields.String(load_default=None)
+
+
+@api_bp.get("/transactions")
+def transactions() -> Response:
+    """List transactions newest first, one keyset page at a time."""
+    params = TransactionListSchema().load(request.args)
+    cursor = params.pop("cursor")
+    limit = params.pop("limit")
+    if cursor is not None:
+        try:
+            decode_cursor(cursor)
+        except ValueError as error:
+            raise ValidationError({"cursor": [str(error)]}) from error
+    with read_engine().connect() as connection:
+        page = list_transactions(
+            connection,
+            TransactionFilters(**params),
+            cursor=cursor,
+            limit=limit,
+        )
+    return jsonify(page.as_dict())
+
+
+def _balances_engine() -> Engine:
+    """Read engine whose ``budget_balances`` hold no dirty categories.
+
+    Dirty categories are refreshed on the primary. A replica that has not
+    replayed the refresh yet still shows the marks, so the read then goes
+    to the primary.
+    """
+    engine = read_engine()
+    with engine.connect() as connection:
+        if balances_current(connection):
+            return engine
+    run_write(refresh_balances)
+    return read_engine(primary=True)
+
+
+class BudgetReportSchema(Schema):
+    """Query string of ``GET /api/budget``."""
+
+    start = fields.Date(format="%Y-%m", load_default=None)
+    end = fields.Date(format="%Y-%m", load_default=None)
+
+
+@api_bp.get("/budget")
+def budget() -> Response:
+    """Budget vs. actual, rollover and savings balances per month and category."""
+    params = BudgetReportSchema().load(request.args)
+    engine = read_engine() if params["start"] is None else _balances_engine()
+    with engine.connect() as connection:
+        report = budget_report(connection, params["start"], params["end"])
+    return jsonify(report.as_dict())
+
+
+class SavingsReconciliationSchema(Schema):
+    """Query string of ``GET /api/savings/reconciliation``."""
+
+    month = fields.Date(format="%Y-%m", load_default=None)
+
+
+@api_bp.get("/savings/reconciliation")
+def savings_reconciliation() -> Response:
+    """Savings accounts with their allocations, balances and shortfalls."""
+    params = SavingsReconciliationSchema().load(request.args)
+    with _balances_engine().connect() as connection:
+        results = reconcile_savings(connection, params["month"])
+    return jsonify(
+        {
+            "accounts": [result.as_dict() for result in results],
+            "shortfall": str(
+                sum((result.shortfall for result in results), Decimal("0.00")),
+            ),
+        },
+    )
@@ -0,0 +1,380 @@
+##: name = archive.py
+##: description = Parquet cold storage of closed transaction years, queried with DuckDB
+##: category = database
+##: usage = archive_year(conn, 2019, "/srv/ledgerbase/archive")
+##:         open_history("/srv/ledgerbase/archive", conn).sql("SELECT ...")
+##: behavior = Writes verified zstd Parquet per year, drops the hot rows, unions on read
+##: inputs = SQLAlchemy connection, archive directory, years or date ranges
+##: outputs = Parquet files, transaction_archives rows, DuckDB connections
+##: dependencies = SQLAlchemy, pyarrow and duckdb (optional 'archive' extra)
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = database, archive, parquet, duckdb, reporting
+##: changelog = Initial version
+
+"""Cold storage for closed years of transactions.
+
+Most queries read the last two years, yet the full history must be kept.
+``archive_year`` moves one closed year out of ``transactions_normalized``
+into ``<directory>/transactions/year=<YYYY>/transactions.parquet``:
+
+* rows are streamed in ``(transaction_date, id)`` order into a zstd
+  compressed Parquet file, ``BATCH_SIZE`` rows per row group, so readers
+  skip row groups by their date statistics;
+* the file is read back and its row count and amount total compared with
+  the database before it replaces any earlier file for the year;
+* the year is recorded in ``transaction_archives`` and its rows deleted, in
+  the caller's transaction. On PostgreSQL the year's monthly partitions
+  are detached and dropped instead of deleted row by row.
+
+A year is closed once it ended more than ``HOT_MONTHS`` months ago.
+``monthly_rollups`` rows of archived years are kept, so budget and monthly
+reports still read them from the database; ``check_rollups`` and
+``rebuild_rollups`` leave those months alone.
+
+``open_history`` opens an in-process DuckDB database whose ``transactions``
+view unions the archived files with the hot rows, so reports spanning
+archived years run unchanged SQL. Without a connection it reads the
+archive alone, which works offline from a copy of the directory. Only
+files of years in ``transaction_archives`` are read when a connection is
+given, so a file left by a rolled back archive run is never counted twice.
+
+The archive needs the optional ``pyarrow`` and ``duckdb`` packages
+(``poetry install --extras archive``).
+"""
+
+import datetime as dt
+import importlib
+import os
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from sqlalchemy import Connection, Select, delete, extract, func, insert, select
+
+from ledgerbase.models import Transaction, TransactionArchive
+from ledgerbase.partitions import add_months, detach_partition, list_partitions
+
+HOT_MONTHS = 24
+BATCH_SIZE = 50_000
+COMPRESSION = "zstd"
+# Directory below the archive root holding one year=YYYY directory per year
+DATASET = "transactions"
+FILE_NAME = "transactions.parquet"
+
+
+def _require(name: str) -> ModuleType:
+    """Import an optional archive dependency."""
+    try:
+        return importlib.import_module(name)
+    except ImportError as exc:
+        msg = f"Transaction archives require the optional '{name}' package"
+        raise ImportError(msg) from exc
+
+
+def _arrow_schema() -> Any:  # noqa: ANN401
+    """Arrow schema of an archived ``transactions_normalized`` row."""
+    pa = _require("pyarrow")
+    types = {
+        "id": pa.int32(),
+        "account_id": pa.int32(),
+        "vendor_id": pa.int32(),
+        "amount": pa.decimal128(12, 2),
+        "transaction_date": pa.date32(),
+        "posted_date": pa.date32(),
+        "manually_edited": pa.bool_(),
+        "created_at": pa.timestamp("us"),
+    }
+    return pa.schema(
+        pa.field(
+            column.name,
+            types.get(column.name, pa.string()),
+            nullable=column.nullable,
+        )
+        for column in Transaction.__table__.columns
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ArchivedYear:
+    """A year of transactions held in the archive."""
+
+    year: int
+    row_count: int
+    total_amount: Decimal
+    path: str
+
+
+def year_path(directory: str | os.PathLike[str], year: int) -> Path:
+    """Parquet file holding ``year`` below the archive ``directory``."""
+    return Path(directory) / DATASET / f"year={year:04d}" / FILE_NAME
+
+
+def _year_bounds(year: int) -> tuple[dt.date, dt.date]:
+    return dt.date(year, 1, 1), dt.date(year + 1, 1, 1)
+
+
+def _cutoff(hot_months: int, today: dt.date | None) -> dt.date:
+    """First day of the oldest month kept in the hot table."""
+    today = today or dt.datetime.now(tz=dt.UTC).date()
+    return add_months(today, -hot_months)
+
+
+def archived_years(connection: Connection) -> list[ArchivedYear]:
+    """Years recorded in ``transaction_archives``, oldest first."""
+    table = TransactionArchive.__table__
+    rows = connection.execute(
+        select(
+            table.c.year,
+            table.c.row_count,
+            table.c.total_amount,
+            table.c.path,
+        ).order_by(table.c.year),
+    )
+    return [
+        ArchivedYear(row.year, row.row_count, Decimal(row.total_amount), row.path)
+        for row in rows
+    ]
+
+
+def archivable_years(
+    connection: Connection,
+    hot_months: int = HOT_MONTHS,
+    today: dt.date | None = None,
+) -> list[int]:
+    """Closed years that still have rows in ``transactions_normalized``."""
+    table = Transaction.__table__
+    cutoff = _cutoff(hot_months, today)
+    year = extract("year", table.c.transaction_date)
+    rows = connection.execute(
+        select(year)
+        .where(table.c.transaction_date < dt.date(cutoff.year, 1, 1))
+        .group_by(year)
+        .order_by(year),
+    )
+    return [int(value) for value in rows.scalars()]
+
+
+def _year_query(start: dt.date, end: dt.date) -> Select:
+    table = Transaction.__table__
+    return (
+        select(table)
+        .where(table.c.transaction_date >= start, table.c.transaction_date < end)
+        .order_by(table.c.transaction_date, table.c.id)
+    )
+
+
+def _record_batches(connection: Connection, query: Select) -> Iterator[Any]:
+    """Stream the rows of ``query`` as Arrow record batches."""
+    pa = _require("pyarrow")
+    schema = _arrow_schema()
+    result = connection.execution_options(yield_per=BATCH_SIZE).execute(query)
+    for rows in result.partitions():
+        yield pa.RecordBatch.from_pylist(
+            [dict(row._mapping) for row in rows],  # noqa: SLF001
+            schema=schema,
+        )
+
+
+def _parquet_totals(path: Path) -> tuple[int, Decimal]:
+    """Row count and amount total read back from an archive file."""
+    pq = _require("pyarrow.parquet")
+    pc = _require("pyarrow.compute")
+    amounts = pq.read_table(path, columns=["amount"])["amount"]
+    return len(amounts), pc.sum(amounts).as_py() or Decimal(0)
+
+
+def _write_year(
+    connection: Connection,
+    year: int,
+    path: Path,
+    expected: tuple[int, Decimal],
+) -> None:
+    """Write ``year`` to a temporary file beside ``path``, verify, then move it.
+
+    Raises:
+        ValueError: If the row count and amount total read back from the
+            file differ from ``expected``.
+
+    """
+    pq = _require("pyarrow.parquet")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(handle)
+    temporary = Path(name)
+    try:
+        with pq.ParquetWriter(
+            temporary,
+            _arrow_schema(),
+            compression=COMPRESSION,
+        ) as writer:
+            for batch in _record_batches(connection, _year_query(*_year_bounds(year))):
+                writer.write_batch(batch, row_group_size=BATCH_SIZE)
+        found = _parquet_totals(temporary)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    if found != expected:
+        temporary.unlink()
+        msg = f"Archive of {year} holds {found}, database has {expected}"
+        raise ValueError(msg)
+    temporary.replace(path)
+
+
+def _drop_hot_rows(connection: Connection, year: int) -> None:
+    """Remove ``year`` from the hot table, dropping whole partitions first."""
+    start, end = _year_bounds(year)
+    for partition in list_partitions(connection):
+        if partition.start and start <= partition.start and partition.end <= end:
+            name = detach_partition(connection, partition.start)
+            connection.exec_driver_sql(f'DROP TABLE "{name}"')
+    table = Transaction.__table__
+    connection.execute(
+        delete(table).where(
+            table.c.transaction_date >= start,
+            table.c.transaction_date < end,
+        ),
+    )
+
+
+def archive_year(
+    connection: Connection,
+    year: int,
+    directory: str | os.PathLike[str],
+    hot_months: int = HOT_MONTHS,
+    today: dt.date | None = None,
+) -> ArchivedYear:
+    """Move the transactions of a closed ``year`` into the Parquet archive.
+
+    Args:
+        connection (Connection): Database connection; the caller commits.
+            The file is in place before the rows are deleted, so a rolled
+            back transaction leaves the year in the database.
+        year (int): Calendar year to archive.
+        directory (str | os.PathLike[str]): Archive root directory.
+        hot_months (int): Months kept in the hot table; ``year`` must have
+            ended before them.
+        today (dt.date | None): Reference date; defaults to today (UTC).
+
+    Returns:
+        The archived year as recorded in ``transaction_archives``.
+
+    Raises:
+        ValueError: If the year is not closed, already archived or has no
+            transactions, or the written file does not match the database.
+        ImportError: If ``pyarrow`` is not installed.
+
+    """
+    start, end = _year_bounds(year)
+    if end > _cutoff(hot_months, today):
+        msg = f"{year} is within the last {hot_months} months and stays hot"
+        raise ValueError(msg)
+    archive = TransactionArchive.__table__
+    if connection.execute(
+        select(archive.c.year).where(archive.c.year == year),
+    ).first():
+        msg = f"{year} is already archived"
+        raise ValueError(msg)
+    table = Transaction.__table__
+    count, total = connection.execute(
+        select(func.count(), func.coalesce(func.sum(table.c.amount), 0)).where(
+            table.c.transaction_date >= start,
+            table.c.transaction_date < end,
+        ),
+    ).one()
+    if not count:
+        msg = f"No transactions in {year}"
+        raise ValueError(msg)
+    path = year_path(directory, year)
+    _write_year(connection, year, path, (count, Decimal(total)))
+    archived = ArchivedYear(year, count, Decimal(total), str(path))
+    connection.execute(
+        insert(archive).values(
+            year=year,
+            row_count=archived.row_count,
+            total_amount=archived.total_amount,
+            path=archived.path,
+        ),
+    )
+    _drop_hot_rows(connection, year)
+    return archived
+
+
+def open_history(
+    directory: str | os.PathLike[str],
+    connection: Connection | None = None,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+) -> Any:  # noqa: ANN401
+    """In-process DuckDB database with a ``transactions`` view over all years.
+
+    Args:
+        directory (str | os.PathLike[str]): Archive root directory.
+        connection (Connection | None): Database connection for the hot
+            rows and the list of archived years; ``None`` reads every file
+            in the archive and nothing else.
+        start (dt.date | None): First date the view covers; archived years
+            and hot rows before it are not read.
+        end (dt.date | None): Day after the last date the view covers.
+
+    Returns:
+        A ``duckdb.DuckDBPyConnection``; close it (or use it as a context
+        manager) when done. Hot rows in range are copied into it, so bound
+        the range for large tables.
+
+    Raises:
+        ImportError: If ``duckdb`` or ``pyarrow`` is not installed.
+
+    """
+    duckdb = _require("duckdb")
+    pa = _require("pyarrow")
+    first_year = start.year if start else dt.MINYEAR
+    last_year = (end - dt.timedelta(days=1)).year if end else dt.MAXYEAR
+    if connection is None:
+        paths = sorted(Path(directory, DATASET).glob(f"year=*/{FILE_NAME}"))
+        years = {int(path.parent.name.removeprefix("year=")): path for path in paths}
+    else:
+        years = {
+            archived.year: year_path(directory, archived.year)
+            for archived in archived_years(connection)
+        }
+    files = [
+        str(path)
+        for year, path in sorted(years.items())
+        if first_year <= year <= last_year
+    ]
+    duck = duckdb.connect()
+    schema = _arrow_schema()
+    if files:
+        duck.read_parquet(files).create_view("archived_transactions")
+    else:
+        duck.register("archived_transactions", schema.empty_table())
+    hot = schema.empty_table()
+    if connection is not None:
+        table = Transaction.__table__
+        query = select(table).order_by(table.c.transaction_date, table.c.id)
+        if start:
+            query = query.where(table.c.transaction_date >= start)
+        if end:
+            query = query.where(table.c.transaction_date < end)
+        hot = pa.Table.from_batches(
+            list(_record_batches(connection, query)),
+            schema=schema,
+        )
+    duck.register("hot_transactions", hot)
+    bounds = [
+        f"transaction_date {operator} DATE '{day.isoformat()}'"
+        for operator, day in ((">=", start), ("<", end))
+        if day
+    ]
+    where = f" WHERE {' AND '.join(bounds)}" if bounds else ""
+    duck.execute(
+        "CREATE VIEW transactions AS"
+        f" SELECT * FROM (SELECT * FROM archived_transactions{where})"
+        " UNION ALL SELECT * FROM hot_transactions",
+    )
+    return duck
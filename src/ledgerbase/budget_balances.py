@@ -0,0 +1,249 @@
+##: name = budget_balances.py
+##: description = Stored rollover balances per category and month, recomputed when dirty
+##: category = reporting
+##: usage = mark_dirty(conn, {("Savings", "Vacation"): dt.date(2024, 3, 1)})
+##:         refresh_balances(conn); balances_at(conn, dt.date(2026, 10, 1))
+##: behavior = Recomputes budget_balances from each dirty category's earliest month
+##: inputs = budget_dirty marks, budget_entries and monthly_rollups rows
+##: outputs = budget_balances rows
+##: dependencies = NumPy, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = reporting, budget, aggregates
+##: changelog = Reports open from stored balances; balances_current checks for marks
+
+"""Incrementally maintained rollover balances.
+
+A rollover category's balance in a month depends on every earlier month,
+so recomputing it from ``budget_report`` on each change means reading the
+whole history. ``budget_balances`` stores the result of
+``compute_budget`` per category and month instead, and ``budget_dirty``
+records, per category, the earliest month whose stored rows are stale.
+
+Writers call ``mark_dirty`` in the transaction that changes budgets or
+expense rollups; ``RollupDeltas.apply`` does this for every category it
+touches. The upsert keeps the earlier of the stored and the new month, so
+a batch reclassifying thousands of transactions leaves one row per
+category. ``refresh_balances`` then, for each group of categories with
+the same dirty month, loads those categories from that month on, opens
+with the stored balances of the month before, recomputes, and replaces
+the stored rows from that month forward. Earlier months and other
+categories are not read.
+
+Only cells with a non-zero budget, actual, carry-in or balance are
+stored: a category without a row in a month has a zero balance there.
+``rebuild_balances`` recomputes the whole table, after the migration or
+when ``monthly_rollups`` was rebuilt.
+
+Readers open from the stored rows: ``budget_report`` with a ``start``
+loads only its window and takes the month before from
+``opening_balances``, and ``reconcile_savings`` reads the closing
+balances directly. They expect no dirty marks; ``balances_current`` tells
+a reader whether a ``refresh_balances`` is due first.
+"""
+
+import datetime as dt
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import (
+    Connection,
+    delete,
+    func,
+    insert,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ledgerbase.budget_engine import Category, compute_budget, load_matrix
+from ledgerbase.models import BudgetBalance, BudgetDirty, BudgetEntry, MonthlyRollup
+from ledgerbase.partitions import add_months
+
+_AMOUNTS = ("budget", "actual", "carry_in", "balance")
+
+
+def mark_dirty(connection: Connection, months: Mapping[Category, dt.date]) -> int:
+    """Record that ``months[category]`` onward must be recomputed.
+
+    A category already marked keeps the earlier of the two months.
+
+    Returns:
+        Number of categories marked.
+
+    Raises:
+        NotImplementedError: On databases without ``ON CONFLICT``.
+
+    """
+    if not months:
+        return 0
+    table = BudgetDirty.__table__
+    dialects = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+    upsert = dialects.get(connection.dialect.name)
+    if upsert is None:
+        msg = f"Budget dirty marks are not supported on {connection.dialect.name}"
+        raise NotImplementedError(msg)
+    statement = upsert(table)
+    # Two-argument min() is SQLite's scalar minimum; PostgreSQL calls it least().
+    earlier = func.least if connection.dialect.name == "postgresql" else func.min
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.category_tier_1, table.c.category_tier_2],
+        set_={"month": earlier(table.c.month, statement.excluded.month)},
+    )
+    connection.execute(
+        statement,
+        [
+            {
+                "category_tier_1": tier_1,
+                "category_tier_2": tier_2,
+                "month": month.replace(day=1),
+            }
+            for (tier_1, tier_2), month in months.items()
+        ],
+    )
+    return len(months)
+
+
+def opening_balances(
+    connection: Connection,
+    categories: Sequence[Category],
+    month: dt.date,
+) -> np.ndarray:
+    """Stored closing balances of ``categories`` in ``month``, in cents."""
+    stored = balances_at(connection, month)
+    return np.array(
+        [int(stored.get(category, 0) * 100) for category in categories],
+        dtype=np.int64,
+    )
+
+
+def _refresh(connection: Connection, categories: list[Category], start: dt.date) -> int:
+    """Recompute the stored rows of ``categories`` from ``start`` on."""
+    table = BudgetBalance.__table__
+    connection.execute(
+        delete(table).where(
+            tuple_(table.c.category_tier_1, table.c.category_tier_2).in_(categories),
+            table.c.month >= start,
+        ),
+    )
+    matrix = load_matrix(connection, start=start, categories=categories)
+    if not matrix.months or not matrix.categories:
+        return 0
+    report = compute_budget(
+        matrix,
+        opening_balances(connection, matrix.categories, add_months(start, -1)),
+    )
+    arrays = [getattr(report, name) for name in _AMOUNTS]
+    stored = np.logical_or.reduce([array != 0 for array in arrays])
+    rows = [
+        {
+            "category_tier_1": report.categories[column][0],
+            "category_tier_2": report.categories[column][1],
+            "month": report.months[row],
+            **{
+                name: Decimal(int(array[row, column])).scaleb(-2)
+                for name, array in zip(_AMOUNTS, arrays, strict=True)
+            },
+        }
+        for row, column in zip(*np.nonzero(stored), strict=True)
+    ]
+    if rows:
+        connection.execute(insert(table), rows)
+    return len(rows)
+
+
+def refresh_balances(connection: Connection) -> int:
+    """Recompute the stored balances of every dirty category and clear it.
+
+    Categories are grouped by their dirty month, so a batch of changes
+    in one month costs one recomputation.
+
+    Returns:
+        Number of ``budget_balances`` rows written.
+
+    """
+    dirty = BudgetDirty.__table__
+    marks = connection.execute(
+        select(dirty.c.category_tier_1, dirty.c.category_tier_2, dirty.c.month)
+        .with_for_update()
+        .order_by(dirty.c.month),
+    ).all()
+    groups: dict[dt.date, list[Category]] = defaultdict(list)
+    for tier_1, tier_2, month in marks:
+        groups[month].append((tier_1, tier_2))
+    written = sum(
+        _refresh(connection, categories, month) for month, categories in groups.items()
+    )
+    if marks:
+        connection.execute(
+            delete(dirty).where(
+                tuple_(
+                    dirty.c.category_tier_1,
+                    dirty.c.category_tier_2,
+                    dirty.c.month,
+                ).in_([tuple(mark) for mark in marks]),
+            ),
+        )
+    return written
+
+
+def mark_all_dirty(connection: Connection) -> int:
+    """Mark every category dirty from its first budget, rollup or balance.
+
+    Returns:
+        Number of categories marked.
+
+    """
+    sources = union_all(
+        *(
+            select(
+                table.c.category_tier_1,
+                table.c.category_tier_2,
+                table.c.month,
+            )
+            for table in (
+                BudgetEntry.__table__,
+                MonthlyRollup.__table__,
+                BudgetBalance.__table__,
+            )
+        ),
+    ).subquery()
+    firsts = connection.execute(
+        select(
+            sources.c.category_tier_1,
+            sources.c.category_tier_2,
+            func.min(sources.c.month),
+        ).group_by(sources.c.category_tier_1, sources.c.category_tier_2),
+    )
+    return mark_dirty(connection, {(row[0], row[1]): row[2] for row in firsts})
+
+
+def rebuild_balances(connection: Connection) -> int:
+    """Recompute ``budget_balances`` from scratch.
+
+    Returns:
+        Number of ``budget_balances`` rows written.
+
+    """
+    mark_all_dirty(connection)
+    return refresh_balances(connection)
+
+
+def balances_at(connection: Connection, month: dt.date) -> dict[Category, Decimal]:
+    """Stored closing balance of every category with one in ``month``."""
+    table = BudgetBalance.__table__
+    rows = connection.execute(
+        select(table.c.category_tier_1, table.c.category_tier_2, table.c.balance).where(
+            table.c.month == month.replace(day=1),
+        ),
+    )
+    return {(row[0], row[1]): Decimal(row[2]) for row in rows}
+
+
+def balances_current(connection: Connection) -> bool:
+    """True when no category is marked dirty, so stored balances are exact."""
+    dirty = BudgetDirty.__table__
+    return connection.scalar(select(dirty.c.month).limit(1)) is None
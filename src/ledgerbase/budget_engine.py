@@ -0,0 +1,360 @@
+##: name = budget_engine.py
+##: description = Vectorized budget-vs-actual, rollover and savings balances per month
+##: category = reporting
+##: usage = report = budget_report(conn, dt.date(2026, 1, 1), dt.date(2026, 12, 1))
+##:         report.as_dict()
+##: behavior = Loads budgets and expense rollups into month x category arrays
+##: inputs = budget_entries and monthly_rollups rows
+##: outputs = BudgetReport arrays and their JSON representation
+##: dependencies = NumPy, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = reporting, budget, numpy
+##: changelog = Windowed reports open from the stored budget_balances
+
+"""Budget-vs-actual comparison over a dense month x category matrix.
+
+``load_matrix`` reads ``budget_entries`` and the expense totals of
+``monthly_rollups`` (transfers and income are not spending) with two
+grouped queries and scatters them into ``int64`` arrays of cents indexed
+``[month, category]``. Categories are ``(tier_1, tier_2)`` pairs matched
+exactly, ``''`` standing for an empty tier 2 as in ``monthly_rollups``.
+Spending in a category without a budget shows up with a zero budget.
+
+``compute_budget`` then derives, without Python loops over months or
+categories:
+
+* ``variance``: budget minus actual spending;
+* ``carry_in``: the previous month's closing balance, for entries with
+  ``rollover`` set (savings categories), else zero;
+* ``available``: budget plus carry-in;
+* ``balance``: available minus actual, the amount carried into the next
+  month when it rolls over;
+* ``savings_balance``: the month's closing balances summed over its
+  rollover categories.
+
+A month without an entry has no budget and does not roll over, so its
+category starts again from zero. Closing balances are a segmented
+cumulative sum of the variance, restarting at every month that does not
+roll over, which ``roll_balances`` computes with ``cumsum`` and
+``maximum.accumulate``.
+
+A report over every month computes the full history. A report from a
+later ``start`` loads only its window and opens each category with the
+closing balance stored in ``budget_balances`` for the month before (see
+``ledgerbase.budget_balances``), so rollover balances still include the
+full history without reading it.
+"""
+
+import datetime as dt
+from collections.abc import Collection
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    Connection,
+    Table,
+    cast,
+    func,
+    select,
+    tuple_,
+)
+
+from ledgerbase.models import BudgetEntry, MonthlyRollup
+from ledgerbase.partitions import add_months
+
+# Top-level and second-level category; '' when tier 2 is empty
+Category = tuple[str, str]
+
+
+def month_range(start: dt.date, end: dt.date) -> list[dt.date]:
+    """First days of the months from ``start`` through ``end``, inclusive."""
+    first = start.replace(day=1)
+    count = (end.year - first.year) * 12 + end.month - first.month + 1
+    return [add_months(first, offset) for offset in range(max(count, 0))]
+
+
+def _money(cents: np.ndarray) -> list:
+    """Decimal strings for an array of cents, keeping its nesting."""
+    return [
+        _money(row) if row.ndim else str(Decimal(int(row)).scaleb(-2)) for row in cents
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class BudgetMatrix:
+    """Budgets and actual spending as ``[month, category]`` arrays of cents."""
+
+    months: tuple[dt.date, ...]
+    categories: tuple[Category, ...]
+    budget: np.ndarray
+    actual: np.ndarray
+    rollover: np.ndarray
+
+    @classmethod
+    def empty(cls, months: list[dt.date]) -> "BudgetMatrix":
+        """Matrix of ``months`` without any category."""
+        shape = (len(months), 0)
+        return cls(
+            tuple(months),
+            (),
+            np.zeros(shape, dtype=np.int64),
+            np.zeros(shape, dtype=np.int64),
+            np.zeros(shape, dtype=bool),
+        )
+
+
+def load_matrix(
+    connection: Connection,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+    categories: Collection[Category] | None = None,
+) -> BudgetMatrix:
+    """Load budgets and expense totals for the months ``start``..``end``.
+
+    Args:
+        connection (Connection): Database connection.
+        start (dt.date | None): First month; defaults to the earliest month
+            with a budget or expense rollup.
+        end (dt.date | None): Last month, inclusive; defaults to the latest.
+        categories (Collection[Category] | None): Only load these
+            categories; defaults to all of them.
+
+    Returns:
+        The matrix; empty when there is nothing to compare.
+
+    """
+    budgets = BudgetEntry.__table__
+    rollups = MonthlyRollup.__table__
+
+    def in_range(table: Table) -> list[ColumnElement[bool]]:
+        bounds = []
+        if start is not None:
+            bounds.append(table.c.month >= start.replace(day=1))
+        if end is not None:
+            bounds.append(table.c.month <= end)
+        if categories is not None:
+            bounds.append(
+                tuple_(table.c.category_tier_1, table.c.category_tier_2).in_(
+                    list(categories),
+                ),
+            )
+        return bounds
+
+    def cents(amount: ColumnElement[Decimal]) -> ColumnElement[int]:
+        return cast(func.round(amount * 100), BigInteger)
+
+    budget_rows = connection.execute(
+        select(
+            budgets.c.month,
+            budgets.c.category_tier_1,
+            budgets.c.category_tier_2,
+            cents(budgets.c.amount),
+            budgets.c.rollover,
+        ).where(*in_range(budgets)),
+    ).all()
+    # Expenses are negative amounts; refunds in the month reduce spending.
+    actual_rows = connection.execute(
+        select(
+            rollups.c.month,
+            rollups.c.category_tier_1,
+            rollups.c.category_tier_2,
+            -cents(func.sum(rollups.c.total_amount)),
+        )
+        .where(rollups.c.transaction_type == "expense", *in_range(rollups))
+        .group_by(
+            rollups.c.month,
+            rollups.c.category_tier_1,
+            rollups.c.category_tier_2,
+        ),
+    ).all()
+    seen = {row[0] for row in budget_rows} | {row[0] for row in actual_rows}
+    if not seen and (start is None or end is None):
+        return BudgetMatrix.empty([])
+    months = month_range(start or min(seen), end or max(seen))
+    month_index = {month: index for index, month in enumerate(months)}
+    categories = sorted(
+        {(row[1], row[2]) for row in budget_rows}
+        | {(row[1], row[2]) for row in actual_rows},
+    )
+    category_index = {category: index for index, category in enumerate(categories)}
+    shape = (len(months), len(categories))
+    matrix = BudgetMatrix(
+        tuple(months),
+        tuple(categories),
+        np.zeros(shape, dtype=np.int64),
+        np.zeros(shape, dtype=np.int64),
+        np.zeros(shape, dtype=bool),
+    )
+
+    def positions(rows: list) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            np.fromiter((month_index[row[0]] for row in rows), dtype=np.intp),
+            np.fromiter(
+                (category_index[row[1], row[2]] for row in rows),
+                dtype=np.intp,
+            ),
+        )
+
+    index = positions(budget_rows)
+    matrix.budget[index] = np.fromiter((row[3] for row in budget_rows), np.int64)
+    matrix.rollover[index] = np.fromiter((row[4] for row in budget_rows), bool)
+    np.add.at(
+        matrix.actual,
+        positions(actual_rows),
+        np.fromiter((row[3] for row in actual_rows), np.int64),
+    )
+    return matrix
+
+
+def roll_balances(
+    variance: np.ndarray,
+    rollover: np.ndarray,
+    opening: np.ndarray | None = None,
+) -> np.ndarray:
+    """Closing balances of ``[month, category]`` variances.
+
+    ``balance[m] = variance[m] + (balance[m - 1] if rollover[m] else 0)``,
+    with ``opening`` (default zero) as the balance before the first month.
+    """
+    months = variance.shape[0]
+    total = np.cumsum(variance, axis=0)
+    month = np.arange(months)[:, None]
+    # Latest month at or before each cell that does not roll over, else -1.
+    restart = np.maximum.accumulate(np.where(rollover, -1, month), axis=0)
+    before = np.take_along_axis(total, np.maximum(restart - 1, 0), axis=0)
+    balance = total - np.where(restart >= 1, before, 0)
+    if opening is not None:
+        balance += np.where(restart < 0, opening, 0)
+    return balance
+
+
+@dataclass(frozen=True, slots=True)
+class BudgetReport:
+    """Budget comparison arrays, all ``[month, category]`` cents."""
+
+    months: tuple[dt.date, ...]
+    categories: tuple[Category, ...]
+    budget: np.ndarray
+    actual: np.ndarray
+    rollover: np.ndarray
+    variance: np.ndarray
+    carry_in: np.ndarray
+    available: np.ndarray
+    balance: np.ndarray
+
+    @property
+    def savings_balance(self) -> np.ndarray:
+        """Closing balance of the rollover categories, per month."""
+        return np.where(self.rollover, self.balance, 0).sum(axis=1)
+
+    def window(self, start: dt.date, end: dt.date) -> "BudgetReport":
+        """The months from ``start`` through ``end`` of this report."""
+        selected = [
+            index
+            for index, month in enumerate(self.months)
+            if start.replace(day=1) <= month <= end
+        ]
+        rows = slice(selected[0], selected[-1] + 1) if selected else slice(0, 0)
+        return BudgetReport(
+            self.months[rows],
+            self.categories,
+            *(
+                getattr(self, name)[rows]
+                for name in (
+                    "budget",
+                    "actual",
+                    "rollover",
+                    "variance",
+                    "carry_in",
+                    "available",
+                    "balance",
+                )
+            ),
+        )
+
+    def as_dict(self) -> dict[str, object]:
+        """JSON-serializable representation; amounts are decimal strings."""
+        return {
+            "months": [month.isoformat() for month in self.months],
+            "categories": [
+                {"category_tier_1": tier_1, "category_tier_2": tier_2}
+                for tier_1, tier_2 in self.categories
+            ],
+            "rollover": self.rollover.tolist(),
+            **{
+                name: _money(getattr(self, name))
+                for name in (
+                    "budget",
+                    "actual",
+                    "variance",
+                    "carry_in",
+                    "available",
+                    "balance",
+                    "savings_balance",
+                )
+            },
+        }
+
+
+def compute_budget(
+    matrix: BudgetMatrix,
+    opening: np.ndarray | None = None,
+) -> BudgetReport:
+    """Variance, rollover and savings balances of ``matrix``.
+
+    Args:
+        matrix (BudgetMatrix): Budgets and actual spending.
+        opening (np.ndarray | None): Per-category balance before the first
+            month, carried into it when it rolls over.
+
+    Returns:
+        The computed report.
+
+    """
+    variance = matrix.budget - matrix.actual
+    balance = roll_balances(variance, matrix.rollover, opening)
+    previous = np.zeros_like(balance)
+    previous[1:] = balance[:-1]
+    if opening is not None and len(previous):
+        previous[0] = opening
+    carry_in = np.where(matrix.rollover, previous, 0)
+    return BudgetReport(
+        matrix.months,
+        matrix.categories,
+        matrix.budget,
+        matrix.actual,
+        matrix.rollover,
+        variance,
+        carry_in,
+        matrix.budget + carry_in,
+        balance,
+    )
+
+
+def budget_report(
+    connection: Connection,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+) -> BudgetReport:
+    """Budget comparison for the months ``start``..``end``.
+
+    Without ``start`` every month from the first with data is computed.
+    With one, only the window is loaded and rollover opens from the stored
+    balances of the month before, which must be current (see
+    ``budget_balances.balances_current``).
+    """
+    if start is None:
+        return compute_budget(load_matrix(connection, end=end))
+    # budget_balances builds on this module, so import it on first use.
+    from ledgerbase.budget_balances import opening_balances  # noqa: PLC0415
+
+    start = start.replace(day=1)
+    matrix = load_matrix(connection, start=start, end=end)
+    return compute_budget(
+        matrix,
+        opening_balances(connection, matrix.categories, add_months(start, -1)),
+    )
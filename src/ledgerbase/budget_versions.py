@@ -0,0 +1,223 @@
+##: name = budget_versions.py
+##: description = Delta-encoded budget version history with periodic full snapshots
+##: category = budgeting
+##: usage = version = record_version(conn, "set 2026-03", rows)
+##:         budget_as_of(conn, version); category_history(conn, ("Food", ""))
+##: behavior = Stores changed entries per version; rebuilds any version from a snapshot
+##: inputs = budget_entries rows written by ledgerbase.budgets
+##: outputs = budget_versions, budget_entry_changes and budget_snapshots rows
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = budgeting, history, audit
+##: changelog = Initial version
+
+"""Version history of ``budget_entries``.
+
+Every write in ``ledgerbase.budgets`` is one version: a
+``budget_versions`` row with a note such as ``clone 2026-03``, and one
+``budget_entry_changes`` row per entry it wrote, holding the entry's new
+amount, rollover and ``manually_edited`` flags. A version costs rows in
+proportion to what it changed, not to the size of the budget, and the
+flag records whether each value was a manual override or a clone.
+
+Every ``SNAPSHOT_EVERY`` versions ``record_version`` also copies the whole
+of ``budget_entries`` into ``budget_snapshots`` with one
+``INSERT ... SELECT``. ``budget_as_of`` rebuilds a version from the latest
+snapshot at or before it plus the changes after the snapshot, at most
+``SNAPSHOT_EVERY`` versions, read through the ``version_id`` index.
+``version_at`` maps a point in time to the version current then.
+
+``category_history`` lists the changes of one category with the
+``(category_tier_1, category_tier_2, version_id)`` index.
+"""
+
+import datetime as dt
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import Connection, func, insert, literal, select
+
+from ledgerbase.budget_engine import Category
+from ledgerbase.models import (
+    BudgetEntry,
+    BudgetEntryChange,
+    BudgetSnapshot,
+    BudgetVersion,
+)
+
+# Versions between full snapshots of budget_entries.
+SNAPSHOT_EVERY = 50
+
+ENTRY_COLUMNS = (
+    "month",
+    "category_tier_1",
+    "category_tier_2",
+    "amount",
+    "rollover",
+    "manually_edited",
+)
+
+# First day of the month and both category tiers.
+EntryKey = tuple[dt.date, str, str]
+
+
+@dataclass(frozen=True, slots=True)
+class EntryValue:
+    """Budgeted amount and flags of an entry in a version."""
+
+    amount: Decimal
+    rollover: bool
+    manually_edited: bool
+
+
+@dataclass(frozen=True, slots=True)
+class BudgetChange:
+    """One change to an entry, as listed by ``category_history``."""
+
+    version: int
+    created_at: dt.datetime
+    note: str
+    month: dt.date
+    amount: Decimal
+    rollover: bool
+    manually_edited: bool
+
+
+def _latest_snapshot(connection: Connection, version: int | None = None) -> int:
+    """Latest snapshot version at or before ``version``; 0 when none."""
+    table = BudgetSnapshot.__table__
+    query = select(func.max(table.c.version_id))
+    if version is not None:
+        query = query.where(table.c.version_id <= version)
+    return connection.scalar(query) or 0
+
+
+def record_version(
+    connection: Connection,
+    note: str,
+    entries: Sequence[Mapping[str, Any]],
+) -> int | None:
+    """Record the entries a write just stored in ``budget_entries``.
+
+    Call in the transaction of the write, after it.
+
+    Args:
+        connection (Connection): Database connection.
+        note (str): What made the change.
+        entries (Sequence[Mapping[str, Any]]): The written entries, with
+            the ``ENTRY_COLUMNS`` keys.
+
+    Returns:
+        The new version, or ``None`` when nothing changed.
+
+    """
+    if not entries:
+        return None
+    version = connection.execute(
+        insert(BudgetVersion.__table__)
+        .values(note=note)
+        .returning(BudgetVersion.__table__.c.id),
+    ).scalar_one()
+    connection.execute(
+        insert(BudgetEntryChange.__table__),
+        [
+            {"version_id": version, **{name: entry[name] for name in ENTRY_COLUMNS}}
+            for entry in entries
+        ],
+    )
+    if version - _latest_snapshot(connection) >= SNAPSHOT_EVERY:
+        entries_table = BudgetEntry.__table__
+        connection.execute(
+            insert(BudgetSnapshot.__table__).from_select(
+                ["version_id", *ENTRY_COLUMNS],
+                select(
+                    literal(version),
+                    *(entries_table.c[name] for name in ENTRY_COLUMNS),
+                ),
+            ),
+        )
+    return version
+
+
+def latest_version(connection: Connection) -> int:
+    """Current version; 0 before the first change."""
+    return connection.scalar(select(func.max(BudgetVersion.__table__.c.id))) or 0
+
+
+def version_at(connection: Connection, when: dt.datetime) -> int:
+    """Latest version recorded at or before ``when``; 0 when none."""
+    table = BudgetVersion.__table__
+    query = select(func.max(table.c.id)).where(table.c.created_at <= when)
+    return connection.scalar(query) or 0
+
+
+def budget_as_of(
+    connection: Connection,
+    version: int | None = None,
+) -> dict[EntryKey, EntryValue]:
+    """Budget entries as they were after ``version``.
+
+    Args:
+        connection (Connection): Database connection.
+        version (int | None): Version to rebuild; defaults to the latest.
+
+    Returns:
+        Every entry of the version, keyed by month and category tiers.
+
+    """
+    snapshot = _latest_snapshot(connection, version)
+    snapshots = BudgetSnapshot.__table__
+    changes = BudgetEntryChange.__table__
+    rows = list(
+        connection.execute(
+            select(*(snapshots.c[name] for name in ENTRY_COLUMNS)).where(
+                snapshots.c.version_id == snapshot,
+            ),
+        ),
+    )
+    replay = select(*(changes.c[name] for name in ENTRY_COLUMNS)).where(
+        changes.c.version_id > snapshot,
+    )
+    if version is not None:
+        replay = replay.where(changes.c.version_id <= version)
+    rows.extend(
+        connection.execute(replay.order_by(changes.c.version_id, changes.c.id)),
+    )
+    return {
+        (row.month, row.category_tier_1, row.category_tier_2): EntryValue(
+            Decimal(row.amount),
+            row.rollover,
+            row.manually_edited,
+        )
+        for row in rows
+    }
+
+
+def category_history(
+    connection: Connection,
+    category: Category,
+) -> list[BudgetChange]:
+    """Every change to the entries of ``category``, oldest first."""
+    changes = BudgetEntryChange.__table__
+    versions = BudgetVersion.__table__
+    rows = connection.execute(
+        select(
+            changes.c.version_id,
+            versions.c.created_at,
+            versions.c.note,
+            changes.c.month,
+            changes.c.amount,
+            changes.c.rollover,
+            changes.c.manually_edited,
+        )
+        .join(versions, versions.c.id == changes.c.version_id)
+        .where(
+            changes.c.category_tier_1 == category[0],
+            changes.c.category_tier_2 == category[1],
+        )
+        .order_by(changes.c.version_id, changes.c.id),
+    )
+    return [BudgetChange(*row) for row in rows]
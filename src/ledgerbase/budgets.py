@@ -0,0 +1,212 @@
+##: name = budgets.py
+##: description = Budget entry writes: manual overrides and set-based monthly cloning
+##: category = budgeting
+##: usage = set_budget(conn, dt.date(2026, 3, 1), ("Food", "Groceries"), amount)
+##:         extend_budgets(conn, dt.date(2027, 6, 1))
+##: behavior = Clones each month's budgets into the next with one INSERT ... SELECT
+##: inputs = budget_entries rows, target months
+##: outputs = budget_entries rows, budget versions and budget_dirty marks
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = budgeting, budget, bulk
+##: changelog = Re-cloning unchanged entries writes and versions nothing
+
+"""Writes to ``budget_entries``.
+
+Budgets clone month to month unless manually changed. ``set_budget``
+records a person's entry and flags it ``manually_edited``;
+``clone_month`` copies the previous month's entries into a month with a
+single ``INSERT ... SELECT ... ON CONFLICT DO UPDATE``. Cloned entries
+follow the previous month; the update skips entries flagged as
+overrides and entries already equal to the previous month's. Categories
+without an entry in the previous month are not removed from the target
+month.
+
+``extend_budgets`` clones month after month up to a target month. Each
+month reads the one before it, so the months run in order, with one
+statement per month, in the caller's transaction: a failure part way
+leaves no partly extended months behind.
+
+Every write records the entries it stored as one version
+(``ledgerbase.budget_versions``) and marks the budget balances of its
+categories dirty (``ledgerbase.budget_balances``).
+"""
+
+import datetime as dt
+from decimal import Decimal
+
+from sqlalchemy import (
+    Connection,
+    Date,
+    RowMapping,
+    and_,
+    false,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ledgerbase.budget_balances import mark_dirty
+from ledgerbase.budget_engine import Category, month_range
+from ledgerbase.budget_versions import ENTRY_COLUMNS, record_version
+from ledgerbase.models import BudgetEntry
+from ledgerbase.partitions import add_months
+
+
+def _upsert(connection: Connection) -> postgresql.Insert | sqlite.Insert:
+    """Dialect ``INSERT`` supporting ``ON CONFLICT`` into ``budget_entries``.
+
+    Raises:
+        NotImplementedError: On databases without ``ON CONFLICT``.
+
+    """
+    dialects = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+    upsert = dialects.get(connection.dialect.name)
+    if upsert is None:
+        msg = f"Budget upserts are not supported on {connection.dialect.name}"
+        raise NotImplementedError(msg)
+    return upsert(BudgetEntry.__table__)
+
+
+def set_budget(
+    connection: Connection,
+    month: dt.date,
+    category: Category,
+    amount: Decimal,
+    *,
+    rollover: bool = False,
+) -> None:
+    """Set the budget of ``category`` in ``month`` as a manual override."""
+    table = BudgetEntry.__table__
+    month = month.replace(day=1)
+    values = {"amount": amount, "rollover": rollover, "manually_edited": True}
+    entry = {
+        "month": month,
+        "category_tier_1": category[0],
+        "category_tier_2": category[1],
+        **values,
+    }
+    connection.execute(
+        _upsert(connection)
+        .values(**entry)
+        .on_conflict_do_update(
+            index_elements=[
+                table.c.month,
+                table.c.category_tier_1,
+                table.c.category_tier_2,
+            ],
+            set_=values,
+        ),
+    )
+    note = f"set {month:%Y-%m} {category[0]}/{category[1]}"
+    record_version(connection, note, [entry])
+    mark_dirty(connection, {category: month})
+
+
+def _clone(connection: Connection, month: dt.date) -> list[RowMapping]:
+    """Clone the previous month's entries into ``month``; the written rows."""
+    table = BudgetEntry.__table__
+    source = add_months(month, -1)
+    statement = _upsert(connection).from_select(
+        list(ENTRY_COLUMNS),
+        select(
+            literal(month, Date),
+            table.c.category_tier_1,
+            table.c.category_tier_2,
+            table.c.amount,
+            table.c.rollover,
+            false(),
+        ).where(table.c.month == source),
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[
+            table.c.month,
+            table.c.category_tier_1,
+            table.c.category_tier_2,
+        ],
+        set_={
+            "amount": statement.excluded.amount,
+            "rollover": statement.excluded.rollover,
+        },
+        # Rows already equal to the source are not rewritten, so re-cloning
+        # returns (and versions) only real changes.
+        where=and_(
+            ~table.c.manually_edited,
+            or_(
+                table.c.amount.is_distinct_from(statement.excluded.amount),
+                table.c.rollover.is_distinct_from(statement.excluded.rollover),
+            ),
+        ),
+    )
+    written = (
+        connection.execute(
+            statement.returning(*(table.c[name] for name in ENTRY_COLUMNS)),
+        )
+        .mappings()
+        .all()
+    )
+    categories = connection.execute(
+        select(table.c.category_tier_1, table.c.category_tier_2).where(
+            table.c.month == source,
+        ),
+    )
+    mark_dirty(connection, {(row[0], row[1]): month for row in categories})
+    return written
+
+
+def clone_month(connection: Connection, month: dt.date) -> int:
+    """Clone the previous month's entries into ``month``, as one version.
+
+    Entries of ``month`` flagged ``manually_edited`` are kept; other
+    entries take the previous month's amount and rollover.
+
+    Returns:
+        Number of entries inserted or updated.
+
+    """
+    month = month.replace(day=1)
+    written = _clone(connection, month)
+    record_version(connection, f"clone {month:%Y-%m}", written)
+    return len(written)
+
+
+def extend_budgets(
+    connection: Connection,
+    through: dt.date,
+    start: dt.date | None = None,
+) -> int:
+    """Clone budgets into every month from ``start`` through ``through``.
+
+    The whole extension is recorded as one version.
+
+    Args:
+        connection (Connection): Database connection, in the transaction
+            that should hold every cloned month.
+        through (dt.date): Last month to fill, inclusive.
+        start (dt.date | None): First month to fill; defaults to the month
+            after the latest month with budgets.
+
+    Returns:
+        Number of entries inserted or updated.
+
+    Raises:
+        ValueError: When there are no budgets to clone from.
+
+    """
+    if start is None:
+        table = BudgetEntry.__table__
+        latest = connection.scalar(select(table.c.month).order_by(table.c.month.desc()))
+        if latest is None:
+            msg = "No budgets to extend"
+            raise ValueError(msg)
+        start = add_months(latest, 1)
+    start = start.replace(day=1)
+    written = [
+        row
+        for month in month_range(start, through)
+        for row in _clone(connection, month)
+    ]
+    record_version(connection, f"extend {start:%Y-%m}..{through:%Y-%m}", written)
+    return len(written)
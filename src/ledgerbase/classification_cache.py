@@ -0,0 +1,357 @@
+##: name = classification_cache.py
+##: description = Versioned LRU memo cache in front of vendor classification
+##: category = etl
+##: usage = classifier = CachedClassifier.from_connection(conn)
+##:         match = classifier.classify("STARBUCKS #1234", "raw_description")
+##:         init_classifier(app, db.engine, "/var/lib/ledgerbase/matchers")
+##: behavior = Memoizes description -> vendor results, invalidated by dictionary version
+##: inputs = Descriptions, source columns, vendor_patterns and dictionary_version rows
+##: outputs = VendorMatch results and cache statistics
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, classification, cache
+##: changelog = Dictionary version is a single-row counter, bumped in commit order
+
+"""Memoized vendor classification.
+
+Bank descriptions repeat heavily, so classification results are cached in
+an LRU keyed on the folded description (``fold_description``), its source
+column and the institution whose patterns apply. Every entry is stamped
+with the dictionary version it was computed under. Writers of ``vendors``
+and ``vendor_patterns`` call ``bump_dictionary_version``, which
+increments the single-row ``dictionary_version`` counter;
+``dictionary_version`` reads it, so checking for changes costs one row
+read however large the dictionary. Once the version changes, old entries
+are treated as misses (and replaced or evicted) on their next lookup
+instead of flushing the whole cache at once.
+
+When ``MATCHER_ARTIFACT_DIR`` is set, ``create_app`` installs one
+classifier per process with ``init_classifier``, loaded from the artifact
+directory by ``preload_matcher``; ``shared_classifier`` returns it, and
+reclassification uses it unless given another.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, Engine, insert, select, update
+
+from flask import Flask, current_app, has_app_context
+from ledgerbase.description_normalizer import fold_description
+from ledgerbase.matcher_artifact import load_or_build, preload_matcher
+from ledgerbase.models import DictionaryVersion
+from ledgerbase.vendor_matcher import (
+    DEFAULT_SOURCE_COLUMN,
+    VendorMatch,
+    VendorMatcher,
+    load_pattern_specs,
+)
+
+DEFAULT_MAX_ENTRIES = 100_000
+EXTENSION_KEY = "classifier"
+
+# (folded description, source column, institution id)
+CacheKey = tuple[str, str, int | None]
+
+# Rough per-entry overhead of the OrderedDict node, key tuple and value
+# tuple on CPython, added to the size of the key strings.
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def dictionary_version(connection: Connection) -> str:
+    """Current version of ``vendors`` and ``vendor_patterns``.
+
+    The ``dictionary_version`` counter, read from its single row; "0"
+    before the first recorded change.
+    """
+    version = connection.scalar(select(DictionaryVersion.__table__.c.version))
+    return str(version or 0)
+
+
+def bump_dictionary_version(connection: Connection) -> str:
+    """Record a change to ``vendors`` or ``vendor_patterns``.
+
+    Every write to either table calls this in the same transaction, so
+    classifiers and matcher artifacts built from the old contents go stale.
+    The increment locks the counter row until the transaction ends, so
+    concurrent writers number their changes in commit order and a version
+    once read never gains an earlier change later.
+
+    Returns:
+        The new version.
+
+    """
+    table = DictionaryVersion.__table__
+    version = connection.execute(
+        update(table).values(version=table.c.version + 1).returning(table.c.version),
+    ).scalar()
+    if version is None:
+        # Databases from ``create_all`` start without the row init.sql seeds.
+        version = connection.execute(
+            insert(table).values(id=1, version=1).returning(table.c.version),
+        ).scalar_one()
+    return str(version)
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    """Point-in-time counters for a ``ClassificationCache``."""
+
+    hits: int
+    misses: int
+    stale: int
+    evictions: int
+    entries: int
+    max_entries: int
+    approx_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ClassificationCache:
+    """Thread-safe LRU of ``CacheKey -> VendorMatch | None``.
+
+    Args:
+        max_entries (int): Capacity; the least recently used entry is
+            evicted once it is exceeded.
+
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[
+            CacheKey,
+            tuple[str, VendorMatch | None],
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _entry_bytes(key: CacheKey) -> int:
+        return sys.getsizeof(key[0]) + sys.getsizeof(key[1]) + _ENTRY_OVERHEAD_BYTES
+
+    def get(
+        self,
+        key: CacheKey,
+        version: str,
+    ) -> tuple[bool, VendorMatch | None]:
+        """Look up ``key``; entries from another dictionary version are dropped.
+
+        Returns:
+            ``(found, value)``; ``value`` may legitimately be ``None`` for a
+            cached "no vendor matched" result.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self._bytes -= self._entry_bytes(key)
+                self._stale += 1
+            self._misses += 1
+            return False, None
+
+    def put(
+        self,
+        key: CacheKey,
+        version: str,
+        value: VendorMatch | None,
+    ) -> None:
+        """Store a result computed under ``version``."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._bytes += self._entry_bytes(key)
+            self._entries[key] = (version, value)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._entry_bytes(evicted)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry but keep the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        """Return current hit/miss counters and memory estimate."""
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                stale=self._stale,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                approx_bytes=self._bytes,
+            )
+
+
+class CachedClassifier:
+    """A ``VendorMatcher`` fronted by a versioned ``ClassificationCache``.
+
+    Descriptions are normalized before matching so that cache hits and
+    fresh classifications always agree.
+
+    Args:
+        matcher (VendorMatcher): Matcher built from the dictionary.
+        version (str): Dictionary version the matcher was built from.
+        cache (ClassificationCache | None): Cache to use; a new one is
+            created when omitted.
+        artifact_dir (str | os.PathLike[str] | None): Directory of prebuilt
+            matcher artifacts (see ``ledgerbase.matcher_artifact``) that
+            ``refresh`` loads from instead of recompiling.
+
+    """
+
+    def __init__(
+        self,
+        matcher: VendorMatcher,
+        version: str,
+        cache: ClassificationCache | None = None,
+        artifact_dir: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self.matcher = matcher
+        self.version = version
+        self.cache = cache if cache is not None else ClassificationCache()
+        self.artifact_dir = artifact_dir
+
+    @classmethod
+    def from_connection(
+        cls,
+        connection: Connection,
+        cache: ClassificationCache | None = None,
+        timeout: float | None = None,
+        artifact_dir: str | os.PathLike[str] | None = None,
+    ) -> "CachedClassifier":
+        """Build the matcher and its version from the database.
+
+        Args:
+            connection (Connection): Database connection.
+            cache (ClassificationCache | None): Cache to use.
+            timeout (float | None): Per-search match timeout, see
+                ``VendorMatcher``.
+            artifact_dir (str | os.PathLike[str] | None): Load the matcher
+                from the artifact for the current version, building it if
+                missing.
+
+        """
+        version = dictionary_version(connection)
+        if artifact_dir is None:
+            matcher = VendorMatcher(load_pattern_specs(connection), timeout=timeout)
+        else:
+            matcher = load_or_build(
+                connection,
+                artifact_dir,
+                version,
+                timeout=timeout,
+            )
+        return cls(matcher, version, cache, artifact_dir)
+
+    def refresh(self, connection: Connection) -> bool:
+        """Rebuild the matcher if the dictionary changed since it was built.
+
+        Returns:
+            True when a new matcher was loaded.
+
+        """
+        version = dictionary_version(connection)
+        if version == self.version:
+            return False
+        if self.artifact_dir is None:
+            self.matcher = self.matcher.rebuilt(load_pattern_specs(connection))
+        else:
+            self.matcher = load_or_build(
+                connection,
+                self.artifact_dir,
+                version,
+                timeout=self.matcher.timeout,
+            )
+        self.version = version
+        return True
+
+    def classify(
+        self,
+        description: str,
+        source_column: str = DEFAULT_SOURCE_COLUMN,
+        institution_id: int | None = None,
+    ) -> VendorMatch | None:
+        """Classify one description, consulting the cache first."""
+        key = (fold_description(description), source_column, institution_id)
+        matcher, version = self.matcher, self.version
+        found, value = self.cache.get(key, version)
+        if found:
+            return value
+        value = matcher.match(key[0], source_column, institution_id)
+        self.cache.put(key, version, value)
+        return value
+
+    def classify_many(
+        self,
+        descriptions: Iterable[str],
+        source_column: str = DEFAULT_SOURCE_COLUMN,
+        institution_id: int | None = None,
+    ) -> list[VendorMatch | None]:
+        """Classify a batch from the same source column and institution."""
+        return [
+            self.classify(description, source_column, institution_id)
+            for description in descriptions
+        ]
+
+
+def init_classifier(
+    app: Flask,
+    engine: Engine,
+    artifact_dir: str | os.PathLike[str],
+    timeout: float | None = None,
+) -> CachedClassifier:
+    """Install a ``CachedClassifier`` loaded from ``artifact_dir`` for ``app``.
+
+    The matcher is loaded with ``preload_matcher``, so when this runs in a
+    preforking master the workers share it. The engine's pooled
+    connections are then discarded so no worker inherits the master's.
+
+    Args:
+        app (Flask): The application.
+        engine (Engine): Primary engine to read the dictionary from.
+        artifact_dir (str | os.PathLike[str]): Matcher artifact directory.
+        timeout (float | None): Per-search match timeout, see
+            ``VendorMatcher``.
+
+    Returns:
+        The installed classifier.
+
+    """
+    with engine.connect() as connection:
+        version = dictionary_version(connection)
+        matcher = preload_matcher(connection, artifact_dir, version, timeout=timeout)
+    engine.dispose()
+    classifier = CachedClassifier(matcher, version, artifact_dir=artifact_dir)
+    app.extensions[EXTENSION_KEY] = classifier
+    return classifier
+
+
+def shared_classifier() -> CachedClassifier | None:
+    """The current app's installed classifier, if any."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(EXTENSION_KEY)
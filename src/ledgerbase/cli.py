@@ -0,0 +1,515 @@
+##: name = cli.py
+##: description = Flask CLI commands for vendor dictionary and schema maintenance
+##: category = cli
+##: usage = flask --app ledgerbase.wsgi patterns preview "SHELL\s+OIL"
+##: behavior = Registers patterns, descriptions, schema, rollups, budget and archive
+##: inputs = Command-line arguments
+##: outputs = JSON printed to stdout
+##: dependencies = Flask, click, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = cli, vendors, schema
+##: changelog = patterns clusters / approve-cluster review the queue by merchant
+
+"""Command-line entry points, registered on the app by ``create_app``."""
+
+import datetime as dt
+import json
+import re
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Connection
+
+from flask import Flask
+
+from . import db
+from .archive import (
+    HOT_MONTHS,
+    archivable_years,
+    archive_year,
+    archived_years,
+    open_history,
+)
+from .budget_balances import rebuild_balances, refresh_balances
+from .budget_versions import category_history
+from .budgets import extend_budgets
+from .classification_cache import dictionary_version
+from .config import get_config
+from .description_clusters import ClusterApproval, approve_cluster, cluster_unmatched
+from .description_normalizer import (
+    DEFAULT_BATCH_SIZE,
+    backfill_normalized_descriptions,
+)
+from .matcher_artifact import write_artifact
+from .migrations import apply_migrations, pending_migrations
+from .partitions import (
+    MONTHS_AHEAD,
+    add_months,
+    detach_partition,
+    ensure_partitions,
+    list_partitions,
+)
+from .pattern_preview import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_SAMPLE_SIZE,
+    DEFAULT_TIME_BUDGET,
+    preview_pattern,
+)
+from .pattern_profiler import (
+    DEFAULT_GUARD_BUDGET,
+    profile_patterns,
+    sample_corpus,
+)
+from .rollups import check_rollups, rebuild_rollups
+from .savings_reconciliation import reconcile_savings
+from .sqlite_profile import run_write
+from .vendor_matcher import DEFAULT_SOURCE_COLUMN, VendorMatcher, load_pattern_specs
+from .vendor_suggestions import DEFAULT_MIN_SCORE, DEFAULT_TOP_K, VendorSuggester
+
+patterns_cli = AppGroup("patterns", help="Vendor pattern maintenance.")
+descriptions_cli = AppGroup("descriptions", help="Transaction description upkeep.")
+schema_cli = AppGroup("schema", help="Database schema migrations.")
+rollups_cli = AppGroup("rollups", help="Monthly rollup maintenance.")
+budget_cli = AppGroup("budget", help="Stored budget rollover balances.")
+archive_cli = AppGroup("archive", help="Parquet archive of closed years.")
+
+archive_directory = click.option(
+    "--directory",
+    envvar="TRANSACTION_ARCHIVE_DIR",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Archive root; defaults to $TRANSACTION_ARCHIVE_DIR.",
+)
+
+
+@patterns_cli.command("preview")
+@click.argument("pattern")
+@click.option("--vendor-id", type=int, default=None)
+@click.option("--institution-id", type=int, default=None)
+@click.option("--source-column", default=DEFAULT_SOURCE_COLUMN, show_default=True)
+@click.option(
+    "--time-budget",
+    type=float,
+    default=DEFAULT_TIME_BUDGET,
+    show_default=True,
+)
+@click.option("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, show_default=True)
+@click.option("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE, show_default=True)
+@click.option("--workers", type=int, default=None, help="Defaults to the CPU count.")
+def preview_command(  # noqa: PLR0913, PLR0917
+    pattern: str,
+    vendor_id: int | None,
+    institution_id: int | None,
+    source_column: str,
+    time_budget: float,
+    chunk_size: int,
+    sample_size: int,
+    workers: int | None,
+) -> None:
+    """Preview which transactions PATTERN would match."""
+    try:
+        re.compile(pattern)
+    except re.error as error:
+        raise click.BadParameter(str(error), param_hint="PATTERN") from error
+    with db.engine.connect() as connection:
+        result = preview_pattern(
+            connection,
+            pattern,
+            vendor_id=vendor_id,
+            institution_id=institution_id,
+            source_column=source_column,
+            time_budget=time_budget,
+            chunk_size=chunk_size,
+            sample_size=sample_size,
+            workers=workers,
+        )
+    click.echo(json.dumps(result.as_dict(), indent=2))
+
+
+@patterns_cli.command("profile")
+@click.option("--source-column", default=DEFAULT_SOURCE_COLUMN, show_default=True)
+@click.option("--sample", type=int, default=10_000, show_default=True)
+@click.option("--top", type=int, default=20, show_default=True)
+@click.option("--fuzz/--no-fuzz", default=False, help="Flag super-linear patterns.")
+@click.option(
+    "--time-budget",
+    type=float,
+    default=DEFAULT_GUARD_BUDGET,
+    show_default=True,
+)
+def profile_command(
+    source_column: str,
+    sample: int,
+    top: int,
+    *,
+    fuzz: bool,
+    time_budget: float,
+) -> None:
+    """Report the most expensive vendor patterns over a sample."""
+    with db.engine.connect() as connection:
+        specs = [
+            spec
+            for spec in load_pattern_specs(connection)
+            if spec.source_column == source_column
+        ]
+        corpus = sample_corpus(connection, source_column, sample)
+    profiles = profile_patterns(specs, corpus, fuzz=fuzz, time_budget=time_budget)
+    click.echo(f"{len(specs)} patterns over {len(corpus)} descriptions")
+    for profile in profiles[:top]:
+        flag = " SUPERLINEAR" if profile.superlinear else ""
+        click.echo(
+            f"{profile.pattern_id:>8} {profile.mean_microseconds:>10.2f}us "
+            f"{profile.matches:>8} matches  {profile.pattern}{flag}",
+        )
+
+
+@patterns_cli.command("build-artifact")
+@click.option(
+    "--directory",
+    envvar="MATCHER_ARTIFACT_DIR",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Artifact directory; defaults to $MATCHER_ARTIFACT_DIR.",
+)
+def build_artifact_command(directory: str) -> None:
+    """Compile the vendor dictionary into a shared matcher artifact.
+
+    The per-search timeout is ``MATCHER_TIMEOUT``, as in the app, which
+    only loads artifacts built with its own timeout.
+    """
+    timeout = get_config().MATCHER_TIMEOUT
+    with db.engine.connect() as connection:
+        version = dictionary_version(connection)
+        matcher = VendorMatcher(load_pattern_specs(connection), timeout=timeout)
+    path = write_artifact(matcher, version, directory)
+    click.echo(f"Wrote {len(matcher)} patterns to {path}")
+
+
+@patterns_cli.command("suggest")
+@click.option("--top", type=int, default=DEFAULT_TOP_K, show_default=True)
+@click.option("--min-score", type=float, default=DEFAULT_MIN_SCORE, show_default=True)
+@click.option("--limit", type=int, default=None, help="Score only the oldest rows.")
+def suggest_command(top: int, min_score: float, limit: int | None) -> None:
+    """Suggest vendors for unmatched transactions by trigram similarity."""
+    with db.engine.connect() as connection:
+        suggester = VendorSuggester.from_connection(connection, min_score)
+        suggestions = suggester.suggest_unmatched(connection, top, limit)
+    for transaction_id, found in suggestions.items():
+        if found:
+            click.echo(
+                f"{transaction_id:>8} "
+                + ", ".join(f"{item.vendor_id} ({item.score:.2f})" for item in found),
+            )
+    suggested = sum(1 for found in suggestions.values() if found)
+    click.echo(f"{suggested} of {len(suggestions)} unmatched rows have suggestions")
+
+
+@patterns_cli.command("clusters")
+@click.option("--source-column", default=DEFAULT_SOURCE_COLUMN, show_default=True)
+@click.option("--top", type=int, default=20, show_default=True)
+def clusters_command(source_column: str, top: int) -> None:
+    """List the unmatched queue grouped by merchant, largest first."""
+    with db.engine.connect() as connection:
+        clusters = cluster_unmatched(connection, source_column)
+    for number, cluster in enumerate(clusters[:top], start=1):
+        click.echo(
+            f"{number:>4} {cluster.size:>6}  {cluster.suggested_pattern:<40}"
+            f" {cluster.representative}",
+        )
+    click.echo(f"{len(clusters)} clusters")
+
+
+@patterns_cli.command("approve-cluster")
+@click.argument("number", type=click.IntRange(min=1))
+@click.argument("vendor_id", type=int)
+@click.option("--pattern", default=None, help="Defaults to the suggested pattern.")
+@click.option("--source-column", default=DEFAULT_SOURCE_COLUMN, show_default=True)
+def approve_cluster_command(
+    number: int,
+    vendor_id: int,
+    pattern: str | None,
+    source_column: str,
+) -> None:
+    """Assign cluster NUMBER of `patterns clusters` to VENDOR_ID.
+
+    The clusters are recomputed in the write transaction, so NUMBER refers
+    to the current queue.
+    """
+
+    def approve(connection: Connection) -> ClusterApproval:
+        clusters = cluster_unmatched(connection, source_column)
+        if number > len(clusters):
+            msg = f"There are {len(clusters)} clusters"
+            raise click.BadParameter(msg, param_hint="NUMBER")
+        return approve_cluster(
+            connection,
+            clusters[number - 1],
+            vendor_id,
+            pattern,
+            source_column,
+        )
+
+    try:
+        approval = run_write(approve)
+    except (re.error, ValueError) as error:
+        raise click.BadParameter(str(error), param_hint="--pattern") from error
+    click.echo(
+        f"Added pattern {approval.pattern_id}; classified {approval.classified}"
+        f" transactions, {approval.manual} flagged as manual",
+    )
+
+
+@descriptions_cli.command("normalize")
+@click.option("--all", "rewrite_all", is_flag=True, help="Recompute every row.")
+@click.option("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, show_default=True)
+def normalize_command(*, rewrite_all: bool, batch_size: int) -> None:
+    """Fill normalized_description for transactions."""
+    written = run_write(
+        lambda connection: backfill_normalized_descriptions(
+            connection,
+            only_missing=not rewrite_all,
+            batch_size=batch_size,
+        ),
+    )
+    click.echo(f"Normalized {written} descriptions")
+
+
+@schema_cli.command("status")
+def status_command() -> None:
+    """List migrations that have not been applied."""
+    pending = pending_migrations(db.engine)
+    for migration in pending:
+        click.echo(f"{migration.version:04d} {migration.name}")
+    click.echo(f"{len(pending)} pending")
+
+
+@schema_cli.command("migrate")
+def migrate_command() -> None:
+    """Apply pending migrations in order."""
+    for migration in apply_migrations(db.engine):
+        click.echo(f"Applied {migration.version:04d} {migration.name}")
+
+
+@schema_cli.command("partitions")
+@click.option(
+    "--months-ahead",
+    type=int,
+    default=MONTHS_AHEAD,
+    show_default=True,
+    help="Create monthly partitions this far past the current month.",
+)
+def partitions_command(months_ahead: int) -> None:
+    """Create upcoming monthly transaction partitions and list them."""
+    today = dt.datetime.now(tz=dt.UTC).date()
+    with db.engine.begin() as connection:
+        created = ensure_partitions(connection, add_months(today, months_ahead))
+        partitions = list_partitions(connection)
+    for name in created:
+        click.echo(f"Created {name}")
+    for partition in partitions:
+        bounds = (
+            f"{partition.start} .. {partition.end}" if partition.start else "default"
+        )
+        click.echo(f"{partition.name:<40} {bounds}")
+    if not partitions:
+        click.echo("transactions_normalized is not partitioned")
+
+
+@schema_cli.command("detach")
+@click.argument("month", type=click.DateTime(formats=["%Y-%m"]))
+def detach_command(month: dt.datetime) -> None:
+    """Detach the transaction partition for MONTH (YYYY-MM)."""
+    with db.engine.begin() as connection:
+        try:
+            name = detach_partition(connection, month.date())
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint="MONTH") from error
+    click.echo(f"Detached {name}; archive or drop it separately")
+
+
+@rollups_cli.command("check")
+@click.option("--limit", type=int, default=20, show_default=True)
+def rollups_check_command(limit: int) -> None:
+    """Compare monthly_rollups with the transactions; exit 1 on mismatch."""
+    with db.engine.connect() as connection:
+        mismatches = check_rollups(connection)
+    for mismatch in mismatches[:limit]:
+        click.echo(
+            f"{mismatch.key}: stored {mismatch.stored[0]} ({mismatch.stored[1]})"
+            f" actual {mismatch.actual[0]} ({mismatch.actual[1]})",
+        )
+    click.echo(f"{len(mismatches)} mismatched rollups")
+    if mismatches:
+        raise SystemExit(1)
+
+
+@rollups_cli.command("rebuild")
+def rollups_rebuild_command() -> None:
+    """Recompute monthly_rollups from the transactions."""
+    written = run_write(rebuild_rollups)
+    click.echo(f"Wrote {written} rollups")
+
+
+@budget_cli.command("refresh")
+def budget_refresh_command() -> None:
+    """Recompute budget balances of categories marked dirty."""
+    written = run_write(refresh_balances)
+    click.echo(f"Wrote {written} budget balances")
+
+
+@budget_cli.command("extend")
+@click.argument("through", type=click.DateTime(formats=["%Y-%m"]))
+@click.option(
+    "--start",
+    type=click.DateTime(formats=["%Y-%m"]),
+    default=None,
+    help="First month to fill. Defaults to the month after the latest budget.",
+)
+def budget_extend_command(through: dt.datetime, start: dt.datetime | None) -> None:
+    """Clone budgets month to month through THROUGH, keeping manual overrides."""
+
+    def extend(connection: Connection) -> tuple[int, int]:
+        cloned = extend_budgets(connection, through.date(), start and start.date())
+        return cloned, refresh_balances(connection)
+
+    try:
+        cloned, written = run_write(extend)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="THROUGH") from error
+    click.echo(f"Cloned {cloned} budget entries; wrote {written} budget balances")
+
+
+@budget_cli.command("history")
+@click.argument("category_tier_1")
+@click.argument("category_tier_2", default="")
+def budget_history_command(category_tier_1: str, category_tier_2: str) -> None:
+    """List every budget version that changed a category."""
+    with db.engine.connect() as connection:
+        history = category_history(connection, (category_tier_1, category_tier_2))
+    for change in history:
+        flag = "manual" if change.manually_edited else "cloned"
+        click.echo(
+            f"v{change.version} {change.created_at:%Y-%m-%d %H:%M} {change.month:%Y-%m}"
+            f" {change.amount:>12} {flag} {change.note}",
+        )
+    click.echo(f"{len(history)} changes")
+
+
+@budget_cli.command("reconcile")
+@click.option("--month", type=click.DateTime(formats=["%Y-%m"]), default=None)
+def budget_reconcile_command(month: dt.datetime | None) -> None:
+    """Check savings account balances; exit 1 on any shortfall."""
+    run_write(refresh_balances)
+    with db.engine.connect() as connection:
+        results = reconcile_savings(connection, month and month.date())
+    short = [result for result in results if result.shortfall]
+    for result in short:
+        click.echo(
+            f"{result.account_name} ({result.account_id}): allocated"
+            f" {result.allocated}, balance {result.balance} as of {result.as_of},"
+            f" short {result.shortfall}",
+        )
+    click.echo(f"{len(short)} of {len(results)} savings accounts short")
+    if short:
+        raise SystemExit(1)
+
+
+@budget_cli.command("rebuild")
+def budget_rebuild_command() -> None:
+    """Recompute every stored budget balance."""
+    written = run_write(rebuild_balances)
+    click.echo(f"Wrote {written} budget balances")
+
+
+@archive_cli.command("run")
+@archive_directory
+@click.option(
+    "--year",
+    "years",
+    type=int,
+    multiple=True,
+    help="Year to archive; repeatable. Defaults to every closed year.",
+)
+@click.option(
+    "--hot-months",
+    type=int,
+    default=HOT_MONTHS,
+    show_default=True,
+    help="Months kept in the database.",
+)
+def archive_run_command(
+    directory: str,
+    years: tuple[int, ...],
+    hot_months: int,
+) -> None:
+    """Move closed years of transactions into the Parquet archive."""
+    if not years:
+        with db.engine.connect() as connection:
+            years = tuple(archivable_years(connection, hot_months))
+    for year in years:
+        try:
+            archived = run_write(
+                lambda connection, year=year: archive_year(
+                    connection,
+                    year,
+                    directory,
+                    hot_months,
+                ),
+            )
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint="--year") from error
+        click.echo(
+            f"Archived {archived.row_count} transactions of {year} to {archived.path}",
+        )
+    click.echo(f"{len(years)} years archived")
+
+
+@archive_cli.command("list")
+def archive_list_command() -> None:
+    """List archived years."""
+    with db.engine.connect() as connection:
+        archived = archived_years(connection)
+    for entry in archived:
+        click.echo(
+            f"{entry.year} {entry.row_count:>8} {entry.total_amount:>14} {entry.path}",
+        )
+    click.echo(f"{len(archived)} archived years")
+
+
+@archive_cli.command("query")
+@click.argument("sql")
+@archive_directory
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None)
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), default=None)
+@click.option("--offline", is_flag=True, help="Read the archive only.")
+def archive_query_command(
+    sql: str,
+    directory: str,
+    start: dt.datetime | None,
+    end: dt.datetime | None,
+    *,
+    offline: bool,
+) -> None:
+    """Run SQL against the `transactions` view of archived and hot rows."""
+    bounds = {"start": start and start.date(), "end": end and end.date()}
+    if offline:
+        history = open_history(directory, **bounds)
+    else:
+        with db.engine.connect() as connection:
+            history = open_history(directory, connection, **bounds)
+    with history:
+        result = history.execute(sql)
+        names = [column[0] for column in result.description]
+        for row in result.fetchall():
+            click.echo(json.dumps(dict(zip(names, row, strict=True)), default=str))
+
+
+def register_cli(app: Flask) -> None:
+    """Register command groups on the Flask application."""
+    app.cli.add_command(patterns_cli)
+    app.cli.add_command(descriptions_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(budget_cli)
+    app.cli.add_command(archive_cli)
@@ -8,12 +8,12 @@ description: "Defines application configuration classes and selection logic."
 category: module
 usage: "Imported by application to obtain environment-specific configs."
 behavior: "Provides Config subclasses and helper functions for security settings."
-inputs: "FLASK_ENV, DATABASE_URL, SECRET_KEY"
-outputs: "Config class types and settings dict"
-dependencies: none
+inputs: "FLASK_ENV, DATABASE_URL, SECRET_KEY, DB_*, SQLITE_*, MATCHER_TIMEOUT"
+outputs: "Config class types, settings dict and SQLAlchemy engine options"
+dependencies: SQLAlchemy
 author: "Byron Williams"
-last_modified: "2025-04-26"
-changelog: "Embedded front-matter, updated type annotations, improved docstrings"
+last_modified: "2026-10-19"
+changelog: "Added MATCHER_TIMEOUT, shared by the app and build-artifact"
 tags: [config, settings]
 ---
 
@@ -21,11 +21,19 @@ Module: config
 
 This module defines base and environment-specific configuration classes
 for the LedgerBase application. It includes:
-  - Config: Base settings loaded from environment variables.
+  - Config: Base settings loaded from environment variables, including the
+    SQLAlchemy connection pool (``DB_POOL_SIZE``, ``DB_MAX_OVERFLOW``,
+    ``DB_POOL_TIMEOUT``, ``DB_POOL_RECYCLE``, ``DB_POOL_PRE_PING`` and
+    ``DB_STATEMENT_CACHE_SIZE``), the read replica lag limit
+    (``DB_REPLICA_MAX_LAG``) and the SQLite profile (``SQLITE_TUNED``,
+    ``SQLITE_SYNCHRONOUS``, ``SQLITE_BUSY_TIMEOUT``, ``SQLITE_MMAP_SIZE``
+    and ``SQLITE_CACHE_SIZE``) and the vendor matcher timeout
+    (``MATCHER_TIMEOUT``).
   - DevelopmentConfig: Debug settings for local development.
   - ProductionConfig: Secure settings for production usage.
 
 Functions:
+    env_flag(name: str, *, default: bool) -> bool
     get_security_settings() -> dict[str, Any]
     get_config(env: str | None = None) -> type[Config]
 """
@@ -33,6 +41,18 @@ Functions:
 import os
 from typing import Any
 
+from sqlalchemy.engine import make_url
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def env_flag(name: str, *, default: bool) -> bool:
+    """Read a boolean environment variable ("1", "true", "yes" or "on")."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in _TRUE_VALUES
+
 
 class Config:
     """Base configuration with environment-backed settings."""
@@ -41,6 +61,69 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv("SECRET_KEY", "unsafe-development-key")
 
+    # Connection pool. Each worker process holds up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections; size the pool to the
+    # number of threads per worker so requests rarely wait for one.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # Seconds a request waits for a free connection before failing.
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Seconds after which an idle connection is replaced (-1 disables).
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Test connections on checkout so a database restart costs one retry
+    # instead of an error for every stale pooled connection.
+    DB_POOL_PRE_PING = env_flag("DB_POOL_PRE_PING", default=True)
+    # Entries in SQLAlchemy's compiled statement cache (0 disables).
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+    # Seconds a read replica (DATABASE_REPLICA_URL) may lag before reports
+    # fall back to the primary.
+    DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "30"))
+    # SQLite database files get WAL, these pragmas and a single writer
+    # queue (see sqlite_profile) unless SQLITE_TUNED is off.
+    SQLITE_TUNED = env_flag("SQLITE_TUNED", default=True)
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    # Milliseconds a connection waits for a lock before failing.
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Pages per connection, or KiB when negative.
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+    # Per-search vendor matcher timeout in seconds (unset: no timeout).
+    # Matcher artifacts record it, so the app and `patterns build-artifact`
+    # both read it from here.
+    MATCHER_TIMEOUT = (
+        float(os.environ["MATCHER_TIMEOUT"]) if os.getenv("MATCHER_TIMEOUT") else None
+    )
+
+    @classmethod
+    def engine_options(cls, database_uri: str) -> dict[str, Any]:
+        """Build ``SQLALCHEMY_ENGINE_OPTIONS`` for ``database_uri``.
+
+        In-memory SQLite databases live in a single connection, so they get
+        no queue pool settings.
+
+        Args:
+            database_uri: The SQLAlchemy database URL the engine connects to.
+
+        Returns:
+            Keyword arguments for ``sqlalchemy.create_engine``.
+
+        """
+        options: dict[str, Any] = {
+            "pool_pre_ping": cls.DB_POOL_PRE_PING,
+            "query_cache_size": cls.DB_STATEMENT_CACHE_SIZE,
+        }
+        url = make_url(database_uri)
+        in_memory = url.database in {None, "", ":memory:"}
+        if url.get_backend_name() == "sqlite" and in_memory:
+            return options
+        options.update(
+            pool_size=cls.DB_POOL_SIZE,
+            max_overflow=cls.DB_MAX_OVERFLOW,
+            pool_timeout=cls.DB_POOL_TIMEOUT,
+            pool_recycle=cls.DB_POOL_RECYCLE,
+        )
+        return options
+
 
 class DevelopmentConfig(Config):
     """Development configuration (e.g., local debugging)."""
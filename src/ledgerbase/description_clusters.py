@@ -0,0 +1,315 @@
+##: name = description_clusters.py
+##: description = MinHash/LSH clustering of unmatched descriptions for bulk review
+##: category = etl
+##: usage = clusters = cluster_unmatched(conn)
+##:         approve_cluster(conn, clusters[0], vendor_id=4)
+##: behavior = Groups near-identical descriptions so one approval classifies a merchant
+##: inputs = Unmatched transactions_normalized rows
+##: outputs = DescriptionCluster lists, vendor_patterns row and batch update on approval
+##: dependencies = NumPy, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, review, clustering, minhash
+##: changelog = Cluster on the pattern's own column; patterns span dropped digits
+
+"""Cluster the unmatched vendor queue by merchant.
+
+Unmatched descriptions for one merchant usually differ only in store
+numbers, dates and card suffixes. Clustering reads the column the
+approved pattern is stored for and matched against, so the suggested
+pattern is built from the text it has to match. Each description is
+reduced to a shape (upper-cased, digits removed, whitespace collapsed);
+the suggested pattern allows digits and spacing wherever the shape
+dropped them. Distinct shapes are
+shingled into character 4-grams and summarized by a MinHash signature, and
+locality-sensitive hashing over signature bands groups shapes whose
+estimated Jaccard similarity exceeds roughly ``(1 / bands) ** (1 / rows)``.
+
+The review queue then presents one cluster per merchant, and approving a
+cluster writes one vendor pattern and classifies every member with a single
+``UPDATE``, so reviewer actions and writes scale with merchants rather than
+rows.
+"""
+
+import re
+import zlib
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import Connection, case, false, insert, select, true, update
+
+from ledgerbase.classification_cache import bump_dictionary_version
+from ledgerbase.description_normalizer import fold_description
+from ledgerbase.models import Transaction, Vendor, VendorPattern
+from ledgerbase.pattern_profiler import ensure_safe_pattern
+from ledgerbase.rollups import RollupDeltas
+from ledgerbase.vendor_matcher import DEFAULT_SOURCE_COLUMN, MATCH_FLAGS
+
+SHINGLE_LENGTH = 4
+DEFAULT_BANDS = 16
+DEFAULT_ROWS = 4
+MINHASH_SEED = 1_729
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+_TOKENS_TO_SKIP = {"#", "*", "-", "/"}
+_TOKEN_GAP = r"[\s\d]*"
+
+
+def description_shape(description: str) -> str:
+    """Reduce a description to the parts shared by all its store variants."""
+    without_digits = _DIGITS.sub(" ", description.upper())
+    return _SPACES.sub(" ", without_digits).strip()
+
+
+def shingles(shape: str) -> np.ndarray:
+    """Return CRC32 hashes of the character shingles of ``shape``."""
+    padded = f" {shape} "
+    if len(padded) <= SHINGLE_LENGTH:
+        return np.array([zlib.crc32(padded.encode())], dtype=np.uint64)
+    return np.unique(
+        np.fromiter(
+            (
+                zlib.crc32(padded[index : index + SHINGLE_LENGTH].encode())
+                for index in range(len(padded) - SHINGLE_LENGTH + 1)
+            ),
+            dtype=np.uint64,
+        ),
+    )
+
+
+class MinHasher:
+    """Multiply-shift MinHash over 32-bit shingle hashes.
+
+    Args:
+        num_perm (int): Signature length.
+        seed (int): Seed for the hash family, so signatures are reproducible.
+
+    """
+
+    def __init__(self, num_perm: int, seed: int = MINHASH_SEED) -> None:
+        rng = np.random.default_rng(seed)
+        max_value = np.iinfo(np.uint64).max
+        self._a = rng.integers(1, max_value, size=(num_perm, 1), dtype=np.uint64) | 1
+        self._b = rng.integers(0, max_value, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """Return the ``num_perm`` minimum hash values for a shingle set."""
+        # uint64 arithmetic wraps, which is exactly multiply-shift hashing.
+        permuted = (self._a * hashes[np.newaxis, :] + self._b) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+
+@dataclass(frozen=True, slots=True)
+class DescriptionCluster:
+    """Unmatched transactions that look like the same merchant."""
+
+    transaction_ids: tuple[int, ...]
+    shapes: tuple[str, ...]
+    representative: str
+    suggested_pattern: str
+
+    @property
+    def size(self) -> int:
+        """Number of transactions in the cluster."""
+        return len(self.transaction_ids)
+
+
+def suggest_pattern(shapes: Sequence[str]) -> str:
+    """Build a regex from the token prefix shared by all shapes.
+
+    Tokens are joined by any run of spacing and digits: in the
+    descriptions the shapes came from, nothing else separates them.
+    """
+    token_lists = [shape.split() for shape in shapes]
+    common: list[str] = []
+    for tokens in zip(*token_lists, strict=False):
+        if len(set(tokens)) != 1:
+            break
+        common.append(tokens[0])
+    while common and common[-1] in _TOKENS_TO_SKIP:
+        common.pop()
+    if not common:
+        common = token_lists[0]
+    return _TOKEN_GAP.join(re.escape(token) for token in common)
+
+
+def _find(parent: list[int], item: int) -> int:
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
+
+
+def cluster_descriptions(
+    rows: Sequence[tuple[int, str]],
+    bands: int = DEFAULT_BANDS,
+    rows_per_band: int = DEFAULT_ROWS,
+) -> list[DescriptionCluster]:
+    """Cluster ``(transaction_id, description)`` pairs by merchant.
+
+    Returns:
+        Clusters ordered by size, largest first.
+
+    """
+    ids_by_shape: dict[str, list[int]] = {}
+    for transaction_id, description in rows:
+        shape = description_shape(description)
+        ids_by_shape.setdefault(shape, []).append(transaction_id)
+    shapes = list(ids_by_shape)
+    if not shapes:
+        return []
+
+    hasher = MinHasher(bands * rows_per_band)
+    signatures = np.vstack([hasher.signature(shingles(shape)) for shape in shapes])
+    parent = list(range(len(shapes)))
+    for band in range(bands):
+        block = signatures[:, band * rows_per_band : (band + 1) * rows_per_band]
+        buckets: dict[bytes, int] = {}
+        for index, key in enumerate(map(bytes, block)):
+            first = buckets.setdefault(key, index)
+            if first != index:
+                parent[_find(parent, index)] = _find(parent, first)
+
+    members: dict[int, list[int]] = {}
+    for index in range(len(shapes)):
+        members.setdefault(_find(parent, index), []).append(index)
+
+    clusters = []
+    for indexes in members.values():
+        cluster_shapes = [shapes[index] for index in indexes]
+        counts = Counter(
+            {shape: len(ids_by_shape[shape]) for shape in cluster_shapes},
+        )
+        transaction_ids = sorted(
+            transaction_id
+            for shape in cluster_shapes
+            for transaction_id in ids_by_shape[shape]
+        )
+        clusters.append(
+            DescriptionCluster(
+                transaction_ids=tuple(transaction_ids),
+                shapes=tuple(sorted(cluster_shapes)),
+                representative=counts.most_common(1)[0][0],
+                suggested_pattern=suggest_pattern(cluster_shapes),
+            ),
+        )
+    clusters.sort(key=lambda cluster: (-cluster.size, cluster.representative))
+    return clusters
+
+
+def cluster_unmatched(
+    connection: Connection,
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+    bands: int = DEFAULT_BANDS,
+    rows_per_band: int = DEFAULT_ROWS,
+) -> list[DescriptionCluster]:
+    """Cluster every unmatched, unedited transaction by ``source_column``.
+
+    Approve the clusters with the same ``source_column``.
+    """
+    table = Transaction.__table__
+    column = table.c[source_column]
+    result = connection.execute(
+        select(table.c.id, column).where(
+            table.c.vendor_id.is_(None),
+            table.c.manually_edited.is_(false()),
+            column.is_not(None),
+        ),
+    )
+    rows = [(row[0], row[1]) for row in result]
+    return cluster_descriptions(rows, bands, rows_per_band)
+
+
+@dataclass(frozen=True, slots=True)
+class ClusterApproval:
+    """Outcome of approving a cluster."""
+
+    pattern_id: int
+    classified: int
+    manual: int
+
+
+def approve_cluster(
+    connection: Connection,
+    cluster: DescriptionCluster,
+    vendor_id: int,
+    pattern: str | None = None,
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+) -> ClusterApproval:
+    """Write a vendor pattern for the cluster and classify all its members.
+
+    Members the pattern does not actually match were still confirmed by the
+    reviewer, so they are flagged ``manually_edited`` to keep later
+    automatic reclassification from undoing the decision.
+
+    Raises:
+        UnsafePatternError: If the pattern fails the backtracking guard.
+
+    """
+    pattern = pattern or cluster.suggested_pattern
+    ensure_safe_pattern(pattern)
+    compiled = re.compile(pattern, MATCH_FLAGS)
+    table = Transaction.__table__
+    vendors = Vendor.__table__
+    patterns = VendorPattern.__table__
+
+    pattern_id = connection.execute(
+        insert(patterns)
+        .values(vendor_id=vendor_id, pattern=pattern, source_column=source_column)
+        .returning(patterns.c.id),
+    ).scalar_one()
+    bump_dictionary_version(connection)
+    tiers = connection.execute(
+        select(vendors.c.category_tier_1, vendors.c.category_tier_2).where(
+            vendors.c.id == vendor_id,
+        ),
+    ).one()
+
+    column = table.c[source_column]
+    members = connection.execute(
+        select(
+            table.c.id,
+            column.label("text"),
+            table.c.account_id,
+            table.c.transaction_date,
+            table.c.transaction_type,
+            table.c.category_tier_1,
+            table.c.category_tier_2,
+            table.c.amount,
+        ).where(
+            table.c.id.in_(cluster.transaction_ids),
+            table.c.vendor_id.is_(None),
+            table.c.manually_edited.is_(false()),
+        ),
+    ).all()
+    if not members:
+        return ClusterApproval(pattern_id, 0, 0)
+
+    manual_ids = [
+        row.id
+        for row in members
+        if not compiled.search(fold_description(row.text or ""))
+    ]
+    values = {
+        "vendor_id": vendor_id,
+        "category_tier_1": tiers.category_tier_1,
+        "category_tier_2": tiers.category_tier_2,
+    }
+    if manual_ids:
+        values["manually_edited"] = case(
+            (table.c.id.in_(manual_ids), true()),
+            else_=table.c.manually_edited,
+        )
+    connection.execute(
+        update(table)
+        .where(table.c.id.in_([row.id for row in members]))
+        .values(**values),
+    )
+    deltas = RollupDeltas()
+    for row in members:
+        deltas.move(row._mapping, tiers.category_tier_1, tiers.category_tier_2)  # noqa: SLF001
+    deltas.apply(connection)
+    return ClusterApproval(pattern_id, len(members), len(manual_ids))
@@ -0,0 +1,243 @@
+##: name = description_normalizer.py
+##: description = Batch canonicalization of bank descriptions with precompiled rules
+##: category = etl
+##: usage = normalizer = DescriptionNormalizer()
+##:         normalizer.normalize_many(["POS DEBIT SHELL OIL 57444 10/03"])
+##:         backfill_normalized_descriptions(conn)
+##:         fold_description("shell  oil")  # "SHELL OIL", as patterns see it
+##: behavior = Applies every rule in one combined substitution pass over a whole batch
+##: inputs = raw_description values
+##: outputs = Canonical descriptions stored in normalized_description
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = etl, normalization, vendors
+##: changelog = fold_description replaces classification_cache.normalize_description
+
+"""Shared canonical form for transaction descriptions.
+
+Bank descriptions wrap the merchant name in noise that differs per
+transaction: "POS DEBIT" style prefixes, store numbers, dates and card
+suffixes. ``DescriptionNormalizer`` removes it with an ordered rule list
+compiled into a single alternation, one named group per rule. A batch is
+upper-cased and joined with newlines so the rules run as one ``re.sub``
+pass over the whole batch, followed by one whitespace pass, instead of one
+pass per rule per description.
+
+Python's ``re`` tries every alternative at every position, so the combined
+pattern is prefixed with a lookahead for the characters any rule can start
+with (derived from the parsed rules). Positions that cannot start a rule
+are then rejected with a single character-set test.
+
+The result is stored in ``transactions_normalized.normalized_description``
+by ``backfill_normalized_descriptions`` so it is computed once per row.
+Vendor patterns can target it with ``source_column='normalized_description'``
+and clustering and suggestions read it instead of re-deriving it.
+
+A normalizer without rules only upper-cases and collapses whitespace.
+``fold_description`` applies that to the text of any source column before
+vendor patterns are matched against it, in the classification cache,
+pattern previews, profiling and cluster approval. Stored
+``normalized_description`` values are already in that form.
+"""
+
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from re import _parser  # type: ignore[attr-defined]
+from typing import Any
+
+from sqlalchemy import Connection, bindparam, select, update
+
+from ledgerbase.models import Transaction
+
+NORMALIZED_COLUMN = "normalized_description"
+DEFAULT_BATCH_SIZE = 5_000
+
+
+@dataclass(frozen=True, slots=True)
+class NormalizationRule:
+    """One canonicalization step, matched against upper-cased text.
+
+    Rules must not match a newline, since batches are newline-joined.
+    """
+
+    name: str
+    pattern: str
+    replacement: str = " "
+
+
+DEFAULT_RULES: tuple[NormalizationRule, ...] = (
+    NormalizationRule(
+        "prefix",
+        r"^(?:POS (?:DEBIT|PURCHASE|PUR|WITHDRAWAL)|DEBIT CARD PURCHASE"
+        r"|CHECKCARD(?: +\d{4})?|PURCHASE AUTHORIZED ON +\d{1,2}/\d{1,2}"
+        r"|RECURRING PAYMENT|ACH (?:DEBIT|CREDIT)|DBT CRD +\d{4})\b",
+    ),
+    NormalizationRule("date", r"\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b"),
+    NormalizationRule("phone", r"\b\d{3}[-.]\d{3}[-.]\d{4}\b"),
+    NormalizationRule("card_suffix", r"(?:\bCARD +|\bX+|\*{2,})\d{4}\b"),
+    NormalizationRule("store_number", r"(?:#+ *|\bSTORE +)\d+\b|\b\d{3,}\b"),
+)
+
+_REPEATS = {
+    _parser.MAX_REPEAT,
+    _parser.MIN_REPEAT,
+    getattr(_parser, "POSSESSIVE_REPEAT", _parser.MAX_REPEAT),
+}
+_ZERO_WIDTH = {_parser.AT, _parser.ASSERT, _parser.ASSERT_NOT}
+_CATEGORIES = {
+    _parser.CATEGORY_DIGIT: r"\d",
+    _parser.CATEGORY_SPACE: r"\s",
+    _parser.CATEGORY_WORD: r"\w",
+}
+_SPACES = str.maketrans(dict.fromkeys("\n\r\t\f\v", " "))
+_SPACE_RUNS = re.compile(" {2,}")
+
+
+def _class_items(av: Iterable[tuple[Any, Any]]) -> set[str] | None:
+    found = set()
+    for op, item in av:
+        if op is _parser.LITERAL:
+            found.add(re.escape(chr(item)))
+        elif op is _parser.RANGE:
+            found.add(f"{re.escape(chr(item[0]))}-{re.escape(chr(item[1]))}")
+        elif op is _parser.CATEGORY and item in _CATEGORIES:
+            found.add(_CATEGORIES[item])
+        else:
+            return None
+    return found
+
+
+def _first_chars(items: Iterable[tuple[Any, Any]]) -> set[str] | None:  # noqa: PLR0911
+    """Character-class items one of which starts every match, if known."""
+    for op, av in items:
+        if op in _ZERO_WIDTH:
+            continue
+        if op is _parser.LITERAL:
+            return {re.escape(chr(av))}
+        if op is _parser.IN:
+            return _class_items(av)
+        if op is _parser.SUBPATTERN:
+            return _first_chars(av[-1])
+        if op is _parser.BRANCH:
+            found: set[str] = set()
+            for branch in av[1]:
+                branch_first = _first_chars(branch)
+                if branch_first is None:
+                    return None
+                found |= branch_first
+            return found
+        if op in _REPEATS and av[0] >= 1:
+            return _first_chars(av[2])
+        return None
+    return None
+
+
+class DescriptionNormalizer:
+    """Apply a precompiled rule list to descriptions in batches.
+
+    Args:
+        rules (Sequence[NormalizationRule]): Rules in priority order; at a
+            given position the first listed rule wins.
+
+    """
+
+    def __init__(self, rules: Sequence[NormalizationRule] = DEFAULT_RULES) -> None:
+        self.rules = tuple(rules)
+        self._replacements = {
+            f"r{index}": rule.replacement for index, rule in enumerate(self.rules)
+        }
+        combined = "|".join(
+            f"(?P<r{index}>{rule.pattern})" for index, rule in enumerate(self.rules)
+        )
+        first: set[str] | None = set()
+        for rule in self.rules:
+            rule_first = _first_chars(_parser.parse(rule.pattern, re.MULTILINE))
+            first = None if first is None or rule_first is None else first | rule_first
+        if first:
+            combined = f"(?=[{''.join(sorted(first))}])(?:{combined})"
+        self._combined = re.compile(combined, re.MULTILINE)
+
+    def _replace(self, found: re.Match[str]) -> str:
+        return self._replacements[found.lastgroup or ""]
+
+    def normalize_many(self, descriptions: Iterable[str | None]) -> list[str]:
+        """Normalize a batch with one substitution pass over all of it."""
+        items = [
+            (description or "").translate(_SPACES).strip()
+            for description in descriptions
+        ]
+        if not items:
+            return []
+        text = "\n".join(items).upper()
+        if self.rules:
+            text = self._combined.sub(self._replace, text)
+        text = _SPACE_RUNS.sub(" ", text)
+        return [line.strip(" ") for line in text.split("\n")]
+
+    def normalize(self, description: str | None) -> str:
+        """Normalize a single description."""
+        return self.normalize_many([description])[0]
+
+
+_FOLDER = DescriptionNormalizer(rules=())
+
+
+def fold_description(description: str | None) -> str:
+    """Upper-case ``description`` and collapse its whitespace, as patterns see it."""
+    return _FOLDER.normalize(description)
+
+
+def backfill_normalized_descriptions(
+    connection: Connection,
+    normalizer: DescriptionNormalizer | None = None,
+    *,
+    only_missing: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Store ``normalized_description`` for transactions, keyset-batched by id.
+
+    Args:
+        connection (Connection): Database connection; the caller commits.
+        normalizer (DescriptionNormalizer | None): Normalizer to apply;
+            defaults to the standard rules.
+        only_missing (bool): Skip rows that already have a value. Pass
+            False after changing the rules.
+        batch_size (int): Rows normalized and written per round trip.
+
+    Returns:
+        Number of rows written.
+
+    """
+    normalizer = normalizer or DescriptionNormalizer()
+    table = Transaction.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(normalized_description=bindparam("normalized"))
+    )
+    written = 0
+    last_id = 0
+    while True:
+        query = (
+            select(table.c.id, table.c.raw_description)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        )
+        if only_missing:
+            query = query.where(table.c.normalized_description.is_(None))
+        rows = connection.execute(query).all()
+        if not rows:
+            return written
+        normalized = normalizer.normalize_many(row.raw_description for row in rows)
+        connection.execute(
+            statement,
+            [
+                {"row_id": row.id, "normalized": value}
+                for row, value in zip(rows, normalized, strict=True)
+            ],
+        )
+        written += len(rows)
+        last_id = rows[-1].id
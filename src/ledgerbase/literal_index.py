@@ -0,0 +1,183 @@
+##: name = literal_index.py
+##: description = Required-literal extraction and Aho-Corasick index for vendor patterns
+##: category = etl
+##: usage = literals = extract_required_literals(r"AMAZON\s*MKTP")
+##:         index = AhoCorasick([("AMAZON", 0)]); index.find("AMAZON MKTP")
+##: behavior = Finds the literals a regex needs and scans text for all of them at once
+##: inputs = Regular expression source strings, description text
+##: outputs = Literal alternatives per pattern, candidate pattern keys per text
+##: dependencies = none
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, regex, classification, index
+##: changelog = Initial version
+
+"""Literal prefiltering for the vendor matcher.
+
+Most vendor patterns can only match when some fixed string occurs in the
+description ("AMAZON", "SHELL OIL"). ``extract_required_literals`` walks the
+parsed regex to find such literals and ``AhoCorasick`` scans a description
+for every indexed literal in one pass, so only patterns whose literals are
+present need their full regex evaluated.
+
+Literals are upper-cased ASCII and are compared against the upper-cased
+description. For ASCII text that keeps the filter a superset of
+case-insensitive regex matching; callers must bypass the filter for
+non-ASCII descriptions.
+"""
+
+import re
+from collections import deque
+from collections.abc import Hashable, Iterable
+from re import _parser  # type: ignore[attr-defined]
+from typing import Any
+
+MIN_LITERAL_LENGTH = 3
+
+_REPEATS = {
+    _parser.MAX_REPEAT,
+    _parser.MIN_REPEAT,
+    getattr(_parser, "POSSESSIVE_REPEAT", _parser.MAX_REPEAT),
+}
+_ZERO_WIDTH = {_parser.AT}
+_PRINTABLE_ASCII = range(0x20, 0x7F)
+
+
+def _better(
+    current: list[str] | None,
+    candidate: list[str] | None,
+) -> list[str] | None:
+    """Prefer the alternative set whose shortest literal is longest."""
+    if not candidate:
+        return current
+    if current is None:
+        return candidate
+    if (min(map(len, candidate)), -len(candidate)) > (
+        min(map(len, current)),
+        -len(current),
+    ):
+        return candidate
+    return current
+
+
+def _flatten(items: Iterable[tuple[Any, Any]]) -> list[tuple[Any, Any]]:
+    """Inline group contents so literals stay contiguous across groups."""
+    flat: list[tuple[Any, Any]] = []
+    for op, av in items:
+        if op is _parser.SUBPATTERN:
+            flat.extend(_flatten(av[-1]))
+        else:
+            flat.append((op, av))
+    return flat
+
+
+def _required(items: Iterable[tuple[Any, Any]]) -> list[str] | None:
+    """Return literals one of which must occur for ``items`` to match."""
+    best: list[str] | None = None
+    run: list[str] = []
+
+    for op, av in _flatten(items):
+        if op is _parser.LITERAL and av in _PRINTABLE_ASCII:
+            run.append(chr(av).upper())
+            continue
+        if op in _ZERO_WIDTH:
+            continue
+        best = _better(best, ["".join(run)] if run else None)
+        run = []
+        if op is _parser.BRANCH:
+            branches = [_required(branch) for branch in av[1]]
+            if all(branches):
+                best = _better(best, sorted({lit for b in branches for lit in b}))
+        elif op in _REPEATS and av[0] >= 1:
+            best = _better(best, _required(av[2]))
+
+    return _better(best, ["".join(run)] if run else None)
+
+
+def extract_required_literals(pattern: str, flags: int = 0) -> list[str] | None:
+    """Extract literals such that any match of ``pattern`` contains one of them.
+
+    Args:
+        pattern (str): Regular expression source.
+        flags (int): ``re`` flags the pattern is compiled with.
+
+    Returns:
+        Upper-cased literal alternatives, or ``None`` when the pattern has no
+        literal of at least ``MIN_LITERAL_LENGTH`` characters (or fails to
+        parse) and must therefore always be evaluated.
+
+    """
+    try:
+        parsed = _parser.parse(pattern, flags)
+    except (re.error, OverflowError, RecursionError):
+        return None
+    literals = _required(parsed)
+    if not literals or min(map(len, literals)) < MIN_LITERAL_LENGTH:
+        return None
+    return literals
+
+
+class AhoCorasick:
+    """Multi-literal string index answering "which keys occur in this text".
+
+    Args:
+        entries (Iterable[tuple[str, Hashable]]): ``(literal, key)`` pairs.
+            A key may be registered under several literals.
+
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, Hashable]] = ()) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[frozenset[Hashable]] = [frozenset()]
+        pending: dict[int, set[Hashable]] = {}
+
+        for literal, key in entries:
+            node = 0
+            for char in literal:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(frozenset())
+                node = child
+            pending.setdefault(node, set()).add(key)
+
+        self._build(pending)
+
+    def _build(self, pending: dict[int, set[Hashable]]) -> None:
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._out[node] = frozenset(pending.get(node, ()))
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target
+                self._out[child] = (
+                    frozenset(pending.get(child, ())) | self._out[self._fail[child]]
+                )
+                queue.append(child)
+
+    def __len__(self) -> int:
+        """Number of trie states, including the root."""
+        return len(self._goto)
+
+    def find(self, text: str) -> set[Hashable]:
+        """Return the keys of every literal that occurs in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[Hashable] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
@@ -0,0 +1,310 @@
+##: name = matcher_artifact.py
+##: description = Versioned on-disk artifact holding a fully built VendorMatcher
+##: category = etl
+##: usage = matcher = load_or_build(conn, artifact_dir, dictionary_version(conn))
+##: behavior = Loads the matcher through mmap; rebuilds only when the dictionary changes
+##: inputs = vendor_patterns rows, dictionary version, artifact directory
+##: outputs = vendor_matcher-<version>.bin files and loaded VendorMatcher objects
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, classification, cache, deployment
+##: changelog = Keep the previous artifact version for workers still on it
+
+"""Prebuilt vendor matcher shared by every worker process.
+
+Building a ``VendorMatcher`` for a large dictionary means parsing every
+pattern for its required literals, building the Aho-Corasick tables and
+compiling the per-tier alternations, and each worker process used to repeat
+that on startup. ``write_artifact`` instead compiles every partition once
+and stores the result as ``vendor_matcher-<dictionary version>.bin``:
+
+* an 8 byte magic string,
+* a 4 byte big-endian length followed by a JSON header (artifact format,
+  Python version, dictionary version, match timeout, pattern count),
+* the matcher pickled with protocol 5.
+
+``load_artifact`` maps the file with ``mmap`` and unpickles straight from
+the mapping, so the page cache holds one copy of the file however many
+processes read it. The header is checked before the payload is touched;
+an artifact from another format, Python version or timeout setting is
+treated as stale. ``load_or_build`` rebuilds only when no artifact exists
+for the current dictionary version, writing it atomically so concurrent
+workers never read a partial file. Writing keeps the ``KEEP_VERSIONS``
+newest artifacts, so workers that have not seen the dictionary change yet
+still find theirs instead of each rebuilding it.
+
+Python cannot serialize compiled regular expression programs. Literal
+extraction, partitioning and the Aho-Corasick tables come from the file as
+built; the per-tier alternations are recompiled on load, and indexed
+patterns only when one of their literals first occurs in a description.
+
+``create_app`` calls ``preload_matcher`` (through
+``classification_cache.init_classifier``) when ``MATCHER_ARTIFACT_DIR`` is
+set; under ``gunicorn --preload ledgerbase.wsgi:app`` that runs in the
+master before workers fork. It loads the artifact and moves every object
+allocated so far into the permanent generation with ``gc.freeze()``, so
+the collector never writes to those pages and the forked workers keep
+sharing them copy-on-write.
+
+Artifacts are pickles: only point the artifact directory at a location the
+application itself writes.
+"""
+
+import gc
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from sqlalchemy import Connection
+
+from ledgerbase.vendor_matcher import VendorMatcher, load_pattern_specs
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MAGIC = b"LBMATCH\x00"
+ARTIFACT_PREFIX = "vendor_matcher-"
+ARTIFACT_SUFFIX = ".bin"
+# Artifacts kept per directory: the current version and the one before it.
+KEEP_VERSIONS = 2
+
+_LENGTH = struct.Struct(">I")
+_PYTHON_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+class ArtifactError(ValueError):
+    """Raised when an artifact file is missing, corrupt or incompatible."""
+
+
+@dataclass(frozen=True, slots=True)
+class ArtifactHeader:
+    """Metadata stored in front of the pickled matcher."""
+
+    dictionary_version: str
+    pattern_count: int
+    timeout: float | None = None
+    format_version: int = FORMAT_VERSION
+    python_version: str = _PYTHON_VERSION
+
+    def compatible(self, timeout: float | None = None) -> bool:
+        """True when this process can load the artifact as built."""
+        return (
+            self.format_version == FORMAT_VERSION
+            and self.python_version == _PYTHON_VERSION
+            and self.timeout == timeout
+        )
+
+
+def artifact_path(directory: str | os.PathLike[str], version: str) -> Path:
+    """Location of the artifact for one dictionary version."""
+    return Path(directory) / f"{ARTIFACT_PREFIX}{version}{ARTIFACT_SUFFIX}"
+
+
+def write_artifact(
+    matcher: VendorMatcher,
+    version: str,
+    directory: str | os.PathLike[str],
+) -> Path:
+    """Compile every partition of ``matcher`` and store it on disk.
+
+    The file is written next to its final name and renamed into place, and
+    artifacts for other dictionary versions are removed afterwards.
+
+    Args:
+        matcher (VendorMatcher): Matcher to store.
+        version (str): Dictionary version the matcher was built from.
+        directory (str | os.PathLike[str]): Artifact directory; created if
+            missing.
+
+    Returns:
+        Path of the written artifact.
+
+    """
+    matcher.compile_all()
+    header = ArtifactHeader(
+        dictionary_version=version,
+        pattern_count=len(matcher),
+        timeout=matcher.timeout,
+    )
+    encoded = json.dumps(asdict(header), sort_keys=True).encode()
+    payload = pickle.dumps(matcher, protocol=5)
+
+    target = artifact_path(directory, version)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as stream:
+            stream.write(MAGIC)
+            stream.write(_LENGTH.pack(len(encoded)))
+            stream.write(encoded)
+            stream.write(payload)
+            stream.flush()
+            os.fsync(stream.fileno())
+        Path(temporary).replace(target)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+
+    _prune(target)
+    return target
+
+
+def _modified(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _prune(current: Path) -> None:
+    """Remove all but the ``KEEP_VERSIONS`` newest artifacts beside ``current``."""
+    others = sorted(
+        (
+            path
+            for path in current.parent.glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}")
+            if path != current
+        ),
+        key=_modified,
+        reverse=True,
+    )
+    for stale in others[KEEP_VERSIONS - 1 :]:
+        stale.unlink(missing_ok=True)
+
+
+def _parse_header(mapped: mmap.mmap) -> tuple[ArtifactHeader, int]:
+    """Decode the header and return it with the offset of the payload."""
+    start = len(MAGIC) + _LENGTH.size
+    if len(mapped) < start or mapped[: len(MAGIC)] != MAGIC:
+        msg = "Not a vendor matcher artifact"
+        raise ArtifactError(msg)
+    (length,) = _LENGTH.unpack_from(mapped, len(MAGIC))
+    try:
+        fields = json.loads(mapped[start : start + length])
+        header = ArtifactHeader(**fields)
+    except (ValueError, TypeError) as exc:
+        msg = f"Corrupt artifact header: {exc}"
+        raise ArtifactError(msg) from exc
+    return header, start + length
+
+
+def read_header(path: str | os.PathLike[str]) -> ArtifactHeader:
+    """Read only the header of an artifact.
+
+    Raises:
+        ArtifactError: If the file is missing or not an artifact.
+
+    """
+    try:
+        with (
+            Path(path).open("rb") as stream,
+            mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            return _parse_header(mapped)[0]
+    except ArtifactError:
+        raise
+    except (OSError, ValueError) as exc:
+        msg = f"Cannot read artifact {path}: {exc}"
+        raise ArtifactError(msg) from exc
+
+
+def _unpickle(path: str | os.PathLike[str]) -> tuple[ArtifactHeader, object]:
+    with (
+        Path(path).open("rb") as stream,
+        mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+    ):
+        header, offset = _parse_header(mapped)
+        with memoryview(mapped) as view:
+            # The artifact directory is written only by this application.
+            return header, pickle.loads(view[offset:])
+
+
+def load_artifact(
+    path: str | os.PathLike[str],
+    timeout: float | None = None,
+) -> tuple[ArtifactHeader, VendorMatcher]:
+    """Load a matcher from an artifact through a read-only memory map.
+
+    Args:
+        path (str | os.PathLike[str]): Artifact file.
+        timeout (float | None): Match timeout the caller expects; an
+            artifact built with another setting is rejected.
+
+    Returns:
+        The artifact header and the loaded matcher.
+
+    Raises:
+        ArtifactError: If the file is missing, corrupt or incompatible.
+
+    """
+    header = read_header(path)
+    if not header.compatible(timeout):
+        msg = f"Incompatible artifact {path}: {header}"
+        raise ArtifactError(msg)
+    try:
+        header, matcher = _unpickle(path)
+    except ArtifactError:
+        raise
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError) as exc:
+        msg = f"Cannot load artifact {path}: {exc}"
+        raise ArtifactError(msg) from exc
+    if not isinstance(matcher, VendorMatcher):
+        msg = f"Artifact {path} does not contain a VendorMatcher"
+        raise ArtifactError(msg)
+    return header, matcher
+
+
+def load_or_build(
+    connection: Connection,
+    directory: str | os.PathLike[str],
+    version: str,
+    *,
+    timeout: float | None = None,
+) -> VendorMatcher:
+    """Load the artifact for ``version``, building it first if needed.
+
+    Args:
+        connection (Connection): Database connection to read patterns from
+            when the artifact has to be built.
+        directory (str | os.PathLike[str]): Artifact directory.
+        version (str): Current dictionary version, see
+            ``ledgerbase.classification_cache.dictionary_version``.
+        timeout (float | None): Per-search match timeout, see
+            ``VendorMatcher``.
+
+    """
+    path = artifact_path(directory, version)
+    try:
+        return load_artifact(path, timeout)[1]
+    except ArtifactError as exc:
+        if path.exists():
+            logger.warning("Rebuilding vendor matcher artifact: %s", exc)
+    matcher = VendorMatcher(load_pattern_specs(connection), timeout=timeout)
+    write_artifact(matcher, version, directory)
+    return matcher
+
+
+def preload_matcher(
+    connection: Connection,
+    directory: str | os.PathLike[str],
+    version: str,
+    *,
+    timeout: float | None = None,
+) -> VendorMatcher:
+    """Load the matcher in a preforking master and freeze it for sharing.
+
+    Call once before workers fork; the returned matcher and everything
+    loaded before it is excluded from garbage collection so its memory
+    pages stay shared copy-on-write.
+    """
+    matcher = load_or_build(connection, directory, version, timeout=timeout)
+    gc.collect()
+    gc.freeze()
+    return matcher
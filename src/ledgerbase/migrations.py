@@ -0,0 +1,199 @@
+##: name = migrations.py
+##: description = Ordered SQL migration runner tracked in a schema_migrations table
+##: category = database
+##: usage = applied = apply_migrations(db.engine)
+##: behavior = Applies pending schema/migrations/NNNN_*.sql files once each, in order
+##: inputs = SQL files under src/schema/migrations, SQLAlchemy engine
+##: outputs = Applied schema changes and schema_migrations rows
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = database, schema, migrations
+##: changelog = Keep SQLite trigger bodies in one statement
+
+"""Managed schema migrations for existing databases.
+
+``src/schema/init.sql`` creates a fresh database. Databases that already
+hold data are brought forward by numbered files in ``src/schema/migrations``
+(``0001_description.sql``), each applied once and recorded in
+``schema_migrations``.
+
+A migration normally runs in a single transaction together with its
+bookkeeping row. Files containing the ``-- migrate: no-transaction``
+directive run statement by statement in autocommit mode instead, which
+``CREATE INDEX CONCURRENTLY`` requires on PostgreSQL. Such migrations must
+be written to be safely re-run (``IF NOT EXISTS``), since a failure part
+way through leaves earlier statements applied.
+
+SQLite has no concurrent index builds, so ``CONCURRENTLY`` is removed from
+statements before they run there; everything else is executed as written.
+Python's SQLite driver commits DDL as it runs, so on SQLite only data
+changes of a failed migration are rolled back. A file marked
+``-- migrate: postgresql-only`` (or another dialect name) is recorded as
+applied without running anything on other databases.
+
+Statements are split on semicolons at the end of a line outside ``$$``
+quoted bodies and SQLite trigger bodies (a line ending in ``BEGIN``
+through a line ``END;``), so a migration must not contain multi-line
+string literals ending in one.
+"""
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sqlalchemy import Connection, Engine, text
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "schema" / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_CONCURRENTLY = re.compile(r"\s+CONCURRENTLY\b", re.IGNORECASE)
+_STATEMENT_END = re.compile(r";\s*$")
+_TRIGGER_BEGIN = re.compile(r"\bBEGIN\s*$", re.IGNORECASE)
+_TRIGGER_END = re.compile(r"^\s*END\s*;\s*$", re.IGNORECASE)
+_DIALECT_ONLY = re.compile(r"^-- migrate: (\w+)-only\s*$", re.MULTILINE)
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    """One migration file."""
+
+    version: int
+    name: str
+    sql: str = field(repr=False)
+
+    @property
+    def transactional(self) -> bool:
+        """False when the file asks to run outside a transaction."""
+        return NO_TRANSACTION not in self.sql
+
+    @property
+    def dialect(self) -> str | None:
+        """Dialect the file is restricted to, if any."""
+        found = _DIALECT_ONLY.search(self.sql)
+        return found.group(1) if found else None
+
+    def statements(self, dialect: str) -> list[str]:
+        """Split the file into statements adapted to ``dialect``.
+
+        Statements end with a semicolon at the end of a line, except inside
+        dollar-quoted bodies (``$$ ... $$``) of functions and ``DO`` blocks
+        and inside ``BEGIN ... END;`` bodies of SQLite triggers.
+        Returns no statements when the file is restricted to another dialect.
+        """
+        if self.dialect not in {None, dialect}:
+            return []
+        statements: list[str] = []
+        current: list[str] = []
+        quoted = trigger = False
+        for line in self.sql.splitlines():
+            if not current and (not line.strip() or line.lstrip().startswith("--")):
+                continue
+            current.append(line)
+            quoted ^= line.count("$$") % 2 == 1
+            if not quoted and _TRIGGER_BEGIN.search(line):
+                trigger = True
+            elif trigger and _TRIGGER_END.match(line):
+                trigger = False
+            if not quoted and not trigger and _STATEMENT_END.search(line):
+                statement = "\n".join(current).strip()
+                statements.append(statement.removesuffix(";").rstrip())
+                current = []
+        if "\n".join(current).strip():
+            statements.append("\n".join(current).strip())
+        if dialect == "sqlite":
+            statements = [_CONCURRENTLY.sub("", statement) for statement in statements]
+        return statements
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Load every migration file in ``directory``, ordered by version.
+
+    Raises:
+        ValueError: If two files share a version number.
+
+    """
+    migrations: dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        found = _FILENAME.match(path.name)
+        if found is None:
+            continue
+        version = int(found.group(1))
+        if version in migrations:
+            msg = f"Duplicate migration version {version}: {path.name}"
+            raise ValueError(msg)
+        migrations[version] = Migration(version, found.group(2), path.read_text())
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def _ensure_table(connection: Connection) -> None:
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+        ),
+    )
+
+
+def _record(connection: Connection, migration: Migration) -> None:
+    connection.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name},
+    )
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    """Versions already recorded in ``schema_migrations``."""
+    with engine.begin() as connection:
+        _ensure_table(connection)
+        rows = connection.execute(text("SELECT version FROM schema_migrations"))
+        return {row.version for row in rows}
+
+
+def pending_migrations(
+    engine: Engine,
+    directory: Path = MIGRATIONS_DIR,
+) -> list[Migration]:
+    """Migrations in ``directory`` that have not been applied yet."""
+    applied = applied_versions(engine)
+    return [
+        migration
+        for migration in discover_migrations(directory)
+        if migration.version not in applied
+    ]
+
+
+def apply_migrations(
+    engine: Engine,
+    directory: Path = MIGRATIONS_DIR,
+) -> list[Migration]:
+    """Apply every pending migration in version order.
+
+    Args:
+        engine (Engine): Engine for the database to migrate.
+        directory (Path): Directory holding the migration files.
+
+    Returns:
+        The migrations that were applied.
+
+    """
+    dialect = engine.dialect.name
+    applied = []
+    for migration in pending_migrations(engine, directory):
+        statements = migration.statements(dialect)
+        if migration.transactional:
+            with engine.begin() as connection:
+                for statement in statements:
+                    connection.execute(text(statement))
+                _record(connection, migration)
+        else:
+            with engine.connect() as raw:
+                connection = raw.execution_options(isolation_level="AUTOCOMMIT")
+                for statement in statements:
+                    connection.execute(text(statement))
+                _record(connection, migration)
+        applied.append(migration)
+    return applied
@@ -7,10 +7,13 @@
 ##: outputs = none
 ##: dependencies = SQLAlchemy
 ##: author = LedgerBase Team
-##: last_modified = 2023-11-15
-##: changelog = Initial version
+##: last_modified = 2026-10-19
+##: changelog = SQLite FTS5 trigram index created with transactions_normalized
+
+from sqlalchemy import DDL, event
 
 from ledgerbase import db  # Fully-qualified import for clarity and typing
+from ledgerbase.trigram_index import SQLITE_TRIGRAM_DDL
 
 """Database models module for LedgerBase.
 
@@ -39,3 +42,580 @@ class ExampleModel(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
+
+
+class Institution(db.Model):
+    """Financial institution that holds one or more accounts.
+
+    Attributes:
+        id (int): Primary key identifier.
+        name (str): Unique institution name.
+        plaid_institution_id (str): Plaid identifier, if linked through Plaid.
+        created_at (datetime): Row creation timestamp.
+
+    """
+
+    __tablename__ = "institutions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.Text, nullable=False, unique=True)
+    plaid_institution_id = db.Column(db.Text, unique=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class Account(db.Model):
+    """Bank, card or investment account at an institution.
+
+    Attributes:
+        id (int): Primary key identifier.
+        institution_id (int): Owning institution.
+        name (str): Display name of the account.
+        plaid_account_id (str): Plaid identifier, if linked through Plaid.
+        account_number_suffix (str): Last digits of the account number.
+        type (str): Account type (e.g. depository, credit).
+        subtype (str): Account subtype (e.g. checking, savings).
+        created_at (datetime): Row creation timestamp.
+
+    """
+
+    __tablename__ = "accounts"
+
+    id = db.Column(db.Integer, primary_key=True)
+    institution_id = db.Column(
+        db.Integer,
+        db.ForeignKey("institutions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    name = db.Column(db.Text, nullable=False)
+    plaid_account_id = db.Column(db.Text, unique=True)
+    account_number_suffix = db.Column(db.Text)
+    type = db.Column(db.Text, nullable=False)
+    subtype = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class Vendor(db.Model):
+    """Canonical vendor entry in the vendor dictionary.
+
+    Attributes:
+        id (int): Primary key identifier.
+        name (str): Unique display name of the vendor.
+        category_tier_1 (str): Top-level category assigned to the vendor.
+        category_tier_2 (str): Second-level category assigned to the vendor.
+        is_creditor (bool): Whether the vendor is a creditor (debt linking).
+        created_at (datetime): Row creation timestamp.
+
+    """
+
+    __tablename__ = "vendors"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.Text, nullable=False, unique=True)
+    category_tier_1 = db.Column(db.Text, nullable=False)
+    category_tier_2 = db.Column(db.Text, nullable=False)
+    is_creditor = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class VendorPattern(db.Model):
+    """Regex pattern that maps a transaction description to a vendor.
+
+    Attributes:
+        id (int): Primary key identifier.
+        vendor_id (int): Vendor assigned when the pattern matches.
+        pattern (str): Python regular expression, matched case-insensitively.
+        source_column (str): Transaction column the pattern is evaluated on.
+        institution_id (int): Institution whose transactions the pattern is
+            limited to, or None for a pattern that applies everywhere.
+        priority (int): Higher values win when several patterns match.
+        created_at (datetime): Row creation timestamp.
+
+    """
+
+    __tablename__ = "vendor_patterns"
+    __table_args__ = (db.UniqueConstraint("vendor_id", "pattern"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    vendor_id = db.Column(
+        db.Integer,
+        db.ForeignKey("vendors.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    pattern = db.Column(db.Text, nullable=False)
+    source_column = db.Column(db.Text, nullable=False)
+    institution_id = db.Column(
+        db.Integer,
+        db.ForeignKey("institutions.id", ondelete="CASCADE"),
+    )
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class DictionaryVersion(db.Model):
+    """Single-row counter of changes to ``vendors`` and ``vendor_patterns``.
+
+    Attributes:
+        id (int): Always 1.
+        version (int): Incremented by every change.
+
+    """
+
+    __tablename__ = "dictionary_version"
+    __table_args__ = (db.CheckConstraint("id = 1"),)
+
+    id = db.Column(db.Integer, primary_key=True, default=1)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+
+
+class Transaction(db.Model):
+    """Normalized transaction imported from an institution.
+
+    Attributes:
+        id (int): Primary key identifier.
+        account_id (int): Account the transaction was recorded in.
+        vendor_id (int): Classified vendor, or None while unmatched.
+        raw_description (str): Description as delivered by the institution.
+        normalized_description (str): Canonical form of raw_description
+            with prefixes, store numbers, dates and card suffixes removed.
+        parsed_vendor (str): Vendor name parsed by the importer, if any.
+        amount (Decimal): Signed transaction amount.
+        transaction_date (date): Date the transaction occurred.
+        posted_date (date): Date the transaction posted.
+        transaction_type (str): One of income, expense or transfer.
+        tag (str): Free-form label.
+        comment (str): Free-form comment.
+        person (str): Household member the transaction is attributed to.
+        category_tier_1 (str): Top-level category.
+        category_tier_2 (str): Second-level category.
+        source_file (str): Import file the row came from.
+        manually_edited (bool): Vendor or category was set by a person and
+            must not be changed by automatic reclassification.
+        created_at (datetime): Row creation timestamp.
+
+    On PostgreSQL ``transactions_normalized`` is a view over the compact
+    ``transaction_facts`` table (integer cents, type codes and ``Category``
+    and ``SourceFile`` ids); triggers on the view translate writes, so the
+    columns here are used unchanged. Other databases store them as-is.
+
+    """
+
+    __tablename__ = "transactions_normalized"
+    __table_args__ = (
+        db.CheckConstraint(
+            "transaction_type IN ('income', 'expense', 'transfer')",
+            name="transactions_normalized_transaction_type_check",
+        ),
+        db.Index(
+            "transactions_normalized_account_date_idx",
+            "account_id",
+            "transaction_date",
+        ),
+        db.Index(
+            "transactions_normalized_category_date_idx",
+            "category_tier_1",
+            "category_tier_2",
+            "transaction_date",
+        ),
+        db.Index(
+            "transactions_normalized_unmatched_idx",
+            "id",
+            postgresql_where=db.text("vendor_id IS NULL"),
+            sqlite_where=db.text("vendor_id IS NULL"),
+        ),
+        db.Index(
+            "transactions_normalized_date_id_idx",
+            "transaction_date",
+            "id",
+        ),
+        db.Index(
+            "transactions_normalized_unmatched_date_idx",
+            "transaction_date",
+            "id",
+            postgresql_where=db.text("vendor_id IS NULL"),
+            sqlite_where=db.text("vendor_id IS NULL"),
+        ),
+        db.Index(
+            "transactions_normalized_vendor_date_idx",
+            "vendor_id",
+            "transaction_date",
+            "id",
+            postgresql_where=db.text("vendor_id IS NOT NULL"),
+            sqlite_where=db.text("vendor_id IS NOT NULL"),
+        ),
+        db.Index(
+            "transactions_normalized_tag_date_idx",
+            "tag",
+            "transaction_date",
+            "id",
+            postgresql_where=db.text("tag IS NOT NULL"),
+            sqlite_where=db.text("tag IS NOT NULL"),
+        ),
+        db.Index(
+            "transactions_normalized_person_date_idx",
+            "person",
+            "transaction_date",
+            "id",
+            postgresql_where=db.text("person IS NOT NULL"),
+            sqlite_where=db.text("person IS NOT NULL"),
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    vendor_id = db.Column(db.Integer, db.ForeignKey("vendors.id"))
+    raw_description = db.Column(db.Text, nullable=False)
+    normalized_description = db.Column(db.Text)
+    parsed_vendor = db.Column(db.Text)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    transaction_date = db.Column(db.Date, nullable=False)
+    posted_date = db.Column(db.Date)
+    transaction_type = db.Column(db.Text, nullable=False)
+    tag = db.Column(db.Text)
+    comment = db.Column(db.Text)
+    person = db.Column(db.Text)
+    category_tier_1 = db.Column(db.Text)
+    category_tier_2 = db.Column(db.Text)
+    source_file = db.Column(db.Text)
+    manually_edited = db.Column(
+        db.Boolean,
+        nullable=False,
+        default=False,
+        server_default=db.false(),
+    )
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+# SQLite substitute for the pg_trgm indexes (see ledgerbase.trigram_index).
+for _statement in SQLITE_TRIGRAM_DDL:
+    event.listen(
+        Transaction.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+
+
+class MonthlyRollup(db.Model):
+    """Transaction totals per account, month, type and category.
+
+    Maintained incrementally by ``ledgerbase.rollups`` so reports read a
+    few aggregate rows instead of scanning ``transactions_normalized``.
+
+    Attributes:
+        account_id (int): Account the transactions belong to.
+        month (date): First day of the transaction month.
+        transaction_type (str): One of income, expense or transfer.
+        category_tier_1 (str): Top-level category, '' when uncategorized.
+        category_tier_2 (str): Second-level category, '' when uncategorized.
+        total_amount (Decimal): Sum of signed amounts.
+        transaction_count (int): Number of transactions summed.
+
+    """
+
+    __tablename__ = "monthly_rollups"
+
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    month = db.Column(db.Date, primary_key=True)
+    transaction_type = db.Column(db.Text, primary_key=True)
+    category_tier_1 = db.Column(db.Text, primary_key=True, server_default="")
+    category_tier_2 = db.Column(db.Text, primary_key=True, server_default="")
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, server_default="0")
+    transaction_count = db.Column(db.Integer, nullable=False, server_default="0")
+
+
+class Category(db.Model):
+    """Distinct category pair referenced by compact transaction rows.
+
+    Attributes:
+        id (int): Primary key identifier.
+        tier_1 (str): Top-level category.
+        tier_2 (str): Second-level category, '' when only tier 1 is set.
+
+    """
+
+    __tablename__ = "categories"
+    __table_args__ = (db.UniqueConstraint("tier_1", "tier_2"),)
+
+    id = db.Column(db.SmallInteger, primary_key=True)
+    tier_1 = db.Column(db.Text, nullable=False)
+    tier_2 = db.Column(db.Text, nullable=False, server_default="")
+
+
+class SourceFile(db.Model):
+    """Import file referenced by compact transaction rows.
+
+    Attributes:
+        id (int): Primary key identifier.
+        name (str): File name as recorded by the importer.
+
+    """
+
+    __tablename__ = "source_files"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.Text, nullable=False, unique=True)
+
+
+class TransactionArchive(db.Model):
+    """Closed year whose transactions were moved to a Parquet archive.
+
+    Written by ``ledgerbase.archive`` in the transaction that removes the
+    year's rows from ``transactions_normalized``.
+
+    Attributes:
+        year (int): Calendar year archived.
+        row_count (int): Number of transactions written to the archive.
+        total_amount (Decimal): Sum of their signed amounts.
+        path (str): Parquet file holding the year.
+        archived_at (datetime): When the year was archived.
+
+    """
+
+    __tablename__ = "transaction_archives"
+
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False)
+    path = db.Column(db.Text, nullable=False)
+    archived_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class BudgetEntry(db.Model):
+    """Amount budgeted for one category in one month.
+
+    Compared with the expense totals in ``monthly_rollups`` by
+    ``ledgerbase.budget_engine``.
+
+    Attributes:
+        id (int): Primary key identifier.
+        month (date): First day of the budgeted month.
+        category_tier_1 (str): Top-level category.
+        category_tier_2 (str): Second-level category, '' for the tier-1
+            category's uncategorized spending.
+        amount (Decimal): Amount budgeted for spending in the month.
+        rollover (bool): Unspent (or overspent) amounts carry into this
+            month from the previous one instead of resetting; savings
+            categories set it.
+        manually_edited (bool): Set by a person rather than cloned from
+            the previous month; cloning leaves it alone.
+        created_at (datetime): Row creation timestamp.
+
+    """
+
+    __tablename__ = "budget_entries"
+    __table_args__ = (
+        db.UniqueConstraint("month", "category_tier_1", "category_tier_2"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, nullable=False)
+    category_tier_1 = db.Column(db.Text, nullable=False)
+    category_tier_2 = db.Column(db.Text, nullable=False, server_default="")
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    rollover = db.Column(
+        db.Boolean,
+        nullable=False,
+        default=False,
+        server_default=db.false(),
+    )
+    manually_edited = db.Column(
+        db.Boolean,
+        nullable=False,
+        default=False,
+        server_default=db.false(),
+    )
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class BudgetBalance(db.Model):
+    """Stored rollover balance of one category in one month.
+
+    Maintained by ``ledgerbase.budget_balances`` from the months marked in
+    ``BudgetDirty`` onward.
+
+    Attributes:
+        category_tier_1 (str): Top-level category.
+        category_tier_2 (str): Second-level category, '' when empty.
+        month (date): First day of the month.
+        budget (Decimal): Amount budgeted.
+        actual (Decimal): Amount spent.
+        carry_in (Decimal): Balance carried in from the previous month.
+        balance (Decimal): Closing balance, carried into the next month
+            when it rolls over.
+
+    """
+
+    __tablename__ = "budget_balances"
+
+    category_tier_1 = db.Column(db.Text, primary_key=True)
+    category_tier_2 = db.Column(db.Text, primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    budget = db.Column(db.Numeric(14, 2), nullable=False, server_default="0")
+    actual = db.Column(db.Numeric(14, 2), nullable=False, server_default="0")
+    carry_in = db.Column(db.Numeric(14, 2), nullable=False, server_default="0")
+    balance = db.Column(db.Numeric(14, 2), nullable=False, server_default="0")
+
+
+class BudgetDirty(db.Model):
+    """Earliest month whose stored balances are stale, per category.
+
+    Attributes:
+        category_tier_1 (str): Top-level category.
+        category_tier_2 (str): Second-level category, '' when empty.
+        month (date): First month to recompute.
+
+    """
+
+    __tablename__ = "budget_dirty"
+
+    category_tier_1 = db.Column(db.Text, primary_key=True)
+    category_tier_2 = db.Column(db.Text, primary_key=True)
+    month = db.Column(db.Date, nullable=False)
+
+
+class BudgetVersion(db.Model):
+    """One change set of ``budget_entries``.
+
+    Attributes:
+        id (int): Version number, increasing with every change set.
+        note (str): What made the change, such as ``clone 2026-03``.
+        created_at (datetime): When the change was made.
+
+    """
+
+    __tablename__ = "budget_versions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    note = db.Column(db.Text, nullable=False, server_default="")
+    created_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        server_default=db.func.current_timestamp(),
+    )
+
+
+class BudgetEntryChange(db.Model):
+    """Value a budget entry took in a version.
+
+    Attributes:
+        id (int): Primary key identifier; orders changes within a version.
+        version_id (int): Version making the change.
+        month (date): First day of the budgeted month.
+        category_tier_1 (str): Top-level category.
+        category_tier_2 (str): Second-level category, '' when empty.
+        amount (Decimal): Amount budgeted after the change.
+        rollover (bool): Rollover flag after the change.
+        manually_edited (bool): Whether a person set the entry, as opposed
+            to cloning.
+
+    """
+
+    __tablename__ = "budget_entry_changes"
+    __table_args__ = (
+        db.Index(
+            "budget_entry_changes_category_version_idx",
+            "category_tier_1",
+            "category_tier_2",
+            "version_id",
+        ),
+        db.Index("budget_entry_changes_version_idx", "version_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    version_id = db.Column(
+        db.Integer,
+        db.ForeignKey("budget_versions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    month = db.Column(db.Date, nullable=False)
+    category_tier_1 = db.Column(db.Text, nullable=False)
+    category_tier_2 = db.Column(db.Text, nullable=False)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    rollover = db.Column(db.Boolean, nullable=False)
+    manually_edited = db.Column(db.Boolean, nullable=False)
+
+
+class BudgetSnapshot(db.Model):
+    """Full copy of ``budget_entries`` as of a version.
+
+    Written every ``ledgerbase.budget_versions.SNAPSHOT_EVERY`` versions so
+    reconstructing a version replays a bounded number of changes.
+
+    Attributes:
+        version_id (int): Version the copy was taken after.
+        month (date): First day of the budgeted month.
+        category_tier_1 (str): Top-level category.
+        category_tier_2 (str): Second-level category, '' when empty.
+        amount (Decimal): Amount budgeted.
+        rollover (bool): Rollover flag.
+        manually_edited (bool): Manual override flag.
+
+    """
+
+    __tablename__ = "budget_snapshots"
+
+    version_id = db.Column(
+        db.Integer,
+        db.ForeignKey("budget_versions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    month = db.Column(db.Date, primary_key=True)
+    category_tier_1 = db.Column(db.Text, primary_key=True)
+    category_tier_2 = db.Column(db.Text, primary_key=True)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    rollover = db.Column(db.Boolean, nullable=False)
+    manually_edited = db.Column(db.Boolean, nullable=False)
+
+
+class AccountBalance(db.Model):
+    """Balance of an account reported on a date.
+
+    Attributes:
+        account_id (int): Account the balance belongs to.
+        as_of (date): Date the balance was reported for.
+        balance (Decimal): Current balance on that date.
+        created_at (datetime): Row creation timestamp.
+
+    """
+
+    __tablename__ = "account_balances"
+
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    as_of = db.Column(db.Date, primary_key=True)
+    balance = db.Column(db.Numeric(14, 2), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class SavingsAccount(db.Model):
+    """Account holding the money allocated to a savings category.
+
+    Several categories may share one account.
+
+    Attributes:
+        category_tier_1 (str): Top-level category.
+        category_tier_2 (str): Second-level category, '' when empty.
+        account_id (int): Account whose balance backs the category.
+
+    """
+
+    __tablename__ = "savings_accounts"
+
+    category_tier_1 = db.Column(db.Text, primary_key=True)
+    category_tier_2 = db.Column(db.Text, primary_key=True)
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
@@ -0,0 +1,184 @@
+##: name = partitions.py
+##: description = Monthly range partitions of transaction_facts on PostgreSQL
+##: category = database
+##: usage = ensure_partitions(conn); scanned_partitions(conn, start, end)
+##: behavior = Creates future monthly partitions, detaches old ones, checks pruning
+##: inputs = SQLAlchemy connection, dates
+##: outputs = Partition names and bounds
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = database, schema, partitions, postgres
+##: changelog = Partitions belong to transaction_facts
+
+"""Maintenance of the monthly transaction partitions.
+
+On PostgreSQL transactions are stored in ``transaction_facts``, which is
+range-partitioned by ``transaction_date`` month (``migrations/0003`` and
+``0006``) and read through the ``transactions_normalized`` view. Partitions
+are named ``transaction_facts_y2026m10`` and created by the
+``ensure_transaction_partitions`` SQL function; rows for a month without a
+partition wait in ``transaction_facts_default`` and are moved when their
+month is created. Run ``ensure_partitions`` ahead of time (``flask schema
+partitions`` from cron) so new imports land in their own month.
+
+Date-bounded queries only scan the partitions of the months they cover.
+``scanned_partitions`` reports which partitions a date-range query plans to
+read, to verify pruning. Old months can be vacuumed, archived or dropped on
+their own after ``detach_partition``.
+
+The SQLAlchemy model keeps ``id`` as its primary key; the database key is
+``(id, transaction_date)`` because PostgreSQL requires unique constraints to
+include the partition key. Lookups by ``id`` alone still work but cannot be
+pruned. Other databases are not partitioned and every function here is a
+no-op on them.
+"""
+
+import datetime as dt
+import json
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, text
+
+# The partitioned table behind the transactions_normalized view
+TABLE = "transaction_facts"
+MONTHS_AHEAD = 3
+
+
+@dataclass(frozen=True, slots=True)
+class Partition:
+    """One attached partition and its date bounds (``end`` exclusive)."""
+
+    name: str
+    start: dt.date | None
+    end: dt.date | None
+
+
+def add_months(day: dt.date, months: int) -> dt.date:
+    """First day of the month ``months`` after the month of ``day``."""
+    index = day.year * 12 + day.month - 1 + months
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(day: dt.date) -> str:
+    """Name of the partition holding ``day``."""
+    return f"{TABLE}_y{day.year:04d}m{day.month:02d}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """True when ``transaction_facts`` is a partitioned table."""
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+                " WHERE partrelid = to_regclass(:table))",
+            ),
+            {"table": TABLE},
+        ).scalar(),
+    )
+
+
+def ensure_partitions(
+    connection: Connection,
+    through: dt.date | None = None,
+    start: dt.date | None = None,
+) -> list[str]:
+    """Create any missing monthly partitions from ``start`` to ``through``.
+
+    Args:
+        connection (Connection): Database connection; the caller commits.
+        through (dt.date | None): Last day to cover; defaults to
+            ``MONTHS_AHEAD`` months after today.
+        start (dt.date | None): First day to cover; defaults to today.
+
+    Returns:
+        Names of the partitions created.
+
+    """
+    if not is_partitioned(connection):
+        return []
+    today = dt.datetime.now(tz=dt.UTC).date()
+    start = start or today
+    through = through or add_months(today, MONTHS_AHEAD)
+    rows = connection.execute(
+        text("SELECT ensure_transaction_partitions(:start, :through)"),
+        {"start": start, "through": through},
+    )
+    return [row[0] for row in rows]
+
+
+def list_partitions(connection: Connection) -> list[Partition]:
+    """Attached partitions in date order, the default partition last."""
+    if not is_partitioned(connection):
+        return []
+    rows = connection.execute(
+        text(
+            "SELECT child.relname AS name,"
+            " pg_get_expr(child.relpartbound, child.oid) AS bound"
+            " FROM pg_inherits"
+            " JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid"
+            " WHERE pg_inherits.inhparent = to_regclass(:table)",
+        ),
+        {"table": TABLE},
+    )
+    partitions = []
+    for row in rows:
+        dates = [dt.date.fromisoformat(part) for part in row.bound.split("'")[1::2]]
+        bounds = (dates[0], dates[1]) if len(dates) == 2 else (None, None)  # noqa: PLR2004
+        partitions.append(Partition(row.name, *bounds))
+    return sorted(partitions, key=lambda item: (item.start is None, item.start))
+
+
+def detach_partition(connection: Connection, month: dt.date) -> str:
+    """Detach the partition of ``month`` so it can be archived or dropped.
+
+    The detached table keeps its rows and is no longer read by queries on
+    ``transactions_normalized``.
+
+    Returns:
+        Name of the detached table.
+
+    Raises:
+        ValueError: If the table is not partitioned or the month has no
+            partition.
+
+    """
+    name = partition_name(month)
+    if name not in {partition.name for partition in list_partitions(connection)}:
+        msg = f"No attached partition {name}"
+        raise ValueError(msg)
+    connection.execute(text(f'ALTER TABLE {TABLE} DETACH PARTITION "{name}"'))
+    return name
+
+
+def scanned_partitions(
+    connection: Connection,
+    start: dt.date,
+    end: dt.date,
+) -> list[str]:
+    """Partitions the planner reads for a ``start <= date < end`` query.
+
+    Pruning works when only the partitions of the covered months (and the
+    default partition) are listed.
+    """
+    if not is_partitioned(connection):
+        return []
+    plan = connection.execute(
+        text(
+            f"EXPLAIN (FORMAT JSON) SELECT count(*) FROM {TABLE}"
+            " WHERE transaction_date >= :start AND transaction_date < :end",
+        ),
+        {"start": start, "end": end},
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    found: set[str] = set()
+    pending = [plan[0]["Plan"]]
+    while pending:
+        node = pending.pop()
+        if "Relation Name" in node:
+            found.add(node["Relation Name"])
+        pending.extend(node.get("Plans", ()))
+    return sorted(found)
@@ -0,0 +1,404 @@
+##: name = pattern_preview.py
+##: description = Parallel, time-bounded preview of a candidate vendor pattern
+##: category = admin
+##: usage = result = preview_pattern(conn, r"SHELL\s+OIL", time_budget=2.0)
+##: behavior = Scans transactions in shuffled chunks across processes until a deadline
+##: inputs = Candidate regex, transactions_normalized rows
+##: outputs = PreviewResult with sampled matches, estimated total and stolen rows
+##: dependencies = Flask, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, regex, admin, debug
+##: changelog = Long-lived app-owned worker pool; overrunning workers are killed
+
+"""Preview which transactions a candidate vendor pattern would match.
+
+Running a pattern over all of ``transactions_normalized`` inside a request
+would time out on a large table. ``preview_pattern`` splits the id range
+into chunks, visits them in a seeded random order (so a partial scan is a
+uniform sample), and evaluates each chunk in a process pool. When the time
+budget runs out no more chunks are submitted and the match count is
+extrapolated from the rows scanned so far.
+
+The worker processes belong to a ``PreviewPool``. ``create_app`` installs
+one per app process with ``init_preview_pool``, so requests reuse warm
+workers instead of starting a pool each. A chunk cannot be cancelled once
+it runs. When chunks are still running ``TERMINATE_GRACE`` seconds after
+the deadline, the preview terminates the pool's workers, and the next
+preview starts new ones. Otherwise a slow pattern would keep them busy
+after the request has returned. Other previews that shared the killed
+workers end early as timed out.
+
+The result also reports which vendors currently own matched rows, i.e.
+which existing classifications approving the pattern could take over.
+"""
+
+import multiprocessing
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, field
+from multiprocessing.pool import Pool
+
+from sqlalchemy import ColumnElement, Connection, func, select
+
+from flask import Flask, current_app
+from ledgerbase.description_normalizer import fold_description
+from ledgerbase.models import Account, Transaction
+from ledgerbase.vendor_matcher import DEFAULT_SOURCE_COLUMN, MATCH_FLAGS
+
+DEFAULT_TIME_BUDGET = 2.0
+DEFAULT_CHUNK_SIZE = 5_000
+DEFAULT_SAMPLE_SIZE = 20
+PREVIEW_SEED = 53
+# Seconds chunks still running at the deadline get before workers are killed
+TERMINATE_GRACE = 0.5
+EXTENSION_KEY = "preview_pool"
+
+_Row = tuple[int, str, int | None]
+
+
+@dataclass(frozen=True, slots=True)
+class PreviewSample:
+    """One transaction the pattern matched."""
+
+    transaction_id: int
+    description: str
+    current_vendor_id: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class _ChunkResult:
+    scanned: int
+    matched: int
+    samples: list[PreviewSample]
+    owners: Counter
+
+
+@dataclass(slots=True)
+class PreviewResult:
+    """Outcome of a (possibly partial) pattern preview."""
+
+    pattern: str
+    total_rows: int
+    rows_scanned: int = 0
+    matches_found: int = 0
+    samples: list[PreviewSample] = field(default_factory=list)
+    stolen_from: dict[int, int] = field(default_factory=dict)
+    timed_out: bool = False
+    elapsed_seconds: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        """True when every row was scanned."""
+        return self.rows_scanned >= self.total_rows
+
+    @property
+    def estimated_total(self) -> int:
+        """Matches expected over the whole table, extrapolated if partial."""
+        if self.complete or not self.rows_scanned:
+            return self.matches_found
+        return round(self.matches_found * self.total_rows / self.rows_scanned)
+
+    def as_dict(self) -> dict[str, object]:
+        """JSON-serializable representation for the admin route and CLI."""
+        return {
+            "pattern": self.pattern,
+            "total_rows": self.total_rows,
+            "rows_scanned": self.rows_scanned,
+            "matches_found": self.matches_found,
+            "estimated_total": self.estimated_total,
+            "complete": self.complete,
+            "timed_out": self.timed_out,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "stolen_from": {
+                str(vendor_id): count for vendor_id, count in self.stolen_from.items()
+            },
+            "samples": [
+                {
+                    "transaction_id": sample.transaction_id,
+                    "description": sample.description,
+                    "current_vendor_id": sample.current_vendor_id,
+                }
+                for sample in self.samples
+            ],
+        }
+
+
+class PreviewPool:
+    """Worker processes shared by every preview of an app process.
+
+    Workers start on first use and are reused until ``terminate`` kills
+    them; the next ``acquire`` then starts new ones.
+
+    Args:
+        workers (int | None): Worker processes; defaults to the CPU count.
+
+    """
+
+    def __init__(self, workers: int | None = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._pool: Pool | None = None
+
+    def acquire(self) -> Pool:
+        """The running workers, started if there are none."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.workers)
+            return self._pool
+
+    def terminate(self, pool: Pool) -> None:
+        """Kill the workers of ``pool``, as returned by ``acquire``."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.terminate()
+        pool.join()
+
+    def close(self) -> None:
+        """Stop the workers once their queued chunks are done."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def init_preview_pool(app: Flask, workers: int | None = None) -> PreviewPool:
+    """Install the ``PreviewPool`` used by ``app``'s preview requests."""
+    pool = PreviewPool(workers)
+    app.extensions[EXTENSION_KEY] = pool
+    return pool
+
+
+def preview_pool() -> PreviewPool:
+    """The current app's ``PreviewPool``."""
+    return current_app.extensions[EXTENSION_KEY]
+
+
+def _scan_chunk(
+    pattern: str,
+    rows: Sequence[_Row],
+    vendor_id: int | None,
+    sample_size: int,
+) -> _ChunkResult:
+    """Evaluate the pattern over one chunk; runs inside a worker process."""
+    compiled = re.compile(pattern, MATCH_FLAGS)
+    matched = 0
+    samples: list[PreviewSample] = []
+    owners: Counter = Counter()
+    for transaction_id, description, current_vendor_id in rows:
+        if not compiled.search(fold_description(description)):
+            continue
+        matched += 1
+        if current_vendor_id is not None and current_vendor_id != vendor_id:
+            owners[current_vendor_id] += 1
+        if len(samples) < sample_size:
+            samples.append(
+                PreviewSample(transaction_id, description, current_vendor_id),
+            )
+    return _ChunkResult(len(rows), matched, samples, owners)
+
+
+def _id_ranges(connection: Connection, chunk_size: int) -> list[tuple[int, int]]:
+    table = Transaction.__table__
+    low, high = connection.execute(
+        select(func.min(table.c.id), func.max(table.c.id)),
+    ).one()
+    if low is None:
+        return []
+    ranges = [(start, start + chunk_size) for start in range(low, high + 1, chunk_size)]
+    random.Random(PREVIEW_SEED).shuffle(ranges)
+    return ranges
+
+
+def _scope(
+    source_column: str,
+    institution_id: int | None,
+) -> list[ColumnElement[bool]]:
+    """Conditions selecting the rows a pattern could apply to."""
+    table = Transaction.__table__
+    conditions = [table.c[source_column].is_not(None)]
+    if institution_id is not None:
+        accounts = Account.__table__
+        conditions.append(
+            table.c.account_id.in_(
+                select(accounts.c.id).where(
+                    accounts.c.institution_id == institution_id,
+                ),
+            ),
+        )
+    return conditions
+
+
+def _chunks(
+    connection: Connection,
+    ranges: Sequence[tuple[int, int]],
+    source_column: str,
+    scope: Sequence[ColumnElement[bool]],
+) -> Iterator[list[_Row]]:
+    table = Transaction.__table__
+    column = table.c[source_column]
+    for start, stop in ranges:
+        rows = connection.execute(
+            select(table.c.id, column, table.c.vendor_id).where(
+                table.c.id >= start,
+                table.c.id < stop,
+                *scope,
+            ),
+        )
+        yield [(row[0], row[1], row[2]) for row in rows]
+
+
+def _merge(result: PreviewResult, chunk: _ChunkResult, sample_size: int) -> None:
+    result.rows_scanned += chunk.scanned
+    result.matches_found += chunk.matched
+    room = sample_size - len(result.samples)
+    result.samples.extend(chunk.samples[: max(room, 0)])
+    for vendor_id, count in chunk.owners.items():
+        result.stolen_from[vendor_id] = result.stolen_from.get(vendor_id, 0) + count
+
+
+def preview_pattern(  # noqa: PLR0913
+    connection: Connection,
+    pattern: str,
+    *,
+    vendor_id: int | None = None,
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+    institution_id: int | None = None,
+    time_budget: float = DEFAULT_TIME_BUDGET,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    workers: int | None = None,
+    pool: PreviewPool | None = None,
+) -> PreviewResult:
+    """Estimate the effect of ``pattern`` within ``time_budget`` seconds.
+
+    Args:
+        connection (Connection): Database connection used to read chunks.
+        pattern (str): Candidate regular expression.
+        vendor_id (int | None): Vendor the pattern would be assigned to; rows
+            already owned by it are not reported as stolen.
+        source_column (str): Transaction column to evaluate.
+        institution_id (int | None): Limit the preview to accounts of one
+            institution, as for an institution-scoped pattern.
+        time_budget (float): Seconds after which scanning stops.
+        chunk_size (int): Width of each id range handed to a worker.
+        sample_size (int): Maximum number of matched rows returned.
+        workers (int | None): Worker processes of a pool started for this
+            preview alone; ``1`` scans in-process. Defaults to the CPU
+            count. Ignored when ``pool`` is given.
+        pool (PreviewPool | None): Long-lived workers to scan with.
+
+    Raises:
+        re.error: If ``pattern`` is not a valid regular expression.
+
+    """
+    re.compile(pattern, MATCH_FLAGS)
+    started = time.monotonic()
+    deadline = started + time_budget
+    scope = _scope(source_column, institution_id)
+    total = connection.execute(
+        select(func.count()).select_from(Transaction.__table__).where(*scope),
+    ).scalar_one()
+    result = PreviewResult(pattern=pattern, total_rows=total)
+    chunks = _chunks(
+        connection,
+        _id_ranges(connection, chunk_size),
+        source_column,
+        scope,
+    )
+
+    workers = workers or os.cpu_count() or 1
+    if pool is None and workers == 1:
+        for rows in chunks:
+            if time.monotonic() >= deadline:
+                result.timed_out = True
+                break
+            _merge(
+                result,
+                _scan_chunk(pattern, rows, vendor_id, sample_size),
+                sample_size,
+            )
+    else:
+        own_pool = pool is None
+        pool = pool or PreviewPool(workers)
+        try:
+            result.timed_out = _run_parallel(
+                pool,
+                chunks,
+                result,
+                deadline=deadline,
+                pattern=pattern,
+                vendor_id=vendor_id,
+                sample_size=sample_size,
+            )
+        finally:
+            if own_pool:
+                pool.close()
+
+    result.elapsed_seconds = time.monotonic() - started
+    return result
+
+
+def _run_parallel(  # noqa: PLR0913
+    pool: PreviewPool,
+    chunks: Iterator[list[_Row]],
+    result: PreviewResult,
+    *,
+    deadline: float,
+    pattern: str,
+    vendor_id: int | None,
+    sample_size: int,
+) -> bool:
+    """Keep ``2 * workers`` chunks in flight until done or out of time.
+
+    Returns:
+        True when the deadline passed before every chunk was scanned.
+
+    """
+    workers = pool.acquire()
+    finished: queue.SimpleQueue[_ChunkResult | BaseException] = queue.SimpleQueue()
+    in_flight = 0
+    exhausted = False
+    while True:
+        while not exhausted and in_flight < 2 * pool.workers:
+            rows = next(chunks, None)
+            if rows is None:
+                exhausted = True
+            elif rows:
+                workers.apply_async(
+                    _scan_chunk,
+                    (pattern, rows, vendor_id, sample_size),
+                    callback=finished.put,
+                    error_callback=finished.put,
+                )
+                in_flight += 1
+        if not in_flight:
+            return False
+        try:
+            outcome = finished.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            break
+        in_flight -= 1
+        if isinstance(outcome, BaseException):
+            raise outcome
+        _merge(result, outcome, sample_size)
+
+    # Out of time: let running chunks finish briefly, discarding their
+    # results, and kill the workers of any that do not.
+    grace = time.monotonic() + TERMINATE_GRACE
+    while in_flight:
+        try:
+            finished.get(timeout=max(grace - time.monotonic(), 0))
+        except queue.Empty:
+            pool.terminate(workers)
+            break
+        in_flight -= 1
+    return True
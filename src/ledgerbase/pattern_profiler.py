@@ -0,0 +1,414 @@
+##: name = pattern_profiler.py
+##: description = Per-pattern profiling and backtracking guard for vendor regexes
+##: category = etl
+##: usage = profiles = profile_patterns(specs, corpus, fuzz=True)
+##:         ensure_safe_pattern(r"(\w+\s?)*$")  # raises UnsafePatternError
+##: behavior = Times each pattern over a corpus and fuzzes risky ones in a subprocess
+##: inputs = PatternSpec lists, description samples, candidate regexes
+##: outputs = PatternProfile rows, GuardResult verdicts
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, regex, profiling, safety
+##: changelog = Fold the sample corpus with description_normalizer.fold_description
+
+r"""Find the vendor patterns that make classification slow.
+
+``profile_patterns`` evaluates every pattern on its own over a sample of
+descriptions and records the time spent and the number of matches, so the
+most expensive rules can be rewritten.
+
+Backtracking regex engines take exponential or polynomial time on some
+patterns, e.g. ``(\w+\s?)*$`` on a long run of word characters followed by a
+character that cannot match. Such inputs rarely occur in samples, so
+``guard_pattern`` fuzzes patterns with inputs built from their own literals
+and character classes, doubling the length each round. A pattern is flagged
+super-linear when its search time grows much faster than the input (more
+than ``SUPERLINEAR_RATIO`` per doubling), and it is unsafe, i.e. rejected at
+approval time, when any single search exceeds the time budget.
+
+The fuzzing runs in a child process that is killed when it overruns, since a
+catastrophic search cannot be interrupted from Python. Patterns without
+nested or repeated quantifiers cannot backtrack catastrophically and skip the
+subprocess.
+"""
+
+import multiprocessing
+import re
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from multiprocessing.connection import Connection as Pipe
+from re import _parser  # type: ignore[attr-defined]
+from typing import Any
+
+from sqlalchemy import Connection, func, select
+
+from ledgerbase.description_normalizer import fold_description
+from ledgerbase.models import Transaction
+from ledgerbase.vendor_matcher import (
+    DEFAULT_SOURCE_COLUMN,
+    MATCH_FLAGS,
+    PatternSpec,
+    compile_pattern,
+)
+
+DEFAULT_GUARD_BUDGET = 0.1
+# Bank descriptions are short; 1024 characters leaves ample headroom.
+FUZZ_LENGTHS = (64, 128, 256, 512, 1024)
+SUPERLINEAR_RATIO = 3.0
+# Below this duration timer noise dominates and growth ratios mean nothing.
+MIN_SIGNIFICANT_SECONDS = 0.002
+# Allowance for starting the fuzzing subprocess.
+PROCESS_START_SECONDS = 2.0
+MAX_UNITS = 12
+TIMING_REPEATS = 3
+
+_REPEATS = {
+    _parser.MAX_REPEAT,
+    _parser.MIN_REPEAT,
+    getattr(_parser, "POSSESSIVE_REPEAT", _parser.MAX_REPEAT),
+}
+_CATEGORY_SAMPLES = {
+    _parser.CATEGORY_DIGIT: "0",
+    _parser.CATEGORY_NOT_DIGIT: "a",
+    _parser.CATEGORY_SPACE: " ",
+    _parser.CATEGORY_NOT_SPACE: "a",
+    _parser.CATEGORY_WORD: "a",
+    _parser.CATEGORY_NOT_WORD: " ",
+}
+_DEFAULT_UNITS = ("a", "0", " ")
+# Appended to every fuzz input so the overall match fails and the engine
+# has to explore every way of splitting the repeated part.
+_MISMATCH = "\x00"
+
+
+class UnsafePatternError(ValueError):
+    """Raised when a pattern fails the backtracking guard."""
+
+
+@dataclass(frozen=True, slots=True)
+class PatternProfile:
+    """Cost of one pattern over a corpus."""
+
+    pattern_id: int
+    vendor_id: int
+    pattern: str
+    evaluations: int
+    matches: int
+    total_seconds: float
+    superlinear: bool | None = None
+
+    @property
+    def mean_microseconds(self) -> float:
+        """Average time per description."""
+        if not self.evaluations:
+            return 0.0
+        return self.total_seconds / self.evaluations * 1_000_000
+
+
+@dataclass(frozen=True, slots=True)
+class GuardResult:
+    """Verdict of the backtracking guard for one pattern."""
+
+    safe: bool
+    superlinear: bool
+    worst_seconds: float
+    reason: str | None = None
+    fuzzed: bool = True
+
+
+def _class_sample(items: Iterable[tuple[Any, Any]]) -> str | None:
+    """Return a character matched by a ``[...]`` set, if easy to find."""
+    for op, av in items:
+        if op is _parser.NEGATE:
+            # The default units cover most negated sets.
+            return None
+        if op is _parser.LITERAL:
+            return chr(av)
+        if op is _parser.RANGE:
+            return chr(av[0])
+        if op is _parser.CATEGORY:
+            return _CATEGORY_SAMPLES.get(av)
+    return None
+
+
+def _has_branch(items: Iterable[tuple[Any, Any]]) -> bool:
+    for op, av in items:
+        if op is _parser.BRANCH:
+            return True
+        if op is _parser.SUBPATTERN and _has_branch(av[-1]):
+            return True
+    return False
+
+
+def _children(op: Any, av: Any) -> list[Any]:  # noqa: ANN401
+    """Sub-sequences of a group, alternation or lookaround node."""
+    if op is _parser.SUBPATTERN:
+        return [av[-1]]
+    if op is _parser.BRANCH:
+        return list(av[1])
+    if op in {_parser.ASSERT, _parser.ASSERT_NOT}:
+        return [av[1]]
+    return []
+
+
+def _walk(
+    items: Iterable[tuple[Any, Any]],
+    units: dict[str, None],
+) -> tuple[int, bool]:
+    """Collect fuzz units; return (unbounded repeats, nested or branchy)."""
+    repeats = 0
+    risky = False
+    run: list[str] = []
+
+    def flush() -> None:
+        if run:
+            units.setdefault("".join(run))
+            run.clear()
+
+    for op, av in items:
+        if op is _parser.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        sample = "a" if op is _parser.ANY else None
+        if op is _parser.IN:
+            sample = _class_sample(av)
+        if sample:
+            units.setdefault(sample)
+        elif op in _REPEATS:
+            _, high, body = av
+            inner, inner_risky = _walk(body, units)
+            if high is _parser.MAXREPEAT or high > 1:
+                repeats += 1
+                risky |= inner > 0 or inner_risky or _has_branch(body)
+            repeats += inner
+        else:
+            for child in _children(op, av):
+                inner, inner_risky = _walk(child, units)
+                repeats += inner
+                risky |= inner_risky
+    flush()
+    return repeats, risky
+
+
+def _analyze(pattern: str, flags: int) -> tuple[list[str], bool]:
+    units: dict[str, None] = {}
+    repeats, nested = _walk(_parser.parse(pattern, flags), units)
+    for unit in _DEFAULT_UNITS:
+        units.setdefault(unit)
+    return list(units)[:MAX_UNITS], nested or repeats > 1
+
+
+def has_risky_structure(pattern: str, flags: int = MATCH_FLAGS) -> bool:
+    """True when the pattern nests or chains unbounded quantifiers."""
+    return _analyze(pattern, flags)[1]
+
+
+def adversarial_inputs(
+    pattern: str,
+    length: int,
+    flags: int = MATCH_FLAGS,
+) -> list[str]:
+    """Build inputs of roughly ``length`` characters likely to backtrack.
+
+    Each literal run and character-class sample of the pattern is repeated
+    to ``length`` and followed by a character that cannot match, with and
+    without the pattern's first literal as a prefix (for anchored patterns).
+    """
+    units, _ = _analyze(pattern, flags)
+    prefix = units[0] if units and units[0] not in _DEFAULT_UNITS else ""
+    inputs: dict[str, None] = {}
+    for unit in units:
+        body = (unit * (length // len(unit) + 1))[:length]
+        inputs.setdefault(body + _MISMATCH)
+        if prefix:
+            inputs.setdefault(prefix + body + _MISMATCH)
+    return list(inputs)
+
+
+def _timed_search(compiled: re.Pattern[str], text: str) -> float:
+    best = float("inf")
+    for _ in range(TIMING_REPEATS):
+        started = time.perf_counter()
+        compiled.search(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def fuzz_pattern(
+    pattern: str,
+    flags: int = MATCH_FLAGS,
+    time_budget: float = DEFAULT_GUARD_BUDGET,
+) -> GuardResult:
+    """Fuzz ``pattern`` in the current process.
+
+    This can hang on a catastrophic pattern; use ``guard_pattern`` for
+    untrusted input.
+    """
+    compiled = re.compile(pattern, flags)
+    worst = 0.0
+    superlinear = False
+    reason = None
+    previous: dict[int, float] = {}
+    for length in FUZZ_LENGTHS:
+        for family, text in enumerate(adversarial_inputs(pattern, length, flags)):
+            elapsed = _timed_search(compiled, text)
+            worst = max(worst, elapsed)
+            if elapsed > time_budget:
+                return GuardResult(
+                    safe=False,
+                    superlinear=True,
+                    worst_seconds=worst,
+                    reason=f"search took {elapsed:.3f}s on {len(text)} characters",
+                )
+            before = previous.get(family)
+            if (
+                not superlinear
+                and before is not None
+                and elapsed >= MIN_SIGNIFICANT_SECONDS
+                and elapsed / max(before, 1e-9) >= SUPERLINEAR_RATIO
+            ):
+                superlinear = True
+                reason = (
+                    f"search time grew {elapsed / before:.1f}x when input "
+                    f"doubled to {len(text)} characters"
+                )
+            previous[family] = elapsed
+    return GuardResult(
+        safe=True,
+        superlinear=superlinear,
+        worst_seconds=worst,
+        reason=reason,
+    )
+
+
+def _fuzz_worker(pipe: Pipe, pattern: str, flags: int, time_budget: float) -> None:
+    pipe.send(fuzz_pattern(pattern, flags, time_budget))
+    pipe.close()
+
+
+def guard_pattern(
+    pattern: str,
+    flags: int = MATCH_FLAGS,
+    time_budget: float = DEFAULT_GUARD_BUDGET,
+) -> GuardResult:
+    """Check a pattern for catastrophic backtracking without risking a hang.
+
+    Raises:
+        re.error: If ``pattern`` is not a valid regular expression.
+
+    """
+    re.compile(pattern, flags)
+    if not has_risky_structure(pattern, flags):
+        return GuardResult(
+            safe=True,
+            superlinear=False,
+            worst_seconds=0.0,
+            fuzzed=False,
+        )
+
+    # Every search is capped by the budget, so a healthy child finishes in
+    # well under one budget per round plus process start-up.
+    deadline = time_budget * len(FUZZ_LENGTHS) + PROCESS_START_SECONDS
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_fuzz_worker,
+        args=(sender, pattern, flags, time_budget),
+        daemon=True,
+    )
+    process.start()
+    sender.close()
+    try:
+        if receiver.poll(deadline):
+            return receiver.recv()
+        return GuardResult(
+            safe=False,
+            superlinear=True,
+            worst_seconds=deadline,
+            reason=f"fuzzing did not finish within {deadline:.1f}s",
+        )
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+
+
+def ensure_safe_pattern(
+    pattern: str,
+    flags: int = MATCH_FLAGS,
+    time_budget: float = DEFAULT_GUARD_BUDGET,
+) -> GuardResult:
+    """Run ``guard_pattern`` and raise ``UnsafePatternError`` on rejection."""
+    result = guard_pattern(pattern, flags, time_budget)
+    if not result.safe:
+        msg = f"Pattern rejected: {result.reason}"
+        raise UnsafePatternError(msg)
+    return result
+
+
+def sample_corpus(
+    connection: Connection,
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+    limit: int = 10_000,
+) -> list[str]:
+    """Return up to ``limit`` random descriptions, folded as patterns see them."""
+    table = Transaction.__table__
+    column = table.c[source_column]
+    rows = connection.execute(
+        select(column).where(column.is_not(None)).order_by(func.random()).limit(limit),
+    )
+    return [fold_description(row[0]) for row in rows]
+
+
+def profile_patterns(
+    specs: Iterable[PatternSpec],
+    corpus: Sequence[str],
+    *,
+    flags: int = MATCH_FLAGS,
+    fuzz: bool = False,
+    time_budget: float = DEFAULT_GUARD_BUDGET,
+) -> list[PatternProfile]:
+    """Time each pattern over ``corpus``, most expensive first.
+
+    Args:
+        specs (Iterable[PatternSpec]): Patterns to profile.
+        corpus (Sequence[str]): Descriptions, already folded.
+        flags (int): ``re`` flags used for matching.
+        fuzz (bool): Also run ``guard_pattern`` and record whether each
+            pattern scales super-linearly.
+        time_budget (float): Per-search budget for the guard.
+
+    """
+    profiles = []
+    for spec in specs:
+        compiled = compile_pattern(spec, flags)
+        if compiled is None:
+            continue
+        search = compiled.search
+        matches = 0
+        started = time.perf_counter()
+        for description in corpus:
+            if search(description) is not None:
+                matches += 1
+        elapsed = time.perf_counter() - started
+        superlinear = (
+            guard_pattern(spec.pattern, flags, time_budget).superlinear
+            if fuzz
+            else None
+        )
+        profiles.append(
+            PatternProfile(
+                pattern_id=spec.pattern_id,
+                vendor_id=spec.vendor_id,
+                pattern=spec.pattern,
+                evaluations=len(corpus),
+                matches=matches,
+                total_seconds=elapsed,
+                superlinear=superlinear,
+            ),
+        )
+    profiles.sort(key=lambda profile: profile.total_seconds, reverse=True)
+    return profiles
@@ -0,0 +1,201 @@
+##: name = pool_metrics.py
+##: description = Connection pool instrumentation and Prometheus metrics endpoint
+##: category = monitoring
+##: usage = app.register_blueprint(metrics_bp); pool_snapshot(engine.pool)
+##: behavior = Times pool checkouts and reports pool occupancy per engine
+##: inputs = SQLAlchemy engines bound to the Flask app
+##: outputs = PoolSnapshot values; Prometheus text on GET /metrics
+##: dependencies = Flask, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = monitoring, database, pool, metrics
+##: changelog = Report the read replica's pool
+
+"""Connection pool metrics.
+
+``InstrumentedQueuePool`` is a ``QueuePool`` that records how long each
+checkout waited for a connection, how many checkouts timed out and how many
+connections were invalidated (for example by ``pool_pre_ping`` after a
+database restart). ``create_app`` installs it whenever the engine uses a
+queue pool.
+
+``pool_snapshot`` combines those counters with the pool's own occupancy
+(size, checked out, overflow) and ``GET /metrics`` renders a snapshot of
+every engine in the Prometheus text format, labelled by bind: ``default``
+for the primary database and ``replica`` for the read replica. Counters
+restart when a pool is recreated by ``engine.dispose()``.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import ConnectionPoolEntry, Pool, QueuePool
+
+from flask import Blueprint, Response, current_app
+
+from . import db
+from .read_routing import EXTENSION_KEY as ROUTER_KEY, REPLICA_BIND
+
+METRIC_PREFIX = "ledgerbase_db_pool_"
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+class PoolStats:
+    """Thread-safe checkout counters of one pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.invalidations = 0
+
+    def record_checkout(self, waited: float) -> None:
+        """Count a checkout that waited ``waited`` seconds."""
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def record_timeout(self, waited: float) -> None:
+        """Count a checkout that gave up after ``waited`` seconds."""
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def record_invalidation(self) -> None:
+        """Count a connection discarded as stale or broken."""
+        with self._lock:
+            self.invalidations += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """``QueuePool`` that records checkout wait times in ``stats``.
+
+    The measured wait covers taking an idle connection, opening a new one
+    within ``pool_size + max_overflow`` and blocking until one is returned.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """Create the pool; arguments are those of ``QueuePool``."""
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        event.listen(self, "invalidate", self._on_invalidate)
+        event.listen(self, "soft_invalidate", self._on_invalidate)
+
+    def _on_invalidate(
+        self,
+        _dbapi_connection: object,
+        _record: ConnectionPoolEntry,
+        _exception: BaseException | None,
+    ) -> None:
+        self.stats.record_invalidation()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout(time.perf_counter() - started)
+            raise
+        self.stats.record_checkout(time.perf_counter() - started)
+        return record
+
+
+@dataclass(frozen=True, slots=True)
+class PoolSnapshot:
+    """Point-in-time pool occupancy and cumulative checkout counters."""
+
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    wait_seconds: float
+    max_wait_seconds: float
+    timeouts: int
+    invalidations: int
+
+
+# Prometheus metric type and help text for each PoolSnapshot field.
+_METRICS = {
+    "size": ("gauge", "Configured number of persistent connections."),
+    "checked_in": ("gauge", "Idle connections in the pool."),
+    "checked_out": ("gauge", "Connections in use."),
+    "overflow": ("gauge", "Connections opened beyond the pool size."),
+    "checkouts": ("counter", "Successful connection checkouts."),
+    "wait_seconds": ("counter", "Total seconds spent waiting for a connection."),
+    "max_wait_seconds": ("gauge", "Longest single wait for a connection."),
+    "timeouts": ("counter", "Checkouts that timed out waiting for a connection."),
+    "invalidations": ("counter", "Connections invalidated as stale or broken."),
+}
+
+
+def pool_snapshot(pool: Pool) -> PoolSnapshot:
+    """Read the current state of ``pool``.
+
+    Pools other than ``QueuePool`` report zero occupancy, and pools that
+    are not instrumented report zero checkout counters.
+    """
+    stats = getattr(pool, "stats", None) or PoolStats()
+    if isinstance(pool, QueuePool):
+        occupancy = (pool.size(), pool.checkedin(), pool.checkedout(), pool.overflow())
+    else:
+        occupancy = (0, 0, 0, 0)
+    return PoolSnapshot(
+        *occupancy,
+        checkouts=stats.checkouts,
+        wait_seconds=stats.wait_seconds,
+        max_wait_seconds=stats.max_wait_seconds,
+        timeouts=stats.timeouts,
+        invalidations=stats.invalidations,
+    )
+
+
+def render_prometheus(engines: dict[str | None, Engine]) -> str:
+    """Render pool snapshots in the Prometheus text exposition format.
+
+    Args:
+        engines: Engines keyed by bind name, ``None`` for the default bind.
+
+    Returns:
+        One sample per metric and engine, labelled ``bind``.
+
+    """
+    snapshots = {
+        bind or "default": pool_snapshot(engine.pool)
+        for bind, engine in engines.items()
+    }
+    lines = []
+    for field in fields(PoolSnapshot):
+        name = METRIC_PREFIX + field.name
+        kind, description = _METRICS[field.name]
+        if kind == "counter":
+            name += "_total"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(
+            f'{name}{{bind="{bind}"}} {getattr(snapshot, field.name)}'
+            for bind, snapshot in sorted(snapshots.items())
+        )
+    return "\n".join(lines) + "\n"
+
+
+@metrics_bp.route("/metrics")
+def metrics() -> Response:
+    """Expose connection pool metrics for Prometheus to scrape."""
+    engines = dict(db.engines)
+    router = current_app.extensions.get(ROUTER_KEY)
+    if router is not None and router.replica is not None:
+        engines[REPLICA_BIND] = router.replica
+    return Response(
+        render_prometheus(engines),
+        mimetype="text/plain; version=0.0.4",
+    )
@@ -0,0 +1,212 @@
+##: name = read_routing.py
+##: description = Routes read-only queries to a reporting replica, writes to the primary
+##: category = database
+##: usage = with read_engine().connect() as connection: run_report(connection)
+##: behavior = Picks the replica engine unless it lags, fails or is overridden
+##: inputs = SQLAlchemy engines, X-Read-Consistency request header
+##: outputs = The SQLAlchemy Engine a read-only query should use
+##: dependencies = Flask, SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = database, replica, routing
+##: changelog = Probe replica lag outside the lock; others read the cached result
+
+"""Read/write routing between the primary database and a replica.
+
+When ``DATABASE_REPLICA_URL`` is set, ``create_app`` creates an engine for
+it and installs a ``ReadRouter``. Report, dashboard and export code asks
+``read_engine()`` for its engine; everything else, and every write, keeps
+using ``db.engine`` (the primary). The replica is deliberately not a
+Flask-SQLAlchemy bind, so ``db.create_all()`` and the ORM never touch it.
+
+The replica is skipped, and reads go to the primary, when:
+
+* the caller passes ``primary=True`` or runs inside ``use_primary()``,
+* the request carries ``X-Read-Consistency: primary`` (for example right
+  after a write the client needs to see),
+* the replica is more than ``DB_REPLICA_MAX_LAG`` seconds behind, or
+* the lag probe fails because the replica is unreachable.
+
+Lag is probed at most once per ``check_interval`` seconds and cached, so
+routing adds no query to most requests; while one request probes, the
+others route by the cached result instead of waiting. Without a replica every read
+uses the primary.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from flask import Flask, current_app, has_request_context, request
+
+REPLICA_BIND = "replica"
+CONSISTENCY_HEADER = "X-Read-Consistency"
+DEFAULT_MAX_LAG = 30.0
+DEFAULT_CHECK_INTERVAL = 5.0
+EXTENSION_KEY = "read_router"
+
+logger = logging.getLogger(__name__)
+
+_force_primary: ContextVar[bool] = ContextVar("force_primary", default=False)
+
+
+def replica_lag(connection: Connection) -> float:
+    """Seconds the database behind ``connection`` lags its primary.
+
+    A PostgreSQL standby that has replayed everything it received reports
+    zero even when the primary has been idle. Primaries and databases
+    without replication report zero.
+    """
+    if connection.dialect.name != "postgresql":
+        return 0.0
+    lag = connection.execute(
+        text(
+            "SELECT CASE"
+            " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+            " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+            " END",
+        ),
+    ).scalar()
+    return float(lag or 0)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Send every ``read_engine()`` call in this block to the primary."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+class ReadRouter:
+    """Chooses between a primary engine and an optional replica engine."""
+
+    def __init__(
+        self,
+        primary: Engine,
+        replica: Engine | None = None,
+        *,
+        max_lag: float = DEFAULT_MAX_LAG,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        lag_probe: Callable[[Connection], float] = replica_lag,
+    ) -> None:
+        """Create a router.
+
+        Args:
+            primary (Engine): Engine for writes and consistent reads.
+            replica (Engine | None): Engine for read-only queries, if any.
+            max_lag (float): Seconds of lag above which the replica is skipped.
+            check_interval (float): Seconds a lag measurement stays valid.
+            lag_probe (Callable[[Connection], float]): Measures replica lag.
+
+        """
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag_probe = lag_probe
+        self._lock = threading.Lock()
+        self._checked_at: float | None = None
+        self._healthy = False
+        self._refreshing = False
+
+    def replica_healthy(self) -> bool:
+        """True when a replica is configured, reachable and caught up.
+
+        One caller probes a stale measurement, outside the lock; callers
+        arriving meanwhile get the cached result rather than waiting on it
+        (the primary, before the first probe completes).
+        """
+        if self.replica is None:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._refreshing or (
+                self._checked_at is not None
+                and now - self._checked_at < self.check_interval
+            ):
+                return self._healthy
+            self._refreshing = True
+        healthy = False
+        try:
+            healthy = self._probe()
+        finally:
+            with self._lock:
+                self._checked_at = now
+                self._healthy = healthy
+                self._refreshing = False
+        return healthy
+
+    def _probe(self) -> bool:
+        """Measure the replica's lag; False when it lags or is unreachable."""
+        try:
+            with self.replica.connect() as connection:
+                lag = self._lag_probe(connection)
+        except SQLAlchemyError:
+            logger.warning("Replica unreachable; reading from the primary")
+            return False
+        if lag > self.max_lag:
+            logger.warning(
+                "Replica %.1fs behind (limit %.1fs); reading from the primary",
+                lag,
+                self.max_lag,
+            )
+            return False
+        return True
+
+    def engine(self, *, primary: bool = False) -> Engine:
+        """Engine for a read-only query.
+
+        Args:
+            primary (bool): Require the primary, e.g. to read your own writes.
+
+        Returns:
+            The replica when it is allowed and healthy, else the primary.
+
+        """
+        if primary or _force_primary.get() or not self.replica_healthy():
+            return self.primary
+        return self.replica
+
+
+def init_read_router(
+    app: Flask,
+    primary: Engine,
+    replica: Engine | None = None,
+    max_lag: float = DEFAULT_MAX_LAG,
+) -> ReadRouter:
+    """Install a ``ReadRouter`` for ``app``.
+
+    Args:
+        app (Flask): The application.
+        primary (Engine): ``db.engine``.
+        replica (Engine | None): Engine for ``DATABASE_REPLICA_URL``, if set.
+        max_lag (float): Seconds of lag above which the replica is skipped.
+
+    Returns:
+        The installed router.
+
+    """
+    router = ReadRouter(primary, replica, max_lag=max_lag)
+    app.extensions[EXTENSION_KEY] = router
+    return router
+
+
+def read_engine(*, primary: bool = False) -> Engine:
+    """Engine for a read-only report, dashboard or export query.
+
+    A request header ``X-Read-Consistency: primary`` has the same effect as
+    ``primary=True``.
+    """
+    if has_request_context():
+        header = request.headers.get(CONSISTENCY_HEADER, "")
+        primary = primary or header.strip().lower() == "primary"
+    return current_app.extensions[EXTENSION_KEY].engine(primary=primary)
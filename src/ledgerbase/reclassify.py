@@ -0,0 +1,369 @@
+##: name = reclassify.py
+##: description = Incremental reclassification of transactions after pattern approval
+##: category = etl
+##: usage = result = approve_pattern(conn, vendor_id=3, pattern=r"SHELL\s+OIL")
+##: behavior = Narrows candidates by required literals, reclassifies them in batches
+##: inputs = vendor_patterns change, transactions_normalized rows
+##: outputs = Updated vendor_id and categories on affected, unedited transactions
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, classification, etl
+##: changelog = SQLite candidates come from the FTS5 trigram index
+
+"""Reprocess transactions affected by an approved or edited vendor pattern.
+
+Rescanning all of ``transactions_normalized`` on every approval does not
+scale. Instead the pattern's required literals (see
+``ledgerbase.literal_index``) are used to find candidate rows with an
+``upper(column) LIKE '%LITERAL%'`` filter. On PostgreSQL a ``pg_trgm`` GIN
+index on each column patterns can target (``raw_description``,
+``normalized_description`` and ``parsed_vendor``) serves it. On SQLite the
+same search runs as a ``MATCH`` against the FTS5 trigram index of those
+columns (``ledgerbase.trigram_index``); only without that index, or for
+literals shorter than a trigram, does SQLite scan.
+Rows currently assigned to the pattern's vendor are always candidates too,
+so an edit that stops matching releases them.
+
+Candidates that have not been ``manually_edited`` are re-classified with the
+full vendor dictionary in batches, and each batch is written back with a
+single ``UPDATE ... SET col = CASE id ...`` statement. Without an explicit
+classifier the app's shared one (``classification_cache.shared_classifier``)
+is refreshed and used, and only outside an app is a matcher built.
+
+New and edited patterns must first pass ``ensure_safe_pattern`` (see
+``ledgerbase.pattern_profiler``), so a catastrophically backtracking regex
+never reaches the dictionary.
+"""
+
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    and_,
+    case,
+    false,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
+
+from ledgerbase.classification_cache import (
+    CachedClassifier,
+    bump_dictionary_version,
+    shared_classifier,
+)
+from ledgerbase.literal_index import extract_required_literals
+from ledgerbase.models import Account, Transaction, Vendor, VendorPattern
+from ledgerbase.pattern_profiler import ensure_safe_pattern
+from ledgerbase.rollups import RollupDeltas
+from ledgerbase.trigram_index import has_trigram_index, trigram_candidates
+from ledgerbase.vendor_matcher import DEFAULT_SOURCE_COLUMN, MATCH_FLAGS
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class ReclassifyResult:
+    """Outcome of reprocessing transactions for one pattern change."""
+
+    pattern_id: int | None
+    candidates: int
+    updated: int
+    full_scan: bool
+
+
+def _search_terms(literals: Sequence[str]) -> list[list[str]]:
+    """Split literals into whitespace-free terms.
+
+    Classification runs on whitespace-normalized text, so a literal such as
+    "SHELL OIL" must match "SHELL  OIL" too; requiring each term separately
+    keeps the candidate set a superset.
+    """
+    return [literal.split() for literal in literals if literal.split()]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _literal_filter(
+    column: ColumnElement[str],
+    terms: list[list[str]],
+) -> ColumnElement[bool]:
+    """``upper(column) LIKE`` filter, served by the pg_trgm index."""
+    upper = func.upper(column)
+    return or_(
+        *(
+            and_(
+                *(upper.like(f"%{_escape_like(term)}%", escape="\\") for term in group),
+            )
+            for group in terms
+        ),
+    )
+
+
+def _batches(ids: Sequence[int], size: int) -> Iterator[Sequence[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+def _all_unedited_ids(connection: Connection) -> list[int]:
+    table = Transaction.__table__
+    rows = connection.execute(
+        select(table.c.id)
+        .where(table.c.manually_edited.is_(false()))
+        .order_by(table.c.id),
+    )
+    return [row.id for row in rows]
+
+
+def find_candidate_ids(
+    connection: Connection,
+    pattern: str,
+    *,
+    vendor_ids: Sequence[int] = (),
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+) -> tuple[list[int], bool]:
+    """Return ids of unedited transactions the pattern change may affect.
+
+    Args:
+        connection (Connection): Database connection.
+        pattern (str): New (or edited) regular expression.
+        vendor_ids (Sequence[int]): Vendors whose current rows must be
+            rechecked, e.g. the vendor of an edited pattern.
+        source_column (str): Transaction column the pattern applies to.
+
+    Returns:
+        ``(ids, full_scan)`` where ``full_scan`` is True when no literal
+        could narrow the search.
+
+    """
+    table = Transaction.__table__
+    column = table.c[source_column]
+    literals = extract_required_literals(pattern, MATCH_FLAGS)
+    terms = _search_terms(literals) if literals else []
+    unedited = table.c.manually_edited.is_(false())
+    by_vendor = table.c.vendor_id.in_(vendor_ids)
+
+    if not terms:
+        return _all_unedited_ids(connection), True
+
+    indexed = (
+        trigram_candidates(source_column, terms)
+        if has_trigram_index(connection)
+        else None
+    )
+    matching = (
+        _literal_filter(column, terms) if indexed is None else table.c.id.in_(indexed)
+    )
+    condition = or_(matching, by_vendor)
+    rows = connection.execute(
+        select(table.c.id).where(unedited, condition).order_by(table.c.id),
+    )
+    return [row.id for row in rows], False
+
+
+def reclassify_transactions(
+    connection: Connection,
+    ids: Sequence[int],
+    *,
+    classifier: CachedClassifier | None = None,
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Re-run vendor classification for ``ids`` and persist changes.
+
+    Rows flagged ``manually_edited`` are never touched. Each row is matched
+    against the partition of its account's institution. Vendor and category
+    columns are written with one ``UPDATE`` per batch, and the category
+    changes are applied to ``monthly_rollups`` as deltas.
+
+    Returns:
+        Number of rows whose vendor assignment changed.
+
+    """
+    if classifier is None:
+        classifier = shared_classifier()
+    if classifier is None:
+        classifier = CachedClassifier.from_connection(connection)
+    else:
+        classifier.refresh(connection)
+
+    table = Transaction.__table__
+    accounts = Account.__table__
+    vendors = Vendor.__table__
+    categories = {
+        row.id: (row.category_tier_1, row.category_tier_2)
+        for row in connection.execute(
+            select(vendors.c.id, vendors.c.category_tier_1, vendors.c.category_tier_2),
+        )
+    }
+    column = table.c[source_column]
+    updated = 0
+
+    for batch in _batches(ids, batch_size):
+        rows = connection.execute(
+            select(
+                table.c.id,
+                table.c.vendor_id,
+                column.label("text"),
+                accounts.c.institution_id,
+                table.c.account_id,
+                table.c.transaction_date,
+                table.c.transaction_type,
+                table.c.category_tier_1,
+                table.c.category_tier_2,
+                table.c.amount,
+            )
+            .join(accounts, accounts.c.id == table.c.account_id)
+            .where(
+                table.c.id.in_(batch),
+                table.c.manually_edited.is_(false()),
+            ),
+        )
+        changes: dict[int, int | None] = {}
+        tiers: dict[int, tuple[str | None, str | None]] = {}
+        deltas = RollupDeltas()
+        for row in rows:
+            match = classifier.classify(
+                row.text or "",
+                source_column,
+                row.institution_id,
+            )
+            vendor_id = match.vendor_id if match else None
+            if vendor_id != row.vendor_id:
+                changes[row.id] = vendor_id
+                tiers[row.id] = categories.get(vendor_id, (None, None))
+                deltas.move(row._mapping, *tiers[row.id])  # noqa: SLF001
+        if not changes:
+            continue
+
+        connection.execute(
+            update(table)
+            .where(
+                table.c.id.in_(list(changes)),
+                table.c.manually_edited.is_(false()),
+            )
+            .values(
+                vendor_id=case(changes, value=table.c.id),
+                category_tier_1=case(
+                    {row_id: tier[0] for row_id, tier in tiers.items()},
+                    value=table.c.id,
+                ),
+                category_tier_2=case(
+                    {row_id: tier[1] for row_id, tier in tiers.items()},
+                    value=table.c.id,
+                ),
+            ),
+        )
+        deltas.apply(connection)
+        updated += len(changes)
+    return updated
+
+
+def reclassify_for_pattern(  # noqa: PLR0913
+    connection: Connection,
+    pattern: str,
+    *,
+    pattern_id: int | None = None,
+    vendor_ids: Sequence[int] = (),
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+    classifier: CachedClassifier | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ReclassifyResult:
+    """Reprocess only the transactions a new or edited pattern can affect."""
+    ids, full_scan = find_candidate_ids(
+        connection,
+        pattern,
+        vendor_ids=vendor_ids,
+        source_column=source_column,
+    )
+    updated = reclassify_transactions(
+        connection,
+        ids,
+        classifier=classifier,
+        source_column=source_column,
+        batch_size=batch_size,
+    )
+    return ReclassifyResult(pattern_id, len(ids), updated, full_scan)
+
+
+def approve_pattern(  # noqa: PLR0913
+    connection: Connection,
+    vendor_id: int,
+    pattern: str,
+    *,
+    source_column: str = DEFAULT_SOURCE_COLUMN,
+    priority: int = 0,
+    institution_id: int | None = None,
+    classifier: CachedClassifier | None = None,
+) -> ReclassifyResult:
+    """Insert an approved pattern and reprocess the transactions it affects.
+
+    A pattern with an ``institution_id`` only applies to transactions from
+    that institution's accounts.
+
+    Raises:
+        UnsafePatternError: If the pattern fails the backtracking guard.
+
+    """
+    ensure_safe_pattern(pattern)
+    patterns = VendorPattern.__table__
+    pattern_id = connection.execute(
+        insert(patterns)
+        .values(
+            vendor_id=vendor_id,
+            pattern=pattern,
+            source_column=source_column,
+            priority=priority,
+            institution_id=institution_id,
+        )
+        .returning(patterns.c.id),
+    ).scalar_one()
+    bump_dictionary_version(connection)
+    return reclassify_for_pattern(
+        connection,
+        pattern,
+        pattern_id=pattern_id,
+        source_column=source_column,
+        classifier=classifier,
+    )
+
+
+def update_pattern(
+    connection: Connection,
+    pattern_id: int,
+    pattern: str,
+    *,
+    classifier: CachedClassifier | None = None,
+) -> ReclassifyResult:
+    """Edit an existing pattern and reprocess old and new matches.
+
+    Raises:
+        UnsafePatternError: If the new pattern fails the backtracking guard.
+
+    """
+    ensure_safe_pattern(pattern)
+    patterns = VendorPattern.__table__
+    current = connection.execute(
+        select(patterns.c.vendor_id, patterns.c.source_column).where(
+            patterns.c.id == pattern_id,
+        ),
+    ).one()
+    connection.execute(
+        update(patterns).where(patterns.c.id == pattern_id).values(pattern=pattern),
+    )
+    bump_dictionary_version(connection)
+    return reclassify_for_pattern(
+        connection,
+        pattern,
+        pattern_id=pattern_id,
+        vendor_ids=[current.vendor_id],
+        source_column=current.source_column,
+        classifier=classifier,
+    )
@@ -0,0 +1,291 @@
+##: name = rollups.py
+##: description = Delta-maintained monthly totals per account, type and category
+##: category = reporting
+##: usage = deltas = RollupDeltas(); deltas.add(row); deltas.apply(conn)
+##:         mismatches = check_rollups(conn); rebuild_rollups(conn)
+##: behavior = Upserts signed deltas into monthly_rollups; verifies and rebuilds it
+##: inputs = transactions_normalized rows and their changes
+##: outputs = monthly_rollups rows
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = reporting, budget, aggregates
+##: changelog = Changes mark the budget balances of their categories dirty
+
+"""Incrementally maintained ``monthly_rollups``.
+
+Budget-vs-actual and monthly reports need sums by account, month and
+category. ``monthly_rollups`` holds them, keyed by account, first day of
+the month, transaction type and both category tiers (``''`` when a
+transaction is uncategorized, so the key never contains NULL).
+
+Writers keep it current with deltas rather than recomputing: each insert,
+delete or category change is expressed as signed amounts and counts per
+rollup key, accumulated in a ``RollupDeltas`` and written with one
+``INSERT ... ON CONFLICT DO UPDATE`` that adds to the existing totals, in
+the same transaction as the change itself. ``reclassify_transactions`` and
+``approve_cluster`` do this for category changes; importers call
+``record_transactions`` for the rows they insert.
+
+Deltas are applied in application code rather than database triggers so
+the same path runs on PostgreSQL and on the SQLite test databases.
+Every change also marks the budget balances of its expense categories
+dirty from its month (``ledgerbase.budget_balances``).
+
+``check_rollups`` compares the table with a fresh aggregate of the
+transactions and ``rebuild_rollups`` recomputes it from scratch. Both skip
+the months of years moved to the Parquet archive (``ledgerbase.archive``):
+their transactions are gone, and their rollups are kept for reports.
+"""
+
+import datetime as dt
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    Date,
+    Select,
+    delete,
+    func,
+    insert,
+    select,
+    type_coerce,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ledgerbase.budget_balances import mark_all_dirty, mark_dirty
+from ledgerbase.models import MonthlyRollup, Transaction, TransactionArchive
+
+# Account id, first day of the month, transaction type and both category tiers.
+RollupKey = tuple[int, dt.date, str, str, str]
+
+_KEY_COLUMNS = (
+    "account_id",
+    "month",
+    "transaction_type",
+    "category_tier_1",
+    "category_tier_2",
+)
+
+
+def rollup_key(row: Mapping[str, Any]) -> RollupKey:
+    """Rollup key of a transaction row (a mapping of its columns)."""
+    return (
+        row["account_id"],
+        row["transaction_date"].replace(day=1),
+        row["transaction_type"],
+        row["category_tier_1"] or "",
+        row["category_tier_2"] or "",
+    )
+
+
+class RollupDeltas:
+    """Signed changes to ``monthly_rollups``, accumulated before writing."""
+
+    def __init__(self) -> None:
+        self._deltas: dict[RollupKey, tuple[Decimal, int]] = {}
+
+    def __len__(self) -> int:
+        """Number of rollup keys with a non-zero change."""
+        return len(self.items())
+
+    def add(self, row: Mapping[str, Any], sign: int = 1) -> None:
+        """Count a transaction in (``sign=1``) or out of (``-1``) its key."""
+        key = rollup_key(row)
+        amount, count = self._deltas.get(key, (Decimal(0), 0))
+        self._deltas[key] = (amount + sign * Decimal(row["amount"]), count + sign)
+
+    def move(
+        self,
+        row: Mapping[str, Any],
+        category_tier_1: str | None,
+        category_tier_2: str | None,
+    ) -> None:
+        """Record a change of ``row``'s categories to the given tiers."""
+        self.add(row, -1)
+        self.add(
+            {
+                **row,
+                "category_tier_1": category_tier_1,
+                "category_tier_2": category_tier_2,
+            },
+        )
+
+    def items(self) -> list[tuple[RollupKey, tuple[Decimal, int]]]:
+        """Keys whose amount or count changes."""
+        return [
+            (key, delta) for key, delta in self._deltas.items() if delta[0] or delta[1]
+        ]
+
+    def apply(self, connection: Connection) -> int:
+        """Add the accumulated deltas to ``monthly_rollups`` and reset.
+
+        Rollup rows whose count drops to zero are removed, and the budget
+        balances of the changed expense categories are marked dirty.
+
+        Returns:
+            Number of rollup keys written.
+
+        Raises:
+            NotImplementedError: On databases without ``ON CONFLICT``.
+
+        """
+        items = self.items()
+        self._deltas.clear()
+        if not items:
+            return 0
+        table = MonthlyRollup.__table__
+        dialects = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+        upsert = dialects.get(connection.dialect.name)
+        if upsert is None:
+            msg = f"Rollup upserts are not supported on {connection.dialect.name}"
+            raise NotImplementedError(msg)
+        statement = upsert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in _KEY_COLUMNS],
+            set_={
+                "total_amount": table.c.total_amount + statement.excluded.total_amount,
+                "transaction_count": (
+                    table.c.transaction_count + statement.excluded.transaction_count
+                ),
+            },
+        )
+        connection.execute(
+            statement,
+            [
+                {
+                    **dict(zip(_KEY_COLUMNS, key, strict=True)),
+                    "total_amount": amount,
+                    "transaction_count": count,
+                }
+                for key, (amount, count) in items
+            ],
+        )
+        connection.execute(delete(table).where(table.c.transaction_count == 0))
+        dirty: dict[tuple[str, str], dt.date] = {}
+        for _account, month, transaction_type, tier_1, tier_2 in (
+            key for key, _delta in items
+        ):
+            if transaction_type == "expense":
+                category = (tier_1, tier_2)
+                dirty[category] = min(month, dirty.get(category, month))
+        mark_dirty(connection, dirty)
+        return len(items)
+
+
+def record_transactions(
+    connection: Connection,
+    rows: Iterable[Mapping[str, Any]],
+    sign: int = 1,
+) -> int:
+    """Apply inserted (or, with ``sign=-1``, deleted) transactions.
+
+    Loaders call this in the transaction that writes the rows.
+
+    Returns:
+        Number of rollup keys written.
+
+    """
+    deltas = RollupDeltas()
+    for row in rows:
+        deltas.add(row, sign)
+    return deltas.apply(connection)
+
+
+def _aggregate(connection: Connection) -> Select:
+    """Rollups recomputed from ``transactions_normalized``."""
+    table = Transaction.__table__
+    if connection.dialect.name == "postgresql":
+        month = func.date_trunc("month", table.c.transaction_date).cast(Date)
+    else:
+        month = type_coerce(
+            func.date(table.c.transaction_date, "start of month"),
+            Date,
+        )
+    tier_1 = func.coalesce(table.c.category_tier_1, "")
+    tier_2 = func.coalesce(table.c.category_tier_2, "")
+    return select(
+        table.c.account_id,
+        month.label("month"),
+        table.c.transaction_type,
+        tier_1.label("category_tier_1"),
+        tier_2.label("category_tier_2"),
+        func.sum(table.c.amount).label("total_amount"),
+        func.count().label("transaction_count"),
+    ).group_by(table.c.account_id, month, table.c.transaction_type, tier_1, tier_2)
+
+
+def _unarchived(connection: Connection) -> list[ColumnElement[bool]]:
+    """Conditions excluding rollups of archived years."""
+    month = MonthlyRollup.__table__.c.month
+    years = connection.execute(select(TransactionArchive.__table__.c.year))
+    return [
+        ~month.between(dt.date(year, 1, 1), dt.date(year, 12, 31))
+        for year in years.scalars()
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class RollupMismatch:
+    """A rollup key whose stored totals differ from the transactions."""
+
+    key: RollupKey
+    stored: tuple[Decimal, int]
+    actual: tuple[Decimal, int]
+
+
+def check_rollups(connection: Connection) -> list[RollupMismatch]:
+    """Compare ``monthly_rollups`` with a fresh aggregate of transactions.
+
+    Returns:
+        Every key whose amount or count differs, including keys missing
+        from either side; an empty list when the table is consistent.
+
+    """
+    table = MonthlyRollup.__table__
+    zero = (Decimal(0), 0)
+
+    def totals(query: Select) -> dict[RollupKey, tuple[Decimal, int]]:
+        return {
+            tuple(row[:5]): (Decimal(row.total_amount), row.transaction_count)
+            for row in connection.execute(query)
+        }
+
+    stored = totals(
+        select(
+            *(table.c[name] for name in _KEY_COLUMNS),
+            table.c.total_amount,
+            table.c.transaction_count,
+        ).where(*_unarchived(connection)),
+    )
+    actual = totals(_aggregate(connection))
+    return [
+        RollupMismatch(key, stored.get(key, zero), actual.get(key, zero))
+        for key in sorted(stored.keys() | actual.keys())
+        if stored.get(key, zero) != actual.get(key, zero)
+    ]
+
+
+def rebuild_rollups(connection: Connection) -> int:
+    """Recompute ``monthly_rollups`` from scratch, except archived years.
+
+    Every budget category is marked dirty from its first month.
+
+    Returns:
+        Number of rollup rows written.
+
+    """
+    table = MonthlyRollup.__table__
+    connection.execute(delete(table).where(*_unarchived(connection)))
+    result = connection.execute(
+        insert(table).from_select(
+            [*_KEY_COLUMNS, "total_amount", "transaction_count"],
+            _aggregate(connection),
+        ),
+    )
+    mark_all_dirty(connection)
+    return result.rowcount
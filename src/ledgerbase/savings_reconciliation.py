@@ -0,0 +1,160 @@
+##: name = savings_reconciliation.py
+##: description = Checks account balances cover the cumulative savings allocations
+##: category = reporting
+##: usage = shortfalls = [r for r in reconcile_savings(conn) if r.shortfall]
+##: behavior = Sums rollover balances per backing account; compares latest balances
+##: inputs = savings_accounts, account_balances and budget_balances rows
+##: outputs = AccountReconciliation per savings account
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = reporting, budget, savings
+##: changelog = Read closing balances from budget_balances
+
+"""Reconciliation of savings allocations with account balances.
+
+Savings categories roll their unspent budget over month to month, so the
+closing balance of each one is the money allocated to it so far.
+``savings_accounts`` names the account that holds that money; several
+categories may share one account. ``reconcile_savings`` checks that
+every such account's latest reported balance in ``account_balances``
+covers the allocations of its categories:
+
+* one query reads every category's closing balance for the month from
+  ``budget_balances`` (see ``ledgerbase.budget_balances``), which must be
+  current: callers run ``refresh_balances`` first when
+  ``balances_current`` says so;
+* the balances are summed per account;
+* one grouped query fetches the latest balance of every linked account.
+
+An account without a reported balance counts as holding nothing. The
+nightly job and the dashboard read the ``shortfall`` of the results.
+"""
+
+import calendar
+import datetime as dt
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+
+from sqlalchemy import Connection, and_, func, select
+
+from ledgerbase.budget_balances import balances_at
+from ledgerbase.budget_engine import Category
+from ledgerbase.models import Account, AccountBalance, SavingsAccount
+
+
+@dataclass(frozen=True, slots=True)
+class AccountReconciliation:
+    """Savings allocated to an account compared with its balance."""
+
+    account_id: int
+    account_name: str
+    as_of: dt.date | None
+    balance: Decimal | None
+    allocated: Decimal
+    categories: tuple[tuple[Category, Decimal], ...]
+
+    @property
+    def shortfall(self) -> Decimal:
+        """Allocated amount the balance does not cover; zero when covered."""
+        return max(self.allocated - (self.balance or 0), Decimal("0.00"))
+
+    def as_dict(self) -> dict[str, object]:
+        """JSON-serializable representation; amounts are decimal strings."""
+        return {
+            "account_id": self.account_id,
+            "account_name": self.account_name,
+            "as_of": self.as_of and self.as_of.isoformat(),
+            "balance": None if self.balance is None else str(self.balance),
+            "allocated": str(self.allocated),
+            "shortfall": str(self.shortfall),
+            "categories": [
+                {
+                    "category_tier_1": tier_1,
+                    "category_tier_2": tier_2,
+                    "allocated": str(amount),
+                }
+                for (tier_1, tier_2), amount in self.categories
+            ],
+        }
+
+
+def _latest_balances(
+    connection: Connection,
+    account_ids: list[int],
+    on_or_before: dt.date,
+) -> dict[int, tuple[dt.date, Decimal]]:
+    """Latest reported balance of each account, with one query."""
+    table = AccountBalance.__table__
+    latest = (
+        select(table.c.account_id, func.max(table.c.as_of).label("as_of"))
+        .where(table.c.account_id.in_(account_ids), table.c.as_of <= on_or_before)
+        .group_by(table.c.account_id)
+        .subquery()
+    )
+    rows = connection.execute(
+        select(table.c.account_id, table.c.as_of, table.c.balance).join(
+            latest,
+            and_(
+                table.c.account_id == latest.c.account_id,
+                table.c.as_of == latest.c.as_of,
+            ),
+        ),
+    )
+    return {row.account_id: (row.as_of, Decimal(row.balance)) for row in rows}
+
+
+def reconcile_savings(
+    connection: Connection,
+    month: dt.date | None = None,
+) -> list[AccountReconciliation]:
+    """Compare each savings account's balance with its categories' allocations.
+
+    Args:
+        connection (Connection): Database connection.
+        month (dt.date | None): Month whose closing allocations are
+            checked, against balances reported up to its last day;
+            defaults to the current month.
+
+    Returns:
+        One result per account linked in ``savings_accounts``, by account id.
+
+    """
+    month = (month or dt.datetime.now(tz=dt.UTC).date()).replace(day=1)
+    links = SavingsAccount.__table__
+    accounts = Account.__table__
+    linked = connection.execute(
+        select(
+            links.c.category_tier_1,
+            links.c.category_tier_2,
+            links.c.account_id,
+            accounts.c.name,
+        )
+        .join(accounts, accounts.c.id == links.c.account_id)
+        .order_by(links.c.account_id, links.c.category_tier_1, links.c.category_tier_2),
+    ).all()
+    if not linked:
+        return []
+    # No stored row means a zero balance that month.
+    closing = balances_at(connection, month)
+    per_account: dict[int, list[tuple[Category, Decimal]]] = defaultdict(list)
+    for row in linked:
+        category = (row.category_tier_1, row.category_tier_2)
+        per_account[row.account_id].append(
+            (category, closing.get(category, Decimal("0.00"))),
+        )
+
+    last_day = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+    balances = _latest_balances(connection, list(per_account), last_day)
+    names = {row.account_id: row.name for row in linked}
+    return [
+        AccountReconciliation(
+            account_id,
+            names[account_id],
+            *balances.get(account_id, (None, None)),
+            sum((amount for _category, amount in categories), Decimal("0.00")),
+            tuple(categories),
+        )
+        for account_id, categories in per_account.items()
+    ]
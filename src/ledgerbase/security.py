@@ -7,8 +7,8 @@
 ##: outputs = Secured Flask application with headers, rate limiting, and logging
 ##: dependencies = Flask, flask_limiter
 ##: author = LedgerBase Team
-##: last_modified = 2023-11-15
-##: changelog = Initial version
+##: last_modified = 2026-10-19
+##: changelog = Return the limiter from configure_rate_limiting
 
 import logging
 from logging.handlers import RotatingFileHandler
@@ -68,13 +68,17 @@ def apply_secure_headers(app: Flask) -> None:
         return response
 
 
-def configure_rate_limiting(app: Flask) -> None:
+def configure_rate_limiting(app: Flask) -> Limiter:
     """Configure rate limiting for the Flask app.
 
     Args:
     ----
         app (Flask): The Flask application instance.
 
+    Returns:
+    -------
+        Limiter: The limiter, for exempting or limiting further routes.
+
     """
     limiter = Limiter(get_remote_address, app=app, default_limits=["100 per hour"])
 
@@ -90,6 +94,8 @@ def configure_rate_limiting(app: Flask) -> None:
         """
         return "Login attempt"
 
+    return limiter
+
 
 def configure_logging(app: Flask) -> None:
     """Configure logging for the Flask app.
@@ -0,0 +1,176 @@
+##: name = transaction_listing.py
+##: description = Keyset-paginated listing of transactions with opaque cursors
+##: category = api
+##: usage = page = list_transactions(conn, TransactionFilters(unmatched=True))
+##:         list_transactions(conn, cursor=page.next_cursor)
+##: behavior = Seeks past the last (transaction_date, id) seen instead of OFFSET
+##: inputs = Filters, an optional cursor and a page size
+##: outputs = TransactionPage with rows and the cursor of the next page
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = api, transactions, pagination
+##: changelog = Document the category filter's index after compaction
+
+"""Transaction listing for the transaction list and filter UI.
+
+Transactions are listed newest first, ordered by ``(transaction_date, id)``
+descending. Each page ends with a cursor encoding the sort key of its last
+row; the next page is the rows strictly before that key. Unlike ``OFFSET``
+the database never reads the rows of earlier pages, so with an index ending
+in ``(transaction_date, id)`` page 1,000 costs the same as page 1. Every
+filter has such an index (``migrations/0005``). On PostgreSQL the category
+filter goes through the ``categories`` join onto
+``transaction_facts_category_date_idx`` on ``(category_id,
+transaction_date, id)`` (``migrations/0006``). The ``label`` filter
+matches the ``tag`` column.
+
+Cursors are URL-safe base64 of the sort key. Clients must treat them as
+opaque: the encoding may change.
+"""
+
+import base64
+import binascii
+import datetime as dt
+import json
+import operator
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import ColumnElement, Connection, select, tuple_
+
+from ledgerbase.models import Transaction
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_COLUMNS = (
+    "id",
+    "account_id",
+    "vendor_id",
+    "transaction_date",
+    "amount",
+    "raw_description",
+    "normalized_description",
+    "transaction_type",
+    "category_tier_1",
+    "category_tier_2",
+    "tag",
+    "person",
+)
+
+
+def encode_cursor(transaction_date: dt.date, transaction_id: int) -> str:
+    """Opaque cursor for the rows after ``(transaction_date, transaction_id)``."""
+    payload = json.dumps([transaction_date.isoformat(), transaction_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[dt.date, int]:
+    """Sort key encoded in ``cursor``.
+
+    Raises:
+        ValueError: If the cursor was not produced by ``encode_cursor``.
+
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        day, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return dt.date.fromisoformat(day), operator.index(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as error:
+        msg = "Invalid cursor"
+        raise ValueError(msg) from error
+
+
+@dataclass(frozen=True, slots=True)
+class TransactionFilters:
+    """Conditions a listed transaction must meet; ``None`` means any."""
+
+    unmatched: bool = False
+    vendor_id: int | None = None
+    category_tier_1: str | None = None
+    category_tier_2: str | None = None
+    label: str | None = None
+    person: str | None = None
+
+    def conditions(self) -> list[ColumnElement[bool]]:
+        """WHERE clauses for these filters."""
+        table = Transaction.__table__
+        conditions = []
+        if self.unmatched:
+            conditions.append(table.c.vendor_id.is_(None))
+        equalities = (
+            (table.c.vendor_id, self.vendor_id),
+            (table.c.category_tier_1, self.category_tier_1),
+            (table.c.category_tier_2, self.category_tier_2),
+            (table.c.tag, self.label),
+            (table.c.person, self.person),
+        )
+        conditions.extend(
+            column == value for column, value in equalities if value is not None
+        )
+        return conditions
+
+
+@dataclass(frozen=True, slots=True)
+class TransactionPage:
+    """One page of transactions and the cursor of the following page."""
+
+    transactions: list[dict[str, Any]]
+    next_cursor: str | None
+
+    def as_dict(self) -> dict[str, object]:
+        """JSON-serializable representation for the API route."""
+        return {
+            "transactions": [
+                {
+                    **row,
+                    "transaction_date": row["transaction_date"].isoformat(),
+                    "amount": str(row["amount"]),
+                }
+                for row in self.transactions
+            ],
+            "next_cursor": self.next_cursor,
+        }
+
+
+def list_transactions(
+    connection: Connection,
+    filters: TransactionFilters | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> TransactionPage:
+    """List one page of transactions, newest first.
+
+    Args:
+        connection (Connection): Database connection.
+        filters (TransactionFilters | None): Conditions rows must meet.
+        cursor (str | None): ``next_cursor`` of the previous page; ``None``
+            for the first page.
+        limit (int): Page size, at most ``MAX_PAGE_SIZE``.
+
+    Returns:
+        The page; ``next_cursor`` is ``None`` on the last page.
+
+    Raises:
+        ValueError: If ``cursor`` is invalid or ``limit`` out of range.
+
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        msg = f"limit must be between 1 and {MAX_PAGE_SIZE}"
+        raise ValueError(msg)
+    table = Transaction.__table__
+    sort_key = (table.c.transaction_date, table.c.id)
+    query = select(*(table.c[name] for name in _COLUMNS)).where(
+        *(filters or TransactionFilters()).conditions(),
+    )
+    if cursor is not None:
+        query = query.where(tuple_(*sort_key) < tuple_(*decode_cursor(cursor)))
+    rows = connection.execute(
+        query.order_by(*(column.desc() for column in sort_key)).limit(limit + 1),
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].transaction_date, rows[-1].id)
+    return TransactionPage([dict(row._mapping) for row in rows], next_cursor)  # noqa: SLF001
@@ -0,0 +1,139 @@
+##: name = trigram_index.py
+##: description = SQLite FTS5 trigram index of descriptions; pg_trgm word trigrams
+##: category = etl
+##: usage = candidates = trigram_candidates("raw_description", [["SHELL", "OIL"]])
+##:         grams = word_trigrams("SHELL OIL 57444")
+##: behavior = Narrows substring searches on SQLite; splits text into word trigrams
+##: inputs = Description text, required pattern terms
+##: outputs = Candidate id queries, trigram sets
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = index, trigram, classification
+##: changelog = SQLite candidate search through an FTS5 trigram index
+
+"""Trigram indexes over transaction descriptions.
+
+Reclassification narrows candidates with substring searches on the
+columns patterns target (see ``ledgerbase.reclassify``). PostgreSQL
+serves them from GIN ``gin_trgm_ops`` indexes. SQLite has no trigram
+operator class, so ``TRIGRAM_TABLE`` is an FTS5 table with the
+``trigram`` tokenizer over the same columns: an external-content index
+of ``transactions_normalized`` (it stores no copy of the text), kept
+current by the triggers in ``SQLITE_TRIGRAM_DDL``. ``create_all`` builds
+it with the table; migration 0015 adds it to existing SQLite databases.
+
+``trigram_candidates`` turns the required terms of a pattern into a
+query for the ids of rows containing them. FTS5 cannot search for
+substrings shorter than three characters, so such terms are skipped; a
+group left empty makes the index unusable and the caller scans instead.
+
+``word_trigrams`` produces ``pg_trgm``-style padded word trigrams, which
+suit similarity scoring rather than substring tests.
+"""
+
+import re
+from collections.abc import Sequence
+
+from sqlalchemy import Connection, Select, inspect, literal_column, select, table, text
+
+TRIGRAM_LENGTH = 3
+TRIGRAM_TABLE = "transactions_normalized_trgm"
+TRIGRAM_COLUMNS = ("raw_description", "normalized_description", "parsed_vendor")
+
+_COLUMNS = ", ".join(TRIGRAM_COLUMNS)
+_NEW = ", ".join(f"new.{column}" for column in TRIGRAM_COLUMNS)
+_OLD = ", ".join(f"old.{column}" for column in TRIGRAM_COLUMNS)
+
+# Mirrored in schema/migrations/0015_sqlite_description_trigram_index.sql.
+SQLITE_TRIGRAM_DDL = (
+    (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_TABLE} USING fts5("
+        f"{_COLUMNS}, content='transactions_normalized', content_rowid='id',"
+        " tokenize='trigram')"
+    ),
+    (
+        f"CREATE TRIGGER IF NOT EXISTS {TRIGRAM_TABLE}_insert"
+        " AFTER INSERT ON transactions_normalized BEGIN"
+        f" INSERT INTO {TRIGRAM_TABLE} (rowid, {_COLUMNS}) VALUES (new.id, {_NEW});"
+        " END"
+    ),
+    (
+        f"CREATE TRIGGER IF NOT EXISTS {TRIGRAM_TABLE}_delete"
+        " AFTER DELETE ON transactions_normalized BEGIN"
+        f" INSERT INTO {TRIGRAM_TABLE} ({TRIGRAM_TABLE}, rowid, {_COLUMNS})"
+        f" VALUES ('delete', old.id, {_OLD});"
+        " END"
+    ),
+    (
+        f"CREATE TRIGGER IF NOT EXISTS {TRIGRAM_TABLE}_update"
+        f" AFTER UPDATE OF id, {_COLUMNS} ON transactions_normalized BEGIN"
+        f" INSERT INTO {TRIGRAM_TABLE} ({TRIGRAM_TABLE}, rowid, {_COLUMNS})"
+        f" VALUES ('delete', old.id, {_OLD});"
+        f" INSERT INTO {TRIGRAM_TABLE} (rowid, {_COLUMNS}) VALUES (new.id, {_NEW});"
+        " END"
+    ),
+)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def has_trigram_index(connection: Connection) -> bool:
+    """True on a SQLite database that has ``TRIGRAM_TABLE``."""
+    return connection.dialect.name == "sqlite" and inspect(connection).has_table(
+        TRIGRAM_TABLE,
+    )
+
+
+def _phrase(term: str) -> str:
+    """FTS5 string literal for ``term``."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def trigram_candidates(
+    column: str,
+    terms: Sequence[Sequence[str]],
+) -> Select | None:
+    """Ids of rows whose ``column`` may contain one group of ``terms``.
+
+    Args:
+        column (str): One of ``TRIGRAM_COLUMNS``.
+        terms (Sequence[Sequence[str]]): Groups of terms; a row is a
+            candidate when it contains every term of any group.
+
+    Returns:
+        A query selecting ``id``, or None when a group has no term long
+        enough to search for.
+
+    """
+    groups = []
+    for group in terms:
+        searchable = [_phrase(term) for term in group if len(term) >= TRIGRAM_LENGTH]
+        if not searchable:
+            return None
+        groups.append(f"({' AND '.join(searchable)})")
+    if column not in TRIGRAM_COLUMNS or not groups:
+        return None
+    query = f"{{{column}}} : ({' OR '.join(groups)})"
+    return (
+        select(literal_column("rowid").label("id"))
+        .select_from(table(TRIGRAM_TABLE))
+        .where(text(f"{TRIGRAM_TABLE} MATCH :query").bindparams(query=query))
+    )
+
+
+def word_trigrams(text: str) -> set[str]:
+    """Return padded word trigrams of ``text`` as ``pg_trgm`` computes them.
+
+    Each alphanumeric word is upper-cased and padded with two leading
+    spaces and one trailing space, so short words still yield trigrams and
+    word starts weigh more than word middles.
+    """
+    grams: set[str] = set()
+    for word in _WORD.findall(text.upper()):
+        padded = f"  {word} "
+        grams.update(
+            padded[index : index + TRIGRAM_LENGTH]
+            for index in range(len(padded) - TRIGRAM_LENGTH + 1)
+        )
+    return grams
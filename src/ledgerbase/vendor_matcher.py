@@ -0,0 +1,488 @@
+##: name = vendor_matcher.py
+##: description = Single-pass regex vendor matcher built from the vendor_patterns table
+##: category = etl
+##: usage = matcher = VendorMatcher.from_connection(conn)
+##:         match = matcher.match("STARBUCKS #1234 SEATTLE")
+##: behavior = Prefilters patterns by required literals, then runs the survivors
+##: inputs = vendor_patterns rows (PatternSpec)
+##: outputs = VendorMatch results carrying the winning vendor_id
+##: dependencies = SQLAlchemy, regex (optional, for match timeouts)
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, regex, classification
+##: changelog = Picklable engine and eager compile_all for prebuilt artifacts
+
+"""Regex-based vendor matching over the vendor dictionary.
+
+Evaluating every ``vendor_patterns`` row against every transaction costs
+O(patterns x rows) Python-level ``re.search`` calls. ``VendorMatcher``
+instead compiles the patterns of a partition into a single combined
+regular expression whose empty named marker groups map back to the
+originating pattern, so each description is classified by one ``search``
+call per priority tier.
+
+Patterns are partitioned by ``(institution_id, source_column)``. A pattern
+without an institution applies to every institution; a partition for a
+specific institution holds its own patterns plus the global ones and is
+compiled the first time a transaction from that institution is matched.
+Each description therefore only sees the patterns written for its bank's
+format.
+
+Patterns that contain a required literal are additionally prefiltered
+through an Aho-Corasick index (see ``ledgerbase.literal_index``), so only
+the handful of patterns whose literals occur in a description run their
+full regex and classification cost stays nearly independent of the size
+of the dictionary.
+
+Priority rules are deterministic:
+
+1. A pattern in a higher ``priority`` tier always beats lower tiers.
+2. Within a tier, the leftmost match in the description wins.
+3. Matches starting at the same position prefer the longer pattern text
+   (a proxy for specificity), then the lower pattern id.
+
+Passing ``timeout`` compiles patterns with the third-party ``regex`` module,
+whose ``search`` accepts a timeout. A search that exceeds it is logged and
+treated as no match, so one pathological pattern cannot stall
+classification. The timeout bounds each ``search`` call: one per indexed
+pattern, or one per tier alternation.
+"""
+
+import importlib
+import logging
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any
+
+from sqlalchemy import Connection, select
+
+from ledgerbase.literal_index import AhoCorasick, extract_required_literals
+from ledgerbase.models import Account, VendorPattern
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE_COLUMN = "raw_description"
+MATCH_FLAGS = re.IGNORECASE
+
+# Constructs that cannot be embedded in a combined alternation because they
+# depend on group numbering or names inside the original pattern, or set
+# global inline flags that are only legal at the start of an expression.
+_NOT_COMBINABLE = re.compile(
+    r"\\[1-9]|\(\?P[<=]|\(\?<[^=!]|\(\?\(|\(\?[aiLmsux]+\)",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class PatternSpec:
+    """A single vendor pattern as stored in ``vendor_patterns``."""
+
+    pattern_id: int
+    vendor_id: int
+    pattern: str
+    source_column: str = DEFAULT_SOURCE_COLUMN
+    priority: int = 0
+    institution_id: int | None = None
+
+    @property
+    def rank(self) -> tuple[int, int, int]:
+        """Sort key; lower ranks win between matches at the same position."""
+        return (-self.priority, -len(self.pattern), self.pattern_id)
+
+
+@dataclass(frozen=True, slots=True)
+class VendorMatch:
+    """Result of classifying one description."""
+
+    vendor_id: int
+    pattern_id: int
+    start: int
+    end: int
+
+
+@dataclass(frozen=True, slots=True)
+class _Engine:
+    """Regex implementation used to compile and run patterns."""
+
+    module: ModuleType
+    flags: int
+    timeout: float | None = None
+
+    @classmethod
+    def for_timeout(cls, flags: int, timeout: float | None) -> "_Engine":
+        if timeout is None:
+            return cls(re, flags)
+        try:
+            module = importlib.import_module("regex")
+        except ImportError as exc:
+            msg = "Match timeouts require the optional 'regex' package"
+            raise ImportError(msg) from exc
+        return cls(module, flags, timeout)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Modules cannot be pickled; re-resolve the engine when loading.
+        return (_Engine.for_timeout, (self.flags, self.timeout))
+
+    def compile(self, pattern: str) -> Any:  # noqa: ANN401
+        return self.module.compile(pattern, self.flags)
+
+    def search(self, compiled: Any, description: str) -> re.Match[str] | None:  # noqa: ANN401
+        if self.timeout is None:
+            return compiled.search(description)
+        try:
+            return compiled.search(description, timeout=self.timeout)
+        except TimeoutError:
+            logger.warning(
+                "Pattern search timed out after %ss: %.80s",
+                self.timeout,
+                compiled.pattern,
+            )
+            return None
+
+
+def compile_pattern(spec: PatternSpec, flags: int) -> re.Pattern[str] | None:
+    """Compile one pattern on its own, logging and skipping invalid ones."""
+    return _compile(spec, _Engine(re, flags))
+
+
+def _compile(spec: PatternSpec, engine: _Engine) -> Any:  # noqa: ANN401
+    try:
+        return engine.compile(spec.pattern)
+    except (re.error, engine.module.error) as exc:
+        logger.warning("Skipping invalid pattern %s: %s", spec.pattern_id, exc)
+        return None
+
+
+_MatchKey = tuple[int, int, tuple[int, int, int]]
+
+
+def _keyed(spec: PatternSpec, found: re.Match[str]) -> tuple[_MatchKey, VendorMatch]:
+    """Pair a match with the sort key implementing the priority rules."""
+    return (
+        (-spec.priority, found.start(), spec.rank),
+        VendorMatch(spec.vendor_id, spec.pattern_id, found.start(), found.end()),
+    )
+
+
+class _Tier:
+    """Patterns sharing one priority, compiled into a single alternation."""
+
+    def __init__(
+        self,
+        priority: int,
+        specs: Sequence[PatternSpec],
+        engine: _Engine,
+    ) -> None:
+        self.priority = priority
+        self.engine = engine
+        self.specs: list[PatternSpec] = []
+        self.isolated: list[tuple[PatternSpec, re.Pattern[str]]] = []
+        branches: list[str] = []
+
+        for spec in sorted(specs, key=lambda item: item.rank):
+            compiled = _compile(spec, engine)
+            if compiled is None:
+                continue
+            if compiled.groupindex or _NOT_COMBINABLE.search(spec.pattern):
+                self.isolated.append((spec, compiled))
+                continue
+            # The empty marker group goes last so each branch still starts
+            # with the pattern's own first literal, which lets the regex
+            # engine reject non-matching branches with a single comparison.
+            branches.append(f"(?:{spec.pattern})(?P<p{len(self.specs)}>)")
+            self.specs.append(spec)
+
+        self.combined: re.Pattern[str] | None = (
+            engine.compile("|".join(branches)) if branches else None
+        )
+
+    def match(self, description: str) -> tuple[_MatchKey, VendorMatch] | None:
+        best: tuple[_MatchKey, VendorMatch] | None = None
+
+        if self.combined is not None:
+            found = self.engine.search(self.combined, description)
+            if found is not None and found.lastgroup is not None:
+                best = _keyed(self.specs[int(found.lastgroup[1:])], found)
+
+        for spec, compiled in self.isolated:
+            found = self.engine.search(compiled, description)
+            if found is not None:
+                keyed = _keyed(spec, found)
+                if best is None or keyed[0] < best[0]:
+                    best = keyed
+        return best
+
+
+_PartitionKey = tuple[int | None, str]
+
+
+class _CompiledSet:
+    """All patterns of one partition.
+
+    Patterns with an extractable required literal are registered in an
+    Aho-Corasick index and only run when one of their literals occurs in
+    the description. The remainder form a small always-run set, compiled
+    into one alternation per priority tier.
+
+    When pickled, the compiled indexed patterns are dropped and recompiled
+    the first time one of their literals occurs, so loading a prebuilt
+    matcher does not pay for patterns that never become candidates.
+    """
+
+    def __init__(
+        self,
+        specs: Sequence[PatternSpec],
+        engine: _Engine,
+        *,
+        use_literal_index: bool,
+    ) -> None:
+        self.engine = engine
+        self.indexed: list[PatternSpec] = []
+        self._programs: list[Any] = []
+        entries: list[tuple[str, int]] = []
+        always_run: dict[int, list[PatternSpec]] = {}
+
+        for spec in specs:
+            literals = (
+                extract_required_literals(spec.pattern, engine.flags)
+                if use_literal_index
+                else None
+            )
+            if literals is None:
+                always_run.setdefault(spec.priority, []).append(spec)
+                continue
+            compiled = _compile(spec, engine)
+            if compiled is None:
+                continue
+            entries.extend((literal, len(self.indexed)) for literal in literals)
+            self.indexed.append(spec)
+            self._programs.append(compiled)
+
+        self.literal_index = AhoCorasick(entries)
+        self.tiers = [
+            _Tier(priority, always_run[priority], engine)
+            for priority in sorted(always_run, reverse=True)
+        ]
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_programs"] = [None] * len(self.indexed)
+        return state
+
+    def _program(self, key: int) -> Any:  # noqa: ANN401
+        compiled = self._programs[key]
+        if compiled is None:
+            compiled = self._programs[key] = self.engine.compile(
+                self.indexed[key].pattern,
+            )
+        return compiled
+
+    def candidates(self, description: str) -> Iterable[int]:
+        """Indexed patterns whose literals occur in ``description``."""
+        if not description.isascii():
+            # Case-insensitive matching of non-ASCII text can equate
+            # characters that upper-casing does not, so skip the filter.
+            return range(len(self.indexed))
+        return self.literal_index.find(description.upper())  # type: ignore[return-value]
+
+    def match(self, description: str) -> VendorMatch | None:
+        best: tuple[_MatchKey, VendorMatch] | None = None
+
+        for key in self.candidates(description):
+            spec = self.indexed[key]
+            if best is not None and -spec.priority > best[0][0]:
+                continue
+            found = self.engine.search(self._program(key), description)
+            if found is not None:
+                keyed = _keyed(spec, found)
+                if best is None or keyed[0] < best[0]:
+                    best = keyed
+
+        for tier in self.tiers:
+            if best is not None and -tier.priority > best[0][0]:
+                break
+            keyed = tier.match(description)
+            if keyed is not None and (best is None or keyed[0] < best[0]):
+                best = keyed
+                break
+
+        return best[1] if best is not None else None
+
+
+class VendorMatcher:
+    """Classify descriptions against the whole vendor dictionary in one pass.
+
+    Args:
+        specs (Iterable[PatternSpec]): Patterns to compile.
+        flags (int): ``re`` flags applied to every pattern.
+        use_literal_index (bool): Prefilter patterns through the required
+            literal index. Disabling it compiles every pattern into the
+            per-tier alternations instead.
+        timeout (float | None): Seconds allowed per ``search`` call. Requires
+            the optional ``regex`` package; ``None`` uses the standard ``re``
+            module without a limit.
+
+    """
+
+    def __init__(
+        self,
+        specs: Iterable[PatternSpec],
+        flags: int = MATCH_FLAGS,
+        *,
+        use_literal_index: bool = True,
+        timeout: float | None = None,
+    ) -> None:
+        self._specs: dict[_PartitionKey, list[PatternSpec]] = {}
+        for spec in specs:
+            key = (spec.institution_id, spec.source_column)
+            self._specs.setdefault(key, []).append(spec)
+        self.flags = flags
+        self.timeout = timeout
+        self._engine = _Engine.for_timeout(flags, timeout)
+        self.use_literal_index = use_literal_index
+        self._sets: dict[_PartitionKey, _CompiledSet | None] = {}
+
+    @classmethod
+    def from_connection(
+        cls,
+        connection: Connection,
+        timeout: float | None = None,
+    ) -> "VendorMatcher":
+        """Build a matcher from the ``vendor_patterns`` table."""
+        return cls(load_pattern_specs(connection), timeout=timeout)
+
+    def rebuilt(self, specs: Iterable[PatternSpec]) -> "VendorMatcher":
+        """Return a matcher for new ``specs`` with the same settings."""
+        return VendorMatcher(
+            specs,
+            self.flags,
+            use_literal_index=self.use_literal_index,
+            timeout=self.timeout,
+        )
+
+    def __len__(self) -> int:
+        """Number of patterns across all partitions."""
+        return sum(len(specs) for specs in self._specs.values())
+
+    @property
+    def source_columns(self) -> list[str]:
+        """Source columns that have at least one pattern."""
+        return sorted({column for _, column in self._specs})
+
+    @property
+    def institutions(self) -> list[int]:
+        """Institutions that have at least one institution-specific pattern."""
+        return sorted({inst for inst, _ in self._specs if inst is not None})
+
+    def partition(
+        self,
+        source_column: str = DEFAULT_SOURCE_COLUMN,
+        institution_id: int | None = None,
+    ) -> list[PatternSpec]:
+        """Patterns evaluated for one institution and source column."""
+        specs = list(self._specs.get((None, source_column), ()))
+        if institution_id is not None:
+            specs.extend(self._specs.get((institution_id, source_column), ()))
+        return specs
+
+    def _compiled(
+        self,
+        source_column: str,
+        institution_id: int | None,
+    ) -> _CompiledSet | None:
+        if (institution_id, source_column) not in self._specs:
+            # Institutions without their own patterns share the global set.
+            institution_id = None
+        key = (institution_id, source_column)
+        if key not in self._sets:
+            specs = self.partition(source_column, institution_id)
+            self._sets[key] = (
+                _CompiledSet(
+                    specs,
+                    self._engine,
+                    use_literal_index=self.use_literal_index,
+                )
+                if specs
+                else None
+            )
+        return self._sets[key]
+
+    def compile_all(self) -> "VendorMatcher":
+        """Compile every partition now instead of on first use.
+
+        Returns:
+            The matcher itself, so it can be pickled fully built.
+
+        """
+        for institution_id, source_column in self._specs:
+            self._compiled(source_column, institution_id)
+        return self
+
+    def match(
+        self,
+        description: str,
+        source_column: str = DEFAULT_SOURCE_COLUMN,
+        institution_id: int | None = None,
+    ) -> VendorMatch | None:
+        """Return the winning vendor match for a description, if any.
+
+        Args:
+            description (str): Text of ``source_column`` to classify.
+            source_column (str): Column the description was taken from.
+            institution_id (int | None): Institution of the transaction's
+                account; None restricts matching to global patterns.
+
+        """
+        compiled_set = self._compiled(source_column, institution_id)
+        if compiled_set is None or not description:
+            return None
+        return compiled_set.match(description)
+
+    def match_many(
+        self,
+        descriptions: Iterable[str],
+        source_column: str = DEFAULT_SOURCE_COLUMN,
+        institution_id: int | None = None,
+    ) -> list[VendorMatch | None]:
+        """Classify a batch from the same source column and institution."""
+        compiled_set = self._compiled(source_column, institution_id)
+        if compiled_set is None:
+            return [None for _ in descriptions]
+        return [
+            compiled_set.match(description) if description else None
+            for description in descriptions
+        ]
+
+
+def load_pattern_specs(connection: Connection) -> list[PatternSpec]:
+    """Read every row of ``vendor_patterns`` as a ``PatternSpec``."""
+    table = VendorPattern.__table__
+    rows = connection.execute(
+        select(
+            table.c.id,
+            table.c.vendor_id,
+            table.c.pattern,
+            table.c.source_column,
+            table.c.priority,
+            table.c.institution_id,
+        ).order_by(table.c.id),
+    )
+    return [
+        PatternSpec(
+            pattern_id=row.id,
+            vendor_id=row.vendor_id,
+            pattern=row.pattern,
+            source_column=row.source_column,
+            priority=row.priority or 0,
+            institution_id=row.institution_id,
+        )
+        for row in rows
+    ]
+
+
+def load_account_institutions(connection: Connection) -> dict[int, int]:
+    """Map each account id to its institution, for choosing a partition."""
+    table = Account.__table__
+    rows = connection.execute(select(table.c.id, table.c.institution_id))
+    return {row.id: row.institution_id for row in rows}
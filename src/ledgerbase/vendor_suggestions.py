@@ -0,0 +1,191 @@
+##: name = vendor_suggestions.py
+##: description = Trigram similarity suggestions for the unmatched vendor queue
+##: category = etl
+##: usage = suggester = VendorSuggester.from_connection(conn)
+##:         suggester.suggest("STARBUCKS STORE 1234", k=3)
+##: behavior = Scores descriptions against vendor names and matched descriptions
+##: inputs = vendors rows, matched transactions, unmatched descriptions
+##: outputs = Ranked VendorSuggestion lists with similarity scores
+##: dependencies = SQLAlchemy
+##: author = LedgerBase Team
+##: last_modified = 2026-10-19
+##: tags = vendors, suggestions, trigram, review
+##: changelog = Score the stored normalized_description when present
+
+"""Auto-suggestion engine for the unmatched vendor queue.
+
+Every vendor name and every distinct description already matched to a
+vendor is stored as a document of padded word trigrams in an inverted
+index. An unmatched description is scored against the documents sharing
+at least one trigram with it and the best score per vendor is reported.
+Matched descriptions use ``pg_trgm``'s ``similarity`` (shared / union
+trigrams); vendor names use ``word_similarity`` semantics (shared / name
+trigrams), because a bank description embeds the name among other words.
+
+Descriptions are read from the stored ``normalized_description`` where it
+has been filled in, and digits are dropped before indexing, so prefixes,
+store numbers, dates and card suffixes do not dilute the similarity. New
+vendors and newly matched descriptions are added incrementally; the index
+is never rebuilt.
+"""
+
+import heapq
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import ColumnElement, Connection, Table, func, select
+
+from ledgerbase.models import Transaction, Vendor
+from ledgerbase.trigram_index import word_trigrams
+
+DEFAULT_TOP_K = 5
+DEFAULT_MIN_SCORE = 0.3
+
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass(frozen=True, slots=True)
+class VendorSuggestion:
+    """A candidate vendor for an unmatched description."""
+
+    vendor_id: int
+    score: float
+
+
+def _description(table: Table) -> ColumnElement[str]:
+    return func.coalesce(
+        table.c.normalized_description,
+        table.c.raw_description,
+    ).label("description")
+
+
+def suggestion_trigrams(text: str) -> frozenset[str]:
+    """Trigrams used for similarity, ignoring digits."""
+    return frozenset(word_trigrams(_DIGITS.sub(" ", text)))
+
+
+class VendorSuggester:
+    """Incrementally maintained trigram index of vendor evidence.
+
+    Args:
+        min_score (float): Similarity below which suggestions are dropped.
+
+    """
+
+    def __init__(self, min_score: float = DEFAULT_MIN_SCORE) -> None:
+        self.min_score = min_score
+        self._postings: dict[str, list[int]] = {}
+        self._doc_vendor: list[int] = []
+        self._doc_size: list[int] = []
+        self._doc_is_name: list[bool] = []
+        self._seen: set[tuple[int, frozenset[str]]] = set()
+
+    @classmethod
+    def from_connection(
+        cls,
+        connection: Connection,
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> "VendorSuggester":
+        """Index all vendor names and distinct matched descriptions."""
+        suggester = cls(min_score)
+        vendors = Vendor.__table__
+        for row in connection.execute(select(vendors.c.id, vendors.c.name)):
+            suggester.add_vendor(row.id, row.name)
+        transactions = Transaction.__table__
+        for row in connection.execute(
+            select(transactions.c.vendor_id, _description(transactions))
+            .where(transactions.c.vendor_id.is_not(None))
+            .distinct(),
+        ):
+            suggester.add_description(row.vendor_id, row.description)
+        return suggester
+
+    def __len__(self) -> int:
+        """Number of indexed documents."""
+        return len(self._doc_vendor)
+
+    def _add_document(self, vendor_id: int, text: str, *, is_name: bool) -> bool:
+        grams = suggestion_trigrams(text)
+        if not grams or (vendor_id, grams) in self._seen:
+            return False
+        self._seen.add((vendor_id, grams))
+        doc_id = len(self._doc_vendor)
+        self._doc_vendor.append(vendor_id)
+        self._doc_size.append(len(grams))
+        self._doc_is_name.append(is_name)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(doc_id)
+        return True
+
+    def add_vendor(self, vendor_id: int, name: str) -> bool:
+        """Index a vendor name. Returns False if it added nothing new."""
+        return self._add_document(vendor_id, name, is_name=True)
+
+    def add_description(self, vendor_id: int, description: str) -> bool:
+        """Index a description known to belong to ``vendor_id``."""
+        return self._add_document(vendor_id, description, is_name=False)
+
+    def _score(self, grams: frozenset[str], k: int) -> list[VendorSuggestion]:
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for doc_id in self._postings.get(gram, ()):
+                shared[doc_id] = shared.get(doc_id, 0) + 1
+
+        best: dict[int, float] = {}
+        query_size = len(grams)
+        for doc_id, count in shared.items():
+            doc_size = self._doc_size[doc_id]
+            if self._doc_is_name[doc_id]:
+                score = count / doc_size
+            else:
+                score = count / (query_size + doc_size - count)
+            vendor_id = self._doc_vendor[doc_id]
+            if score >= self.min_score and score > best.get(vendor_id, 0.0):
+                best[vendor_id] = score
+
+        top = heapq.nsmallest(k, best.items(), key=lambda item: (-item[1], item[0]))
+        return [VendorSuggestion(vendor_id, score) for vendor_id, score in top]
+
+    def suggest(
+        self,
+        description: str,
+        k: int = DEFAULT_TOP_K,
+    ) -> list[VendorSuggestion]:
+        """Return up to ``k`` vendors most similar to ``description``."""
+        grams = suggestion_trigrams(description)
+        return self._score(grams, k) if grams else []
+
+    def suggest_many(
+        self,
+        descriptions: Iterable[str],
+        k: int = DEFAULT_TOP_K,
+    ) -> list[list[VendorSuggestion]]:
+        """Score a batch; descriptions with identical trigrams are scored once."""
+        memo: dict[frozenset[str], list[VendorSuggestion]] = {}
+        results = []
+        for description in descriptions:
+            grams = suggestion_trigrams(description)
+            if grams not in memo:
+                memo[grams] = self._score(grams, k) if grams else []
+            results.append(memo[grams])
+        return results
+
+    def suggest_unmatched(
+        self,
+        connection: Connection,
+        k: int = DEFAULT_TOP_K,
+        limit: int | None = None,
+    ) -> dict[int, list[VendorSuggestion]]:
+        """Score the unmatched queue, keyed by transaction id."""
+        table = Transaction.__table__
+        query = (
+            select(table.c.id, _description(table))
+            .where(table.c.vendor_id.is_(None))
+            .order_by(table.c.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        rows = connection.execute(query).all()
+        suggestions = self.suggest_many((row.description for row in rows), k)
+        return {row.id: found for row, found in zip(rows, suggestions, strict=True)}
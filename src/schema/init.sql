@@ -1,7 +1,23 @@
 -- schema/init.sql
 
 -- Drop tables for clean re-init
-DROP TABLE IF EXISTS transactions_normalized, vendor_patterns, vendors, accounts, institutions CASCADE;
+DO $$
+BEGIN
+    -- A view since migration 0006; a table in databases created before it
+    IF (SELECT relkind FROM pg_class
+        WHERE oid = to_regclass('transactions_normalized')) = 'v' THEN
+        DROP VIEW transactions_normalized CASCADE;
+    ELSE
+        DROP TABLE IF EXISTS transactions_normalized CASCADE;
+    END IF;
+END;
+$$;
+DROP TABLE IF EXISTS schema_migrations, savings_accounts, account_balances, budget_snapshots, budget_entry_changes, budget_versions, budget_dirty, budget_balances, budget_entries, transaction_archives, monthly_rollups, transaction_facts, source_files, categories, dictionary_version, vendor_patterns, vendors, accounts, institutions CASCADE;
+DROP FUNCTION IF EXISTS ensure_transaction_partitions(DATE, DATE);
+DROP FUNCTION IF EXISTS transactions_normalized_write();
+DROP FUNCTION IF EXISTS transaction_type_code(TEXT);
+DROP FUNCTION IF EXISTS category_id_for(TEXT, TEXT);
+DROP FUNCTION IF EXISTS source_file_id_for(TEXT);
 
 -- Institutions
 CREATE TABLE institutions (
@@ -39,25 +55,452 @@ CREATE TABLE vendor_patterns (
     vendor_id INTEGER NOT NULL REFERENCES vendors(id) ON DELETE CASCADE,
     pattern TEXT NOT NULL,
     source_column TEXT NOT NULL,
+    institution_id INTEGER REFERENCES institutions(id) ON DELETE CASCADE,
+    priority INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE (vendor_id, pattern)
 );
 
--- Normalized Transactions
-CREATE TABLE transactions_normalized (
-    id SERIAL PRIMARY KEY,
+-- Single-row counter incremented by every change to vendors or
+-- vendor_patterns; classification caches and matcher artifacts are keyed
+-- on it (ledgerbase.classification_cache)
+CREATE TABLE dictionary_version (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO dictionary_version (id, version) VALUES (1, 0);
+
+-- Normalized Transactions are stored compactly in transaction_facts,
+-- range-partitioned by transaction_date month, and read and written through
+-- the transactions_normalized view below. Unique constraints must include
+-- the partition key, hence the composite primary key. Rows outside every
+-- monthly partition land in the default partition until
+-- ensure_transaction_partitions creates their month.
+
+-- Distinct category pairs. A transaction has a category_id only when
+-- category_tier_1 is set; a missing tier 2 is stored as ''.
+CREATE TABLE categories (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    tier_1 TEXT NOT NULL,
+    tier_2 TEXT NOT NULL DEFAULT '',
+    UNIQUE (tier_1, tier_2)
+);
+
+-- Import files transactions were loaded from
+CREATE TABLE source_files (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE OR REPLACE FUNCTION transaction_type_code(transaction_type TEXT)
+RETURNS SMALLINT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+    CASE transaction_type
+        WHEN 'income' THEN RETURN 1;
+        WHEN 'expense' THEN RETURN 2;
+        WHEN 'transfer' THEN RETURN 3;
+        ELSE RAISE EXCEPTION 'invalid transaction_type %', transaction_type
+            USING ERRCODE = 'check_violation';
+    END CASE;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION category_id_for(category_tier_1 TEXT, category_tier_2 TEXT)
+RETURNS SMALLINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    found SMALLINT;
+BEGIN
+    IF category_tier_1 IS NULL THEN
+        IF category_tier_2 IS NOT NULL THEN
+            RAISE EXCEPTION 'category_tier_2 requires category_tier_1'
+                USING ERRCODE = 'check_violation';
+        END IF;
+        RETURN NULL;
+    END IF;
+    SELECT id INTO found FROM categories
+    WHERE tier_1 = category_tier_1 AND tier_2 = COALESCE(category_tier_2, '');
+    IF found IS NULL THEN
+        INSERT INTO categories (tier_1, tier_2)
+        VALUES (category_tier_1, COALESCE(category_tier_2, ''))
+        ON CONFLICT (tier_1, tier_2) DO UPDATE SET tier_1 = EXCLUDED.tier_1
+        RETURNING id INTO found;
+    END IF;
+    RETURN found;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION source_file_id_for(source_file TEXT)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    found INTEGER;
+BEGIN
+    IF source_file IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT id INTO found FROM source_files WHERE name = source_file;
+    IF found IS NULL THEN
+        INSERT INTO source_files (name) VALUES (source_file)
+        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id INTO found;
+    END IF;
+    RETURN found;
+END;
+$$;
+
+CREATE SEQUENCE transactions_normalized_id_seq;
+
+-- Columns are ordered by alignment (8, 4, 2, 1 bytes, then text) so no
+-- padding is wasted between them. type_code: 1 income, 2 expense,
+-- 3 transfer.
+CREATE TABLE transaction_facts (
+    id INTEGER NOT NULL DEFAULT nextval('transactions_normalized_id_seq'),
     account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    amount_cents BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     vendor_id INTEGER REFERENCES vendors(id),
-    raw_description TEXT NOT NULL,
-    parsed_vendor TEXT,
-    amount NUMERIC(12, 2) NOT NULL,
     transaction_date DATE NOT NULL,
     posted_date DATE,
-    transaction_type TEXT NOT NULL CHECK (transaction_type IN ('income', 'expense', 'transfer')),
+    source_file_id INTEGER REFERENCES source_files(id),
+    category_id SMALLINT REFERENCES categories(id),
+    type_code SMALLINT NOT NULL CHECK (type_code BETWEEN 1 AND 3),
+    manually_edited BOOLEAN NOT NULL DEFAULT FALSE,
+    raw_description TEXT NOT NULL,
+    normalized_description TEXT,
+    parsed_vendor TEXT,
     tag TEXT,
     comment TEXT,
-    category_tier_1 TEXT,
-    category_tier_2 TEXT,
-    source_file TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    person TEXT,
+    PRIMARY KEY (id, transaction_date)
+) PARTITION BY RANGE (transaction_date);
+ALTER SEQUENCE transactions_normalized_id_seq OWNED BY transaction_facts.id;
+
+CREATE TABLE transaction_facts_default
+    PARTITION OF transaction_facts DEFAULT;
+
+-- Create monthly partitions of transaction_facts covering
+-- from_date..to_date, moving any rows for those months out of the default
+-- partition. Returns the new names.
+CREATE OR REPLACE FUNCTION ensure_transaction_partitions(from_date DATE, to_date DATE)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::DATE;
+    month_end DATE;
+    part_name TEXT;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        part_name := 'transaction_facts_' || to_char(month_start, '"y"YYYY"m"MM');
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE transaction_facts'
+                ' INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                part_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM transaction_facts_default'
+                ' WHERE transaction_date >= %L AND transaction_date < %L'
+                ' RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE transaction_facts ATTACH PARTITION %I'
+                ' FOR VALUES FROM (%L) TO (%L)',
+                part_name, month_start, month_end
+            );
+            RETURN NEXT part_name;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+END;
+$$;
+
+SELECT ensure_transaction_partitions(
+    CURRENT_DATE,
+    (CURRENT_DATE + INTERVAL '3 months')::DATE
+);
+
+-- Hot-path indexes, created on every partition
+CREATE INDEX transaction_facts_account_date_idx
+    ON transaction_facts (account_id, transaction_date);
+
+CREATE INDEX transaction_facts_category_date_idx
+    ON transaction_facts (category_id, transaction_date, id);
+
+CREATE INDEX transaction_facts_unmatched_idx
+    ON transaction_facts (id)
+    WHERE vendor_id IS NULL;
+
+-- Keyset pagination of the transaction listing: each filter's index ends in
+-- the (transaction_date, id) sort key
+CREATE INDEX transaction_facts_date_id_idx
+    ON transaction_facts (transaction_date, id);
+
+CREATE INDEX transaction_facts_unmatched_date_idx
+    ON transaction_facts (transaction_date, id)
+    WHERE vendor_id IS NULL;
+
+CREATE INDEX transaction_facts_vendor_date_idx
+    ON transaction_facts (vendor_id, transaction_date, id)
+    WHERE vendor_id IS NOT NULL;
+
+CREATE INDEX transaction_facts_tag_date_idx
+    ON transaction_facts (tag, transaction_date, id)
+    WHERE tag IS NOT NULL;
+
+CREATE INDEX transaction_facts_person_date_idx
+    ON transaction_facts (person, transaction_date, id)
+    WHERE person IS NOT NULL;
+
+-- Trigram indexes used to narrow reclassification candidates when a vendor
+-- pattern is approved or edited (LIKE '%LITERAL%' on the upper-cased text),
+-- one per column patterns can target
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX transaction_facts_raw_description_trgm_idx
+    ON transaction_facts USING gin (upper(raw_description) gin_trgm_ops);
+
+CREATE INDEX transaction_facts_normalized_description_trgm_idx
+    ON transaction_facts USING gin (upper(normalized_description) gin_trgm_ops);
+
+CREATE INDEX transaction_facts_parsed_vendor_trgm_idx
+    ON transaction_facts USING gin (upper(parsed_vendor) gin_trgm_ops);
+
+-- Transactions with their readable columns; writes go through the trigger
+CREATE VIEW transactions_normalized AS
+SELECT
+    facts.id,
+    facts.account_id,
+    facts.vendor_id,
+    facts.raw_description,
+    facts.normalized_description,
+    facts.parsed_vendor,
+    (facts.amount_cents / 100.0)::NUMERIC(12, 2) AS amount,
+    facts.transaction_date,
+    facts.posted_date,
+    (CASE facts.type_code
+        WHEN 1 THEN 'income'
+        WHEN 2 THEN 'expense'
+        WHEN 3 THEN 'transfer'
+    END) AS transaction_type,
+    facts.tag,
+    facts.comment,
+    categories.tier_1 AS category_tier_1,
+    NULLIF(categories.tier_2, '') AS category_tier_2,
+    source_files.name AS source_file,
+    facts.manually_edited,
+    facts.created_at,
+    facts.person
+FROM transaction_facts AS facts
+LEFT JOIN categories ON categories.id = facts.category_id
+LEFT JOIN source_files ON source_files.id = facts.source_file_id;
+
+ALTER VIEW transactions_normalized
+    ALTER COLUMN id SET DEFAULT nextval('transactions_normalized_id_seq');
+ALTER VIEW transactions_normalized
+    ALTER COLUMN manually_edited SET DEFAULT FALSE;
+ALTER VIEW transactions_normalized
+    ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+
+-- Writes through the view, translated to transaction_facts
+CREATE OR REPLACE FUNCTION transactions_normalized_write()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM transaction_facts
+        WHERE id = OLD.id AND transaction_date = OLD.transaction_date;
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO transaction_facts (
+            id, account_id, vendor_id, category_id, type_code, manually_edited,
+            transaction_date, posted_date, source_file_id, amount_cents,
+            created_at, raw_description, normalized_description, parsed_vendor,
+            tag, comment, person
+        )
+        VALUES (
+            NEW.id, NEW.account_id, NEW.vendor_id,
+            category_id_for(NEW.category_tier_1, NEW.category_tier_2),
+            transaction_type_code(NEW.transaction_type),
+            NEW.manually_edited, NEW.transaction_date, NEW.posted_date,
+            source_file_id_for(NEW.source_file), (NEW.amount * 100)::BIGINT,
+            NEW.created_at, NEW.raw_description, NEW.normalized_description,
+            NEW.parsed_vendor, NEW.tag, NEW.comment, NEW.person
+        );
+        RETURN NEW;
+    END IF;
+
+    UPDATE transaction_facts SET
+        id = NEW.id,
+        account_id = NEW.account_id,
+        vendor_id = NEW.vendor_id,
+        category_id = category_id_for(NEW.category_tier_1, NEW.category_tier_2),
+        type_code = transaction_type_code(NEW.transaction_type),
+        manually_edited = NEW.manually_edited,
+        transaction_date = NEW.transaction_date,
+        posted_date = NEW.posted_date,
+        source_file_id = source_file_id_for(NEW.source_file),
+        amount_cents = (NEW.amount * 100)::BIGINT,
+        created_at = NEW.created_at,
+        raw_description = NEW.raw_description,
+        normalized_description = NEW.normalized_description,
+        parsed_vendor = NEW.parsed_vendor,
+        tag = NEW.tag,
+        comment = NEW.comment,
+        person = NEW.person
+    WHERE id = OLD.id AND transaction_date = OLD.transaction_date;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER transactions_normalized_write
+    INSTEAD OF INSERT OR UPDATE OR DELETE ON transactions_normalized
+    FOR EACH ROW EXECUTE FUNCTION transactions_normalized_write();
+
+-- Monthly totals per account, transaction type and category, maintained
+-- incrementally by ledgerbase.rollups ('' marks uncategorized)
+CREATE TABLE monthly_rollups (
+    account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    transaction_type TEXT NOT NULL,
+    category_tier_1 TEXT NOT NULL DEFAULT '',
+    category_tier_2 TEXT NOT NULL DEFAULT '',
+    total_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_id, month, transaction_type, category_tier_1, category_tier_2)
 );
+
+-- Closed years moved to Parquet by ledgerbase.archive
+CREATE TABLE transaction_archives (
+    year INTEGER PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    total_amount NUMERIC(14, 2) NOT NULL,
+    path TEXT NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Monthly budget per category, compared with monthly_rollups by
+-- ledgerbase.budget_engine ('' tier 2 as in monthly_rollups)
+CREATE TABLE budget_entries (
+    id SERIAL PRIMARY KEY,
+    month DATE NOT NULL,
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL DEFAULT '',
+    amount NUMERIC(12, 2) NOT NULL,
+    rollover BOOLEAN NOT NULL DEFAULT FALSE,
+    manually_edited BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (month, category_tier_1, category_tier_2)
+);
+
+-- Rollover balances per category and month, recomputed by
+-- ledgerbase.budget_balances from each category's earliest dirty month
+CREATE TABLE budget_balances (
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    month DATE NOT NULL,
+    budget NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    actual NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    carry_in NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    balance NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (category_tier_1, category_tier_2, month)
+);
+
+CREATE TABLE budget_dirty (
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    month DATE NOT NULL,
+    PRIMARY KEY (category_tier_1, category_tier_2)
+);
+
+-- Budget version history: the entries each version wrote, and a full copy
+-- of budget_entries every few versions (ledgerbase.budget_versions)
+CREATE TABLE budget_versions (
+    id SERIAL PRIMARY KEY,
+    note TEXT NOT NULL DEFAULT '',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE budget_entry_changes (
+    id SERIAL PRIMARY KEY,
+    version_id INT NOT NULL REFERENCES budget_versions(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    rollover BOOLEAN NOT NULL,
+    manually_edited BOOLEAN NOT NULL
+);
+
+CREATE INDEX budget_entry_changes_category_version_idx
+    ON budget_entry_changes (category_tier_1, category_tier_2, version_id);
+
+CREATE INDEX budget_entry_changes_version_idx
+    ON budget_entry_changes (version_id);
+
+CREATE TABLE budget_snapshots (
+    version_id INT NOT NULL REFERENCES budget_versions(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    rollover BOOLEAN NOT NULL,
+    manually_edited BOOLEAN NOT NULL,
+    PRIMARY KEY (version_id, month, category_tier_1, category_tier_2)
+);
+
+-- Reported account balances, and the accounts backing savings categories
+-- (ledgerbase.savings_reconciliation)
+CREATE TABLE account_balances (
+    account_id INT NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    as_of DATE NOT NULL,
+    balance NUMERIC(14, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (account_id, as_of)
+);
+
+CREATE TABLE savings_accounts (
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    account_id INT NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    PRIMARY KEY (category_tier_1, category_tier_2)
+);
+
+CREATE INDEX ix_savings_accounts_account_id ON savings_accounts (account_id);
+
+-- Applied migrations. A fresh database already has the schema they
+-- produce, so they are recorded as applied.
+CREATE TABLE schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations (version, name) VALUES
+    (1, 'transactions_hot_path_indexes'),
+    (2, 'vendor_and_transaction_columns'),
+    (3, 'partition_transactions_by_month'),
+    (4, 'monthly_rollups'),
+    (5, 'transaction_listing_indexes'),
+    (6, 'compact_transaction_storage'),
+    (7, 'transaction_archives'),
+    (8, 'budget_entries'),
+    (9, 'budget_balances'),
+    (10, 'budget_manual_overrides'),
+    (11, 'budget_versions'),
+    (12, 'savings_accounts'),
+    (13, 'source_column_trigram_indexes'),
+    (14, 'dictionary_version'),
+    (15, 'sqlite_description_trigram_index');
@@ -0,0 +1,20 @@
+-- schema/migrations/0001_transactions_hot_path_indexes.sql
+-- migrate: no-transaction
+
+-- Hot-path indexes for transactions_normalized. CONCURRENTLY keeps the table
+-- writable while each index builds; it cannot run inside a transaction block.
+-- If a build fails PostgreSQL leaves an INVALID index behind: drop it with
+-- DROP INDEX CONCURRENTLY before re-running the migration.
+
+-- Account statements and per-account date ranges
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_normalized_account_date_idx
+    ON transactions_normalized (account_id, transaction_date);
+
+-- Category reports over a date range
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_normalized_category_date_idx
+    ON transactions_normalized (category_tier_1, category_tier_2, transaction_date);
+
+-- Unmatched review queue; only unclassified rows are indexed
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_normalized_unmatched_idx
+    ON transactions_normalized (id)
+    WHERE vendor_id IS NULL;
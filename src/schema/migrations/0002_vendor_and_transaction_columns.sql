@@ -0,0 +1,31 @@
+-- schema/migrations/0002_vendor_and_transaction_columns.sql
+-- migrate: postgresql-only
+-- migrate: no-transaction
+
+-- Columns and the trigram index that init.sql gained before the migration
+-- runner existed. Databases created from an older init.sql lack them, and
+-- the matcher, reclassification, the description backfill and the
+-- partitioning in 0003 all read them. Every statement is safe to re-run.
+
+-- Vendor pattern precedence (higher wins) and institution scope
+ALTER TABLE vendor_patterns
+    ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE vendor_patterns
+    ADD COLUMN IF NOT EXISTS institution_id INTEGER
+        REFERENCES institutions(id) ON DELETE CASCADE;
+
+-- Rows a person classified; reclassification leaves them alone
+ALTER TABLE transactions_normalized
+    ADD COLUMN IF NOT EXISTS manually_edited BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Filled by `flask descriptions normalize`
+ALTER TABLE transactions_normalized
+    ADD COLUMN IF NOT EXISTS normalized_description TEXT;
+
+-- Trigram index narrowing reclassification candidates
+-- (LIKE '%LITERAL%' on the upper-cased text)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_normalized_raw_description_trgm_idx
+    ON transactions_normalized USING gin (upper(raw_description) gin_trgm_ops);
@@ -0,0 +1,139 @@
+-- schema/migrations/0003_partition_transactions_by_month.sql
+-- migrate: postgresql-only
+
+-- Convert transactions_normalized into a table range-partitioned by
+-- transaction_date month. Rows outside every monthly partition land in
+-- transactions_normalized_default until ensure_transaction_partitions
+-- creates their month. The primary key becomes (id, transaction_date)
+-- because PostgreSQL requires unique constraints to include the partition
+-- key; ids still come from the original sequence.
+--
+-- The copy runs in one transaction and holds an exclusive lock on the
+-- table until it commits, so schedule it in a maintenance window.
+--
+-- Requires 0002_vendor_and_transaction_columns: the copy reads
+-- normalized_description and manually_edited, which databases created from
+-- the baseline schema only gain there.
+
+-- Create monthly partitions covering from_date..to_date, moving any rows
+-- for those months out of the default partition. Returns the new names.
+CREATE OR REPLACE FUNCTION ensure_transaction_partitions(from_date DATE, to_date DATE)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::DATE;
+    month_end DATE;
+    part_name TEXT;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        part_name := 'transactions_normalized_' || to_char(month_start, '"y"YYYY"m"MM');
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE transactions_normalized'
+                ' INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                part_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM transactions_normalized_default'
+                ' WHERE transaction_date >= %L AND transaction_date < %L'
+                ' RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE transactions_normalized ATTACH PARTITION %I'
+                ' FOR VALUES FROM (%L) TO (%L)',
+                part_name, month_start, month_end
+            );
+            RETURN NEXT part_name;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+END;
+$$;
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class
+        WHERE oid = 'transactions_normalized'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    IF (SELECT count(*) FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'transactions_normalized'
+          AND column_name IN ('normalized_description', 'manually_edited')) < 2 THEN
+        RAISE EXCEPTION 'transactions_normalized lacks columns added by migration 0002'
+            USING HINT = 'Apply 0002_vendor_and_transaction_columns first.';
+    END IF;
+
+    ALTER TABLE transactions_normalized RENAME TO transactions_normalized_unpartitioned;
+    ALTER TABLE transactions_normalized_unpartitioned
+        RENAME CONSTRAINT transactions_normalized_pkey
+        TO transactions_normalized_unpartitioned_pkey;
+    DROP INDEX IF EXISTS transactions_normalized_account_date_idx;
+    DROP INDEX IF EXISTS transactions_normalized_category_date_idx;
+    DROP INDEX IF EXISTS transactions_normalized_unmatched_idx;
+    DROP INDEX IF EXISTS transactions_normalized_raw_description_trgm_idx;
+
+    CREATE TABLE transactions_normalized (
+        id INTEGER NOT NULL DEFAULT nextval('transactions_normalized_id_seq'),
+        account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+        vendor_id INTEGER REFERENCES vendors(id),
+        raw_description TEXT NOT NULL,
+        normalized_description TEXT,
+        parsed_vendor TEXT,
+        amount NUMERIC(12, 2) NOT NULL,
+        transaction_date DATE NOT NULL,
+        posted_date DATE,
+        transaction_type TEXT NOT NULL CHECK (transaction_type IN ('income', 'expense', 'transfer')),
+        tag TEXT,
+        comment TEXT,
+        category_tier_1 TEXT,
+        category_tier_2 TEXT,
+        source_file TEXT,
+        manually_edited BOOLEAN NOT NULL DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, transaction_date)
+    ) PARTITION BY RANGE (transaction_date);
+    ALTER SEQUENCE transactions_normalized_id_seq OWNED BY transactions_normalized.id;
+
+    CREATE TABLE transactions_normalized_default
+        PARTITION OF transactions_normalized DEFAULT;
+
+    CREATE INDEX transactions_normalized_account_date_idx
+        ON transactions_normalized (account_id, transaction_date);
+    CREATE INDEX transactions_normalized_category_date_idx
+        ON transactions_normalized (category_tier_1, category_tier_2, transaction_date);
+    CREATE INDEX transactions_normalized_unmatched_idx
+        ON transactions_normalized (id)
+        WHERE vendor_id IS NULL;
+    CREATE INDEX transactions_normalized_raw_description_trgm_idx
+        ON transactions_normalized USING gin (upper(raw_description) gin_trgm_ops);
+
+    PERFORM ensure_transaction_partitions(
+        COALESCE(
+            (SELECT min(transaction_date) FROM transactions_normalized_unpartitioned),
+            CURRENT_DATE
+        ),
+        (CURRENT_DATE + INTERVAL '3 months')::DATE
+    );
+
+    INSERT INTO transactions_normalized (
+        id, account_id, vendor_id, raw_description, normalized_description,
+        parsed_vendor, amount, transaction_date, posted_date, transaction_type,
+        tag, comment, category_tier_1, category_tier_2, source_file,
+        manually_edited, created_at
+    )
+    SELECT
+        id, account_id, vendor_id, raw_description, normalized_description,
+        parsed_vendor, amount, transaction_date, posted_date, transaction_type,
+        tag, comment, category_tier_1, category_tier_2, source_file,
+        manually_edited, created_at
+    FROM transactions_normalized_unpartitioned;
+
+    DROP TABLE transactions_normalized_unpartitioned;
+    ANALYZE transactions_normalized;
+END;
+$$;
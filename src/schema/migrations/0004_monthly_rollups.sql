@@ -0,0 +1,31 @@
+-- schema/migrations/0004_monthly_rollups.sql
+-- migrate: postgresql-only
+
+-- Monthly totals per account, transaction type and category, maintained by
+-- ledgerbase.rollups. Uncategorized transactions use '' so the key never
+-- contains NULL. The backfill can be repeated with `flask rollups rebuild`.
+CREATE TABLE monthly_rollups (
+    account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    transaction_type TEXT NOT NULL,
+    category_tier_1 TEXT NOT NULL DEFAULT '',
+    category_tier_2 TEXT NOT NULL DEFAULT '',
+    total_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_id, month, transaction_type, category_tier_1, category_tier_2)
+);
+
+INSERT INTO monthly_rollups (
+    account_id, month, transaction_type, category_tier_1, category_tier_2,
+    total_amount, transaction_count
+)
+SELECT
+    account_id,
+    date_trunc('month', transaction_date)::DATE,
+    transaction_type,
+    COALESCE(category_tier_1, ''),
+    COALESCE(category_tier_2, ''),
+    SUM(amount),
+    COUNT(*)
+FROM transactions_normalized
+GROUP BY 1, 2, 3, 4, 5;
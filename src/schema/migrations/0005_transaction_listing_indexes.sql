@@ -0,0 +1,35 @@
+-- schema/migrations/0005_transaction_listing_indexes.sql
+-- migrate: postgresql-only
+
+-- Person attribution for transactions (Phase 2 #16 filters) and the indexes
+-- behind keyset pagination of GET /api/transactions. Every index ends in
+-- (transaction_date, id), the listing's sort key, so each filter reads one
+-- page straight from its index no matter how deep the cursor is.
+--
+-- Indexes on the partitioned table cannot be built CONCURRENTLY; each build
+-- blocks writes to one partition at a time while it runs.
+ALTER TABLE transactions_normalized ADD COLUMN IF NOT EXISTS person TEXT;
+
+-- Unfiltered listing
+CREATE INDEX IF NOT EXISTS transactions_normalized_date_id_idx
+    ON transactions_normalized (transaction_date, id);
+
+-- Unmatched filter; only unclassified rows are indexed
+CREATE INDEX IF NOT EXISTS transactions_normalized_unmatched_date_idx
+    ON transactions_normalized (transaction_date, id)
+    WHERE vendor_id IS NULL;
+
+-- Vendor, label and person filters. Rows without a value are left out: an
+-- equality filter implies IS NOT NULL, and the unmatched queue keeps using
+-- its own partial index instead of the vendor one.
+CREATE INDEX IF NOT EXISTS transactions_normalized_vendor_date_idx
+    ON transactions_normalized (vendor_id, transaction_date, id)
+    WHERE vendor_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS transactions_normalized_tag_date_idx
+    ON transactions_normalized (tag, transaction_date, id)
+    WHERE tag IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS transactions_normalized_person_date_idx
+    ON transactions_normalized (person, transaction_date, id)
+    WHERE person IS NOT NULL;
@@ -0,0 +1,337 @@
+-- schema/migrations/0006_compact_transaction_storage.sql
+-- migrate: postgresql-only
+
+-- Store transactions in a compact partitioned table, transaction_facts:
+--   amount            NUMERIC(12, 2) -> amount_cents BIGINT
+--   transaction_type  TEXT           -> type_code SMALLINT (1 income,
+--                                        2 expense, 3 transfer)
+--   category_tier_1/2 TEXT, TEXT     -> category_id SMALLINT -> categories
+--   source_file       TEXT           -> source_file_id INTEGER -> source_files
+-- transactions_normalized becomes a view with the old columns. INSTEAD OF
+-- triggers translate inserts, updates and deletes on the view, so existing
+-- queries and writers keep working unchanged.
+--
+-- Partitions move from transactions_normalized_yYYYYmMM to
+-- transaction_facts_yYYYYmMM. The copy runs in one transaction and holds an
+-- exclusive lock on the table until it commits, so schedule it in a
+-- maintenance window.
+
+-- transaction_facts_raw_description_trgm_idx uses gin_trgm_ops. 0002 creates
+-- the extension already; repeated here so this file stands on its own.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Distinct category pairs. A transaction has a category_id only when
+-- category_tier_1 is set; a missing tier 2 is stored as ''.
+CREATE TABLE IF NOT EXISTS categories (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    tier_1 TEXT NOT NULL,
+    tier_2 TEXT NOT NULL DEFAULT '',
+    UNIQUE (tier_1, tier_2)
+);
+
+-- Import files transactions were loaded from
+CREATE TABLE IF NOT EXISTS source_files (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE OR REPLACE FUNCTION transaction_type_code(transaction_type TEXT)
+RETURNS SMALLINT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+    CASE transaction_type
+        WHEN 'income' THEN RETURN 1;
+        WHEN 'expense' THEN RETURN 2;
+        WHEN 'transfer' THEN RETURN 3;
+        ELSE RAISE EXCEPTION 'invalid transaction_type %', transaction_type
+            USING ERRCODE = 'check_violation';
+    END CASE;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION category_id_for(category_tier_1 TEXT, category_tier_2 TEXT)
+RETURNS SMALLINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    found SMALLINT;
+BEGIN
+    IF category_tier_1 IS NULL THEN
+        IF category_tier_2 IS NOT NULL THEN
+            RAISE EXCEPTION 'category_tier_2 requires category_tier_1'
+                USING ERRCODE = 'check_violation';
+        END IF;
+        RETURN NULL;
+    END IF;
+    SELECT id INTO found FROM categories
+    WHERE tier_1 = category_tier_1 AND tier_2 = COALESCE(category_tier_2, '');
+    IF found IS NULL THEN
+        INSERT INTO categories (tier_1, tier_2)
+        VALUES (category_tier_1, COALESCE(category_tier_2, ''))
+        ON CONFLICT (tier_1, tier_2) DO UPDATE SET tier_1 = EXCLUDED.tier_1
+        RETURNING id INTO found;
+    END IF;
+    RETURN found;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION source_file_id_for(source_file TEXT)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    found INTEGER;
+BEGIN
+    IF source_file IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT id INTO found FROM source_files WHERE name = source_file;
+    IF found IS NULL THEN
+        INSERT INTO source_files (name) VALUES (source_file)
+        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id INTO found;
+    END IF;
+    RETURN found;
+END;
+$$;
+
+-- Create monthly partitions of transaction_facts covering
+-- from_date..to_date, moving any rows for those months out of the default
+-- partition. Returns the new names.
+CREATE OR REPLACE FUNCTION ensure_transaction_partitions(from_date DATE, to_date DATE)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::DATE;
+    month_end DATE;
+    part_name TEXT;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        part_name := 'transaction_facts_' || to_char(month_start, '"y"YYYY"m"MM');
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE transaction_facts'
+                ' INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                part_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM transaction_facts_default'
+                ' WHERE transaction_date >= %L AND transaction_date < %L'
+                ' RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE transaction_facts ATTACH PARTITION %I'
+                ' FOR VALUES FROM (%L) TO (%L)',
+                part_name, month_start, month_end
+            );
+            RETURN NEXT part_name;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+END;
+$$;
+
+DO $$
+BEGIN
+    IF to_regclass('transaction_facts') IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO categories (tier_1, tier_2)
+    SELECT DISTINCT category_tier_1, COALESCE(category_tier_2, '')
+    FROM transactions_normalized
+    WHERE category_tier_1 IS NOT NULL
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO source_files (name)
+    SELECT DISTINCT source_file
+    FROM transactions_normalized
+    WHERE source_file IS NOT NULL
+    ON CONFLICT DO NOTHING;
+
+    ALTER TABLE transactions_normalized RENAME TO transactions_normalized_wide;
+
+    -- Columns are ordered by alignment (8, 4, 2, 1 bytes, then text) so no
+    -- padding is wasted between them.
+    CREATE TABLE transaction_facts (
+        id INTEGER NOT NULL DEFAULT nextval('transactions_normalized_id_seq'),
+        account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+        amount_cents BIGINT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        vendor_id INTEGER REFERENCES vendors(id),
+        transaction_date DATE NOT NULL,
+        posted_date DATE,
+        source_file_id INTEGER REFERENCES source_files(id),
+        category_id SMALLINT REFERENCES categories(id),
+        type_code SMALLINT NOT NULL CHECK (type_code BETWEEN 1 AND 3),
+        manually_edited BOOLEAN NOT NULL DEFAULT FALSE,
+        raw_description TEXT NOT NULL,
+        normalized_description TEXT,
+        parsed_vendor TEXT,
+        tag TEXT,
+        comment TEXT,
+        person TEXT,
+        PRIMARY KEY (id, transaction_date)
+    ) PARTITION BY RANGE (transaction_date);
+    ALTER SEQUENCE transactions_normalized_id_seq OWNED BY transaction_facts.id;
+
+    CREATE TABLE transaction_facts_default
+        PARTITION OF transaction_facts DEFAULT;
+
+    CREATE INDEX transaction_facts_account_date_idx
+        ON transaction_facts (account_id, transaction_date);
+    -- Ends in id too, so category-filtered listing pages seek on the index.
+    CREATE INDEX transaction_facts_category_date_idx
+        ON transaction_facts (category_id, transaction_date, id);
+    CREATE INDEX transaction_facts_unmatched_idx
+        ON transaction_facts (id)
+        WHERE vendor_id IS NULL;
+    CREATE INDEX transaction_facts_date_id_idx
+        ON transaction_facts (transaction_date, id);
+    CREATE INDEX transaction_facts_unmatched_date_idx
+        ON transaction_facts (transaction_date, id)
+        WHERE vendor_id IS NULL;
+    CREATE INDEX transaction_facts_vendor_date_idx
+        ON transaction_facts (vendor_id, transaction_date, id)
+        WHERE vendor_id IS NOT NULL;
+    CREATE INDEX transaction_facts_tag_date_idx
+        ON transaction_facts (tag, transaction_date, id)
+        WHERE tag IS NOT NULL;
+    CREATE INDEX transaction_facts_person_date_idx
+        ON transaction_facts (person, transaction_date, id)
+        WHERE person IS NOT NULL;
+    CREATE INDEX transaction_facts_raw_description_trgm_idx
+        ON transaction_facts USING gin (upper(raw_description) gin_trgm_ops);
+
+    PERFORM ensure_transaction_partitions(
+        COALESCE(
+            (SELECT min(transaction_date) FROM transactions_normalized_wide),
+            CURRENT_DATE
+        ),
+        (CURRENT_DATE + INTERVAL '3 months')::DATE
+    );
+
+    INSERT INTO transaction_facts (
+        id, account_id, vendor_id, category_id, type_code, manually_edited,
+        transaction_date, posted_date, source_file_id, amount_cents, created_at,
+        raw_description, normalized_description, parsed_vendor, tag, comment,
+        person
+    )
+    SELECT
+        wide.id, wide.account_id, wide.vendor_id, categories.id,
+        transaction_type_code(wide.transaction_type), wide.manually_edited,
+        wide.transaction_date, wide.posted_date, source_files.id,
+        (wide.amount * 100)::BIGINT, wide.created_at,
+        wide.raw_description, wide.normalized_description, wide.parsed_vendor,
+        wide.tag, wide.comment, wide.person
+    FROM transactions_normalized_wide AS wide
+    LEFT JOIN categories
+        ON categories.tier_1 = wide.category_tier_1
+        AND categories.tier_2 = COALESCE(wide.category_tier_2, '')
+    LEFT JOIN source_files ON source_files.name = wide.source_file;
+
+    DROP TABLE transactions_normalized_wide;
+    ANALYZE transaction_facts;
+END;
+$$;
+
+-- The pre-0006 columns, in their original order
+CREATE OR REPLACE VIEW transactions_normalized AS
+SELECT
+    facts.id,
+    facts.account_id,
+    facts.vendor_id,
+    facts.raw_description,
+    facts.normalized_description,
+    facts.parsed_vendor,
+    (facts.amount_cents / 100.0)::NUMERIC(12, 2) AS amount,
+    facts.transaction_date,
+    facts.posted_date,
+    (CASE facts.type_code
+        WHEN 1 THEN 'income'
+        WHEN 2 THEN 'expense'
+        WHEN 3 THEN 'transfer'
+    END) AS transaction_type,
+    facts.tag,
+    facts.comment,
+    categories.tier_1 AS category_tier_1,
+    NULLIF(categories.tier_2, '') AS category_tier_2,
+    source_files.name AS source_file,
+    facts.manually_edited,
+    facts.created_at,
+    facts.person
+FROM transaction_facts AS facts
+LEFT JOIN categories ON categories.id = facts.category_id
+LEFT JOIN source_files ON source_files.id = facts.source_file_id;
+
+ALTER VIEW transactions_normalized
+    ALTER COLUMN id SET DEFAULT nextval('transactions_normalized_id_seq');
+ALTER VIEW transactions_normalized
+    ALTER COLUMN manually_edited SET DEFAULT FALSE;
+ALTER VIEW transactions_normalized
+    ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+
+-- Writes through the view, translated to transaction_facts
+CREATE OR REPLACE FUNCTION transactions_normalized_write()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM transaction_facts
+        WHERE id = OLD.id AND transaction_date = OLD.transaction_date;
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO transaction_facts (
+            id, account_id, vendor_id, category_id, type_code, manually_edited,
+            transaction_date, posted_date, source_file_id, amount_cents,
+            created_at, raw_description, normalized_description, parsed_vendor,
+            tag, comment, person
+        )
+        VALUES (
+            NEW.id, NEW.account_id, NEW.vendor_id,
+            category_id_for(NEW.category_tier_1, NEW.category_tier_2),
+            transaction_type_code(NEW.transaction_type),
+            NEW.manually_edited, NEW.transaction_date, NEW.posted_date,
+            source_file_id_for(NEW.source_file), (NEW.amount * 100)::BIGINT,
+            NEW.created_at, NEW.raw_description, NEW.normalized_description,
+            NEW.parsed_vendor, NEW.tag, NEW.comment, NEW.person
+        );
+        RETURN NEW;
+    END IF;
+
+    UPDATE transaction_facts SET
+        id = NEW.id,
+        account_id = NEW.account_id,
+        vendor_id = NEW.vendor_id,
+        category_id = category_id_for(NEW.category_tier_1, NEW.category_tier_2),
+        type_code = transaction_type_code(NEW.transaction_type),
+        manually_edited = NEW.manually_edited,
+        transaction_date = NEW.transaction_date,
+        posted_date = NEW.posted_date,
+        source_file_id = source_file_id_for(NEW.source_file),
+        amount_cents = (NEW.amount * 100)::BIGINT,
+        created_at = NEW.created_at,
+        raw_description = NEW.raw_description,
+        normalized_description = NEW.normalized_description,
+        parsed_vendor = NEW.parsed_vendor,
+        tag = NEW.tag,
+        comment = NEW.comment,
+        person = NEW.person
+    WHERE id = OLD.id AND transaction_date = OLD.transaction_date;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS transactions_normalized_write ON transactions_normalized;
+
+CREATE TRIGGER transactions_normalized_write
+    INSTEAD OF INSERT OR UPDATE OR DELETE ON transactions_normalized
+    FOR EACH ROW EXECUTE FUNCTION transactions_normalized_write();
@@ -0,0 +1,13 @@
+-- schema/migrations/0007_transaction_archives.sql
+-- migrate: postgresql-only
+
+-- Closed years moved out of transactions_normalized into Parquet files by
+-- ledgerbase.archive (`flask archive run`). Monthly rollups of archived
+-- years are kept, so reports over them still read monthly_rollups.
+CREATE TABLE transaction_archives (
+    year INTEGER PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    total_amount NUMERIC(14, 2) NOT NULL,
+    path TEXT NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,16 @@
+-- schema/migrations/0008_budget_entries.sql
+-- migrate: postgresql-only
+
+-- Monthly category budgets (Phase 3 #17). ledgerbase.budget_engine compares
+-- them with the expense totals in monthly_rollups; rollover categories
+-- carry unspent amounts from month to month.
+CREATE TABLE budget_entries (
+    id SERIAL PRIMARY KEY,
+    month DATE NOT NULL,
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL DEFAULT '',
+    amount NUMERIC(12, 2) NOT NULL,
+    rollover BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (month, category_tier_1, category_tier_2)
+);
@@ -0,0 +1,24 @@
+-- schema/migrations/0009_budget_balances.sql
+-- migrate: postgresql-only
+
+-- Stored rollover balances per category and month. Changes to rollups or
+-- budgets record the earliest affected month per category in budget_dirty;
+-- `flask budget refresh` recomputes only those categories from that month
+-- on. `flask budget rebuild` fills budget_balances after this migration.
+CREATE TABLE budget_balances (
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    month DATE NOT NULL,
+    budget NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    actual NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    carry_in NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    balance NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (category_tier_1, category_tier_2, month)
+);
+
+CREATE TABLE budget_dirty (
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    month DATE NOT NULL,
+    PRIMARY KEY (category_tier_1, category_tier_2)
+);
@@ -0,0 +1,11 @@
+-- schema/migrations/0010_budget_manual_overrides.sql
+-- migrate: postgresql-only
+
+-- Budgets clone month to month unless manually changed (Phase 3 #19).
+-- ledgerbase.budgets clones with one INSERT ... SELECT per month and
+-- leaves entries with manually_edited set untouched. Existing entries
+-- were entered by hand, so they are marked as overrides.
+ALTER TABLE budget_entries
+    ADD COLUMN manually_edited BOOLEAN NOT NULL DEFAULT FALSE;
+
+UPDATE budget_entries SET manually_edited = TRUE;
@@ -0,0 +1,53 @@
+-- schema/migrations/0011_budget_versions.sql
+-- migrate: postgresql-only
+
+-- Budget version history (Phase 3 #21). Each change set of budget_entries
+-- is a budget_versions row; budget_entry_changes holds only the entries it
+-- wrote, and budget_snapshots a full copy every SNAPSHOT_EVERY versions, so
+-- ledgerbase.budget_versions rebuilds any version from the latest snapshot
+-- plus a bounded run of changes.
+CREATE TABLE budget_versions (
+    id SERIAL PRIMARY KEY,
+    note TEXT NOT NULL DEFAULT '',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE budget_entry_changes (
+    id SERIAL PRIMARY KEY,
+    version_id INT NOT NULL REFERENCES budget_versions(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    rollover BOOLEAN NOT NULL,
+    manually_edited BOOLEAN NOT NULL
+);
+
+CREATE INDEX budget_entry_changes_category_version_idx
+    ON budget_entry_changes (category_tier_1, category_tier_2, version_id);
+
+CREATE INDEX budget_entry_changes_version_idx
+    ON budget_entry_changes (version_id);
+
+CREATE TABLE budget_snapshots (
+    version_id INT NOT NULL REFERENCES budget_versions(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    rollover BOOLEAN NOT NULL,
+    manually_edited BOOLEAN NOT NULL,
+    PRIMARY KEY (version_id, month, category_tier_1, category_tier_2)
+);
+
+-- The entries that exist before history starts become version 1's snapshot.
+INSERT INTO budget_versions (id, note) VALUES (1, 'initial');
+SELECT setval(pg_get_serial_sequence('budget_versions', 'id'), 1);
+
+INSERT INTO budget_snapshots (
+    version_id, month, category_tier_1, category_tier_2,
+    amount, rollover, manually_edited
+)
+SELECT 1, month, category_tier_1, category_tier_2,
+    amount, rollover, manually_edited
+FROM budget_entries;
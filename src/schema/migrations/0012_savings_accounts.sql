@@ -0,0 +1,24 @@
+-- schema/migrations/0012_savings_accounts.sql
+-- migrate: postgresql-only
+
+-- Savings reconciliation (Phase 5 #37/#38). account_balances keeps the
+-- balances reported per account and date; savings_accounts links each
+-- savings category to the account holding its money.
+-- ledgerbase.savings_reconciliation compares the cumulative allocations of
+-- the categories with the latest balance of their account.
+CREATE TABLE account_balances (
+    account_id INT NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    as_of DATE NOT NULL,
+    balance NUMERIC(14, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (account_id, as_of)
+);
+
+CREATE TABLE savings_accounts (
+    category_tier_1 TEXT NOT NULL,
+    category_tier_2 TEXT NOT NULL,
+    account_id INT NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    PRIMARY KEY (category_tier_1, category_tier_2)
+);
+
+CREATE INDEX ix_savings_accounts_account_id ON savings_accounts (account_id);
@@ -0,0 +1,17 @@
+-- schema/migrations/0013_source_column_trigram_indexes.sql
+-- migrate: postgresql-only
+
+-- Vendor patterns can target normalized_description and parsed_vendor as
+-- well as raw_description. Reclassification narrows candidates with
+-- upper(column) LIKE '%LITERAL%' on the pattern's own column, so each of
+-- them gets the trigram index raw_description already has.
+--
+-- Indexes on the partitioned table cannot be built CONCURRENTLY; each build
+-- blocks writes to one partition at a time while it runs.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS transaction_facts_normalized_description_trgm_idx
+    ON transaction_facts USING gin (upper(normalized_description) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS transaction_facts_parsed_vendor_trgm_idx
+    ON transaction_facts USING gin (upper(parsed_vendor) gin_trgm_ops);
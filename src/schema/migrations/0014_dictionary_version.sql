@@ -0,0 +1,17 @@
+-- schema/migrations/0014_dictionary_version.sql
+-- migrate: postgresql-only
+
+-- Vendor dictionary version counter. Every write to vendors or
+-- vendor_patterns increments the single row in its transaction with
+-- UPDATE ... SET version = version + 1, whose row lock orders the bumps by
+-- commit, so a version once read always includes every change numbered
+-- below it. Classification caches and matcher artifacts are keyed on it,
+-- and checking for changes reads one row instead of hashing both tables.
+-- Versions before this migration were content hashes; the first refresh
+-- after it rebuilds the matcher once.
+CREATE TABLE dictionary_version (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO dictionary_version (id, version) VALUES (1, 0);
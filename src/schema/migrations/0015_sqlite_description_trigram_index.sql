@@ -0,0 +1,48 @@
+-- schema/migrations/0015_sqlite_description_trigram_index.sql
+-- migrate: sqlite-only
+
+-- SQLite has no trigram operator class, so the columns vendor patterns
+-- target get an FTS5 trigram index instead of the pg_trgm GIN indexes of
+-- 0002 and 0013. It is an external-content table: it indexes transactions_normalized
+-- without storing a copy of the text, and the triggers keep it current.
+-- Mirrors ledgerbase.trigram_index.SQLITE_TRIGRAM_DDL, which create_all runs
+-- for new SQLite databases.
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_normalized_trgm USING fts5(
+    raw_description, normalized_description, parsed_vendor,
+    content='transactions_normalized', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS transactions_normalized_trgm_insert
+    AFTER INSERT ON transactions_normalized BEGIN
+    INSERT INTO transactions_normalized_trgm
+        (rowid, raw_description, normalized_description, parsed_vendor)
+        VALUES (new.id, new.raw_description, new.normalized_description,
+            new.parsed_vendor);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_normalized_trgm_delete
+    AFTER DELETE ON transactions_normalized BEGIN
+    INSERT INTO transactions_normalized_trgm
+        (transactions_normalized_trgm, rowid, raw_description,
+            normalized_description, parsed_vendor)
+        VALUES ('delete', old.id, old.raw_description,
+            old.normalized_description, old.parsed_vendor);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_normalized_trgm_update
+    AFTER UPDATE OF id, raw_description, normalized_description, parsed_vendor
+    ON transactions_normalized BEGIN
+    INSERT INTO transactions_normalized_trgm
+        (transactions_normalized_trgm, rowid, raw_description,
+            normalized_description, parsed_vendor)
+        VALUES ('delete', old.id, old.raw_description,
+            old.normalized_description, old.parsed_vendor);
+    INSERT INTO transactions_normalized_trgm
+        (rowid, raw_description, normalized_description, parsed_vendor)
+        VALUES (new.id, new.raw_description, new.normalized_description,
+            new.parsed_vendor);
+END;
+
+-- Index the rows that existed before the table did.
+INSERT INTO transactions_normalized_trgm (transactions_normalized_trgm)
+    VALUES ('rebuild');
@@ -0,0 +1,200 @@
+"""Benchmark hot-path transaction queries before and after the index migration.
+
+Builds a synthetic ``transactions_normalized`` table without the hot-path
+indexes, times the account statement, category report and unmatched queue
+queries, applies the pending migrations and times them again. The query
+plan of each query is printed after the migration.
+
+``--database-url`` must point at a scratch database: every table is dropped
+and recreated. The default is a temporary SQLite file.
+
+Usage (from ``src/``):
+    python -m scripts.bench_indexes --rows 500000
+    python -m scripts.bench_indexes --database-url postgresql://.../ledgerbase_bench
+"""
+
+import argparse
+import datetime as dt
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import Engine, create_engine, insert, text
+
+from ledgerbase import db
+from ledgerbase.migrations import apply_migrations
+from ledgerbase.models import Account, Institution, Transaction, Vendor
+
+SEED = 20261019
+ACCOUNTS = 20
+CATEGORIES = {
+    "Food": ("Groceries", "Restaurants", "Coffee"),
+    "Auto": ("Fuel", "Parking", "Service"),
+    "Home": ("Utilities", "Rent", "Furniture"),
+    "Fun": ("Streaming", "Games", "Travel"),
+}
+UNMATCHED_RATE = 0.05
+START = dt.date(2022, 1, 1)
+DAYS = 4 * 365
+BATCH = 10_000
+REPEATS = 5
+HOT_PATH_INDEXES = (
+    "transactions_normalized_account_date_idx",
+    "transactions_normalized_category_date_idx",
+    "transactions_normalized_unmatched_idx",
+)
+
+QUERIES = {
+    "account statement": (
+        "SELECT id, transaction_date, amount FROM transactions_normalized"
+        " WHERE account_id = :account_id"
+        " AND transaction_date BETWEEN :start AND :end"
+        " ORDER BY transaction_date"
+    ),
+    "category report": (
+        "SELECT category_tier_2, SUM(amount) FROM transactions_normalized"
+        " WHERE category_tier_1 = :tier_1"
+        " AND transaction_date BETWEEN :start AND :end"
+        " GROUP BY category_tier_2"
+    ),
+    "unmatched queue": (
+        "SELECT id, raw_description FROM transactions_normalized"
+        " WHERE vendor_id IS NULL ORDER BY id LIMIT 100"
+    ),
+}
+PARAMETERS = {
+    "account_id": 7,
+    "tier_1": "Food",
+    "start": dt.date(2024, 3, 1),
+    "end": dt.date(2024, 3, 31),
+}
+
+
+def _rows(count: int, rng: random.Random) -> list[dict[str, object]]:
+    """Generate ``count`` synthetic transactions."""
+    tiers = [
+        (tier_1, tier_2) for tier_1, names in CATEGORIES.items() for tier_2 in names
+    ]
+    rows = []
+    for _ in range(count):
+        matched = rng.random() >= UNMATCHED_RATE
+        tier_1, tier_2 = rng.choice(tiers) if matched else (None, None)
+        rows.append(
+            {
+                "account_id": rng.randint(1, ACCOUNTS),
+                "vendor_id": 1 if matched else None,
+                "raw_description": f"POS DEBIT MERCHANT {rng.randint(1, 9999)}",
+                "amount": Decimal(rng.randint(-50_000, 5_000)) / 100,
+                "transaction_date": START + dt.timedelta(rng.randrange(DAYS)),
+                "transaction_type": "expense",
+                "category_tier_1": tier_1,
+                "category_tier_2": tier_2,
+            },
+        )
+    return rows
+
+
+def populate(engine: Engine, count: int) -> None:
+    """Recreate the schema without hot-path indexes and load ``count`` rows."""
+    rng = random.Random(SEED)
+    db.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for name in HOT_PATH_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__),
+            [
+                {
+                    "id": account_id,
+                    "institution_id": 1,
+                    "name": f"A{account_id}",
+                    "type": "checking",
+                }
+                for account_id in range(1, ACCOUNTS + 1)
+            ],
+        )
+        connection.execute(
+            insert(Vendor.__table__).values(
+                id=1,
+                name="Merchant",
+                category_tier_1="Food",
+                category_tier_2="Groceries",
+            ),
+        )
+        for start in range(0, count, BATCH):
+            connection.execute(
+                insert(Transaction.__table__),
+                _rows(min(BATCH, count - start), rng),
+            )
+    with engine.connect() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+
+def time_queries(engine: Engine) -> dict[str, float]:
+    """Median seconds per query over ``REPEATS`` runs."""
+    timings = {}
+    with engine.connect() as connection:
+        for name, sql in QUERIES.items():
+            samples = []
+            for _ in range(REPEATS):
+                started = time.perf_counter()
+                connection.execute(text(sql), PARAMETERS).all()
+                samples.append(time.perf_counter() - started)
+            timings[name] = statistics.median(samples)
+    return timings
+
+
+def plans(engine: Engine) -> dict[str, list[str]]:
+    """Query plan lines for each benchmark query."""
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    found = {}
+    with engine.connect() as connection:
+        for name, sql in QUERIES.items():
+            rows = connection.execute(text(prefix + sql), PARAMETERS).all()
+            found[name] = [str(row[-1]) for row in rows]
+    return found
+
+
+def run(database_url: str | None, count: int) -> None:
+    """Run the benchmark and print before/after timings."""
+    with tempfile.TemporaryDirectory() as scratch:
+        url = database_url or f"sqlite:///{Path(scratch) / 'bench.db'}"
+        engine = create_engine(url)
+        populate(engine, count)
+        before = time_queries(engine)
+        started = time.perf_counter()
+        applied = apply_migrations(engine)
+        migrate_seconds = time.perf_counter() - started
+        after = time_queries(engine)
+
+        print(f"database:   {engine.dialect.name}, {count:,} transactions")
+        print(
+            f"migrations: {', '.join(f'{m.version:04d}' for m in applied) or 'none'}"
+            f" in {migrate_seconds:.2f}s",
+        )
+        for name in QUERIES:
+            print(
+                f"{name:<18} before {before[name] * 1000:9.2f}ms"
+                f"  after {after[name] * 1000:9.2f}ms"
+                f"  ({before[name] / after[name]:,.1f}x)",
+            )
+        for name, lines in plans(engine).items():
+            print(f"\n{name}:")
+            for line in lines:
+                print(f"  {line}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    run(args.database_url, args.rows)
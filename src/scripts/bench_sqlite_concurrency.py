@@ -0,0 +1,250 @@
+"""Benchmark SQLite readers while ETL writers run, default vs tuned profile.
+
+For each profile a fresh SQLite file gets a synthetic
+``transactions_normalized`` table. Reader threads then run the account
+statement query in a loop while writer threads commit ETL-style batches
+(recategorize a few thousand rows, insert new ones) for ``--seconds``.
+
+* ``default``: SQLite's rollback journal and pysqlite defaults, every writer
+  thread committing on its own connection, as before the profile existed.
+* ``tuned``: ``SqlitePragmas`` (WAL, ``synchronous=NORMAL``, busy timeout,
+  mmap and cache) with every write sent through one ``WriterQueue``.
+
+Reader latency percentiles show whether readers wait behind writers;
+errors count ``database is locked`` failures.
+
+Usage (from ``src/``):
+    python -m scripts.bench_sqlite_concurrency --rows 200000 --seconds 10
+"""
+
+import argparse
+import datetime as dt
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import Connection, Engine, bindparam, create_engine, insert, text
+from sqlalchemy.exc import OperationalError
+
+from ledgerbase import db
+from ledgerbase.models import Account, Institution, Transaction
+from ledgerbase.sqlite_profile import SqlitePragmas, WriterQueue, apply_pragmas
+
+SEED = 20261019
+ACCOUNTS = 20
+START = dt.date(2023, 1, 1)
+DAYS = 3 * 365
+LOAD_BATCH = 10_000
+WRITE_UPDATES = 2_000
+WRITE_INSERTS = 500
+CATEGORIES = ("Groceries", "Fuel", "Utilities", "Dining", "Travel")
+
+STATEMENT = text(
+    "SELECT id, transaction_date, amount FROM transactions_normalized"
+    " WHERE account_id = :account_id"
+    " AND transaction_date BETWEEN :start AND :end"
+    " ORDER BY transaction_date",
+)
+RECATEGORIZE = text(
+    "UPDATE transactions_normalized SET category_tier_2 = :category WHERE id IN :ids",
+).bindparams(bindparam("ids", expanding=True))
+
+
+@dataclass
+class Results:
+    """Counters collected by the reader and writer threads."""
+
+    latencies: list[float] = field(default_factory=list)
+    read_errors: int = 0
+    writes: int = 0
+    write_errors: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _rows(count: int, rng: random.Random) -> list[dict[str, object]]:
+    """Generate ``count`` synthetic transactions."""
+    return [
+        {
+            "account_id": rng.randint(1, ACCOUNTS),
+            "raw_description": f"POS DEBIT MERCHANT {rng.randint(1, 9999)}",
+            "amount": Decimal(rng.randint(-50_000, 5_000)) / 100,
+            "transaction_date": START + dt.timedelta(rng.randrange(DAYS)),
+            "transaction_type": "expense",
+            "category_tier_1": "Spending",
+            "category_tier_2": rng.choice(CATEGORIES),
+        }
+        for _ in range(count)
+    ]
+
+
+def populate(engine: Engine, count: int) -> None:
+    """Create the schema and load ``count`` transactions."""
+    rng = random.Random(SEED)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__),
+            [
+                {
+                    "id": account_id,
+                    "institution_id": 1,
+                    "name": f"A{account_id}",
+                    "type": "checking",
+                }
+                for account_id in range(1, ACCOUNTS + 1)
+            ],
+        )
+        for start in range(0, count, LOAD_BATCH):
+            connection.execute(
+                insert(Transaction.__table__),
+                _rows(min(LOAD_BATCH, count - start), rng),
+            )
+
+
+def _reader(engine: Engine, results: Results, stop: threading.Event) -> None:
+    rng = random.Random()
+    while not stop.is_set():
+        month = START + dt.timedelta(rng.randrange(DAYS - 31))
+        parameters = {
+            "account_id": rng.randint(1, ACCOUNTS),
+            "start": month,
+            "end": month + dt.timedelta(days=30),
+        }
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.execute(STATEMENT, parameters).all()
+        except OperationalError:
+            with results.lock:
+                results.read_errors += 1
+            continue
+        elapsed = time.perf_counter() - started
+        with results.lock:
+            results.latencies.append(elapsed)
+
+
+def _etl_batch(count: int) -> Callable[[Connection], None]:
+    """One ETL write transaction over a table of about ``count`` rows."""
+    rng = random.Random()
+
+    def work(connection: Connection) -> None:
+        ids = rng.sample(range(1, count + 1), WRITE_UPDATES)
+        connection.execute(
+            RECATEGORIZE,
+            {"ids": ids, "category": rng.choice(CATEGORIES)},
+        )
+        connection.execute(insert(Transaction.__table__), _rows(WRITE_INSERTS, rng))
+
+    return work
+
+
+def _writer(
+    write: Callable[[Callable[[Connection], None]], None],
+    count: int,
+    results: Results,
+    stop: threading.Event,
+) -> None:
+    work = _etl_batch(count)
+    while not stop.is_set():
+        try:
+            write(work)
+        except OperationalError:
+            with results.lock:
+                results.write_errors += 1
+            continue
+        with results.lock:
+            results.writes += 1
+
+
+def run_profile(  # noqa: PLR0913
+    path: Path,
+    count: int,
+    seconds: float,
+    readers: int,
+    writers: int,
+    *,
+    tuned: bool,
+) -> Results:
+    """Load a fresh database at ``path`` and run the concurrent workload."""
+    engine = create_engine(f"sqlite:///{path}", pool_size=readers + writers)
+    if tuned:
+        apply_pragmas(engine, SqlitePragmas())
+    populate(engine, count)
+    queue = WriterQueue(engine) if tuned else None
+
+    def write(work: Callable[[Connection], None]) -> None:
+        if queue is not None:
+            queue.run(work)
+            return
+        with engine.begin() as connection:
+            work(connection)
+
+    results = Results()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_reader, args=(engine, results, stop))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=_writer, args=(write, count, results, stop))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if queue is not None:
+        queue.close()
+    engine.dispose()
+    return results
+
+
+def _report(name: str, results: Results, seconds: float) -> None:
+    latencies = sorted(results.latencies) or [0.0]
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else 0.0
+    print(
+        f"{name:<8} reads {len(results.latencies) / seconds:8.1f}/s"
+        f"  p50 {statistics.median(latencies) * 1000:8.2f}ms"
+        f"  p95 {p95 * 1000:8.2f}ms"
+        f"  max {latencies[-1] * 1000:8.2f}ms"
+        f"  read errors {results.read_errors:4d}"
+        f"  writes {results.writes / seconds:6.1f}/s"
+        f"  write errors {results.write_errors:4d}",
+    )
+
+
+def run(count: int, seconds: float, readers: int, writers: int) -> None:
+    """Run both profiles and print reader latency and write throughput."""
+    print(
+        f"{count:,} transactions, {readers} readers, {writers} writers,"
+        f" {seconds:g}s per profile",
+    )
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, tuned in (("default", False), ("tuned", True)):
+            results = run_profile(
+                Path(scratch) / f"{name}.db",
+                count,
+                seconds,
+                readers,
+                writers,
+                tuned=tuned,
+            )
+            _report(name, results, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+    run(args.rows, args.seconds, args.readers, args.writers)
@@ -0,0 +1,144 @@
+"""Benchmark the vendor matcher against a naive per-pattern loop.
+
+Reports the literal-indexed matcher, the plain combined alternation and a
+sampled naive loop so the effect of each stage is visible.
+
+Usage (from ``src/``):
+    python -m scripts.bench_vendor_matcher --patterns 10000 --descriptions 1000000
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+
+from ledgerbase.vendor_matcher import PatternSpec, VendorMatch, VendorMatcher
+
+SEED = 20261019
+WORD_LENGTHS = (4, 9)
+MATCH_RATE = 0.8
+
+
+def _word(rng: random.Random) -> str:
+    """Return a random upper-case merchant-like word."""
+    return "".join(rng.choices(string.ascii_uppercase, k=rng.randint(*WORD_LENGTHS)))
+
+
+def build_patterns(names: list[str]) -> list[PatternSpec]:
+    """Generate one synthetic vendor pattern per merchant name."""
+    specs = []
+    for pattern_id, name in enumerate(names, start=1):
+        pattern = re.escape(name) + (r"\s*#?\d*" if pattern_id % 3 == 0 else "")
+        specs.append(PatternSpec(pattern_id, pattern_id, pattern))
+    return specs
+
+
+def build_descriptions(
+    count: int,
+    names: list[str],
+    rng: random.Random,
+) -> list[str]:
+    """Generate bank-style descriptions, roughly 80% of which match a pattern."""
+    descriptions = []
+    for _ in range(count):
+        merchant = rng.choice(names) if rng.random() < MATCH_RATE else _word(rng)
+        descriptions.append(
+            f"POS DEBIT {merchant} #{rng.randint(1, 9999)} {rng.randint(1, 12):02d}/"
+            f"{rng.randint(1, 28):02d}",
+        )
+    return descriptions
+
+
+def naive_match(specs: list[PatternSpec], description: str) -> int | None:
+    """Classify by searching every pattern in turn (the baseline)."""
+    best: tuple[int, int, tuple[int, int, int], int] | None = None
+    for spec in specs:
+        found = re.search(spec.pattern, description, re.IGNORECASE)
+        if found is None:
+            continue
+        key = (-spec.priority, found.start(), spec.rank, spec.vendor_id)
+        if best is None or key < best:
+            best = key
+    return best[-1] if best else None
+
+
+def time_matcher(
+    matcher: VendorMatcher,
+    descriptions: list[str],
+) -> tuple[float, list[VendorMatch | None]]:
+    """Classify every description and return elapsed seconds and results."""
+    started = time.perf_counter()
+    results = matcher.match_many(descriptions)
+    return time.perf_counter() - started, results
+
+
+def run(
+    pattern_count: int,
+    description_count: int,
+    naive_sample: int,
+    alternation_sample: int,
+) -> None:
+    """Run the benchmark and print throughput figures."""
+    rng = random.Random(SEED)
+    names = [f"{_word(rng)} {_word(rng)}" for _ in range(pattern_count)]
+    specs = build_patterns(names)
+    descriptions = build_descriptions(description_count, names, rng)
+
+    started = time.perf_counter()
+    matcher = VendorMatcher(specs)
+    compile_seconds = time.perf_counter() - started
+
+    match_seconds, results = time_matcher(matcher, descriptions)
+    matched = sum(result is not None for result in results)
+
+    alternation = VendorMatcher(specs, use_literal_index=False)
+    alternation_seconds, alternation_results = time_matcher(
+        alternation,
+        descriptions[:alternation_sample],
+    )
+
+    sample = descriptions[:naive_sample]
+    started = time.perf_counter()
+    naive_results = [naive_match(specs, description) for description in sample]
+    naive_seconds = time.perf_counter() - started
+    mismatches = sum(
+        (result.vendor_id if result else None) != expected
+        for result, expected in zip(results, naive_results, strict=False)
+    ) + sum(
+        result != expected
+        for result, expected in zip(results, alternation_results, strict=False)
+    )
+
+    print(f"patterns:            {pattern_count:,}")
+    print(f"descriptions:        {description_count:,} ({matched:,} matched)")
+    print(f"compile:             {compile_seconds:.2f}s")
+    print(
+        f"literal-indexed:     {match_seconds:.2f}s "
+        f"({description_count / match_seconds:,.0f} descriptions/s)",
+    )
+    if alternation_results:
+        print(
+            f"alternation only:    {alternation_seconds:.2f}s for "
+            f"{len(alternation_results):,} "
+            f"({len(alternation_results) / alternation_seconds:,.0f} "
+            "descriptions/s)",
+        )
+    if sample:
+        naive_rate = len(sample) / naive_seconds
+        print(
+            f"naive loop (sample): {naive_seconds:.2f}s for {len(sample):,} "
+            f"({naive_rate:,.0f} descriptions/s, "
+            f"~{description_count / naive_rate:,.0f}s extrapolated)",
+        )
+        print(f"disagreements:       {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patterns", type=int, default=10_000)
+    parser.add_argument("--descriptions", type=int, default=1_000_000)
+    parser.add_argument("--naive-sample", type=int, default=200)
+    parser.add_argument("--alternation-sample", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.patterns, args.descriptions, args.naive_sample, args.alternation_sample)
@@ -0,0 +1,153 @@
+"""Unit tests for the Parquet archive of closed transaction years."""
+
+import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, create_engine, func, insert, select
+
+from ledgerbase import db
+from ledgerbase.archive import (
+    archivable_years,
+    archive_year,
+    archived_years,
+    open_history,
+    year_path,
+)
+from ledgerbase.models import (
+    Account,
+    Institution,
+    MonthlyRollup,
+    Transaction,
+    TransactionArchive,
+)
+from ledgerbase.rollups import check_rollups, rebuild_rollups, record_transactions
+
+pq = pytest.importorskip("pyarrow.parquet")
+pytest.importorskip("duckdb")
+
+TODAY = datetime.date(2026, 10, 19)
+ROWS = [
+    ("PAYROLL ACME", "2500.00", datetime.date(2023, 1, 31)),
+    ("SHELL OIL 57444", "-40.00", datetime.date(2023, 6, 3)),
+    ("SHELL OIL 12201", "-35.50", datetime.date(2023, 12, 31)),
+    ("SHELL OIL 99120", "-20.00", datetime.date(2024, 1, 2)),
+    ("PAYROLL ACME", "2600.00", datetime.date(2026, 9, 30)),
+]
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """SQLite database with transactions from 2023 to 2026 and their rollups."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    rows = [
+        {
+            "id": row_id,
+            "account_id": 1,
+            "raw_description": description,
+            "amount": Decimal(amount),
+            "transaction_date": day,
+            "transaction_type": "income" if amount[0] != "-" else "expense",
+            "category_tier_1": None,
+            "category_tier_2": None,
+        }
+        for row_id, (description, amount, day) in enumerate(ROWS, start=1)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__).values(
+                id=1,
+                institution_id=1,
+                name="Checking",
+                type="depository",
+            ),
+        )
+        connection.execute(insert(Transaction.__table__), rows)
+        record_transactions(connection, rows)
+    return engine
+
+
+def test_closed_year_moves_to_parquet(engine: Engine, tmp_path: Path) -> None:
+    """The year's rows land in one file and leave the hot table."""
+    with engine.begin() as connection:
+        assert archivable_years(connection, today=TODAY) == [2023]
+        archived = archive_year(connection, 2023, tmp_path, today=TODAY)
+
+    path = year_path(tmp_path, 2023)
+    table = pq.read_table(path)
+    assert archived.path == str(path)
+    assert (archived.row_count, archived.total_amount) == (3, Decimal("2424.50"))
+    assert table.column("id").to_pylist() == [1, 2, 3]
+    assert pq.ParquetFile(path).metadata.row_group(0).column(0).compression == "ZSTD"
+    assert list(path.parent.iterdir()) == [path]
+    with engine.connect() as connection:
+        remaining = connection.execute(
+            select(Transaction.__table__.c.id).order_by(Transaction.__table__.c.id),
+        ).scalars()
+        assert list(remaining) == [4, 5]
+        assert archived_years(connection) == [archived]
+        assert archivable_years(connection, today=TODAY) == []
+
+
+def test_open_and_archived_years_are_refused(engine: Engine, tmp_path: Path) -> None:
+    """Years inside the hot window, or archived already, stay where they are."""
+    with engine.begin() as connection:
+        with pytest.raises(ValueError, match="stays hot"):
+            archive_year(connection, 2024, tmp_path, today=TODAY)
+        archive_year(connection, 2023, tmp_path, today=TODAY)
+        with pytest.raises(ValueError, match="already archived"):
+            archive_year(connection, 2023, tmp_path, today=TODAY)
+        with pytest.raises(ValueError, match="No transactions"):
+            archive_year(connection, 2022, tmp_path, today=TODAY)
+
+
+def test_history_spans_archived_and_hot_years(engine: Engine, tmp_path: Path) -> None:
+    """The DuckDB view unions the archive with hot rows, online or offline."""
+    with engine.begin() as connection:
+        archive_year(connection, 2023, tmp_path, today=TODAY)
+    totals = (
+        "SELECT year(transaction_date) AS year, sum(amount), count(*)"
+        " FROM transactions GROUP BY 1 ORDER BY 1"
+    )
+
+    with engine.connect() as connection, open_history(tmp_path, connection) as duck:
+        assert duck.execute(totals).fetchall() == [
+            (2023, Decimal("2424.50"), 3),
+            (2024, Decimal("-20.00"), 1),
+            (2026, Decimal("2600.00"), 1),
+        ]
+    with (
+        engine.connect() as connection,
+        open_history(
+            tmp_path,
+            connection,
+            start=datetime.date(2023, 6, 1),
+            end=datetime.date(2024, 6, 1),
+        ) as duck,
+    ):
+        ids = duck.execute("SELECT id FROM transactions ORDER BY id").fetchall()
+        assert ids == [(2,), (3,), (4,)]
+    with open_history(tmp_path) as duck:
+        assert duck.execute(totals).fetchall() == [(2023, Decimal("2424.50"), 3)]
+
+
+def test_rollups_of_archived_years_are_kept(engine: Engine, tmp_path: Path) -> None:
+    """Checks and rebuilds ignore archived months instead of emptying them."""
+    rollups = MonthlyRollup.__table__
+    with engine.begin() as connection:
+        before = connection.execute(select(func.count()).select_from(rollups)).scalar()
+        archive_year(connection, 2023, tmp_path, today=TODAY)
+
+        assert check_rollups(connection) == []
+        assert rebuild_rollups(connection) == 2
+        after = connection.execute(select(func.count()).select_from(rollups)).scalar()
+        assert after == before
+        assert (
+            connection.execute(
+                select(TransactionArchive.__table__.c.row_count),
+            ).scalar()
+            == 3
+        )
@@ -0,0 +1,166 @@
+"""Unit tests for the stored, incrementally refreshed budget balances."""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, event, insert, select, update
+
+from ledgerbase import db
+from ledgerbase.budget_balances import (
+    balances_at,
+    mark_dirty,
+    rebuild_balances,
+    refresh_balances,
+)
+from ledgerbase.budget_engine import budget_report
+from ledgerbase.models import (
+    Account,
+    BudgetBalance,
+    BudgetDirty,
+    BudgetEntry,
+    Institution,
+    Transaction,
+)
+from ledgerbase.rollups import RollupDeltas, record_transactions
+
+MONTHS = [datetime.date(2025, month, 1) for month in range(1, 13)]
+CATEGORIES = [("Savings", "Vacation"), ("Savings", "Car"), ("Food", "Groceries")]
+# Groceries in September
+MOVED_ID = 27
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """A year of budgets and monthly spending in three categories."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__).values(
+                id=1,
+                institution_id=1,
+                name="Checking",
+                type="depository",
+            ),
+        )
+        connection.execute(
+            insert(BudgetEntry.__table__),
+            [
+                {
+                    "month": month,
+                    "category_tier_1": tier_1,
+                    "category_tier_2": tier_2,
+                    "amount": Decimal(100),
+                    "rollover": tier_1 == "Savings",
+                }
+                for month in MONTHS
+                for tier_1, tier_2 in CATEGORIES
+            ],
+        )
+        rows = [
+            {
+                "id": index,
+                "account_id": 1,
+                "raw_description": f"{tier_1} {tier_2}",
+                "amount": Decimal(-30 - index),
+                "transaction_date": month.replace(day=10),
+                "transaction_type": "expense",
+                "category_tier_1": tier_1,
+                "category_tier_2": tier_2,
+            }
+            for index, (month, (tier_1, tier_2)) in enumerate(
+                ((month, category) for month in MONTHS for category in CATEGORIES),
+                start=1,
+            )
+        ]
+        connection.execute(insert(Transaction.__table__), rows)
+        record_transactions(connection, rows)
+        rebuild_balances(connection)
+    return engine
+
+
+def _stored(connection: Connection) -> dict[tuple, tuple]:
+    table = BudgetBalance.__table__
+    return {
+        (row.category_tier_1, row.category_tier_2, row.month): (
+            row.carry_in,
+            row.balance,
+        )
+        for row in connection.execute(select(table))
+    }
+
+
+def _expected(connection: Connection) -> dict[tuple, tuple]:
+    report = budget_report(connection)
+    return {
+        (*category, month): (
+            Decimal(int(report.carry_in[row, column])).scaleb(-2),
+            Decimal(int(report.balance[row, column])).scaleb(-2),
+        )
+        for row, month in enumerate(report.months)
+        for column, category in enumerate(report.categories)
+    }
+
+
+def test_rebuild_matches_the_full_report(engine: Engine) -> None:
+    """Stored balances equal a full recomputation and nothing is left dirty."""
+    with engine.connect() as connection:
+        stored = _stored(connection)
+        assert stored == _expected(connection)
+        assert connection.execute(select(BudgetDirty.__table__)).all() == []
+        assert balances_at(connection, MONTHS[2])[CATEGORIES[0]] == Decimal("198.00")
+
+
+def test_reclassification_refreshes_from_its_month_only(engine: Engine) -> None:
+    """Moving an old transaction recomputes its two categories from that month."""
+    transactions = Transaction.__table__
+    with engine.begin() as connection:
+        moved = (
+            connection.execute(
+                select(transactions).where(transactions.c.id == MOVED_ID),
+            )
+            .mappings()
+            .one()
+        )
+        deltas = RollupDeltas()
+        deltas.move(moved, "Savings", "Car")
+        connection.execute(
+            update(transactions)
+            .where(transactions.c.id == MOVED_ID)
+            .values(category_tier_1="Savings", category_tier_2="Car"),
+        )
+        deltas.apply(connection)
+        marks = connection.execute(select(BudgetDirty.__table__)).all()
+        assert sorted(marks) == [
+            ("Food", "Groceries", MONTHS[8]),
+            ("Savings", "Car", MONTHS[8]),
+        ]
+        statements: list[str] = []
+
+        def record(*args: object) -> None:
+            statements.append(str(args[2]))
+
+        event.listen(connection, "before_cursor_execute", record)
+        refresh_balances(connection)
+        event.remove(connection, "before_cursor_execute", record)
+
+        assert _stored(connection) == _expected(connection)
+        assert connection.execute(select(BudgetDirty.__table__)).all() == []
+        loads = [sql for sql in statements if "FROM budget_entries" in sql]
+        assert len(loads) == 1
+        assert "month >=" in loads[0]
+
+
+def test_marks_coalesce_to_the_earliest_month(engine: Engine) -> None:
+    """Repeated marks keep one row per category at its earliest month."""
+    with engine.begin() as connection:
+        for month in (MONTHS[6], MONTHS[3], MONTHS[9]):
+            mark_dirty(connection, {CATEGORIES[0]: month, CATEGORIES[2]: MONTHS[11]})
+        marks = connection.execute(select(BudgetDirty.__table__)).all()
+
+    assert sorted(marks) == [
+        ("Food", "Groceries", MONTHS[11]),
+        ("Savings", "Vacation", MONTHS[3]),
+    ]
@@ -0,0 +1,155 @@
+"""Unit tests for the vectorized budget-vs-actual engine."""
+
+import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, insert
+
+from ledgerbase import create_app, db
+from ledgerbase.budget_balances import mark_all_dirty
+from ledgerbase.budget_engine import budget_report, month_range, roll_balances
+from ledgerbase.models import Account, BudgetEntry, Institution, Transaction
+from ledgerbase.rollups import record_transactions
+
+JAN, FEB, MAR = (datetime.date(2026, month, 1) for month in (1, 2, 3))
+SPENDING = [
+    # tier 1, tier 2, type, amount, day
+    ("Food", "Groceries", "expense", "-250.00", JAN),
+    ("Food", "Groceries", "expense", "-320.00", FEB),
+    ("Food", "Groceries", "expense", "20.00", FEB),
+    ("Auto", "Fuel", "expense", "-40.00", FEB),
+    ("Savings", "Vacation", "expense", "-150.00", MAR),
+    ("Salary", "", "income", "4000.00", JAN),
+    ("Savings", "Vacation", "transfer", "-500.00", JAN),
+]
+
+
+def _seed(connection: Connection) -> None:
+    connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+    connection.execute(
+        insert(Account.__table__).values(
+            id=1,
+            institution_id=1,
+            name="Checking",
+            type="depository",
+        ),
+    )
+    rows = [
+        {
+            "id": row_id,
+            "account_id": 1,
+            "raw_description": f"{tier_1} {tier_2}",
+            "amount": Decimal(amount),
+            "transaction_date": day.replace(day=15),
+            "transaction_type": transaction_type,
+            "category_tier_1": tier_1,
+            "category_tier_2": tier_2 or None,
+        }
+        for row_id, (tier_1, tier_2, transaction_type, amount, day) in enumerate(
+            SPENDING,
+            start=1,
+        )
+    ]
+    connection.execute(insert(Transaction.__table__), rows)
+    record_transactions(connection, rows)
+    connection.execute(
+        insert(BudgetEntry.__table__),
+        [
+            {
+                "month": month,
+                "category_tier_1": tier_1,
+                "category_tier_2": tier_2,
+                "amount": Decimal(amount),
+                "rollover": rollover,
+            }
+            for month in (JAN, FEB, MAR)
+            for tier_1, tier_2, amount, rollover in (
+                ("Food", "Groceries", "300.00", False),
+                ("Savings", "Vacation", "100.00", True),
+            )
+        ],
+    )
+    # Written directly rather than through ledgerbase.budgets, so mark them.
+    mark_all_dirty(connection)
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """SQLite database with three months of budgets and spending."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+    return engine
+
+
+def test_variance_rollover_and_savings(engine: Engine) -> None:
+    """Only expenses count; rollover categories carry their balance forward."""
+    with engine.connect() as connection:
+        report = budget_report(connection)
+
+    assert report.months == (JAN, FEB, MAR)
+    assert report.categories == (
+        ("Auto", "Fuel"),
+        ("Food", "Groceries"),
+        ("Savings", "Vacation"),
+    )
+    assert report.actual.tolist() == [[0, 25000, 0], [4000, 30000, 0], [0, 0, 15000]]
+    assert report.variance.tolist() == [
+        [0, 5000, 10000],
+        [-4000, 0, 10000],
+        [0, 30000, -5000],
+    ]
+    assert report.carry_in[:, 2].tolist() == [0, 10000, 20000]
+    assert report.balance[:, 2].tolist() == [10000, 20000, 15000]
+    assert report.balance[:, 1].tolist() == [5000, 0, 30000]
+    assert report.as_dict()["savings_balance"] == ["100.00", "200.00", "150.00"]
+
+
+def test_roll_balances_restart_and_opening() -> None:
+    """A month that does not roll over starts from its own variance."""
+    variance = np.array([[10, 5], [20, 5], [-5, 5], [7, 5]])
+    rollover = np.array([[1, 0], [1, 1], [0, 1], [1, 1]], dtype=bool)
+
+    assert roll_balances(variance, rollover).tolist() == [
+        [10, 5],
+        [30, 10],
+        [-5, 15],
+        [2, 20],
+    ]
+    opened = roll_balances(variance, rollover, np.array([100, 1000]))
+    assert opened[:, 0].tolist() == [110, 130, -5, 2]
+    assert opened[:, 1].tolist() == [5, 10, 15, 20]
+    assert month_range(datetime.date(2025, 11, 20), FEB) == [
+        datetime.date(2025, 11, 1),
+        datetime.date(2025, 12, 1),
+        JAN,
+        FEB,
+    ]
+
+
+def test_api_route_keeps_earlier_rollover(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """GET /api/budget?start=... still carries balances from before start."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'budget.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            _seed(connection)
+    client = app.test_client()
+    headers = {"Accept": "application/json"}
+
+    response = client.get("/api/budget?start=2026-02&end=2026-03", headers=headers)
+    bad = client.get("/api/budget?start=February", headers=headers)
+
+    body = response.get_json()
+    assert body["months"] == ["2026-02-01", "2026-03-01"]
+    assert [row[2] for row in body["carry_in"]] == ["100.00", "200.00"]
+    assert body["savings_balance"] == ["200.00", "150.00"]
+    assert bad.status_code == 422
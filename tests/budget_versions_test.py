@@ -0,0 +1,128 @@
+"""Unit tests for the delta-encoded budget version history."""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Engine, create_engine, func, select, update
+
+from ledgerbase import budget_versions, db
+from ledgerbase.budget_versions import (
+    budget_as_of,
+    category_history,
+    latest_version,
+    version_at,
+)
+from ledgerbase.budgets import extend_budgets, set_budget
+from ledgerbase.models import BudgetEntry, BudgetSnapshot, BudgetVersion
+
+JAN, FEB, MAR = (datetime.date(2026, month, 1) for month in (1, 2, 3))
+GROCERIES = ("Food", "Groceries")
+FUEL = ("Auto", "Fuel")
+
+
+def _utc(year: int, month: int, day: int) -> datetime.datetime:
+    """Noon of a day as the naive UTC timestamp stored in created_at."""
+    return datetime.datetime(year, month, day, 12, tzinfo=datetime.UTC).replace(
+        tzinfo=None,
+    )
+
+
+@pytest.fixture
+def engine(monkeypatch: pytest.MonkeyPatch) -> Engine:
+    """Empty SQLite database snapshotting every three versions."""
+    monkeypatch.setattr(budget_versions, "SNAPSHOT_EVERY", 3)
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    return engine
+
+
+def test_every_version_is_rebuilt_from_snapshots_and_changes(engine: Engine) -> None:
+    """budget_as_of matches budget_entries as it was after each version."""
+    states = {}
+    with engine.begin() as connection:
+        for step, (month, category, amount) in enumerate(
+            [
+                (JAN, GROCERIES, 300),
+                (JAN, FUEL, 80),
+                (JAN, GROCERIES, 320),
+                (FEB, FUEL, 95),
+                (FEB, GROCERIES, 310),
+                (JAN, FUEL, 70),
+                (MAR, GROCERIES, 400),
+            ],
+        ):
+            set_budget(connection, month, category, Decimal(amount))
+            if step == 4:
+                extend_budgets(connection, MAR, start=FEB)
+            table = BudgetEntry.__table__
+            states[latest_version(connection)] = {
+                (row.month, row.category_tier_1, row.category_tier_2): (
+                    row.amount,
+                    row.rollover,
+                    row.manually_edited,
+                )
+                for row in connection.execute(select(table))
+            }
+        snapshots = connection.scalars(
+            select(BudgetSnapshot.__table__.c.version_id).distinct(),
+        ).all()
+
+        assert sorted(snapshots) == [3, 6]
+        for version, state in states.items():
+            rebuilt = budget_as_of(connection, version)
+            assert {
+                key: (value.amount, value.rollover, value.manually_edited)
+                for key, value in rebuilt.items()
+            } == state
+        assert budget_as_of(connection, 0) == {}
+
+
+def test_version_at_a_point_in_time(engine: Engine) -> None:
+    """version_at returns the version current at a timestamp."""
+    versions = BudgetVersion.__table__
+    with engine.begin() as connection:
+        for day, amount in ((1, 300), (10, 250), (20, 275)):
+            set_budget(connection, JAN, GROCERIES, Decimal(amount))
+            connection.execute(
+                update(versions)
+                .where(versions.c.id == latest_version(connection))
+                .values(created_at=_utc(2026, 1, day)),
+            )
+
+        version = version_at(connection, _utc(2026, 1, 15))
+        assert version == 2
+        assert budget_as_of(connection, version)[JAN, *GROCERIES].amount == 250
+        assert version_at(connection, _utc(2025, 12, 31)) == 0
+
+
+def test_category_history_uses_its_index(engine: Engine) -> None:
+    """One category's changes come back in order through the index."""
+    with engine.begin() as connection:
+        set_budget(connection, JAN, GROCERIES, Decimal(300))
+        set_budget(connection, JAN, FUEL, Decimal(80))
+        extend_budgets(connection, FEB)
+        set_budget(connection, FEB, GROCERIES, Decimal(280))
+        history = category_history(connection, GROCERIES)
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT version_id FROM budget_entry_changes"
+            " WHERE category_tier_1 = 'Food' AND category_tier_2 = 'Groceries'"
+            " ORDER BY version_id",
+        ).all()
+        changes = connection.scalar(select(func.count()).select_from(BudgetEntry))
+
+    assert [
+        (change.month, change.amount, change.manually_edited) for change in history
+    ] == [
+        (JAN, Decimal("300.00"), True),
+        (FEB, Decimal("300.00"), False),
+        (FEB, Decimal("280.00"), True),
+    ]
+    assert [change.note for change in history] == [
+        "set 2026-01 Food/Groceries",
+        "extend 2026-02..2026-02",
+        "set 2026-02 Food/Groceries",
+    ]
+    assert changes == 4
+    assert "budget_entry_changes_category_version_idx" in str(plan)
+    assert "TEMP B-TREE" not in str(plan)
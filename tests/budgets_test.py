@@ -0,0 +1,112 @@
+"""Unit tests for manual budget overrides and set-based monthly cloning."""
+
+import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, select
+
+from ledgerbase import create_app, db
+from ledgerbase.budget_versions import latest_version
+from ledgerbase.budgets import clone_month, extend_budgets, set_budget
+from ledgerbase.models import BudgetBalance, BudgetDirty, BudgetEntry
+
+JAN, FEB, MAR, APR = (datetime.date(2026, month, 1) for month in (1, 2, 3, 4))
+GROCERIES = ("Food", "Groceries")
+VACATION = ("Savings", "Vacation")
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """SQLite database with January budgets for two categories."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        set_budget(connection, JAN, GROCERIES, Decimal(300))
+        set_budget(connection, JAN, VACATION, Decimal(100), rollover=True)
+    return engine
+
+
+def _entries(connection: Connection) -> dict[tuple, tuple]:
+    table = BudgetEntry.__table__
+    return {
+        (row.month, row.category_tier_1, row.category_tier_2): (
+            row.amount,
+            row.rollover,
+            row.manually_edited,
+        )
+        for row in connection.execute(select(table))
+    }
+
+
+def test_clone_follows_previous_month_except_overrides(engine: Engine) -> None:
+    """Cloned entries track the previous month; manual overrides are kept."""
+    with engine.begin() as connection:
+        set_budget(connection, FEB, GROCERIES, Decimal(350))
+        assert clone_month(connection, FEB) == 1
+        set_budget(connection, JAN, VACATION, Decimal(120), rollover=True)
+        clone_month(connection, FEB)
+        entries = _entries(connection)
+
+    assert entries[FEB, *GROCERIES] == (Decimal("350.00"), False, True)
+    assert entries[FEB, *VACATION] == (Decimal("120.00"), True, False)
+
+
+def test_reclone_of_unchanged_month_writes_nothing(engine: Engine) -> None:
+    """Entries already equal to the previous month are not rewritten."""
+    with engine.begin() as connection:
+        assert clone_month(connection, FEB) == 2
+        version = latest_version(connection)
+        assert clone_month(connection, FEB) == 0
+        assert latest_version(connection) == version
+
+
+def test_extend_backfills_every_month_in_order(engine: Engine) -> None:
+    """Extending fills each month from the one before it and marks balances."""
+    with engine.begin() as connection:
+        set_budget(connection, MAR, GROCERIES, Decimal(280))
+        written = extend_budgets(connection, APR, start=FEB)
+        entries = _entries(connection)
+        marks = connection.execute(select(BudgetDirty.__table__)).all()
+
+    assert written == 5
+    assert [entries[month, *GROCERIES][0] for month in (FEB, MAR, APR)] == [
+        Decimal("300.00"),
+        Decimal("280.00"),
+        Decimal("280.00"),
+    ]
+    assert entries[APR, *VACATION] == (Decimal("100.00"), True, False)
+    assert sorted(marks) == [(*GROCERIES, JAN), (*VACATION, JAN)]
+
+
+def test_extend_command_clones_and_refreshes(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """`flask budget extend` clones and refreshes balances in one write."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'budgets.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    runner = app.test_cli_runner()
+
+    empty = runner.invoke(args=["budget", "extend", "2026-04"])
+    with app.app_context(), db.engine.begin() as connection:
+        set_budget(connection, JAN, VACATION, Decimal(100), rollover=True)
+    result = runner.invoke(args=["budget", "extend", "2026-04"])
+
+    assert empty.exit_code == 2
+    assert "No budgets to extend" in empty.output
+    assert result.exit_code == 0, result.output
+    assert "Cloned 3 budget entries; wrote 4 budget balances" in result.output
+    with app.app_context(), db.engine.connect() as connection:
+        balances = connection.execute(
+            select(BudgetBalance.__table__.c.balance).order_by("month"),
+        ).scalars()
+        assert list(balances) == [
+            Decimal(100),
+            Decimal(200),
+            Decimal(300),
+            Decimal(400),
+        ]
@@ -0,0 +1,128 @@
+"""Unit tests for the versioned classification cache."""
+
+from sqlalchemy import create_engine, insert, select, update
+
+from ledgerbase import db
+from ledgerbase.classification_cache import (
+    CachedClassifier,
+    ClassificationCache,
+    bump_dictionary_version,
+    dictionary_version,
+)
+from ledgerbase.models import DictionaryVersion, Vendor, VendorPattern
+from ledgerbase.vendor_matcher import PatternSpec, VendorMatcher
+
+
+def test_repeated_descriptions_hit_the_cache() -> None:
+    """Descriptions differing only in case and spacing share one entry."""
+    classifier = CachedClassifier(
+        VendorMatcher([PatternSpec(1, 10, r"BLUE BOTTLE")]),
+        version="v1",
+    )
+
+    first = classifier.classify("Blue  Bottle Coffee")
+    second = classifier.classify("BLUE BOTTLE   COFFEE")
+    missing = classifier.classify("unknown")
+    classifier.classify("UNKNOWN")
+
+    stats = classifier.cache.stats()
+    assert first == second
+    assert first.vendor_id == 10
+    assert missing is None
+    assert (stats.hits, stats.misses, stats.entries) == (2, 2, 2)
+    assert stats.hit_rate == 0.5
+    assert stats.approx_bytes > 0
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    """Capacity overflow evicts the entry that was used least recently."""
+    cache = ClassificationCache(max_entries=2)
+    cache.put(("A", "raw_description"), "v1", None)
+    cache.put(("B", "raw_description"), "v1", None)
+    cache.get(("A", "raw_description"), "v1")
+    cache.put(("C", "raw_description"), "v1", None)
+
+    assert cache.get(("B", "raw_description"), "v1") == (False, None)
+    assert cache.get(("A", "raw_description"), "v1")[0]
+    assert cache.stats().evictions == 1
+
+
+def test_version_change_drops_stale_entries_lazily() -> None:
+    """Entries from an older dictionary version are misses, not flushed."""
+    cache = ClassificationCache()
+    cache.put(("A", "raw_description"), "v1", None)
+    cache.put(("B", "raw_description"), "v1", None)
+
+    assert cache.get(("A", "raw_description"), "v2") == (False, None)
+
+    stats = cache.stats()
+    assert (stats.stale, stats.entries) == (1, 1)
+
+
+def test_refresh_follows_dictionary_changes() -> None:
+    """A recorded pattern edit changes the version and the classification."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(
+        engine,
+        tables=[
+            DictionaryVersion.__table__,
+            Vendor.__table__,
+            VendorPattern.__table__,
+        ],
+    )
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Vendor.__table__),
+            [
+                {
+                    "id": 1,
+                    "name": "Shell",
+                    "category_tier_1": "Auto",
+                    "category_tier_2": "Fuel",
+                },
+            ],
+        )
+        connection.execute(
+            insert(VendorPattern.__table__),
+            [
+                {
+                    "id": 1,
+                    "vendor_id": 1,
+                    "pattern": "SHELL",
+                    "source_column": "raw_description",
+                },
+            ],
+        )
+        classifier = CachedClassifier.from_connection(connection)
+        before = dictionary_version(connection)
+
+        assert classifier.classify("SHELL OIL 123").vendor_id == 1
+        assert not classifier.refresh(connection)
+
+        connection.execute(
+            update(VendorPattern.__table__).values(pattern="EXXON"),
+        )
+        assert not classifier.refresh(connection)
+        bump_dictionary_version(connection)
+
+        assert dictionary_version(connection) != before
+        assert classifier.refresh(connection)
+        assert classifier.classify("SHELL OIL 123") is None
+        assert classifier.cache.stats().stale == 1
+
+
+def test_dictionary_version_is_one_counter_row() -> None:
+    """Bumps increment the single counter row, seeded or not."""
+    engine = create_engine("sqlite://")
+    table = DictionaryVersion.__table__
+    db.metadata.create_all(engine, tables=[table])
+    with engine.begin() as connection:
+        assert dictionary_version(connection) == "0"
+        versions = [bump_dictionary_version(connection) for _ in range(2)]
+        rows = connection.execute(select(table.c.id, table.c.version)).all()
+        connection.execute(update(table).values(version=41))
+        seeded = bump_dictionary_version(connection)
+
+    assert versions == ["1", "2"]
+    assert [tuple(row) for row in rows] == [(1, 2)]
+    assert seeded == "42"
@@ -0,0 +1,206 @@
+"""Unit tests for MinHash/LSH clustering of unmatched descriptions."""
+
+import datetime
+import re
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, create_engine, func, insert, select
+
+from ledgerbase import create_app, db
+from ledgerbase.description_clusters import (
+    approve_cluster,
+    cluster_descriptions,
+    cluster_unmatched,
+    description_shape,
+    suggest_pattern,
+)
+from ledgerbase.models import Account, Institution, Transaction, Vendor, VendorPattern
+from ledgerbase.pattern_profiler import UnsafePatternError
+from ledgerbase.vendor_matcher import MATCH_FLAGS
+
+QUEUE = [
+    "POS DEBIT TRADER JOE S #552 09/14",
+    "POS DEBIT TRADER JOE S #118 10/02",
+    "POS DEBIT TRADER JOE S #552 11/30",
+    "SHELL OIL 57444 10/03",
+    "SHELL OIL 12201 10/17",
+    "NETFLIX.COM 866-579-7172",
+]
+
+
+def test_shape_strips_digits_and_spacing() -> None:
+    """Store numbers and dates do not affect a description's shape."""
+    assert description_shape("Shell  Oil 57444 10/03") == "SHELL OIL /"
+
+
+def test_store_variants_cluster_by_merchant() -> None:
+    """Variants of one merchant share a cluster; merchants stay apart."""
+    clusters = cluster_descriptions(list(enumerate(QUEUE, start=1)))
+
+    assert [cluster.transaction_ids for cluster in clusters] == [
+        (1, 2, 3),
+        (4, 5),
+        (6,),
+    ]
+    assert clusters[0].representative == "POS DEBIT TRADER JOE S # /"
+    assert clusters[1].suggested_pattern == r"SHELL[\s\d]*OIL"
+
+
+def test_suggest_pattern_uses_common_token_prefix() -> None:
+    """The suggested pattern covers the tokens every shape starts with."""
+    assert suggest_pattern(["SQ *BLUE BOTTLE", "SQ *BLUE BOTTLE COF"]) == (
+        r"SQ[\s\d]*\*BLUE[\s\d]*BOTTLE"
+    )
+
+
+def _seed(connection: Connection) -> None:
+    """Queue every description in QUEUE for one card, with one vendor."""
+    connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+    connection.execute(
+        insert(Account.__table__).values(
+            id=1,
+            institution_id=1,
+            name="Card",
+            type="credit",
+        ),
+    )
+    connection.execute(
+        insert(Vendor.__table__).values(
+            id=9,
+            name="Trader Joe's",
+            category_tier_1="Food",
+            category_tier_2="Groceries",
+        ),
+    )
+    connection.execute(
+        insert(Transaction.__table__),
+        [
+            {
+                "id": row_id,
+                "account_id": 1,
+                "raw_description": description,
+                "amount": Decimal("-1.00"),
+                "transaction_date": datetime.date(2026, 3, row_id),
+                "transaction_type": "expense",
+            }
+            for row_id, description in enumerate(QUEUE, start=1)
+        ],
+    )
+
+
+def test_approve_cluster_classifies_every_member_at_once() -> None:
+    """Approval writes one pattern and assigns the vendor to all members."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        cluster = cluster_unmatched(connection)[0]
+        approval = approve_cluster(connection, cluster, vendor_id=9)
+        table = Transaction.__table__
+        rows = connection.execute(
+            select(
+                table.c.id,
+                table.c.vendor_id,
+                table.c.category_tier_2,
+                table.c.manually_edited,
+            ).order_by(table.c.id),
+        ).all()
+
+    assert (approval.classified, approval.manual) == (3, 0)
+    assert [tuple(row) for row in rows[:4]] == [
+        (1, 9, "Groceries", False),
+        (2, 9, "Groceries", False),
+        (3, 9, "Groceries", False),
+        (4, None, None, False),
+    ]
+
+
+def test_approve_cluster_rejects_catastrophic_pattern() -> None:
+    """A reviewer's pattern must pass the backtracking guard to be written."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        cluster = cluster_unmatched(connection)[0]
+        with pytest.raises(UnsafePatternError):
+            approve_cluster(connection, cluster, vendor_id=9, pattern=r"(\w+\s?)*$")
+        written = connection.scalar(select(func.count()).select_from(VendorPattern))
+        unmatched = connection.scalar(
+            select(func.count())
+            .select_from(Transaction)
+            .where(Transaction.__table__.c.vendor_id.is_(None)),
+        )
+
+    assert (written, unmatched) == (0, len(QUEUE))
+
+
+def test_cluster_pattern_matches_the_column_it_is_stored_for() -> None:
+    """Raw text with digits inside and a different normalized form still matches."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    amazon = [
+        "AMAZON MKTP 10/03 SEATTLE WA",
+        "AMAZON MKTP 10/17 SEATTLE WA",
+        "AMAZON MKTP 11/02 SEATTLE WA",
+    ]
+    table = Transaction.__table__
+    with engine.begin() as connection:
+        _seed(connection)
+        connection.execute(table.delete())
+        connection.execute(
+            insert(table),
+            [
+                {
+                    "id": row_id,
+                    "account_id": 1,
+                    "raw_description": description,
+                    "normalized_description": "AMAZON MKTP SEATTLE WA",
+                    "amount": Decimal("-1.00"),
+                    "transaction_date": datetime.date(2026, 3, row_id),
+                    "transaction_type": "expense",
+                }
+                for row_id, description in enumerate(amazon, start=1)
+            ],
+        )
+        cluster = cluster_unmatched(connection)[0]
+        approval = approve_cluster(connection, cluster, vendor_id=9)
+        stored = connection.execute(
+            select(
+                VendorPattern.__table__.c.pattern,
+                VendorPattern.__table__.c.source_column,
+            ),
+        ).one()
+
+    assert (approval.classified, approval.manual) == (3, 0)
+    assert stored.source_column == "raw_description"
+    assert re.search(stored.pattern, "AMAZON MKTP 01/05 SEATTLE WA", MATCH_FLAGS)
+
+
+def test_cluster_commands_list_and_approve_the_queue(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """`flask patterns clusters` numbers clusters; approve-cluster takes one."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'clusters.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            _seed(connection)
+    runner = app.test_cli_runner()
+
+    listed = runner.invoke(args=["patterns", "clusters"])
+    missing = runner.invoke(args=["patterns", "approve-cluster", "4", "9"])
+    approved = runner.invoke(args=["patterns", "approve-cluster", "1", "9"])
+    remaining = runner.invoke(args=["patterns", "clusters"])
+
+    assert listed.output.splitlines()[0].split()[:2] == ["1", "3"]
+    assert "POS DEBIT TRADER JOE S" in listed.output.splitlines()[0]
+    assert listed.output.splitlines()[-1] == "3 clusters"
+    assert missing.exit_code == 2
+    assert "There are 3 clusters" in missing.output
+    assert approved.exit_code == 0, approved.output
+    assert "classified 3 transactions" in approved.output
+    assert remaining.output.splitlines()[-1] == "2 clusters"
@@ -0,0 +1,110 @@
+"""Unit tests for the batch description normalizer."""
+
+import datetime
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, select
+
+from ledgerbase import db
+from ledgerbase.description_normalizer import (
+    DescriptionNormalizer,
+    NormalizationRule,
+    backfill_normalized_descriptions,
+    fold_description,
+)
+from ledgerbase.models import Account, Institution, Transaction
+
+RAW = [
+    "POS DEBIT TRADER JOE S #552 09/14",
+    "  Shell\tOil 57444 10/03/2026",
+    "PURCHASE AUTHORIZED ON 09/14 STARBUCKS STORE 1234 SEATTLE WA CARD 4321",
+    "NETFLIX.COM 866-579-7172",
+    "7-ELEVEN XXXX1234",
+]
+
+
+def test_rules_strip_prefixes_numbers_dates_and_card_suffixes() -> None:
+    """Noise around the merchant name is removed in one batch."""
+    assert DescriptionNormalizer().normalize_many(RAW) == [
+        "TRADER JOE S",
+        "SHELL OIL",
+        "STARBUCKS SEATTLE WA",
+        "NETFLIX.COM",
+        "7-ELEVEN",
+    ]
+
+
+def test_batches_keep_one_output_per_input() -> None:
+    """Embedded newlines and missing values cannot shift batch rows."""
+    normalizer = DescriptionNormalizer()
+
+    assert normalizer.normalize_many(["A\nB", None, "", "c"]) == ["A B", "", "", "C"]
+    assert normalizer.normalize_many([]) == []
+
+
+def test_custom_rules_apply_in_priority_order() -> None:
+    """At one position the first listed rule wins."""
+    normalizer = DescriptionNormalizer(
+        [
+            NormalizationRule("amazon", r"\bAMZN\b", "AMAZON"),
+            NormalizationRule("word", r"\bAMZN MKTP\b", "X"),
+        ],
+    )
+
+    assert normalizer.normalize("amzn mktp us") == "AMAZON MKTP US"
+
+
+def test_fold_keeps_numbers_and_leaves_stored_values_unchanged() -> None:
+    """Folding only upper-cases and collapses whitespace."""
+    normalized = DescriptionNormalizer().normalize_many(RAW)
+
+    assert fold_description("  pos debit\tShell  Oil 57444 ") == (
+        "POS DEBIT SHELL OIL 57444"
+    )
+    assert fold_description(None) == ""
+    assert [fold_description(value) for value in normalized] == normalized
+
+
+def test_backfill_fills_missing_rows_in_batches() -> None:
+    """The stored column is written once per row, in keyset batches."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    table = Transaction.__table__
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__).values(
+                id=1,
+                institution_id=1,
+                name="Card",
+                type="credit",
+            ),
+        )
+        connection.execute(
+            insert(table),
+            [
+                {
+                    "account_id": 1,
+                    "raw_description": description,
+                    "normalized_description": "KEEP" if index == 0 else None,
+                    "amount": Decimal("-1.00"),
+                    "transaction_date": datetime.date(2026, 3, 1),
+                    "transaction_type": "expense",
+                }
+                for index, description in enumerate(RAW)
+            ],
+        )
+        written = backfill_normalized_descriptions(connection, batch_size=2)
+        again = backfill_normalized_descriptions(connection, batch_size=2)
+        stored = connection.execute(
+            select(table.c.normalized_description).order_by(table.c.id),
+        ).scalars()
+
+        assert (written, again) == (4, 0)
+        assert list(stored) == [
+            "KEEP",
+            "SHELL OIL",
+            "STARBUCKS SEATTLE WA",
+            "NETFLIX.COM",
+            "7-ELEVEN",
+        ]
@@ -0,0 +1,50 @@
+"""Unit tests for required-literal extraction and the Aho-Corasick index."""
+
+import pytest
+
+from ledgerbase.literal_index import AhoCorasick, extract_required_literals
+
+
+@pytest.mark.parametrize(
+    ("pattern", "expected"),
+    [
+        (r"SHELL OIL", ["SHELL OIL"]),
+        (r"amazon\s*mktp", ["AMAZON"]),
+        (r"\bKROGER\b #\d+", ["KROGER #"]),
+        (r"STAR(BUCKS)?", ["STAR"]),
+        (r"(?:SAFEWAY|ALBERTSONS) #", ["ALBERTSONS", "SAFEWAY"]),
+        (r"(?:WALMART|WAL-MART)\s", ["-MART", "MART"]),
+        (r"(?:NETFLIX){1,2}", ["NETFLIX"]),
+    ],
+)
+def test_extracts_required_literals(pattern: str, expected: list[str]) -> None:
+    """The longest literal every match must contain is extracted, upper-cased."""
+    assert extract_required_literals(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [r"[0-9]+ P", r"A.B", r"FOO|BA", r"(?:CAFE)?\d+", r"BROKEN("],
+)
+def test_patterns_without_literal_return_none(pattern: str) -> None:
+    """Short, optional or unparsable literals cannot be used as a filter."""
+    assert extract_required_literals(pattern) is None
+
+
+def test_aho_corasick_finds_overlapping_literals() -> None:
+    """Every indexed literal occurring in the text reports its key."""
+    index = AhoCorasick(
+        [("AMAZON", 1), ("AMZN", 2), ("MAZ", 3), ("ZON", 4), ("SHELL OIL", 5)],
+    )
+
+    assert index.find("POS AMAZON MKTP") == {1, 3, 4}
+    assert index.find("AMZN SHELL OI") == {2}
+    assert index.find("") == set()
+
+
+def test_aho_corasick_key_under_several_literals() -> None:
+    """A key registered under alternative literals is found by either one."""
+    index = AhoCorasick([("WALMART", "w"), ("WAL-MART", "w"), ("TARGET", "t")])
+
+    assert index.find("WAL-MART SUPERCENTER") == {"w"}
+    assert index.find("TARGET WALMART") == {"w", "t"}
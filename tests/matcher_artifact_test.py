@@ -0,0 +1,248 @@
+"""Unit tests for the prebuilt vendor matcher artifact."""
+
+import gc
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, create_engine, insert, update
+
+from ledgerbase import create_app, db
+from ledgerbase.classification_cache import (
+    CachedClassifier,
+    bump_dictionary_version,
+    dictionary_version,
+    shared_classifier,
+)
+from ledgerbase.config import Config
+from ledgerbase.matcher_artifact import (
+    MAGIC,
+    ArtifactError,
+    artifact_path,
+    load_artifact,
+    load_or_build,
+    read_header,
+    write_artifact,
+)
+from ledgerbase.models import Institution, Vendor, VendorPattern
+from ledgerbase.vendor_matcher import PatternSpec, VendorMatcher
+
+
+def _seed(connection: Connection) -> None:
+    connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+    connection.execute(
+        insert(Vendor.__table__),
+        [
+            {
+                "id": 10,
+                "name": "Shell",
+                "category_tier_1": "Auto",
+                "category_tier_2": "Fuel",
+            },
+            {
+                "id": 11,
+                "name": "Netflix",
+                "category_tier_1": "Fun",
+                "category_tier_2": "Streaming",
+            },
+        ],
+    )
+    connection.execute(
+        insert(VendorPattern.__table__),
+        [
+            {
+                "id": 1,
+                "vendor_id": 10,
+                "pattern": r"SHELL\s*OIL",
+                "source_column": "raw_description",
+                "institution_id": None,
+            },
+            {
+                "id": 2,
+                "vendor_id": 11,
+                "pattern": r"NFLX|NETFLIX",
+                "source_column": "raw_description",
+                "institution_id": 1,
+            },
+        ],
+    )
+
+
+def test_artifact_round_trip_matches_like_the_original(tmp_path: Path) -> None:
+    """A loaded artifact classifies every partition like the source matcher."""
+    matcher = VendorMatcher(
+        [
+            PatternSpec(1, 10, r"SHELL\s*OIL"),
+            PatternSpec(2, 11, r"NFLX|NETFLIX", institution_id=1),
+            PatternSpec(3, 12, r"^\d+$", source_column="parsed_vendor"),
+        ],
+    )
+    path = write_artifact(matcher, "v1", tmp_path)
+
+    header, loaded = load_artifact(path)
+
+    assert path == artifact_path(tmp_path, "v1")
+    assert path.read_bytes().startswith(MAGIC)
+    assert (header.dictionary_version, header.pattern_count) == ("v1", 3)
+    assert len(loaded) == 3
+    assert loaded.match("shell oil 123").vendor_id == 10
+    assert loaded.match("NETFLIX.COM", institution_id=1).vendor_id == 11
+    assert loaded.match("NETFLIX.COM") is None
+    assert loaded.match("1234", "parsed_vendor").vendor_id == 12
+
+
+def test_incompatible_or_corrupt_artifacts_are_rejected(tmp_path: Path) -> None:
+    """Timeout mismatches and foreign files raise ArtifactError."""
+    path = write_artifact(VendorMatcher([PatternSpec(1, 10, "SHELL")]), "v1", tmp_path)
+    bogus = tmp_path / "bogus.bin"
+    bogus.write_bytes(b"not an artifact")
+
+    with pytest.raises(ArtifactError, match="Incompatible"):
+        load_artifact(path, timeout=0.5)
+    with pytest.raises(ArtifactError, match="Not a vendor matcher"):
+        read_header(bogus)
+    with pytest.raises(ArtifactError):
+        load_artifact(tmp_path / "missing.bin")
+
+
+def test_load_or_build_rebuilds_only_on_version_change(tmp_path: Path) -> None:
+    """An unchanged dictionary reuses the file; a change adds the next one."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        first_version = dictionary_version(connection)
+        load_or_build(connection, tmp_path, first_version)
+        first = artifact_path(tmp_path, first_version)
+        built_at = first.stat().st_mtime_ns
+
+        reused = load_or_build(connection, tmp_path, first_version)
+        reused_at = first.stat().st_mtime_ns
+
+        connection.execute(
+            update(VendorPattern.__table__)
+            .where(VendorPattern.__table__.c.id == 1)
+            .values(pattern=r"SHELL\s*SERVICE"),
+        )
+        bump_dictionary_version(connection)
+        second_version = dictionary_version(connection)
+        rebuilt = load_or_build(connection, tmp_path, second_version)
+        kept = {path.name for path in tmp_path.iterdir()}
+        # Oldest by modification time, even on coarse file system clocks.
+        os.utime(first, ns=(built_at - 10**9, built_at - 10**9))
+
+        connection.execute(
+            update(VendorPattern.__table__)
+            .where(VendorPattern.__table__.c.id == 1)
+            .values(pattern=r"SHELL\s*STATION"),
+        )
+        bump_dictionary_version(connection)
+        third_version = dictionary_version(connection)
+        load_or_build(connection, tmp_path, third_version)
+
+    assert reused_at == built_at
+    assert reused.match("SHELL OIL").vendor_id == 10
+    assert rebuilt.match("SHELL OIL") is None
+    assert rebuilt.match("SHELL SERVICE").vendor_id == 10
+    assert kept == {first.name, artifact_path(tmp_path, second_version).name}
+    assert {path.name for path in tmp_path.iterdir()} == {
+        artifact_path(tmp_path, second_version).name,
+        artifact_path(tmp_path, third_version).name,
+    }
+
+
+def test_cached_classifier_refreshes_from_artifacts(tmp_path: Path) -> None:
+    """A classifier with an artifact directory reloads from it on refresh."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        classifier = CachedClassifier.from_connection(
+            connection,
+            artifact_dir=tmp_path,
+        )
+        before = classifier.classify("NFLX.COM", institution_id=1)
+        connection.execute(
+            insert(VendorPattern.__table__).values(
+                id=3,
+                vendor_id=10,
+                pattern=r"SHELL\s*SERVICE",
+                source_column="raw_description",
+            ),
+        )
+        bump_dictionary_version(connection)
+        refreshed = classifier.refresh(connection)
+
+    assert before.vendor_id == 11
+    assert refreshed
+    assert artifact_path(tmp_path, classifier.version).exists()
+    assert classifier.classify("SHELL SERVICE 12").vendor_id == 10
+
+
+def test_app_preloads_shared_classifier(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """With MATCHER_ARTIFACT_DIR the app loads one classifier from the artifact."""
+    database = tmp_path / "artifact.db"
+    engine = create_engine(f"sqlite:///{database}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        version = dictionary_version(connection)
+    engine.dispose()
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{database}")
+    monkeypatch.setenv("MATCHER_ARTIFACT_DIR", str(tmp_path / "matchers"))
+
+    try:
+        app = create_app()
+    finally:
+        gc.unfreeze()
+    with app.app_context():
+        classifier = shared_classifier()
+
+    assert classifier is not None
+    assert classifier.version == version
+    assert classifier.artifact_dir == str(tmp_path / "matchers")
+    assert artifact_path(tmp_path / "matchers", version).exists()
+    assert classifier.classify("SHELL OIL 57444").vendor_id == 10
+    assert shared_classifier() is None
+
+
+def test_app_loads_artifact_built_with_the_configured_timeout(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """build-artifact and the app share MATCHER_TIMEOUT, so nothing is rebuilt."""
+    pytest.importorskip("regex")
+    database = tmp_path / "artifact.db"
+    engine = create_engine(f"sqlite:///{database}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        version = dictionary_version(connection)
+    engine.dispose()
+    directory = tmp_path / "matchers"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{database}")
+    monkeypatch.setattr(Config, "MATCHER_TIMEOUT", 0.5)
+
+    try:
+        result = (
+            create_app()
+            .test_cli_runner()
+            .invoke(
+                args=["patterns", "build-artifact", "--directory", str(directory)],
+            )
+        )
+        built_at = artifact_path(directory, version).stat().st_mtime_ns
+        monkeypatch.setenv("MATCHER_ARTIFACT_DIR", str(directory))
+        app = create_app()
+    finally:
+        gc.unfreeze()
+    with app.app_context():
+        classifier = shared_classifier()
+
+    assert result.exit_code == 0, result.output
+    assert artifact_path(directory, version).stat().st_mtime_ns == built_at
+    assert classifier.matcher.timeout == 0.5
+    assert read_header(artifact_path(directory, version)).timeout == 0.5
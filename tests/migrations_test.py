@@ -0,0 +1,144 @@
+"""Unit tests for the SQL migration runner."""
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from ledgerbase import db
+from ledgerbase.migrations import (
+    Migration,
+    apply_migrations,
+    discover_migrations,
+    pending_migrations,
+)
+from ledgerbase.models import Transaction
+
+HOT_PATH_INDEXES = {
+    "transactions_normalized_account_date_idx",
+    "transactions_normalized_category_date_idx",
+    "transactions_normalized_unmatched_idx",
+}
+
+
+def test_concurrent_statements_are_adapted_for_sqlite() -> None:
+    """CONCURRENTLY is stripped on SQLite and comments are dropped."""
+    migration = Migration(
+        1,
+        "indexes",
+        "-- migrate: no-transaction\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS a_idx ON t (a);\n"
+        "-- second\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS b_idx\n    ON t (b);\n",
+    )
+
+    assert not migration.transactional
+    assert migration.statements("sqlite") == [
+        "CREATE INDEX IF NOT EXISTS a_idx ON t (a)",
+        "CREATE INDEX IF NOT EXISTS b_idx\n    ON t (b)",
+    ]
+    assert migration.statements("postgresql")[0].startswith(
+        "CREATE INDEX CONCURRENTLY",
+    )
+
+
+def test_trigger_bodies_stay_in_one_statement() -> None:
+    """Semicolons inside a trigger's BEGIN ... END do not split it."""
+    migration = Migration(
+        1,
+        "trigger",
+        "CREATE TRIGGER t_insert AFTER INSERT ON t BEGIN\n"
+        "    INSERT INTO u VALUES (new.id);\n"
+        "    INSERT INTO v VALUES (new.id);\n"
+        "END;\n"
+        "INSERT INTO w VALUES (1);\n",
+    )
+
+    assert migration.statements("sqlite") == [
+        (
+            "CREATE TRIGGER t_insert AFTER INSERT ON t BEGIN\n"
+            "    INSERT INTO u VALUES (new.id);\n"
+            "    INSERT INTO v VALUES (new.id);\n"
+            "END"
+        ),
+        "INSERT INTO w VALUES (1)",
+    ]
+
+
+def test_migrations_apply_once_in_order(tmp_path: Path) -> None:
+    """Pending files run in version order and are recorded."""
+    (tmp_path / "0002_add_column.sql").write_text(
+        "ALTER TABLE widgets ADD COLUMN size INTEGER;\n",
+    )
+    (tmp_path / "0001_create.sql").write_text(
+        "CREATE TABLE widgets (id INTEGER PRIMARY KEY);\n",
+    )
+    (tmp_path / "notes.txt").write_text("ignored")
+    engine = create_engine("sqlite://")
+
+    applied = apply_migrations(engine, tmp_path)
+
+    assert [migration.version for migration in applied] == [1, 2]
+    assert apply_migrations(engine, tmp_path) == []
+    assert pending_migrations(engine, tmp_path) == []
+    assert {column["name"] for column in inspect(engine).get_columns("widgets")} == {
+        "id",
+        "size",
+    }
+
+
+def test_failed_migration_is_rolled_back_and_stays_pending(tmp_path: Path) -> None:
+    """A failing migration undoes its changes and is retried next time."""
+    (tmp_path / "0001_create.sql").write_text(
+        "CREATE TABLE widgets (id INTEGER PRIMARY KEY);\n",
+    )
+    (tmp_path / "0002_seed.sql").write_text(
+        "INSERT INTO widgets (id) VALUES (1);\nSELECT * FROM missing;\n",
+    )
+    engine = create_engine("sqlite://")
+
+    with pytest.raises(Exception, match="missing"):
+        apply_migrations(engine, tmp_path)
+
+    with engine.connect() as connection:
+        count = connection.execute(text("SELECT COUNT(*) FROM widgets")).scalar()
+    assert count == 0
+    assert [
+        migration.version for migration in pending_migrations(engine, tmp_path)
+    ] == [2]
+
+
+def test_duplicate_versions_are_rejected(tmp_path: Path) -> None:
+    """Two files with the same number are a configuration error."""
+    (tmp_path / "0001_a.sql").write_text("SELECT 1;")
+    (tmp_path / "0001_b.sql").write_text("SELECT 1;")
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        discover_migrations(tmp_path)
+
+
+def test_hot_path_migration_adds_indexes_to_existing_database() -> None:
+    """The shipped migration creates the indexes, including the partial one."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for name in HOT_PATH_INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+
+    apply_migrations(engine)
+
+    with engine.connect() as connection:
+        indexes = dict(
+            connection.execute(
+                text("SELECT name, sql FROM sqlite_master WHERE type = 'index'"),
+            ).all(),
+        )
+        plan = connection.execute(
+            text(
+                f"EXPLAIN QUERY PLAN SELECT id FROM {Transaction.__tablename__}"
+                " WHERE vendor_id IS NULL ORDER BY id",
+            ),
+        ).all()
+    assert indexes.keys() >= HOT_PATH_INDEXES
+    assert "WHERE vendor_id IS NULL" in indexes["transactions_normalized_unmatched_idx"]
+    assert "transactions_normalized_unmatched_idx" in str(plan)
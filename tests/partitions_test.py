@@ -0,0 +1,81 @@
+"""Unit tests for monthly transaction partition helpers."""
+
+import datetime as dt
+
+from sqlalchemy import create_engine, inspect, text
+
+from ledgerbase import db
+from ledgerbase.migrations import apply_migrations, discover_migrations
+from ledgerbase.models import Transaction
+from ledgerbase.partitions import (
+    add_months,
+    ensure_partitions,
+    list_partitions,
+    partition_name,
+    scanned_partitions,
+)
+
+
+def test_partition_names_and_month_arithmetic() -> None:
+    """Names follow the SQL function's y<YYYY>m<MM> scheme across years."""
+    assert partition_name(dt.date(2026, 10, 19)) == "transaction_facts_y2026m10"
+    assert add_months(dt.date(2026, 11, 30), 3) == dt.date(2027, 2, 1)
+    assert add_months(dt.date(2026, 1, 15), -1) == dt.date(2025, 12, 1)
+
+
+def test_partition_migration_keeps_plpgsql_bodies_whole() -> None:
+    """Dollar-quoted function and DO bodies are single statements."""
+    migration = next(
+        migration
+        for migration in discover_migrations()
+        if migration.name == "partition_transactions_by_month"
+    )
+
+    statements = migration.statements("postgresql")
+
+    assert migration.dialect == "postgresql"
+    assert [statement.split()[0] for statement in statements] == ["CREATE", "DO"]
+    assert all(statement.endswith("$$") for statement in statements)
+    assert migration.statements("sqlite") == []
+
+
+def test_unpartitioned_databases_are_left_alone() -> None:
+    """On SQLite the migration is recorded and the helpers are no-ops."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+
+    applied = apply_migrations(engine)
+
+    with engine.connect() as connection:
+        versions = connection.execute(
+            text("SELECT version FROM schema_migrations ORDER BY version"),
+        ).scalars()
+        assert [migration.version for migration in applied] == list(versions)
+        assert inspect(connection).has_table(Transaction.__tablename__)
+        assert ensure_partitions(connection) == []
+        assert list_partitions(connection) == []
+        assert (
+            scanned_partitions(connection, dt.date(2026, 1, 1), dt.date(2026, 2, 1))
+            == []
+        )
+
+
+def test_compact_storage_migration_partitions_the_facts_table() -> None:
+    """After 0006 the SQL function creates partitions partition_name() expects."""
+    migration = next(
+        migration
+        for migration in discover_migrations()
+        if migration.name == "compact_transaction_storage"
+    )
+
+    statements = migration.statements("postgresql")
+    ensure = next(
+        statement
+        for statement in statements
+        if statement.startswith("CREATE OR REPLACE FUNCTION ensure_transaction")
+    )
+
+    assert migration.dialect == "postgresql"
+    assert "'transaction_facts_' || to_char" in ensure
+    assert partition_name(dt.date(2026, 1, 1)).startswith("transaction_facts_")
+    assert statements[-1].startswith("CREATE TRIGGER transactions_normalized_write")
@@ -0,0 +1,190 @@
+"""Unit tests for the time-bounded pattern preview engine."""
+
+import datetime
+import multiprocessing
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, insert
+
+from ledgerbase import create_app, db
+from ledgerbase.models import Account, Institution, Transaction, Vendor
+from ledgerbase.pattern_preview import PreviewPool, preview_pattern
+
+DESCRIPTIONS = [
+    ("SHELL OIL 57444", 1),
+    ("SHELL  OIL 12201", 1),
+    ("SHELL OIL 99812", 2),
+    ("SHELL OIL 31337", None),
+    ("NETFLIX.COM", 3),
+    ("STARBUCKS 1234", None),
+]
+
+
+def _seed(connection: Connection, copies: int = 1) -> None:
+    connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+    connection.execute(
+        insert(Account.__table__).values(
+            id=1,
+            institution_id=1,
+            name="Card",
+            type="credit",
+        ),
+    )
+    connection.execute(
+        insert(Vendor.__table__),
+        [
+            {
+                "id": vendor_id,
+                "name": f"Vendor {vendor_id}",
+                "category_tier_1": "Misc",
+                "category_tier_2": "Misc",
+            }
+            for vendor_id in (1, 2, 3)
+        ],
+    )
+    connection.execute(
+        insert(Transaction.__table__),
+        [
+            {
+                "account_id": 1,
+                "vendor_id": vendor_id,
+                "raw_description": description,
+                "amount": Decimal("-1.00"),
+                "transaction_date": datetime.date(2026, 3, 1),
+                "transaction_type": "expense",
+            }
+            for _ in range(copies)
+            for description, vendor_id in DESCRIPTIONS
+        ],
+    )
+
+
+def _engine(copies: int = 1) -> Engine:
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection, copies)
+    return engine
+
+
+def test_full_scan_counts_matches_and_stolen_rows() -> None:
+    """A completed preview reports exact matches and rows owned elsewhere."""
+    with _engine().connect() as connection:
+        result = preview_pattern(
+            connection,
+            r"shell\s+oil",
+            vendor_id=1,
+            chunk_size=2,
+            workers=1,
+        )
+
+    assert result.complete
+    assert not result.timed_out
+    assert (result.matches_found, result.estimated_total) == (4, 4)
+    assert result.stolen_from == {2: 1}
+    assert sorted(sample.transaction_id for sample in result.samples) == [1, 2, 3, 4]
+
+
+def test_parallel_scan_matches_in_process_scan() -> None:
+    """Chunks scanned by pooled worker processes produce the same totals."""
+    pool = PreviewPool(2)
+    try:
+        with _engine(copies=20).connect() as connection:
+            result = preview_pattern(
+                connection,
+                r"SHELL\s+OIL",
+                chunk_size=7,
+                sample_size=3,
+                pool=pool,
+            )
+            again = preview_pattern(connection, "NETFLIX", chunk_size=7, pool=pool)
+    finally:
+        pool.close()
+
+    assert result.complete
+    assert result.matches_found == 80
+    assert result.stolen_from == {1: 40, 2: 20}
+    assert len(result.samples) == 3
+    assert again.matches_found == 20
+
+
+def test_overrunning_workers_are_killed_and_replaced() -> None:
+    """A chunk still running after the deadline does not outlive the preview."""
+    engine = _engine()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Transaction.__table__).values(
+                account_id=1,
+                raw_description="A" * 40 + "!",
+                amount=Decimal("-1.00"),
+                transaction_date=datetime.date(2026, 3, 2),
+                transaction_type="expense",
+            ),
+        )
+    pool = PreviewPool(1)
+    try:
+        with engine.connect() as connection:
+            stuck = preview_pattern(connection, r"(A+)+$", time_budget=0.2, pool=pool)
+            alive = multiprocessing.active_children()
+            after = preview_pattern(connection, "NETFLIX", pool=pool)
+    finally:
+        pool.close()
+
+    assert stuck.timed_out
+    assert alive == []
+    assert after.complete
+    assert after.matches_found == 1
+
+
+def test_exhausted_budget_returns_partial_result() -> None:
+    """With no time left the preview stops early and flags the result."""
+    with _engine(copies=5).connect() as connection:
+        result = preview_pattern(connection, "SHELL", time_budget=0, workers=1)
+
+    assert result.timed_out
+    assert not result.complete
+    assert result.rows_scanned == 0
+    assert result.as_dict()["estimated_total"] == 0
+
+
+def test_estimate_extrapolates_from_scanned_rows() -> None:
+    """A partial scan scales its match count to the whole table."""
+    with _engine(copies=10).connect() as connection:
+        result = preview_pattern(connection, "SHELL", chunk_size=6, workers=1)
+    result.rows_scanned, result.matches_found = 30, 20
+
+    assert result.estimated_total == 40
+
+
+def test_admin_route_previews_and_rejects_bad_patterns(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The admin endpoint returns JSON previews and 422 for invalid input."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'preview.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            _seed(connection)
+    client = app.test_client()
+    headers = {"Accept": "application/json"}
+
+    ok = client.post(
+        "/admin/patterns/preview",
+        json={"pattern": "NETFLIX", "time_budget": 5},
+        headers=headers,
+    )
+    bad = client.post(
+        "/admin/patterns/preview",
+        json={"pattern": "SHELL("},
+        headers=headers,
+    )
+
+    assert ok.status_code == 200
+    assert ok.get_json()["matches_found"] == 1
+    assert ok.get_json()["stolen_from"] == {"3": 1}
+    assert bad.status_code == 422
+    assert "pattern" in bad.get_json()["errors"]
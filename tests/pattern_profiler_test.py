@@ -0,0 +1,109 @@
+"""Unit tests for pattern profiling and the backtracking guard."""
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from ledgerbase import db
+from ledgerbase.models import Vendor
+from ledgerbase.pattern_profiler import (
+    UnsafePatternError,
+    adversarial_inputs,
+    fuzz_pattern,
+    guard_pattern,
+    has_risky_structure,
+    profile_patterns,
+)
+from ledgerbase.reclassify import approve_pattern
+from ledgerbase.vendor_matcher import PatternSpec, VendorMatcher
+
+
+def test_only_nested_or_chained_quantifiers_are_risky() -> None:
+    """Simple patterns skip fuzzing; nested and chained repeats do not."""
+    assert not has_risky_structure(r"SHELL\s+OIL")
+    assert not has_risky_structure(r"^CHECKCARD \d{4} (?:AMZN|AMAZON)")
+    assert has_risky_structure(r"(a|aa)+$")
+    assert has_risky_structure(r"\s*\d+\s*$")
+
+
+def test_adversarial_inputs_repeat_pattern_units() -> None:
+    """Inputs repeat the pattern's literals and classes, then fail to match."""
+    inputs = adversarial_inputs(r"STORE(\d+ )*#", 6)
+
+    assert "STORESTORE\x00" not in inputs
+    assert "STORES\x00" in inputs
+    assert "STORE000000\x00" in inputs
+
+
+def test_fuzzing_flags_polynomial_growth() -> None:
+    """A quadratic pattern is flagged but stays within the budget."""
+    result = fuzz_pattern(r"\s*\d+\s*$", time_budget=1.0)
+
+    assert result.safe
+    assert result.superlinear
+
+
+def test_guard_rejects_catastrophic_pattern() -> None:
+    """Exponential backtracking overruns the budget and is rejected."""
+    result = guard_pattern(r"(a|aa)+$", time_budget=0.05)
+
+    assert not result.safe
+    assert result.fuzzed
+
+
+def test_guard_accepts_linear_pattern_with_repeats() -> None:
+    """Chained repeats that do not backtrack pass the fuzzing."""
+    result = guard_pattern(r"AMAZON\s*MKTP\s*\d+")
+
+    assert (result.safe, result.superlinear, result.fuzzed) == (True, False, True)
+
+
+def test_profile_counts_matches_and_flags_superlinear_patterns() -> None:
+    """Each pattern is run over the corpus; fuzzing flags polynomial growth."""
+    specs = [PatternSpec(1, 10, r"SHELL"), PatternSpec(2, 20, r"\s*\d+\s*$")]
+    corpus = ["SHELL OIL 123", "KROGER #412", "SHELL 99"]
+
+    profiles = profile_patterns(specs, corpus)
+    fuzzed = profile_patterns(specs, corpus, fuzz=True, time_budget=1.0)
+
+    assert {
+        profile.pattern_id: (profile.evaluations, profile.matches)
+        for profile in profiles
+    } == {1: (3, 2), 2: (3, 3)}
+    assert [profile.total_seconds for profile in profiles] == sorted(
+        (profile.total_seconds for profile in profiles),
+        reverse=True,
+    )
+    assert {profile.superlinear for profile in profiles} == {None}
+    assert {profile.pattern_id: profile.superlinear for profile in fuzzed} == {
+        1: False,
+        2: True,
+    }
+
+
+def test_approval_rejects_unsafe_pattern() -> None:
+    """Approving a pattern that fails the guard raises before writing."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Vendor.__table__).values(
+                id=1,
+                name="Shell",
+                category_tier_1="Auto",
+                category_tier_2="Fuel",
+            ),
+        )
+        with pytest.raises(UnsafePatternError):
+            approve_pattern(connection, 1, r"\d+\d+\d+\d+X")
+
+
+def test_matcher_timeout_treats_runaway_search_as_no_match() -> None:
+    """With a timeout the regex engine abandons a catastrophic search."""
+    pytest.importorskip("regex")
+    matcher = VendorMatcher(
+        [PatternSpec(1, 10, r"(a|aa)+$"), PatternSpec(2, 20, r"SHELL")],
+        timeout=0.05,
+    )
+
+    assert matcher.match("a" * 60 + "!") is None
+    assert matcher.match("SHELL OIL").vendor_id == 20
@@ -0,0 +1,90 @@
+"""Unit tests for connection pool settings and metrics."""
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from ledgerbase import create_app, db
+from ledgerbase.config import Config
+from ledgerbase.pool_metrics import (
+    InstrumentedQueuePool,
+    pool_snapshot,
+    render_prometheus,
+)
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    """File SQLite engine with a one-connection instrumented pool."""
+    return create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+
+def test_engine_options_follow_the_database() -> None:
+    """Queue pool settings apply to server and file databases only."""
+    server = Config.engine_options("postgresql://user@localhost/ledgerbase")
+    memory = Config.engine_options("sqlite://")
+
+    assert server["pool_size"] == Config.DB_POOL_SIZE
+    assert server["max_overflow"] == Config.DB_MAX_OVERFLOW
+    assert server["pool_recycle"] == Config.DB_POOL_RECYCLE
+    assert server["pool_pre_ping"] is Config.DB_POOL_PRE_PING
+    assert "pool_size" in Config.engine_options("sqlite:///ledgerbase.db")
+    assert memory == {
+        "pool_pre_ping": Config.DB_POOL_PRE_PING,
+        "query_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def test_snapshot_tracks_checkouts_and_timeouts(engine: Engine) -> None:
+    """An exhausted pool reports the checked-out connection and the timeout."""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        busy = pool_snapshot(engine.pool)
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    idle = pool_snapshot(engine.pool)
+
+    assert (busy.size, busy.checked_out, busy.checkouts) == (1, 1, 1)
+    assert (idle.checked_in, idle.checked_out, idle.timeouts) == (1, 0, 1)
+    assert idle.max_wait_seconds >= 0.05
+    assert idle.wait_seconds >= idle.max_wait_seconds
+
+
+def test_invalidated_connections_are_counted(engine: Engine) -> None:
+    """Connections discarded as broken show up in the invalidation counter."""
+    with engine.connect() as connection:
+        connection.invalidate()
+
+    assert pool_snapshot(engine.pool).invalidations == 1
+
+
+def test_metrics_endpoint_renders_prometheus_text(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """GET /metrics reports the default bind's instrumented pool."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        with db.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        expected = render_prometheus(db.engines)
+
+    response = client.get("/metrics")
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert body == expected
+    assert "# TYPE ledgerbase_db_pool_checkouts_total counter" in body
+    assert 'ledgerbase_db_pool_checkouts_total{bind="default"} 1' in body
+    assert f'ledgerbase_db_pool_size{{bind="default"}} {Config.DB_POOL_SIZE}' in body
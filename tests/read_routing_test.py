@@ -0,0 +1,148 @@
+"""Unit tests for primary/replica read routing."""
+
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from ledgerbase import create_app
+from ledgerbase.read_routing import (
+    CONSISTENCY_HEADER,
+    ReadRouter,
+    read_engine,
+    use_primary,
+)
+
+
+def _database(path: Path, role: str) -> Engine:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE role (name TEXT)"))
+        connection.execute(text("INSERT INTO role VALUES (:name)"), {"name": role})
+    return engine
+
+
+def _role(engine: Engine) -> str:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT name FROM role")).scalar_one()
+
+
+@pytest.fixture
+def engines(tmp_path: Path) -> tuple[Engine, Engine]:
+    """A primary and a replica database file, each naming its role."""
+    return (
+        _database(tmp_path / "primary.db", "primary"),
+        _database(tmp_path / "replica.db", "replica"),
+    )
+
+
+def test_reads_go_to_the_replica_unless_overridden(
+    engines: tuple[Engine, Engine],
+) -> None:
+    """Reads use the replica; primary=True and use_primary() opt out."""
+    router = ReadRouter(*engines)
+
+    assert _role(router.engine()) == "replica"
+    assert _role(router.engine(primary=True)) == "primary"
+    with use_primary():
+        assert _role(router.engine()) == "primary"
+    assert _role(router.engine()) == "replica"
+
+
+def test_lagging_or_unreachable_replica_falls_back(
+    engines: tuple[Engine, Engine],
+) -> None:
+    """Lag above the limit or a failing probe routes reads to the primary."""
+    lag = {"seconds": 120.0}
+
+    def probe(_connection: Connection) -> float:
+        if lag["seconds"] < 0:
+            reason = "replica down"
+            raise OperationalError(None, None, Exception(reason))
+        return lag["seconds"]
+
+    router = ReadRouter(*engines, max_lag=30, check_interval=0, lag_probe=probe)
+    assert _role(router.engine()) == "primary"
+
+    lag["seconds"] = 2.0
+    assert _role(router.engine()) == "replica"
+
+    lag["seconds"] = -1
+    assert _role(router.engine()) == "primary"
+
+
+def test_lag_is_cached_between_checks(engines: tuple[Engine, Engine]) -> None:
+    """The probe runs once per check interval, not once per read."""
+    calls = []
+
+    def probe(_connection: Connection) -> float:
+        calls.append(1)
+        return 0.0
+
+    router = ReadRouter(*engines, check_interval=60, lag_probe=probe)
+    for _ in range(5):
+        router.engine()
+
+    assert len(calls) == 1
+
+
+def test_readers_do_not_wait_for_a_running_probe(
+    engines: tuple[Engine, Engine],
+) -> None:
+    """While one thread probes, other reads route by the cached result."""
+    probing, release = threading.Event(), threading.Event()
+    calls = []
+
+    def probe(_connection: Connection) -> float:
+        calls.append(1)
+        if len(calls) > 1:
+            probing.set()
+            release.wait(timeout=5)
+        return 0.0
+
+    router = ReadRouter(*engines, check_interval=0, lag_probe=probe)
+    assert router.replica_healthy()
+    worker = threading.Thread(target=router.replica_healthy)
+    worker.start()
+    try:
+        assert probing.wait(timeout=5)
+        assert _role(router.engine()) == "replica"
+        assert len(calls) == 2
+    finally:
+        release.set()
+        worker.join()
+
+
+def test_app_routes_requests_by_header(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """create_app binds DATABASE_REPLICA_URL; the header forces the primary."""
+    _database(tmp_path / "primary.db", "primary")
+    _database(tmp_path / "replica.db", "replica")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setenv("DATABASE_REPLICA_URL", f"sqlite:///{tmp_path / 'replica.db'}")
+    app = create_app()
+
+    with app.test_request_context("/"):
+        assert _role(read_engine()) == "replica"
+    with app.test_request_context("/", headers={CONSISTENCY_HEADER: "primary"}):
+        assert _role(read_engine()) == "primary"
+    metrics = app.test_client().get("/metrics").get_data(as_text=True)
+    assert 'ledgerbase_db_pool_size{bind="replica"}' in metrics
+
+
+def test_without_a_replica_reads_use_the_primary(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """No DATABASE_REPLICA_URL means every read goes to the primary."""
+    _database(tmp_path / "primary.db", "primary")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.delenv("DATABASE_REPLICA_URL", raising=False)
+    app = create_app()
+
+    with app.app_context():
+        assert _role(read_engine()) == "primary"
@@ -0,0 +1,161 @@
+"""Unit tests for incremental reclassification on pattern approval."""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Engine, create_engine, event, insert, select
+
+from ledgerbase import db
+from ledgerbase.classification_cache import dictionary_version
+from ledgerbase.models import Account, Institution, Transaction, Vendor
+from ledgerbase.reclassify import (
+    approve_pattern,
+    find_candidate_ids,
+    update_pattern,
+)
+from ledgerbase.trigram_index import TRIGRAM_TABLE
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """SQLite database with two vendors and a handful of transactions."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__).values(
+                id=1,
+                institution_id=1,
+                name="Checking",
+                type="depository",
+            ),
+        )
+        connection.execute(
+            insert(Vendor.__table__),
+            [
+                {
+                    "id": 1,
+                    "name": "Shell",
+                    "category_tier_1": "Auto",
+                    "category_tier_2": "Fuel",
+                },
+                {
+                    "id": 2,
+                    "name": "Kroger",
+                    "category_tier_1": "Food",
+                    "category_tier_2": "Groceries",
+                },
+            ],
+        )
+        descriptions = [
+            ("SHELL OIL 5551234", False),
+            ("shell  oil #88", False),
+            ("SHELL OIL MANUAL", True),
+            ("KROGER #412", False),
+            ("SEASHELLS GIFT SHOP", False),
+        ]
+        connection.execute(
+            insert(Transaction.__table__),
+            [
+                {
+                    "id": row_id,
+                    "account_id": 1,
+                    "raw_description": description,
+                    "amount": Decimal("-10.00"),
+                    "transaction_date": datetime.date(2026, 1, row_id),
+                    "transaction_type": "expense",
+                    "manually_edited": edited,
+                }
+                for row_id, (description, edited) in enumerate(descriptions, 1)
+            ],
+        )
+    return engine
+
+
+def _vendors(engine: Engine) -> dict[int, tuple]:
+    table = Transaction.__table__
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(table.c.id, table.c.vendor_id, table.c.category_tier_2),
+        )
+        return {row.id: (row.vendor_id, row.category_tier_2) for row in rows}
+
+
+def test_literals_narrow_candidates_to_rows_containing_them(engine: Engine) -> None:
+    """Only unedited rows containing the pattern's literal are candidates."""
+    with engine.connect() as connection:
+        ids, full_scan = find_candidate_ids(connection, r"SHELL\s+OIL")
+
+    assert (ids, full_scan) == ([1, 2, 5], False)
+
+
+def test_sqlite_candidates_come_from_the_trigram_index(engine: Engine) -> None:
+    """On SQLite the literals are matched against the FTS5 trigram index."""
+    statements: list[str] = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    with engine.connect() as connection:
+        ids, _ = find_candidate_ids(connection, r"SHELL\s+OIL")
+
+    assert ids == [1, 2, 5]
+    assert any(f"{TRIGRAM_TABLE} MATCH" in statement for statement in statements)
+
+
+def test_patterns_without_literal_fall_back_to_full_scan(engine: Engine) -> None:
+    """A pattern with no usable literal rechecks every unedited row."""
+    with engine.connect() as connection:
+        ids, full_scan = find_candidate_ids(connection, r"\d{3,}")
+
+    assert (ids, full_scan) == ([1, 2, 4, 5], True)
+
+
+def test_approve_pattern_updates_unedited_matches(engine: Engine) -> None:
+    """Approval assigns vendor and categories, leaving edited rows alone."""
+    with engine.begin() as connection:
+        result = approve_pattern(connection, 1, r"SHELL\s+OIL")
+
+    assert (result.candidates, result.updated, result.full_scan) == (3, 2, False)
+    assert _vendors(engine) == {
+        1: (1, "Fuel"),
+        2: (1, "Fuel"),
+        3: (None, None),
+        4: (None, None),
+        5: (None, None),
+    }
+
+
+def test_editing_a_pattern_releases_rows_it_no_longer_matches(
+    engine: Engine,
+) -> None:
+    """Rows of the pattern's vendor are rechecked after an edit."""
+    with engine.begin() as connection:
+        result = approve_pattern(connection, 1, r"SHELL")
+        assert result.updated == 3
+        approved = dictionary_version(connection)
+
+        result = update_pattern(connection, result.pattern_id, r"SHELL OIL \d+")
+        edited = dictionary_version(connection)
+
+    assert (approved, edited) == ("1", "2")
+    assert result.updated == 2
+    assert _vendors(engine)[1] == (1, "Fuel")
+    assert _vendors(engine)[2] == (None, None)
+    assert _vendors(engine)[5] == (None, None)
+
+
+def test_institution_pattern_skips_other_institutions(engine: Engine) -> None:
+    """A pattern scoped to another institution does not match these rows."""
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=2, name="Other"))
+        result = approve_pattern(connection, 2, r"KROGER", institution_id=2)
+        assert result.updated == 0
+
+        result = approve_pattern(connection, 1, r"SHELL", institution_id=1)
+
+    assert result.updated == 3
+    assert _vendors(engine)[4] == (None, None)
@@ -0,0 +1,157 @@
+"""Unit tests for the delta-maintained monthly rollups."""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Engine, create_engine, insert, select, update
+
+from ledgerbase import db
+from ledgerbase.description_clusters import approve_cluster, cluster_unmatched
+from ledgerbase.models import Account, Institution, MonthlyRollup, Transaction, Vendor
+from ledgerbase.reclassify import approve_pattern
+from ledgerbase.rollups import (
+    RollupDeltas,
+    check_rollups,
+    rebuild_rollups,
+    record_transactions,
+)
+
+ROWS = [
+    ("SHELL OIL 57444", "-40.00", datetime.date(2026, 1, 3)),
+    ("SHELL OIL 12201", "-35.50", datetime.date(2026, 1, 17)),
+    ("SHELL OIL 99120", "-20.00", datetime.date(2026, 2, 2)),
+    ("PAYROLL ACME", "2500.00", datetime.date(2026, 1, 31)),
+]
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """SQLite database with uncategorized transactions and their rollups."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    rows = [
+        {
+            "id": row_id,
+            "account_id": 1,
+            "raw_description": description,
+            "amount": Decimal(amount),
+            "transaction_date": day,
+            "transaction_type": "income" if amount[0] != "-" else "expense",
+            "category_tier_1": None,
+            "category_tier_2": None,
+        }
+        for row_id, (description, amount, day) in enumerate(ROWS, start=1)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__).values(
+                id=1,
+                institution_id=1,
+                name="Checking",
+                type="depository",
+            ),
+        )
+        connection.execute(
+            insert(Vendor.__table__).values(
+                id=1,
+                name="Shell",
+                category_tier_1="Auto",
+                category_tier_2="Fuel",
+            ),
+        )
+        connection.execute(insert(Transaction.__table__), rows)
+        record_transactions(connection, rows)
+    return engine
+
+
+def _rollups(engine: Engine) -> dict[tuple, tuple]:
+    table = MonthlyRollup.__table__
+    with engine.connect() as connection:
+        rows = connection.execute(select(table))
+        return {
+            (row.month.month, row.transaction_type, row.category_tier_2): (
+                row.total_amount,
+                row.transaction_count,
+            )
+            for row in rows
+        }
+
+
+def test_recorded_inserts_match_a_full_aggregate(engine: Engine) -> None:
+    """Loader deltas produce the same rows a GROUP BY would."""
+    assert _rollups(engine) == {
+        (1, "expense", ""): (Decimal("-75.50"), 2),
+        (1, "income", ""): (Decimal("2500.00"), 1),
+        (2, "expense", ""): (Decimal("-20.00"), 1),
+    }
+    with engine.connect() as connection:
+        assert check_rollups(connection) == []
+
+
+def test_reclassification_moves_totals_between_categories(engine: Engine) -> None:
+    """Approving a pattern moves the matched rows out of uncategorized."""
+    with engine.begin() as connection:
+        approve_pattern(connection, vendor_id=1, pattern=r"SHELL\s*OIL")
+        mismatches = check_rollups(connection)
+
+    assert mismatches == []
+    assert _rollups(engine) == {
+        (1, "expense", "Fuel"): (Decimal("-75.50"), 2),
+        (1, "income", ""): (Decimal("2500.00"), 1),
+        (2, "expense", "Fuel"): (Decimal("-20.00"), 1),
+    }
+
+
+def test_cluster_approval_updates_rollups(engine: Engine) -> None:
+    """Bulk cluster approval applies the same deltas."""
+    with engine.begin() as connection:
+        cluster = next(
+            cluster
+            for cluster in cluster_unmatched(connection)
+            if len(cluster.transaction_ids) == 3  # noqa: PLR2004
+        )
+        approve_cluster(connection, cluster, vendor_id=1)
+
+        assert check_rollups(connection) == []
+
+
+def test_offsetting_deltas_remove_empty_rollups(engine: Engine) -> None:
+    """A key whose count returns to zero is deleted, not kept at zero."""
+    row = {
+        "account_id": 1,
+        "transaction_date": datetime.date(2026, 2, 2),
+        "transaction_type": "expense",
+        "category_tier_1": None,
+        "category_tier_2": None,
+        "amount": Decimal("-20.00"),
+    }
+    deltas = RollupDeltas()
+    deltas.add(row, -1)
+    deltas.add(row, -1)
+    deltas.add(row)
+
+    with engine.begin() as connection:
+        assert len(deltas) == 1
+        deltas.apply(connection)
+
+    assert (2, "expense", "") not in _rollups(engine)
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(engine: Engine) -> None:
+    """Writes that bypass the deltas are detected and fixed by a rebuild."""
+    table = Transaction.__table__
+    with engine.begin() as connection:
+        connection.execute(
+            update(table).where(table.c.id == 4).values(amount=Decimal("2600.00")),
+        )
+        mismatches = check_rollups(connection)
+        written = rebuild_rollups(connection)
+        after = check_rollups(connection)
+
+    assert [(m.stored, m.actual) for m in mismatches] == [
+        ((Decimal("2500.00"), 1), (Decimal("2600.00"), 1)),
+    ]
+    assert written == 3
+    assert after == []
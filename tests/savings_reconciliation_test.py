@@ -0,0 +1,144 @@
+"""Unit tests for reconciling savings allocations with account balances."""
+
+import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, insert
+
+from ledgerbase import create_app, db
+from ledgerbase.budget_balances import refresh_balances
+from ledgerbase.budgets import extend_budgets, set_budget
+from ledgerbase.models import (
+    Account,
+    AccountBalance,
+    Institution,
+    SavingsAccount,
+    Transaction,
+)
+from ledgerbase.rollups import record_transactions
+from ledgerbase.savings_reconciliation import reconcile_savings
+
+JAN, MAR = datetime.date(2026, 1, 1), datetime.date(2026, 3, 1)
+VACATION = ("Savings", "Vacation")
+CAR = ("Savings", "Car")
+EMERGENCY = ("Savings", "Emergency")
+
+
+def _seed(connection: Connection) -> None:
+    connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+    connection.execute(
+        insert(Account.__table__),
+        [
+            {"id": 1, "institution_id": 1, "name": "Checking", "type": "depository"},
+            {"id": 2, "institution_id": 1, "name": "High yield", "type": "savings"},
+            {"id": 3, "institution_id": 1, "name": "Reserve", "type": "savings"},
+        ],
+    )
+    # 100 + 50 a month into account 2, 200 a month into account 3.
+    set_budget(connection, JAN, VACATION, Decimal(100), rollover=True)
+    set_budget(connection, JAN, CAR, Decimal(50), rollover=True)
+    set_budget(connection, JAN, EMERGENCY, Decimal(200), rollover=True)
+    extend_budgets(connection, MAR)
+    rows = [
+        {
+            "id": 1,
+            "account_id": 1,
+            "raw_description": "AIRLINE",
+            "amount": Decimal("-120.00"),
+            "transaction_date": datetime.date(2026, 2, 14),
+            "transaction_type": "expense",
+            "category_tier_1": "Savings",
+            "category_tier_2": "Vacation",
+        },
+    ]
+    connection.execute(insert(Transaction.__table__), rows)
+    record_transactions(connection, rows)
+    connection.execute(
+        insert(SavingsAccount.__table__),
+        [
+            {"category_tier_1": tier_1, "category_tier_2": tier_2, "account_id": id_}
+            for (tier_1, tier_2), id_ in ((VACATION, 2), (CAR, 2), (EMERGENCY, 3))
+        ],
+    )
+    connection.execute(
+        insert(AccountBalance.__table__),
+        [
+            {"account_id": 2, "as_of": datetime.date(2026, 2, 28), "balance": 900},
+            {"account_id": 2, "as_of": datetime.date(2026, 3, 31), "balance": 300},
+            {"account_id": 2, "as_of": datetime.date(2026, 4, 30), "balance": 999},
+            {"account_id": 3, "as_of": datetime.date(2026, 3, 15), "balance": 650},
+        ],
+    )
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """Three months of savings budgets held in two accounts."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        refresh_balances(connection)
+    return engine
+
+
+def test_allocations_per_account_against_latest_balance(engine: Engine) -> None:
+    """Shared accounts sum their categories; the month's latest balance counts."""
+    with engine.connect() as connection:
+        high_yield, reserve = reconcile_savings(connection, MAR)
+
+    assert high_yield.categories == (
+        (CAR, Decimal("150.00")),
+        (VACATION, Decimal("180.00")),
+    )
+    assert high_yield.allocated == Decimal("330.00")
+    assert (high_yield.as_of, high_yield.balance) == (
+        datetime.date(2026, 3, 31),
+        Decimal(300),
+    )
+    assert high_yield.shortfall == Decimal("30.00")
+    assert reserve.allocated == Decimal("600.00")
+    assert reserve.shortfall == 0
+
+
+def test_account_without_balance_and_no_links(engine: Engine) -> None:
+    """An account with no reported balance is short by its whole allocation."""
+    with engine.connect() as connection:
+        _high_yield, reserve = reconcile_savings(connection, JAN)
+
+    assert (reserve.as_of, reserve.balance) == (None, None)
+    assert reserve.shortfall == Decimal("200.00")
+    empty = create_engine("sqlite://")
+    db.metadata.create_all(empty)
+    with empty.connect() as connection:
+        assert reconcile_savings(connection) == []
+
+
+def test_api_and_nightly_command(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """The route reports every account; the command exits 1 on a shortfall."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'savings.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            _seed(connection)
+
+    response = app.test_client().get(
+        "/api/savings/reconciliation?month=2026-03",
+        headers={"Accept": "application/json"},
+    )
+    result = app.test_cli_runner().invoke(
+        args=["budget", "reconcile", "--month", "2026-03"],
+    )
+
+    body = response.get_json()
+    assert [account["shortfall"] for account in body["accounts"]] == ["30.00", "0.00"]
+    assert body["shortfall"] == "30.00"
+    assert result.exit_code == 1
+    assert "High yield (2): allocated 330.00" in result.output
+    assert "1 of 2 savings accounts short" in result.output
@@ -0,0 +1,89 @@
+"""Unit tests for the tuned SQLite profile and its writer queue."""
+
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, text
+
+from ledgerbase import create_app, db
+from ledgerbase.sqlite_profile import (
+    EXTENSION_KEY,
+    SqlitePragmas,
+    WriterQueue,
+    apply_pragmas,
+    is_sqlite_file,
+    run_write,
+)
+
+
+def _pragma(engine: Engine, name: str) -> object:
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_pragmas_are_set_on_every_connection(tmp_path: Path) -> None:
+    """New connections of a tuned file database use WAL and the settings."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+    apply_pragmas(engine, SqlitePragmas(busy_timeout=1234, cache_size=-2048))
+
+    assert is_sqlite_file(engine)
+    assert not is_sqlite_file(create_engine("sqlite://"))
+    assert _pragma(engine, "journal_mode") == "wal"
+    assert _pragma(engine, "synchronous") == 1  # NORMAL
+    assert _pragma(engine, "busy_timeout") == 1234
+    assert _pragma(engine, "cache_size") == -2048
+
+
+def test_writer_queue_runs_writes_in_order_on_one_thread(tmp_path: Path) -> None:
+    """Writes commit one at a time; a failing write rolls back and re-raises."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE log (value INTEGER)"))
+    queue = WriterQueue(engine)
+    threads: set[str] = set()
+
+    def append(value: int) -> object:
+        def work(connection: Connection) -> int:
+            threads.add(threading.current_thread().name)
+            connection.execute(text("INSERT INTO log VALUES (:v)"), {"v": value})
+            return value
+
+        return work
+
+    def fail(connection: Connection) -> None:
+        connection.execute(text("INSERT INTO log VALUES (-1)"))
+        raise RuntimeError
+
+    futures = [queue.submit(append(value)) for value in range(20)]
+    assert [future.result() for future in futures] == list(range(20))
+    with pytest.raises(RuntimeError):
+        queue.run(fail)
+    queue.close()
+
+    with engine.connect() as connection:
+        values = connection.execute(text("SELECT value FROM log")).scalars()
+        assert list(values) == list(range(20))
+    assert len(threads) == 1
+    assert threads.pop().startswith("sqlite-writer")
+
+
+def test_app_on_a_sqlite_file_gets_the_profile(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """create_app tunes SQLite files and run_write uses the writer queue."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app()
+
+    with app.app_context():
+        assert isinstance(app.extensions[EXTENSION_KEY], WriterQueue)
+        assert _pragma(db.engine, "journal_mode") == "wal"
+        name = run_write(lambda _connection: threading.current_thread().name)
+        assert name.startswith("sqlite-writer")
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    app = create_app()
+    with app.app_context():
+        assert EXTENSION_KEY not in app.extensions
+        assert run_write(lambda connection: connection.scalar(text("SELECT 7"))) == 7
@@ -0,0 +1,204 @@
+"""Unit tests for the keyset-paginated transaction listing."""
+
+import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, insert, text
+
+from ledgerbase import create_app, db
+from ledgerbase.models import Account, Institution, Transaction, Vendor
+from ledgerbase.transaction_listing import (
+    TransactionFilters,
+    decode_cursor,
+    encode_cursor,
+    list_transactions,
+)
+
+DAYS = 10
+PER_DAY = 7
+
+
+def _seed(connection: Connection) -> None:
+    connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+    connection.execute(
+        insert(Account.__table__).values(
+            id=1,
+            institution_id=1,
+            name="Checking",
+            type="depository",
+        ),
+    )
+    connection.execute(
+        insert(Vendor.__table__).values(
+            id=1,
+            name="Shell",
+            category_tier_1="Auto",
+            category_tier_2="Fuel",
+        ),
+    )
+    connection.execute(
+        insert(Transaction.__table__),
+        [
+            {
+                "id": row_id,
+                "account_id": 1,
+                "vendor_id": 1 if row_id % 3 else None,
+                "raw_description": f"PURCHASE {row_id}",
+                "amount": Decimal("-1.25") * row_id,
+                "transaction_date": datetime.date(2026, 1, 1)
+                + datetime.timedelta(days=row_id % DAYS),
+                "transaction_type": "expense",
+                "category_tier_1": "Auto" if row_id % 3 else None,
+                "category_tier_2": "Fuel" if row_id % 3 else None,
+                "tag": "trip" if row_id % 4 == 0 else None,
+                "person": "alex" if row_id % 2 else "sam",
+            }
+            for row_id in range(1, DAYS * PER_DAY + 1)
+        ],
+    )
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """SQLite database with several transactions on each day."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+    return engine
+
+
+def _walk(
+    connection: Connection,
+    filters: TransactionFilters | None = None,
+    limit: int = 4,
+) -> list[int]:
+    ids: list[int] = []
+    cursor = None
+    while True:
+        page = list_transactions(connection, filters, cursor=cursor, limit=limit)
+        ids.extend(row["id"] for row in page.transactions)
+        if page.next_cursor is None:
+            return ids
+        cursor = page.next_cursor
+
+
+def _expected(connection: Connection, where: str = "1 = 1") -> list[int]:
+    return list(
+        connection.execute(
+            text(
+                f"SELECT id FROM transactions_normalized WHERE {where}"
+                " ORDER BY transaction_date DESC, id DESC",
+            ),
+        ).scalars(),
+    )
+
+
+def test_pages_cover_every_row_once_in_order(engine: Engine) -> None:
+    """Walking the cursors yields the full newest-first ordering."""
+    with engine.connect() as connection:
+        assert _walk(connection) == _expected(connection)
+        assert _walk(connection, limit=DAYS * PER_DAY) == _expected(connection)
+
+
+@pytest.mark.parametrize(
+    ("filters", "where"),
+    [
+        (TransactionFilters(unmatched=True), "vendor_id IS NULL"),
+        (TransactionFilters(vendor_id=1), "vendor_id = 1"),
+        (
+            TransactionFilters(category_tier_1="Auto", category_tier_2="Fuel"),
+            "category_tier_1 = 'Auto' AND category_tier_2 = 'Fuel'",
+        ),
+        (TransactionFilters(label="trip"), "tag = 'trip'"),
+        (
+            TransactionFilters(person="sam", unmatched=True),
+            "person = 'sam' AND vendor_id IS NULL",
+        ),
+    ],
+)
+def test_filters_apply_across_pages(
+    engine: Engine,
+    filters: TransactionFilters,
+    where: str,
+) -> None:
+    """Each filter is applied on every page, not just the first."""
+    with engine.connect() as connection:
+        expected = _expected(connection, where)
+        assert expected
+        assert _walk(connection, filters, limit=3) == expected
+
+
+def test_deep_pages_seek_through_the_index(engine: Engine) -> None:
+    """A cursor page is an index range scan, not a sort or an offset."""
+    cursor = encode_cursor(datetime.date(2026, 1, 5), 40)
+    with engine.connect() as connection:
+        page = list_transactions(connection, cursor=cursor, limit=2)
+        plan = " ".join(
+            str(row[-1])
+            for row in connection.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT id FROM transactions_normalized"
+                    " WHERE (transaction_date, id) < ('2026-01-05', 40)"
+                    " ORDER BY transaction_date DESC, id DESC LIMIT 3",
+                ),
+            )
+        )
+
+    assert [row["id"] for row in page.transactions] == [34, 24]
+    assert "transactions_normalized_date_id_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_cursors_round_trip_and_reject_garbage() -> None:
+    """Cursors decode to their key; anything else is a ValueError."""
+    day = datetime.date(2026, 3, 1)
+
+    assert decode_cursor(encode_cursor(day, 17)) == (day, 17)
+    for cursor in ("", "not-a-cursor", encode_cursor(day, 17)[:-3]):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor)
+
+
+def test_api_route_pages_and_validates(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """GET /api/transactions returns pages and 422 for a bad cursor."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'listing.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            _seed(connection)
+    client = app.test_client()
+    headers = {"Accept": "application/json"}
+
+    first = client.get("/api/transactions?limit=2&label=trip", headers=headers)
+    cursor = first.get_json()["next_cursor"]
+    second = client.get(
+        f"/api/transactions?limit=2&label=trip&cursor={cursor}",
+        headers=headers,
+    )
+    bad = client.get("/api/transactions?cursor=bogus", headers=headers)
+
+    assert first.status_code == 200
+    assert first.get_json()["transactions"][0] == {
+        "id": 68,
+        "account_id": 1,
+        "vendor_id": 1,
+        "transaction_date": "2026-01-09",
+        "amount": "-85.00",
+        "raw_description": "PURCHASE 68",
+        "normalized_description": None,
+        "transaction_type": "expense",
+        "category_tier_1": "Auto",
+        "category_tier_2": "Fuel",
+        "tag": "trip",
+        "person": "sam",
+    }
+    assert [row["id"] for row in second.get_json()["transactions"]] == [28, 8]
+    assert bad.status_code == 422
+    assert "cursor" in bad.get_json()["errors"]
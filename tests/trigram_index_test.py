@@ -0,0 +1,106 @@
+"""Unit tests for the trigram helpers."""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Engine, create_engine, delete, insert, text, update
+
+from ledgerbase import db
+from ledgerbase.migrations import apply_migrations
+from ledgerbase.models import Account, Institution, Transaction
+from ledgerbase.trigram_index import (
+    TRIGRAM_TABLE,
+    has_trigram_index,
+    trigram_candidates,
+    word_trigrams,
+)
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """SQLite database with one account and two transactions."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+        connection.execute(
+            insert(Account.__table__).values(
+                id=1,
+                institution_id=1,
+                name="Checking",
+                type="depository",
+            ),
+        )
+        connection.execute(
+            insert(Transaction.__table__),
+            [
+                {
+                    "id": row_id,
+                    "account_id": 1,
+                    "raw_description": description,
+                    "amount": Decimal("-10.00"),
+                    "transaction_date": datetime.date(2026, 1, row_id),
+                    "transaction_type": "expense",
+                }
+                for row_id, description in enumerate(
+                    ["SHELL OIL 5551234", "KROGER #412"],
+                    1,
+                )
+            ],
+        )
+    return engine
+
+
+def _candidates(engine: Engine, terms: list[list[str]]) -> list[int]:
+    query = trigram_candidates("raw_description", terms)
+    assert query is not None
+    with engine.connect() as connection:
+        return sorted(connection.scalars(query))
+
+
+def test_create_all_builds_the_index(engine: Engine) -> None:
+    """SQLite databases get the FTS5 table with the transactions table."""
+    with engine.connect() as connection:
+        assert has_trigram_index(connection)
+
+    assert _candidates(engine, [["SHELL", "OIL"]]) == [1]
+    assert _candidates(engine, [["shell"], ["KROGER"]]) == [1, 2]
+
+
+def test_triggers_keep_the_index_current(engine: Engine) -> None:
+    """Updates and deletes of transactions are reflected in the index."""
+    table = Transaction.__table__
+    with engine.begin() as connection:
+        connection.execute(
+            update(table).where(table.c.id == 2).values(raw_description="SHELL 99"),
+        )
+        connection.execute(delete(table).where(table.c.id == 1))
+
+    assert _candidates(engine, [["SHELL"]]) == [2]
+    assert _candidates(engine, [["KROGER"]]) == []
+
+
+def test_migration_indexes_existing_rows(engine: Engine) -> None:
+    """The SQLite migration rebuilds the index for rows it did not see."""
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE {TRIGRAM_TABLE}"))
+        for suffix in ("insert", "delete", "update"):
+            connection.execute(text(f"DROP TRIGGER {TRIGRAM_TABLE}_{suffix}"))
+
+    apply_migrations(engine)
+
+    assert _candidates(engine, [["OIL"]]) == [1]
+
+
+def test_short_terms_cannot_use_the_index() -> None:
+    """A group without a term of three characters or more gives no query."""
+    assert trigram_candidates("raw_description", [["SHELL"], ["AB"]]) is None
+    assert trigram_candidates("raw_description", [["AB", "OIL"]]) is not None
+    assert trigram_candidates("vendor_id", [["SHELL"]]) is None
+
+
+def test_word_trigrams_are_padded_per_word() -> None:
+    """Each word gets two leading and one trailing space, as in pg_trgm."""
+    assert word_trigrams("oil") == {"  O", " OI", "OIL", "IL "}
+    assert word_trigrams("a-b") == {"  A", " A ", "  B", " B "}
@@ -0,0 +1,187 @@
+"""Unit tests for the single-pass vendor matcher."""
+
+from sqlalchemy import create_engine, insert
+
+from ledgerbase import db
+from ledgerbase.models import Vendor, VendorPattern
+from ledgerbase.vendor_matcher import PatternSpec, VendorMatcher
+
+
+def test_match_returns_vendor_for_matching_pattern() -> None:
+    """A description matching one pattern resolves to that pattern's vendor."""
+    matcher = VendorMatcher(
+        [
+            PatternSpec(1, 10, r"STARBUCKS"),
+            PatternSpec(2, 20, r"SHELL\s+OIL"),
+        ],
+    )
+
+    match = matcher.match("POS DEBIT shell  oil 5551234")
+
+    assert match is not None
+    assert (match.vendor_id, match.pattern_id) == (20, 2)
+    assert (match.start, match.end) == (10, 20)
+    assert matcher.match("UNKNOWN MERCHANT") is None
+
+
+def test_priority_beats_position_and_length() -> None:
+    """Explicit priority wins over an earlier or more specific match."""
+    matcher = VendorMatcher(
+        [
+            PatternSpec(1, 10, r"PAYPAL \*"),
+            PatternSpec(2, 20, r"NETFLIX", priority=5),
+        ],
+    )
+
+    match = matcher.match("PAYPAL *NETFLIX.COM")
+
+    assert match is not None
+    assert match.vendor_id == 20
+
+
+def test_ties_break_on_position_then_length_then_id() -> None:
+    """Equal priorities prefer the leftmost, then longer, then lower-id pattern."""
+    matcher = VendorMatcher(
+        [
+            PatternSpec(3, 30, r"AMAZON"),
+            PatternSpec(2, 20, r"AMAZON MKTP"),
+            PatternSpec(1, 10, r"AMAZON"),
+            PatternSpec(4, 40, r"PRIME VIDEO"),
+        ],
+    )
+
+    assert matcher.match("AMAZON MKTP US").vendor_id == 20
+    assert matcher.match("AMAZON PRIME").vendor_id == 10
+    assert matcher.match("PRIME VIDEO AMAZON").vendor_id == 40
+
+
+def test_patterns_are_scoped_by_source_column() -> None:
+    """Patterns only apply to the source column they were defined for."""
+    matcher = VendorMatcher(
+        [PatternSpec(1, 10, r"ACME", source_column="parsed_vendor")],
+    )
+
+    assert matcher.match("ACME CORP") is None
+    assert matcher.match("ACME CORP", "parsed_vendor").vendor_id == 10
+    assert matcher.source_columns == ["parsed_vendor"]
+
+
+def test_institution_patterns_only_apply_to_their_institution() -> None:
+    """Institution partitions add their own patterns to the global ones."""
+    matcher = VendorMatcher(
+        [
+            PatternSpec(1, 10, r"AMAZON"),
+            PatternSpec(2, 20, r"^CHECKCARD \d{4} (?:AMZN|AMAZON)", institution_id=7),
+            PatternSpec(3, 30, r"ACH", source_column="parsed_vendor", institution_id=7),
+        ],
+    )
+
+    assert matcher.match("CHECKCARD 0412 AMZN MKTP") is None
+    assert matcher.match("CHECKCARD 0412 AMZN MKTP", institution_id=7).vendor_id == 20
+    assert matcher.match("CHECKCARD 0412 AMZN MKTP", institution_id=8) is None
+    assert matcher.match("AMAZON PRIME", institution_id=7).vendor_id == 10
+    assert matcher.match("ACH", institution_id=7) is None
+    assert [spec.pattern_id for spec in matcher.partition(institution_id=7)] == [1, 2]
+    assert matcher.institutions == [7]
+
+
+def test_non_combinable_and_invalid_patterns() -> None:
+    """Backreferences run in isolation and invalid patterns are skipped."""
+    matcher = VendorMatcher(
+        [
+            PatternSpec(1, 10, r"(\d)\1{3}", priority=1),
+            PatternSpec(2, 20, r"(?P<store>WALMART)"),
+            PatternSpec(3, 30, r"BROKEN("),
+            PatternSpec(4, 40, r"(?i)target"),
+            PatternSpec(5, 50, r"STORE"),
+        ],
+    )
+
+    assert matcher.match("STORE 7777").vendor_id == 10
+    assert matcher.match("WALMART STORE").vendor_id == 20
+    assert matcher.match("TARGET STORE").vendor_id == 40
+    assert matcher.match("CORNER STORE").vendor_id == 50
+
+
+def test_literal_index_agrees_with_plain_alternation() -> None:
+    """Prefiltering by required literals never changes the winning pattern."""
+    specs = [
+        PatternSpec(1, 10, r"AMAZON\s*MKTP"),
+        PatternSpec(2, 20, r"AMAZON"),
+        PatternSpec(3, 30, r"\d{4}\s+SEATTLE"),
+        PatternSpec(4, 40, r"(?:PRIME|KINDLE) VIDEO", priority=2),
+        PatternSpec(5, 50, r"SEATTLE"),
+        PatternSpec(6, 60, r"sq \*"),
+    ]
+    descriptions = [
+        "AMAZON MKTP US*2K4",
+        "amazon.com seattle",
+        "STORE 1234  SEATTLE WA",
+        "AMAZON PRIME VIDEO",
+        "SQ *BLUE BOTTLE",
+        "CAFÉ SEATTLE",
+        "NOTHING HERE",
+    ]
+
+    indexed = VendorMatcher(specs).match_many(descriptions)
+    plain = VendorMatcher(specs, use_literal_index=False).match_many(descriptions)
+
+    assert indexed == plain
+    assert [match.vendor_id if match else None for match in indexed] == [
+        10,
+        20,
+        30,
+        40,
+        60,
+        50,
+        None,
+    ]
+
+
+def test_match_many_and_from_connection() -> None:
+    """Patterns load from the database and classify a batch in order."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[Vendor.__table__, VendorPattern.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Vendor.__table__),
+            [
+                {
+                    "id": 1,
+                    "name": "Shell",
+                    "category_tier_1": "Auto",
+                    "category_tier_2": "Fuel",
+                },
+                {
+                    "id": 2,
+                    "name": "Kroger",
+                    "category_tier_1": "Food",
+                    "category_tier_2": "Groceries",
+                },
+            ],
+        )
+        connection.execute(
+            insert(VendorPattern.__table__),
+            [
+                {
+                    "vendor_id": 1,
+                    "pattern": "SHELL",
+                    "source_column": "raw_description",
+                },
+                {
+                    "vendor_id": 2,
+                    "pattern": "KROGER #\\d+",
+                    "source_column": "raw_description",
+                },
+            ],
+        )
+        matcher = VendorMatcher.from_connection(connection)
+
+    results = matcher.match_many(["KROGER #412", "", "SHELL 123", "OTHER"])
+
+    assert [result.vendor_id if result else None for result in results] == [
+        2,
+        None,
+        1,
+        None,
+    ]
@@ -0,0 +1,115 @@
+"""Unit tests for the trigram vendor suggestion engine."""
+
+import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Connection, create_engine, insert
+
+from ledgerbase import create_app, db
+from ledgerbase.models import Account, Institution, Transaction, Vendor
+from ledgerbase.vendor_suggestions import VendorSuggester
+
+
+def test_vendor_names_are_suggested_for_embedded_names() -> None:
+    """A description containing a vendor name suggests that vendor first."""
+    suggester = VendorSuggester()
+    suggester.add_vendor(1, "Starbucks")
+    suggester.add_vendor(2, "Star Market")
+    suggester.add_vendor(3, "Shell")
+
+    suggestions = suggester.suggest("POS DEBIT STARBUCKS STORE 01234 09/14")
+
+    assert suggestions[0].vendor_id == 1
+    assert suggestions[0].score == 1.0
+    assert 3 not in {suggestion.vendor_id for suggestion in suggestions}
+
+
+def test_matched_descriptions_and_incremental_updates() -> None:
+    """Matched descriptions act as evidence and additions need no rebuild."""
+    suggester = VendorSuggester()
+    assert suggester.suggest("SQ *BLUE BOTTLE COF 8842") == []
+
+    suggester.add_description(7, "SQ *BLUE BOTTLE COF 1234")
+    assert not suggester.add_description(7, "SQ *BLUE BOTTLE COF 5678")
+
+    top = suggester.suggest("SQ *BLUE BOTTLE COF 8842", k=1)
+    assert [suggestion.vendor_id for suggestion in top] == [7]
+    assert len(suggester) == 1
+
+
+def _seed(connection: Connection) -> None:
+    """One matched Trader Joe's row and two unmatched rows."""
+    connection.execute(insert(Institution.__table__).values(id=1, name="Bank"))
+    connection.execute(
+        insert(Account.__table__).values(
+            id=1,
+            institution_id=1,
+            name="Card",
+            type="credit",
+        ),
+    )
+    connection.execute(
+        insert(Vendor.__table__).values(
+            id=1,
+            name="Trader Joe's",
+            category_tier_1="Food",
+            category_tier_2="Groceries",
+        ),
+    )
+    connection.execute(
+        insert(Transaction.__table__),
+        [
+            {
+                "id": row_id,
+                "account_id": 1,
+                "vendor_id": vendor_id,
+                "raw_description": description,
+                "amount": Decimal("-5.00"),
+                "transaction_date": datetime.date(2026, 2, row_id),
+                "transaction_type": "expense",
+            }
+            for row_id, vendor_id, description in [
+                (1, 1, "TRADER JOE S #552 QPS"),
+                (2, None, "TRADER JOE S #118 QPS"),
+                (3, None, "ZELLE TO J SMITH"),
+            ]
+        ],
+    )
+
+
+def test_batch_scoring_of_the_unmatched_queue() -> None:
+    """The whole queue is scored in one call keyed by transaction id."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _seed(connection)
+        suggester = VendorSuggester.from_connection(connection)
+        queue = suggester.suggest_unmatched(connection, k=3)
+
+    assert set(queue) == {2, 3}
+    assert queue[2][0].vendor_id == 1
+    assert queue[2][0].score == 1.0
+    assert queue[3] == []
+
+
+def test_suggest_command_lists_the_queue(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """`flask patterns suggest` prints suggestions per unmatched row."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'suggest.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            _seed(connection)
+
+    result = app.test_cli_runner().invoke(args=["patterns", "suggest", "--top", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines() == [
+        "       2 1 (1.00)",
+        "1 of 2 unmatched rows have suggestions",
+    ]